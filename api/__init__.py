@@ -0,0 +1,14 @@
+"""
+Plain Flask routes served alongside the Dash app.
+"""
+
+from .downloads import downloads_blueprint
+from .metrics import metrics_blueprint
+from .v1 import api_v1_blueprint
+
+
+def register_routes(server):
+    """Register all non-Dash routes on the Flask server."""
+    server.register_blueprint(downloads_blueprint)
+    server.register_blueprint(api_v1_blueprint)
+    server.register_blueprint(metrics_blueprint)
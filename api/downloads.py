@@ -0,0 +1,73 @@
+"""
+Bulk CSV downloads served from pre-built export artifacts.
+
+Files are streamed from disk by Flask, so large downloads never occupy a Dash
+callback or get base64-encoded into a callback response.
+"""
+
+import gzip
+import io
+import os
+
+from flask import Blueprint, abort, request, send_file
+
+from data_processing.export_artifacts import EXPORT_DATA_TYPES, get_export_artifact
+from utils import setup_logging
+
+logger = setup_logging("downloads", category="app")
+
+downloads_blueprint = Blueprint('downloads', __name__)
+
+# Artifacts only change with the data version, but a short lifetime lets reloads pick that up
+DOWNLOAD_MAX_AGE = 3600
+
+def download_url(data_type):
+    """Return the URL for downloading all data of a type."""
+    return f"/downloads/{data_type}.csv"
+
+def _accepts_gzip():
+    return 'gzip' in request.accept_encodings
+
+@downloads_blueprint.route('/downloads/<data_type>.csv')
+def download_csv(data_type):
+    """Serve an export artifact, gzip-encoded when the client accepts it."""
+    if data_type not in EXPORT_DATA_TYPES:
+        abort(404)
+
+    site_name = request.args.get('site') or None
+    artifact = get_export_artifact(data_type, site_name)
+    if artifact is None:
+        logger.warning(f"No {data_type} export available for site {site_name!r}")
+        abort(404)
+
+    last_modified = os.path.getmtime(artifact['path'])
+
+    if _accepts_gzip():
+        response = send_file(
+            artifact['path'],
+            mimetype='text/csv',
+            as_attachment=True,
+            download_name=artifact['download_name'],
+            conditional=True,
+            etag=artifact['etag'],
+            last_modified=last_modified,
+            max_age=DOWNLOAD_MAX_AGE,
+        )
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        # Rare for browsers; decompressed copies get their own ETag so caches never mix encodings
+        with gzip.open(artifact['path'], 'rb') as artifact_file:
+            csv_bytes = artifact_file.read()
+        response = send_file(
+            io.BytesIO(csv_bytes),
+            mimetype='text/csv',
+            as_attachment=True,
+            download_name=artifact['download_name'],
+            conditional=True,
+            etag=f"{artifact['etag']}-identity",
+            last_modified=last_modified,
+            max_age=DOWNLOAD_MAX_AGE,
+        )
+
+    response.vary.add('Accept-Encoding')
+    return response
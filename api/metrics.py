@@ -0,0 +1,20 @@
+"""
+Prometheus scrape endpoint for callback and chatbot metrics.
+"""
+
+from flask import Blueprint, Response
+
+from callbacks.chat_cache import chat_answer_stats
+from callbacks.instrumentation import callback_metrics
+
+metrics_blueprint = Blueprint('metrics', __name__)
+
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+@metrics_blueprint.route('/metrics')
+def metrics():
+    """Callback metrics and chatbot answer latencies in Prometheus text format."""
+    body = callback_metrics.render_prometheus() + chat_answer_stats.render_prometheus()
+    response = Response(body, content_type=PROMETHEUS_MIMETYPE)
+    response.cache_control.no_store = True
+    return response
@@ -0,0 +1,242 @@
+"""
+Read-only data API for machine clients.
+
+Serves the same query results the dashboard renders, without going through
+Dash. Every list endpoint supports:
+- fields: comma-separated columns to return
+- limit / cursor: cursor pagination; cursors are tied to the data version
+- format: json (rows), columns (column arrays), npz (NumPy archive) or arrow (Arrow IPC stream)
+- If-None-Match: responses carry an ETag derived from the data version and request
+"""
+
+import base64
+import binascii
+import hashlib
+import io
+import json
+
+import numpy as np
+import pandas as pd
+from flask import Blueprint, Response, abort, jsonify, request
+
+from data_processing.data_queries import (
+    get_chemical_data_from_db,
+    get_fish_dataframe,
+    get_habitat_dataframe,
+    get_macroinvertebrate_dataframe,
+)
+from database.database import get_data_version
+from database.request_context import data_request_context
+from utils import setup_logging
+from visualizations.map_queries import (
+    get_latest_chemical_data_for_maps,
+    get_latest_fish_data_for_maps,
+    get_latest_habitat_data_for_maps,
+    get_latest_macro_data_for_maps,
+    get_sites_for_maps,
+)
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+logger = setup_logging("api_v1", category="app")
+
+api_v1_blueprint = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+LATEST_QUERIES = {
+    'chemical': get_latest_chemical_data_for_maps,
+    'fish': get_latest_fish_data_for_maps,
+    'macro': get_latest_macro_data_for_maps,
+    'habitat': get_latest_habitat_data_for_maps,
+}
+
+SITE_QUERIES = {
+    'chemical': get_chemical_data_from_db,
+    'fish': get_fish_dataframe,
+    'macro': get_macroinvertebrate_dataframe,
+    'habitat': get_habitat_dataframe,
+}
+
+class ApiError(Exception):
+    """An error returned to the client as a JSON body with an HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+@api_v1_blueprint.errorhandler(ApiError)
+def handle_api_error(error):
+    response = jsonify({'error': error.message})
+    response.status_code = error.status
+    return response
+
+def encode_cursor(data_version, offset):
+    """Return an opaque cursor for the row offset within one data version."""
+    payload = json.dumps({'v': data_version, 'o': offset}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor, data_version):
+    """Return the row offset a cursor points at, rejecting cursors from other data versions."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        offset = int(payload['o'])
+        cursor_version = payload['v']
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise ApiError(400, "Invalid cursor")
+
+    if cursor_version != data_version:
+        raise ApiError(410, "Cursor expired because the data has been updated; restart pagination")
+    if offset < 0:
+        raise ApiError(400, "Invalid cursor")
+    return offset
+
+def _page_size():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, "limit must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ApiError(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+def _response_format():
+    response_format = request.args.get('format')
+    if response_format is None:
+        response_format = 'arrow' if request.accept_mimetypes.best == ARROW_MIMETYPE else 'json'
+    if response_format not in ('json', 'columns', 'npz', 'arrow'):
+        raise ApiError(400, "format must be one of json, columns, npz or arrow")
+    if response_format == 'arrow' and pa is None:
+        raise ApiError(406, "Arrow responses are unavailable because pyarrow is not installed; use format=npz")
+    return response_format
+
+def _select_fields(df):
+    fields = request.args.get('fields')
+    if not fields or df.empty:
+        return df
+    columns = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [column for column in columns if column not in df.columns]
+    if unknown:
+        raise ApiError(400, f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(df.columns)}")
+    return df[columns]
+
+def _serializable(df):
+    """Format dates as ISO strings so every response format carries the same values."""
+    df = df.copy()
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = df[column].dt.strftime('%Y-%m-%d')
+    return df
+
+def _json_values(df):
+    # Object dtype turns NumPy scalars into Python ones and lets NaN become None
+    return df.astype(object).where(df.notna(), None)
+
+def _arrow_response(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(sink.getvalue(), mimetype=ARROW_MIMETYPE)
+
+def _npz_response(df):
+    arrays = {}
+    for column in df.columns:
+        values = df[column]
+        # Text becomes fixed-width unicode so clients can load without allow_pickle
+        if values.dtype == object:
+            arrays[column] = values.fillna('').to_numpy(dtype=str)
+        else:
+            arrays[column] = values.to_numpy()
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return Response(buffer.getvalue(), mimetype='application/octet-stream')
+
+def _request_etag(data_version):
+    request_key = f"{request.path}?{request.query_string.decode('utf-8')}|{request.accept_mimetypes}"
+    return f"{data_version}-{hashlib.sha1(request_key.encode('utf-8')).hexdigest()[:16]}"
+
+def serve_frame(load_frame):
+    """
+    Run a query and return one page of it in the requested format.
+
+    Conditional requests are answered from the data version alone, so repeated
+    polls by clients that already hold the data never touch the database.
+    """
+    # Read the version and the rows from one snapshot, so a hot reload between
+    # them cannot pair the old ETag and cursor with new rows
+    with data_request_context():
+        data_version = get_data_version()
+        if data_version is None:
+            raise ApiError(503, "Database is not available")
+
+        limit = _page_size()
+        response_format = _response_format()
+        offset = decode_cursor(request.args['cursor'], data_version) if request.args.get('cursor') else 0
+
+        etag = _request_etag(data_version)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        df = load_frame()
+        if 'error' in df.columns:
+            logger.error(f"Query failed for {request.path}: {df['error'].iloc[0]}")
+            raise ApiError(500, df['error'].iloc[0])
+
+        df = _serializable(_select_fields(df))
+        page = df.iloc[offset:offset + limit].reset_index(drop=True)
+        next_cursor = encode_cursor(data_version, offset + limit) if offset + limit < len(df) else None
+
+        if response_format == 'json':
+            response = jsonify({'data': _json_values(page).to_dict(orient='records'),
+                                'next_cursor': next_cursor, 'data_version': data_version})
+        elif response_format == 'columns':
+            response = jsonify({'data': _json_values(page).to_dict(orient='list'),
+                                'next_cursor': next_cursor, 'data_version': data_version})
+        elif response_format == 'npz':
+            response = _npz_response(page)
+        else:
+            response = _arrow_response(page)
+
+        # Binary formats carry pagination in headers
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['X-Data-Version'] = data_version
+        response.headers['X-Total-Count'] = str(len(df))
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        response.vary.add('Accept')
+        return response
+
+def _data_type_query(queries, data_type):
+    if data_type not in queries:
+        abort(404)
+    return queries[data_type]
+
+@api_v1_blueprint.route('/sites')
+def list_sites():
+    """All monitoring sites with coordinates; ?active=1 limits to active sites."""
+    active_only = request.args.get('active') in ('1', 'true')
+    return serve_frame(lambda: get_sites_for_maps(active_only=active_only))
+
+@api_v1_blueprint.route('/latest/<data_type>')
+def latest_by_site(data_type):
+    """The most recent reading per site; ?site= limits to one site."""
+    query = _data_type_query(LATEST_QUERIES, data_type)
+    site_name = request.args.get('site') or None
+    return serve_frame(lambda: query(site_name=site_name))
+
+@api_v1_blueprint.route('/sites/<path:site_name>/<data_type>')
+def site_series(site_name, data_type):
+    """Every chemical reading, or biological and habitat summary score, for one site."""
+    query = _data_type_query(SITE_QUERIES, data_type)
+    return serve_frame(lambda: query(site_name))
@@ -9,15 +9,21 @@ import dash
 import dash_bootstrap_components as dbc
 from dotenv import load_dotenv
 
+from api import register_routes
 from callbacks import register_callbacks
 from dash import html, dcc
+from database.database import enable_serving_mode
+from database.shared_data import preload_enabled, preload_shared_data
+from database.snapshot_watcher import start_snapshot_watcher
 from layouts.tabs.overview import create_overview_tab
 from layouts.tabs.chemical import create_chemical_tab
 from layouts.tabs.biological import create_biological_tab
 from layouts.tabs.habitat import create_habitat_tab
 from layouts.tabs.protect_streams import create_protect_our_streams_tab
 from layouts.tabs.source_data import create_source_data_tab
+from layouts.lazy_tabs import create_lazy_tab
 from layouts.modals import create_icon_attribution_modal, create_image_credits_modal
+from utils import markdown_registry
 
 # Load environment variables from .env file
 load_dotenv()
@@ -33,6 +39,28 @@ app = dash.Dash(__name__,
                     {"name": "viewport", "content": "width=device-width, initial-scale=1, shrink-to-fit=no"}
                 ])
 server = app.server
+register_routes(server)
+
+def start_data_services():
+    """Enable the configured database serving mode and snapshot watcher in this process."""
+    # Serve reads from the mode in DATABASE_SERVING_MODE (e.g. an in-memory snapshot)
+    enable_serving_mode()
+    
+    # Hot reload new snapshots published to SNAPSHOT_SOURCE, if one is configured
+    start_snapshot_watcher()
+
+if preload_enabled():
+    # Loaded once in the gunicorn master and shared by the workers it forks. SQLite
+    # connections and threads do not survive a fork, so gunicorn.conf.py starts the
+    # data services in each worker instead.
+    preload_shared_data()
+else:
+    start_data_services()
+
+# Read text/ markdown once so tab views and callbacks skip file I/O
+markdown_registry.preload()
+
+DEFAULT_TAB = "overview-tab"
 
 # Responsive header with background image overlay
 header = dbc.Container([
@@ -69,21 +97,27 @@ header = dbc.Container([
 app.layout = dbc.Container([
     header,
     
-    # Tab-based navigation structure
+    # Tab-based navigation; inactive tabs render on first activation
     dbc.Tabs([
-        dbc.Tab(label="Overview", children=create_overview_tab(), tab_id="overview-tab"),
-        dbc.Tab(label="Chemical Data", children=create_chemical_tab(), tab_id="chemical-tab"),
-        dbc.Tab(label="Biological Data", children=create_biological_tab(), tab_id="biological-tab"),
-        dbc.Tab(label="Habitat Data", children=create_habitat_tab(), tab_id="habitat-tab"),
-        dbc.Tab(label="Protect Our Streams", children=create_protect_our_streams_tab(), tab_id="protect-tab"),
-        dbc.Tab(label="Source Data", children=create_source_data_tab(), tab_id="source-tab"),
-    ], id="main-tabs", active_tab="overview-tab"),
+        create_lazy_tab("Overview", "overview-tab", create_overview_tab, DEFAULT_TAB),
+        create_lazy_tab("Chemical Data", "chemical-tab", create_chemical_tab, DEFAULT_TAB),
+        create_lazy_tab("Biological Data", "biological-tab", create_biological_tab, DEFAULT_TAB),
+        create_lazy_tab("Habitat Data", "habitat-tab", create_habitat_tab, DEFAULT_TAB),
+        create_lazy_tab("Protect Our Streams", "protect-tab", create_protect_our_streams_tab, DEFAULT_TAB),
+        create_lazy_tab("Source Data", "source-tab", create_source_data_tab, DEFAULT_TAB),
+    ], id="main-tabs", active_tab=DEFAULT_TAB),
 
     # State management containers
     html.Div([
         # Enable cross-tab navigation from map interactions
         dcc.Store(id='navigation-store', storage_type='memory', data={'target_tab': None, 'target_site': None}),
         
+        # Tabs whose content has been rendered in this page load
+        dcc.Store(id='rendered-tabs', storage_type='memory', data=[DEFAULT_TAB]),
+        
+        # Browser width, used to size the point budget of long time series
+        dcc.Store(id='viewport-width', storage_type='memory'),
+        
         # Preserve user selections across sessions
         dcc.Store(id='overview-tab-state', storage_type='session', data={'selected_parameter': None, 'active_sites_only': False}),
         dcc.Store(id='habitat-tab-state', storage_type='session', data={'selected_site': None}),
@@ -126,5 +160,7 @@ register_callbacks(app)
 
 if __name__ == '__main__':
     import os
+    if preload_enabled():
+        start_data_services()
     port = int(os.environ.get('PORT', 8050))  # Fallback to default port if not specified
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
@@ -0,0 +1,250 @@
+/*
+ * Browser-executed callbacks for pure UI interactions.
+ *
+ * These callbacks do no data work, so running them in the browser keeps
+ * server threads free for database and figure callbacks. Each namespace
+ * mirrors the Python callback module that registers it.
+ */
+
+(function() {
+    const defaultChemicalState = function() {
+        return {
+            selected_site: null,
+            selected_parameter: null,
+            year_range: null,
+            selected_months: null,
+            highlight_thresholds: null
+        };
+    };
+
+    // Empty objects are falsy in the Python callbacks these replaced
+    const hasState = function(state) {
+        return Boolean(state) && Object.keys(state).length > 0;
+    };
+
+    const isSet = function(value) {
+        return value !== null && value !== undefined;
+    };
+
+    const triggeredId = function() {
+        const ctx = window.dash_clientside.callback_context;
+        if (!ctx || !ctx.triggered || ctx.triggered.length === 0) {
+            return null;
+        }
+        const propId = ctx.triggered[0].prop_id;
+        if (!propId || propId === '.') {
+            return null;
+        }
+        return propId.split('.')[0];
+    };
+
+    const SEASON_MONTHS = {
+        'select-all-months': [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12],
+        'select-spring': [3, 4, 5],
+        'select-summer': [6, 7, 8],
+        'select-fall': [9, 10, 11],
+        'select-winter': [12, 1, 2]
+    };
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        shared: {
+            toggleModal: function(linkClicks, closeClicks, isOpen) {
+                if (linkClicks || closeClicks) {
+                    return !isOpen;
+                }
+                return isOpen;
+            },
+
+            returnToOverview: function(nClicks) {
+                if (!nClicks) {
+                    return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+                }
+                return ['overview-tab', {target_tab: null, target_site: null}];
+            },
+
+            recordViewportWidth: function() {
+                return window.innerWidth || null;
+            }
+        },
+
+        overview: {
+            saveOverviewTabState: function(parameterValue, activeSitesToggle, currentState) {
+                const updatedState = Object.assign({}, currentState || {});
+                updatedState.selected_parameter = isSet(parameterValue) ? parameterValue : null;
+                updatedState.active_sites_only = isSet(activeSitesToggle) ? activeSitesToggle : null;
+                return updatedState;
+            }
+        },
+
+        chemical: {
+            saveChemicalState: function(selectedSite, selectedParameter, startYear, endYear,
+                                        selectedMonths, highlightThresholds, currentState) {
+                const values = [selectedSite, selectedParameter, startYear, endYear,
+                                selectedMonths, highlightThresholds];
+
+                // Keep existing state when all controls are cleared
+                if (!values.some(isSet)) {
+                    return hasState(currentState) ? currentState : defaultChemicalState();
+                }
+
+                const newState = hasState(currentState)
+                    ? Object.assign({}, currentState)
+                    : defaultChemicalState();
+
+                if (isSet(selectedSite)) {
+                    newState.selected_site = selectedSite;
+                }
+                if (isSet(selectedParameter)) {
+                    newState.selected_parameter = selectedParameter;
+                }
+                if (isSet(startYear) && isSet(endYear)) {
+                    newState.year_range = [startYear, endYear];
+                }
+                if (isSet(selectedMonths)) {
+                    newState.selected_months = selectedMonths;
+                }
+                if (isSet(highlightThresholds)) {
+                    newState.highlight_thresholds = highlightThresholds;
+                }
+                return newState;
+            },
+
+            showChemicalControls: function(selectedSite, selectedParameter) {
+                if (selectedSite && selectedParameter) {
+                    return [{display: 'block'}, {display: 'block'}, {display: 'block', marginRight: '10px'}];
+                }
+                if (selectedSite) {
+                    return [{display: 'block'}, {display: 'none'}, {display: 'none'}];
+                }
+                return [{display: 'none'}, {display: 'none'}, {display: 'none'}];
+            },
+
+            // Site downloads are plain links to the pre-built export route
+            siteDownloadHref: function(selectedSite) {
+                if (!selectedSite) {
+                    return null;
+                }
+                return '/downloads/chemical.csv?site=' + encodeURIComponent(selectedSite);
+            },
+
+            updateMonthSelection: function() {
+                const buttonId = triggeredId();
+                if (buttonId && SEASON_MONTHS[buttonId]) {
+                    return SEASON_MONTHS[buttonId].slice();
+                }
+                return window.dash_clientside.no_update;
+            },
+
+            // End year options only include years on or after the start year
+            updateYearDropdownOptions: function(startYear, endYear, yearBounds) {
+                if (!yearBounds) {
+                    return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+                }
+
+                const allYears = [];
+                for (let year = yearBounds.min_year; year <= yearBounds.max_year; year++) {
+                    allYears.push(year);
+                }
+
+                const toOption = function(year) {
+                    return {label: String(year), value: year};
+                };
+                const validEndYears = isSet(startYear)
+                    ? allYears.filter(function(year) { return year >= startYear; })
+                    : allYears;
+
+                return [allYears.map(toOption), validEndYears.map(toOption)];
+            }
+        },
+
+        biological: {
+            saveBiologicalState: function(selectedCommunity, selectedSite, currentState) {
+                const defaults = {selected_community: null, selected_site: null};
+
+                // Maintain state when dropdowns cleared
+                if (!isSet(selectedCommunity) && !isSet(selectedSite)) {
+                    return hasState(currentState) ? currentState : defaults;
+                }
+
+                const newState = hasState(currentState) ? Object.assign({}, currentState) : defaults;
+                if (isSet(selectedCommunity)) {
+                    newState.selected_community = selectedCommunity;
+                }
+                if (isSet(selectedSite)) {
+                    newState.selected_site = selectedSite;
+                }
+                return newState;
+            },
+
+            // Circular navigation over the pre-rendered species slides
+            navigateGallery: function(prevClicks, nextClicks, currentIndex) {
+                const ctx = window.dash_clientside.callback_context;
+                const slideCount = ctx.outputs_list[0].length;
+                const buttonId = triggeredId();
+
+                let newIndex = 0;
+                if (buttonId && slideCount > 0) {
+                    const index = currentIndex || 0;
+                    const step = buttonId.indexOf('prev-') === 0 ? -1 : 1;
+                    newIndex = ((index + step) % slideCount + slideCount) % slideCount;
+                }
+
+                const styles = [];
+                for (let i = 0; i < slideCount; i++) {
+                    styles.push({display: i === newIndex ? 'block' : 'none'});
+                }
+                return [styles, newIndex];
+            }
+        },
+
+        habitat: {
+            saveHabitatState: function(selectedSite, currentState) {
+                if (isSet(selectedSite)) {
+                    return {selected_site: selectedSite};
+                }
+                return hasState(currentState) ? currentState : {selected_site: null};
+            },
+
+            showHabitatControls: function(selectedSite) {
+                return selectedSite ? {display: 'block'} : {display: 'none'};
+            }
+        },
+
+        chatbot: {
+            toggleChatCollapse: function(toggleClicks, closeClicks, isOpen) {
+                if (!isSet(toggleClicks) && !isSet(closeClicks)) {
+                    return isOpen;
+                }
+                return !isOpen;
+            },
+
+            hideChatCallout: function() {
+                return {display: 'none'};
+            },
+
+            scrollToLatestMessage: function() {
+                // Give a brief moment for the DOM to update
+                setTimeout(function() {
+                    try {
+                        const elements = document.querySelectorAll('.chat-messages-container');
+                        for (let i = 0; i < elements.length; i++) {
+                            // offsetParent is null for hidden elements
+                            if (elements[i].offsetParent !== null) {
+                                elements[i].scrollTop = elements[i].scrollHeight;
+                                break;
+                            }
+                        }
+                    } catch (e) {
+                        console.error("Error scrolling chat:", e);
+                    }
+                }, 50);
+                return window.dash_clientside.no_update;
+            }
+        }
+    });
+
+    // Expose the namespaces to the test suite when loaded outside a browser
+    if (typeof module !== 'undefined' && module.exports) {
+        module.exports = window.dash_clientside;
+    }
+})();
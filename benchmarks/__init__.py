@@ -0,0 +1,3 @@
+"""
+Performance measurement scripts for the dashboard.
+"""
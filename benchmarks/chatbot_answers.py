@@ -0,0 +1,122 @@
+"""
+Chatbot answer latency and hit rate with the local index and answer cache.
+
+Replays a mix of questions through the chatbot's answer path: repeated FAQ-style
+questions in varied case and punctuation, questions the local index covers and
+open questions that need the model. The model is a stub that sleeps for a fixed
+time and echoes the question, so the benchmark needs no Vertex credentials.
+It reports how many questions each source answered, their latency, and the total
+time against sending every question to the model. It also checks each cached
+answer matches what the model returned for that question.
+
+Usage: python -m benchmarks.chatbot_answers [model_seconds]
+"""
+
+import sys
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+from callbacks import chatbot_callbacks
+from callbacks.chat_cache import AnswerCache, ChatAnswerStats, normalize_question
+from utils import setup_logging
+
+logger = setup_logging("chatbot_answers_benchmark", category="testing")
+
+DEFAULT_MODEL_SECONDS = 0.2
+
+QUESTIONS = [
+    "What does chloride mean?",
+    "what does chloride mean",
+    "What is dissolved oxygen?",
+    "What is a bluegill?",
+    "Why is pH important for fish?",
+    "How can I tell if my creek is healthy?",
+    "How can I tell if my creek is healthy",
+    "What are macroinvertebrates?",
+    "what are macroinvertebrates",
+    "Tell me about phosphorus",
+    "Does road salt hurt streams?",
+    "WHAT DOES CHLORIDE MEAN?",
+    "Does road salt hurt streams?",
+    "What is dissolved oxygen",
+    "How do I make a rain garden?",
+    "How do I make a rain garden",
+]
+
+class StubModel:
+    """Answers after a fixed delay, like a grounded LLM call."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.models = self
+
+    def generate_content(self, model, contents, config):
+        time.sleep(self.seconds)
+        question = contents[0].rsplit('Question: ', 1)[-1]
+        candidate = SimpleNamespace(grounding_metadata=None, finish_reason=SimpleNamespace(name='STOP'))
+        return SimpleNamespace(text=f"Model answer to: {normalize_question(question)}", candidates=[candidate])
+
+def answer(question):
+    """Answer as the chat callbacks do and return (source, text, seconds)."""
+    start = time.perf_counter()
+    text = chatbot_callbacks.answer_instantly(question)
+    source = 'instant'
+    if text is None:
+        text, source = chatbot_callbacks.answer_from_model(question), 'model'
+    return source, text, time.perf_counter() - start
+
+def run_benchmarks(questions=None, model_seconds=DEFAULT_MODEL_SECONDS):
+    """
+    Answer every question once through the cache, local index and stub model.
+
+    Returns a summary with the answer counts and mean latency by source, the hit
+    rate, total seconds against an all-model baseline, and 'identical', which
+    reports whether every cached answer equals the model's answer.
+    """
+    questions = questions or QUESTIONS
+    # Loading the index is a one-off per worker, so it stays out of the timings
+    chatbot_callbacks.get_chat_index()
+    stats = ChatAnswerStats()
+    model_answers = {}
+    identical = True
+    with patch.object(chatbot_callbacks, 'get_genai_client', return_value=StubModel(model_seconds)), \
+         patch.object(chatbot_callbacks, 'get_generation_config', return_value=None), \
+         patch.object(chatbot_callbacks, 'get_answer_cache', return_value=AnswerCache()), \
+         patch.object(chatbot_callbacks, 'chat_answer_stats', stats):
+        start = time.perf_counter()
+        latencies = []
+        for question in questions:
+            source, text, seconds = answer(question)
+            latencies.append(seconds)
+            key = normalize_question(question)
+            if source == 'model':
+                model_answers[key] = text
+            elif key in model_answers:
+                identical = identical and text == model_answers[key]
+        total_seconds = time.perf_counter() - start
+
+    summary = stats.summary()
+    summary.update(
+        questions=len(questions),
+        total_seconds=total_seconds,
+        all_model_seconds=len(questions) * model_seconds,
+        p50_ms=float(np.percentile(latencies, 50) * 1000),
+        identical=identical,
+    )
+    return summary
+
+if __name__ == "__main__":
+    model_seconds = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MODEL_SECONDS
+
+    result = run_benchmarks(model_seconds=model_seconds)
+    print(f"{result['questions']} questions, stub model {model_seconds * 1000:.0f} ms per call")
+    print(f"{'Source':<8} {'Answers':>8} {'Mean ms':>9}")
+    for source, count in result['answers'].items():
+        mean = result['mean_latency_ms'][source]
+        print(f"{source:<8} {count:>8} {mean if mean is not None else float('nan'):>9.2f}")
+    print(f"Answered without the model: {result['local_hit_rate']:.0%}; p50 latency {result['p50_ms']:.2f} ms")
+    print(f"Total {result['total_seconds']:.2f}s vs {result['all_model_seconds']:.2f}s sending every question "
+          f"to the model; cached answers identical: {result['identical']}")
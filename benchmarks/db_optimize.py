@@ -0,0 +1,118 @@
+"""
+Dashboard query timings for the post-load optimization stage.
+
+Copies the database once as loaded and once per candidate page size after
+optimize_database, then runs each of the dashboard's traced read statements
+against every copy on a fresh connection, as a request would. Reports the file
+size, total query time and how many plans ANALYZE changed, and checks every
+copy returns the same rows.
+
+Usage: python -m benchmarks.db_optimize [db_path]
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from benchmarks.query_plans import collect_traced_statements, explain
+from database.db_optimize import optimize_database
+from utils import setup_logging
+
+logger = setup_logging("db_optimize_benchmark", category="testing")
+
+PAGE_SIZES = [4096, 8192, 16384, 32768]
+
+def best_time_ms(func, repeats=5):
+    """Return the fastest of several runs in milliseconds."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+def run_statements(db_path, statements):
+    """Run every statement on its own connection and return the rows each produced."""
+    results = []
+    for sql in statements:
+        conn = sqlite3.connect(db_path)
+        try:
+            results.append(conn.execute(sql).fetchall())
+        finally:
+            conn.close()
+    return results
+
+def page_size(db_path):
+    """Return the page size of a database file."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        conn.close()
+
+def query_plans(db_path, statements):
+    """Return the EXPLAIN QUERY PLAN lines for every statement."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return [explain(conn, sql) for sql in statements]
+    finally:
+        conn.close()
+
+def run_benchmarks(db_path, statements=None, page_sizes=PAGE_SIZES):
+    """
+    Time the statements against the loaded database and each optimized copy.
+
+    Statements default to the dashboard's traced read paths, which are bound
+    and so need no parameters.
+    """
+    if statements is None:
+        statements = list(collect_traced_statements())
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        loaded_path = os.path.join(temp_dir, 'loaded.db')
+        shutil.copyfile(db_path, loaded_path)
+        baseline_rows = run_statements(loaded_path, statements)
+        baseline_plans = query_plans(loaded_path, statements)
+
+        variants = [{
+            'variant': 'as loaded',
+            'page_size': page_size(loaded_path),
+            'size_bytes': os.path.getsize(loaded_path),
+            'query_ms': best_time_ms(lambda: run_statements(loaded_path, statements)),
+            'plans_changed': 0,
+            'identical': True
+        }]
+
+        for size in page_sizes:
+            optimized_path = os.path.join(temp_dir, f'optimized_{size}.db')
+            report = optimize_database(loaded_path, output_path=optimized_path, page_size=size)
+            plans = query_plans(optimized_path, statements)
+            variants.append({
+                'variant': 'optimized',
+                'page_size': report['page_size'],
+                'size_bytes': report['size_after'],
+                'query_ms': best_time_ms(lambda: run_statements(optimized_path, statements)),
+                'plans_changed': sum(before != after for before, after in zip(baseline_plans, plans)),
+                'identical': run_statements(optimized_path, statements) == baseline_rows
+            })
+            # Each variant starts from the file as loaded, without the statistics
+            shutil.copyfile(db_path, loaded_path)
+
+        return variants
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    from database.database import get_database_path
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else get_database_path()
+
+    variants = run_benchmarks(db_path)
+    print(f"{'Variant':<10} {'Page size':>10} {'Size KB':>9} {'Query ms':>9} {'Plans changed':>14} {'Identical':>10}")
+    for result in variants:
+        print(f"{result['variant']:<10} {result['page_size']:>10,} {result['size_bytes'] / 1024:>9,.0f} "
+              f"{result['query_ms']:>9.1f} {result['plans_changed']:>14} {str(result['identical']):>10}")
@@ -0,0 +1,557 @@
+"""
+Duplicate resolution timings for multi-decade biological datasets.
+
+Compares the grouped-aggregation habitat and fish duplicate resolution with the
+per-group loops they replaced, on synthetic statewide datasets with decades of
+assessments, replicate collections, year/date mismatches and a BT field-work
+calendar, and checks both produce identical records.
+
+Usage: python -m benchmarks.duplicate_resolution [sites] [years]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_processing.bt_fieldwork_validator import (
+    categorize_and_process_duplicates,
+    correct_collection_dates,
+    find_bt_site_match,
+    load_bt_field_work_dates,
+)
+from data_processing.habitat_processing import HABITAT_METRICS, calculate_habitat_grade, resolve_habitat_duplicates
+from utils import setup_logging
+
+logger = setup_logging("duplicate_resolution_benchmark", category="testing")
+
+DEFAULT_SITES = 40
+DEFAULT_YEARS = 35
+
+# Reference implementations: the per-group loops before vectorization
+
+def legacy_resolve_habitat_duplicates(habitat_df):
+    """
+    Resolves duplicate habitat assessments by averaging their numeric metrics and scores.
+    
+    A duplicate is defined as an assessment for the same site on the same date.
+    
+    Args:
+        habitat_df: A DataFrame containing habitat data, with standardized column names.
+        
+    Returns:
+        A DataFrame with duplicate assessments resolved through averaging.
+    """
+    try:
+        metric_columns = [
+            'instream_cover',
+            'pool_bottom_substrate', 
+            'pool_variability',
+            'canopy_cover',
+            'rocky_runs_riffles',
+            'flow',
+            'channel_alteration',
+            'channel_sinuosity',
+            'bank_stability',
+            'bank_vegetation_stability',
+            'streamside_cover'
+        ]
+        
+        existing_metric_columns = [col for col in metric_columns if col in habitat_df.columns]
+        
+        if not existing_metric_columns and 'total_score' not in habitat_df.columns:
+            logger.warning("No habitat metric columns found for averaging")
+            return habitat_df
+        
+        grouped = habitat_df.groupby(['site_name', 'assessment_date'])
+        
+        duplicate_groups = []
+        unique_records = []
+        
+        for (site_name, date_str), group in grouped:
+            if len(group) > 1:
+                duplicate_groups.append((site_name, date_str, group))
+            else:
+                unique_records.append(group)
+        
+        if not duplicate_groups:
+            return habitat_df
+        
+        averaged_records = []
+        
+        for site_name, date_str, group in duplicate_groups:
+            # Use the first record as a template for the averaged entry.
+            averaged_record = group.iloc[0].copy()
+            
+            for col in existing_metric_columns:
+                values = group[col].dropna()
+                
+                if len(values) > 0:
+                    avg_value = values.mean()
+                    averaged_record[col] = round(avg_value, 1)
+                else:
+                    averaged_record[col] = None
+            
+            if 'total_score' in habitat_df.columns:
+                total_values = group['total_score'].dropna()
+                
+                if len(total_values) > 0:
+                    avg_total = total_values.mean()
+                    averaged_record['total_score'] = round(avg_total)
+                else:
+                    averaged_record['total_score'] = None
+            
+            # Recalculate the habitat grade based on the new averaged score.
+            if pd.notna(averaged_record['total_score']):
+                averaged_record['habitat_grade'] = calculate_habitat_grade(averaged_record['total_score'])
+            else:
+                averaged_record['habitat_grade'] = "Unknown"
+            
+            averaged_records.append(averaged_record)
+        
+        if unique_records:
+            unique_df = pd.concat(unique_records, ignore_index=True)
+        else:
+            unique_df = pd.DataFrame()
+        
+        if averaged_records:
+            averaged_df = pd.DataFrame(averaged_records)
+            if not unique_df.empty:
+                result_df = pd.concat([unique_df, averaged_df], ignore_index=True)
+            else:
+                result_df = averaged_df
+        else:
+            result_df = unique_df
+        
+        original_count = len(habitat_df)
+        final_count = len(result_df)
+        duplicates_resolved = original_count - final_count
+        
+        logger.info(f"Habitat duplicate resolution: {duplicates_resolved} duplicates resolved from {original_count} records")
+        
+        return result_df
+        
+    except Exception as e:
+        logger.error(f"Error resolving habitat duplicates: {e}")
+        return habitat_df
+
+def legacy_correct_collection_dates(fish_df, bt_df=None):
+    """
+    Correct fish collection dates using authoritative BT records.
+    
+    Resolution priority:
+    1. Use BT date if site+year match found
+    2. Fall back to YEAR field if no BT match
+    3. Keep month/day but correct year when using fallback
+    """
+    if fish_df.empty:
+        return fish_df.copy()
+    
+    if bt_df is None:
+        bt_df = load_bt_field_work_dates()
+    
+    fish_corrected = fish_df.copy()
+    
+    fish_corrected['collection_date'] = pd.to_datetime(fish_corrected['collection_date'])
+    fish_corrected['year_from_date'] = fish_corrected['collection_date'].dt.year
+    
+    mismatched_mask = fish_corrected['year'] != fish_corrected['year_from_date']
+    mismatched_records = fish_corrected[mismatched_mask]
+    
+    if len(mismatched_records) == 0:
+        logger.info("No date mismatches found - all records consistent")
+        return fish_corrected
+    
+    logger.info(f"Found {len(mismatched_records)} records with year/date mismatches")
+    
+    if bt_df.empty or 'Site_Clean' not in bt_df.columns:
+        bt_sites = set()
+    else:
+        bt_sites = set(bt_df['Site_Clean'].unique())
+    
+    corrections_applied = 0
+    bt_corrections = 0
+    year_field_corrections = 0
+    correction_log = []
+    
+    for idx, record in mismatched_records.iterrows():
+        site_name = record['site_name']
+        db_year = record['year']  
+        date_year = record['year_from_date']  
+        original_date = record['collection_date']
+        
+        correction_applied = False
+        correction_source = None
+        new_date = None
+        
+        bt_site_match = find_bt_site_match(site_name, bt_sites)
+        
+        if bt_site_match:
+            potential_bt_matches = bt_df[
+                (bt_df['Site_Clean'] == bt_site_match) & 
+                (bt_df['Year'].isin([db_year, date_year]))
+            ]
+            
+            if not potential_bt_matches.empty:
+                # Prefer database year match if available
+                db_year_match = potential_bt_matches[potential_bt_matches['Year'] == db_year]
+                if not db_year_match.empty:
+                    bt_date = db_year_match.iloc[0]['Date_Clean']
+                else:
+                    bt_date = potential_bt_matches.iloc[0]['Date_Clean']
+                
+                fish_corrected.at[idx, 'collection_date'] = bt_date
+                fish_corrected.at[idx, 'collection_date_str'] = bt_date.strftime('%Y-%m-%d')
+                fish_corrected.at[idx, 'year'] = bt_date.year
+                
+                new_date = bt_date
+                correction_applied = True
+                correction_source = "BT_truth"
+                bt_corrections += 1
+                
+                correction_log.append({
+                    'site_name': site_name,
+                    'sample_id': record.get('sample_id', 'unknown'),
+                    'original_date': original_date.strftime('%Y-%m-%d'),
+                    'original_year': db_year,
+                    'corrected_date': new_date.strftime('%Y-%m-%d'),
+                    'corrected_year': new_date.year,
+                    'correction_source': correction_source,
+                    'bt_site_match': bt_site_match
+                })
+        
+        # Fall back to YEAR field if no BT match is found
+        if not correction_applied:
+            try:
+                corrected_date = original_date.replace(year=db_year)
+                fish_corrected.at[idx, 'collection_date'] = corrected_date
+                fish_corrected.at[idx, 'collection_date_str'] = corrected_date.strftime('%Y-%m-%d')
+                
+                new_date = corrected_date
+                correction_applied = True
+                correction_source = "year_field_truth"
+                year_field_corrections += 1
+                
+                correction_log.append({
+                    'site_name': site_name,
+                    'sample_id': record.get('sample_id', 'unknown'),
+                    'original_date': original_date.strftime('%Y-%m-%d'),
+                    'original_year': date_year,
+                    'corrected_date': new_date.strftime('%Y-%m-%d'),
+                    'corrected_year': db_year,
+                    'correction_source': correction_source,
+                    'bt_site_match': bt_site_match if bt_site_match else 'no_match'
+                })
+                
+            except ValueError as e:
+                logger.warning(f"Could not correct date for {site_name} sample {record.get('sample_id', 'unknown')}: {e}")
+        
+        if correction_applied:
+            corrections_applied += 1
+    
+    if corrections_applied > 0:
+        logger.info(f"Date correction complete: {corrections_applied} corrections applied")
+        logger.info(f"  - BT truth corrections: {bt_corrections} ({bt_corrections/corrections_applied*100:.1f}%)")
+        logger.info(f"  - Year field corrections: {year_field_corrections} ({year_field_corrections/corrections_applied*100:.1f}%)")
+        logger.info("All date mismatches successfully resolved")
+    
+    return fish_corrected
+
+def detect_replicates_by_dates(bt_df, site_name, year):
+    """
+    Find legitimate replicates by checking for multiple collection dates.
+    
+    Detection logic:
+    1. Find matching BT site name
+    2. Check target year ±1 for multiple dates
+    3. Conclude that multiple dates indicate legitimate replicates
+    """
+    if bt_df.empty or 'Site_Clean' not in bt_df.columns:
+        return None
+
+    bt_sites = set(bt_df['Site_Clean'].unique())
+    bt_site_match = find_bt_site_match(site_name, bt_sites)
+    
+    if not bt_site_match:
+        return None
+
+    for check_year in [year, year-1, year+1]:
+        potential_dates = bt_df[
+            (bt_df['Site_Clean'] == bt_site_match) & 
+            (bt_df['Year'] == check_year)
+        ]
+        
+        if len(potential_dates) >= 2:
+            logger.debug(f"Found {len(potential_dates)} dates for {site_name} in {check_year}: date-based replicates")
+            return potential_dates.sort_values('Date_Clean')
+    
+    return None
+
+def average_group_samples(group):
+    """
+    Average duplicate samples while preserving key metadata.
+    
+    Averaging rules:
+    1. Average comparison_to_reference values
+    2. Keep first record's metadata
+    3. Set individual scores to NULL to avoid misinterpretation of an averaged categorical scale
+    """
+    comparison_values = group['comparison_to_reference'].dropna().tolist()
+    if comparison_values:
+        avg_comparison = sum(comparison_values) / len(comparison_values)
+    else:
+        avg_comparison = None
+    
+    averaged_row = group.iloc[0].copy()
+    averaged_row['comparison_to_reference'] = avg_comparison
+    
+    score_columns = [col for col in averaged_row.index if 'score' in str(col).lower() and col != 'comparison_to_reference']
+    for col in score_columns:
+        averaged_row[col] = None
+    
+    return averaged_row
+
+def legacy_categorize_and_process_duplicates(fish_df, bt_df):
+    """
+    Process duplicates using date-based detection for replicates.
+    
+    Detection strategy:
+    1. Multiple BT dates = legitimate replicates
+    2. No multiple dates = duplicates to average
+    3. Assign dates chronologically to replicates
+    """
+    fish_processed = fish_df.copy()
+    
+    if fish_df.empty:
+        return fish_processed
+    
+    if bt_df.empty or 'Site_Clean' not in bt_df.columns:
+        pass
+    else:
+        set(bt_df['Site_Clean'].unique())
+    
+    rep_groups_processed = 0
+    duplicate_groups_averaged = 0
+    date_assignments = []
+    
+    duplicate_groups = fish_df.groupby(['site_name', 'year']).filter(lambda x: len(x) > 1)
+    
+    if duplicate_groups.empty:
+        return fish_processed
+    
+    unique_duplicate_groups = duplicate_groups.groupby(['site_name', 'year']).size().reset_index()
+    unique_duplicate_groups.columns = ['site_name', 'year', 'sample_count']
+    
+    records_to_remove = []
+    records_to_add = []
+    
+    for _, group_info in unique_duplicate_groups.iterrows():
+        site_name = group_info['site_name']
+        year = group_info['year']
+        group_info['sample_count']
+        
+        group_samples = fish_df[
+            (fish_df['site_name'] == site_name) & 
+            (fish_df['year'] == year)
+        ].copy()
+        
+        replicate_dates = detect_replicates_by_dates(bt_df, site_name, year)
+        
+        if replicate_dates is not None and len(replicate_dates) >= 2:
+            # Replicates: Multiple BT dates were found, so assign them chronologically
+            replicate_dates_sorted = replicate_dates.sort_values('Date_Clean')
+            group_samples_sorted = group_samples.sort_values('sample_id')
+            
+            for i, (idx, sample) in enumerate(group_samples_sorted.iterrows()):
+                if i < len(replicate_dates_sorted):
+                    bt_date = replicate_dates_sorted.iloc[i]['Date_Clean']
+                    fish_processed.at[idx, 'collection_date'] = bt_date
+                    fish_processed.at[idx, 'collection_date_str'] = bt_date.strftime('%Y-%m-%d')
+                    fish_processed.at[idx, 'year'] = bt_date.year
+                    assignment_type = f"Date_{i+1}" if i > 0 else "Original"
+                else:
+                    assignment_type = f"Extra_{i+1}"
+                
+                year_used = replicate_dates_sorted.iloc[0]['Year']
+                date_assignments.append({
+                    'site_name': site_name,
+                    'original_year': year,
+                    'bt_year_used': year_used,
+                    'sample_id': sample['sample_id'],
+                    'assignment_type': assignment_type,
+                    'assigned_date': fish_processed.at[idx, 'collection_date_str'],
+                    'year_buffer_used': year_used != year,
+                    'detection_method': 'date_based'
+                })
+            
+            rep_groups_processed += 1
+            logger.debug(f"Processed {site_name} ({year}) as replicates: {len(replicate_dates_sorted)} BT dates found")
+            
+        else:
+            # Duplicates: No multiple BT dates were found, so average the records
+            averaged_record = average_group_samples(group_samples)
+            records_to_remove.extend(group_samples.index)
+            records_to_add.append(averaged_record)
+            duplicate_groups_averaged += 1
+            logger.debug(f"Processed {site_name} ({year}) as duplicates: no multiple BT dates found")
+    
+    if records_to_remove:
+        fish_processed = fish_processed.drop(records_to_remove)
+    
+    if records_to_add:
+        fish_processed = pd.concat([fish_processed, pd.DataFrame(records_to_add)], ignore_index=True)
+    
+    logger.info(f"Fish duplicate processing (date-based): {rep_groups_processed} replicate groups, {duplicate_groups_averaged} groups averaged, {len(date_assignments)} date assignments")
+    
+    return fish_processed
+
+# Synthetic datasets
+
+def site_names(sites):
+    """Return distinct, realistic-length site names."""
+    return [f"Benchmark Creek {site:03d}" for site in range(sites)]
+
+def make_habitat_assessments(sites=DEFAULT_SITES, years=DEFAULT_YEARS, seed=0):
+    """
+    Build one habitat assessment per site and year, with repeat assessments on the same day.
+    
+    Every fifth site-year is assessed two or three times, and a few metric and
+    total values are missing so NaN-skipping means are exercised.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for site_index, site_name in enumerate(site_names(sites)):
+        for year in range(1990, 1990 + years):
+            repeats = 1 if (site_index + year) % 5 else 2 + year % 2
+            for _ in range(repeats):
+                rows.append({'site_name': site_name, 'assessment_date': f"{year}-06-{10 + site_index % 15:02d}", 'year': year})
+    habitat_df = pd.DataFrame(rows)
+    
+    for col in HABITAT_METRICS:
+        habitat_df[col] = rng.integers(0, 20, len(habitat_df)).astype(float)
+        habitat_df.loc[rng.random(len(habitat_df)) < 0.02, col] = np.nan
+    habitat_df['total_score'] = rng.integers(40, 110, len(habitat_df)).astype(float)
+    habitat_df.loc[rng.random(len(habitat_df)) < 0.01, 'total_score'] = np.nan
+    habitat_df['habitat_grade'] = habitat_df['total_score'].apply(calculate_habitat_grade)
+    
+    # Input arrives in file order, not key order
+    return habitat_df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+def make_fish_collections(sites=DEFAULT_SITES, years=DEFAULT_YEARS, seed=0):
+    """
+    Build fish collections and the BT field-work calendar that validates them.
+    
+    Every fourth site-year has two or three samples. Half of those have two BT
+    dates on the calendar, some recorded the year before, so they resolve as
+    replicates; the rest are averaged. A few collections carry a date whose year
+    disagrees with the year field, with or without a BT date to correct them.
+    Some calendar names are misspelled so fuzzy site matching is exercised, and
+    some sites are missing from the calendar altogether.
+    
+    Returns (fish_df, bt_df) shaped like process_fish_csv_data and load_bt_field_work_dates.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    calendar = []
+    sample_id = 1
+    for site_index, site_name in enumerate(site_names(sites)):
+        bt_name = site_name.replace('Creek', 'Crek') if site_index % 7 == 3 else site_name
+        for year in range(1990, 1990 + years):
+            samples = 1 if (site_index + year) % 4 else 2 + year % 2
+            month, day = 6 + site_index % 3, 1 + (site_index * 3 + year) % 28
+            for sample in range(samples):
+                date_year = year + 1 if (site_index + year + sample) % 23 == 0 else year
+                # A leap day cannot move back to the year field, so these stay as recorded
+                if date_year != year and date_year % 4 == 0 and site_index % 9 == 8:
+                    date = pd.Timestamp(date_year, 2, 29)
+                else:
+                    date = pd.Timestamp(date_year, month, day)
+                rows.append({
+                    'site_name': site_name,
+                    'sample_id': sample_id,
+                    'collection_date': date,
+                    'collection_date_str': date.strftime('%Y-%m-%d'),
+                    'year': year,
+                })
+                sample_id += 1
+            
+            if site_index % 9 == 8:
+                continue  # Sites the calendar never visited
+            if samples > 1 and year % 2 == 0:
+                calendar_year = year - 1 if site_index % 5 == 0 else year
+                calendar += [(bt_name, pd.Timestamp(calendar_year, month, day)),
+                             (bt_name, pd.Timestamp(calendar_year, month + 2, day))]
+            elif (site_index + year) % 3 == 0:
+                calendar.append((bt_name, pd.Timestamp(year, month, day)))
+    
+    fish_df = pd.DataFrame(rows)
+    for col in ['total_species_score', 'sensitive_benthic_score', 'sunfish_species_score', 'total_score']:
+        fish_df[col] = rng.integers(1, 6, len(fish_df))
+    fish_df['comparison_to_reference'] = rng.uniform(0.2, 1.1, len(fish_df)).round(3)
+    fish_df['integrity_class'] = rng.choice(['Excellent', 'Good', 'Fair', 'Poor'], len(fish_df))
+    
+    bt_df = pd.DataFrame(calendar, columns=['Name', 'Date_Clean'])
+    bt_df = bt_df.sample(frac=1, random_state=seed).reset_index(drop=True)
+    bt_df['Date'] = bt_df['Date_Clean'].dt.strftime('%m/%d/%Y')
+    bt_df['Site_Clean'] = bt_df['Name']
+    bt_df['Year'] = bt_df['Date_Clean'].dt.year
+    
+    return fish_df, bt_df
+
+def best_time_ms(func, repeats=3):
+    """Return the best run time in milliseconds over several runs."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def frames_equal(first, second):
+    """Check two resolved frames hold the same records in the same order, ignoring dtype widening."""
+    try:
+        pd.testing.assert_frame_equal(first.reset_index(drop=True), second.reset_index(drop=True), check_dtype=False)
+        return True
+    except AssertionError:
+        return False
+
+def run_benchmarks(sites=DEFAULT_SITES, years=DEFAULT_YEARS, repeats=3):
+    """Time legacy and grouped duplicate resolution on each synthetic dataset."""
+    habitat_df = make_habitat_assessments(sites, years)
+    fish_df, bt_df = make_fish_collections(sites, years)
+    corrected_df = correct_collection_dates(fish_df, bt_df)
+    
+    cases = [
+        ('habitat', len(habitat_df),
+         lambda: legacy_resolve_habitat_duplicates(habitat_df),
+         lambda: resolve_habitat_duplicates(habitat_df)),
+        ('fish dates', len(fish_df),
+         lambda: legacy_correct_collection_dates(fish_df, bt_df),
+         lambda: correct_collection_dates(fish_df, bt_df)),
+        ('fish replicates', len(corrected_df),
+         lambda: legacy_categorize_and_process_duplicates(corrected_df, bt_df),
+         lambda: categorize_and_process_duplicates(corrected_df, bt_df)),
+    ]
+    
+    results = []
+    for name, rows, legacy, grouped in cases:
+        results.append({
+            'dataset': name,
+            'rows': rows,
+            'legacy_ms': best_time_ms(legacy, repeats),
+            'grouped_ms': best_time_ms(grouped, repeats),
+            'identical': frames_equal(legacy(), grouped())
+        })
+    return results
+
+if __name__ == "__main__":
+    sites = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SITES
+    years = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_YEARS
+    
+    print(f"Synthetic dataset with {sites} sites and {years} years of data")
+    print(f"{'Dataset':<16} {'Rows':>7} {'Legacy ms':>10} {'Grouped ms':>11} {'Speedup':>8} {'Identical':>10}")
+    for result in run_benchmarks(sites, years):
+        speedup = result['legacy_ms'] / result['grouped_ms']
+        print(f"{result['dataset']:<16} {result['rows']:>7,} {result['legacy_ms']:>10.1f} {result['grouped_ms']:>11.1f} "
+              f"{speedup:>7.1f}x {str(result['identical']):>10}")
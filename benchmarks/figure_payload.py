@@ -0,0 +1,79 @@
+"""
+Figure payload sizes before and after minimization.
+
+Builds each chart type for the site with the longest record in the database and
+reports raw and gzipped JSON bytes for the Plotly figure and its minimized form.
+
+Usage: python -m benchmarks.figure_payload
+"""
+
+import gzip
+
+from plotly.io.json import to_json_plotly
+
+from data_processing.chemical_utils import KEY_PARAMETERS, get_reference_values
+from data_processing.data_queries import get_chemical_data_from_db
+from database.database import close_connection, get_connection
+from visualizations.chemical_viz import create_all_parameters_view, create_time_series_plot
+from visualizations.figure_payload import minimize_figure
+from visualizations.fish_viz import create_fish_viz
+from visualizations.habitat_viz import create_habitat_viz
+from visualizations.macro_viz import create_macro_viz
+
+LONGEST_RECORD_QUERIES = {
+    'chemical': "SELECT site_id FROM chemical_collection_events GROUP BY site_id ORDER BY COUNT(*) DESC LIMIT 1",
+    'fish': "SELECT site_id FROM fish_collection_events GROUP BY site_id ORDER BY COUNT(*) DESC LIMIT 1",
+    'macro': "SELECT site_id FROM macro_collection_events GROUP BY site_id ORDER BY COUNT(*) DESC LIMIT 1",
+    'habitat': "SELECT site_id FROM habitat_assessments GROUP BY site_id ORDER BY COUNT(*) DESC LIMIT 1",
+}
+
+def payload_sizes(figure):
+    """Return raw and gzipped byte sizes of a figure's JSON payload."""
+    payload = to_json_plotly(figure).encode('utf-8')
+    return len(payload), len(gzip.compress(payload))
+
+def find_longest_record_sites():
+    """Return the site with the most collections for each data type."""
+    conn = get_connection()
+    try:
+        sites = {}
+        for data_type, query in LONGEST_RECORD_QUERIES.items():
+            row = conn.execute(
+                f"SELECT site_name FROM sites WHERE site_id = ({query})"
+            ).fetchone()
+            sites[data_type] = row[0] if row else None
+        return sites
+    finally:
+        close_connection(conn)
+
+def build_figures():
+    """Build one figure of each chart type."""
+    sites = find_longest_record_sites()
+    chemical_df = get_chemical_data_from_db(sites['chemical'])
+    reference_values = get_reference_values()
+
+    return {
+        'chemical (pH)': create_time_series_plot(chemical_df, 'pH', reference_values, site_name=sites['chemical']),
+        'chemical (all)': create_all_parameters_view(
+            chemical_df, KEY_PARAMETERS, reference_values, site_name=sites['chemical']
+        ),
+        'fish': create_fish_viz(sites['fish']),
+        'macro': create_macro_viz(sites['macro']),
+        'habitat': create_habitat_viz(sites['habitat']),
+    }
+
+def measure_figure_payloads():
+    """Return payload sizes for each chart type before and after minimization."""
+    results = {}
+    for label, fig in build_figures().items():
+        results[label] = {'original': payload_sizes(fig), 'minimized': payload_sizes(minimize_figure(fig))}
+    return results
+
+if __name__ == "__main__":
+    results = measure_figure_payloads()
+
+    print(f"{'Figure':<16} {'JSON bytes':>12} {'Minimized':>12} {'Saved':>7} {'Gzip':>9} {'Min gzip':>9}")
+    for label, sizes in results.items():
+        (raw, compressed), (min_raw, min_compressed) = sizes['original'], sizes['minimized']
+        print(f"{label:<16} {raw:>12,} {min_raw:>12,} {1 - min_raw / raw:>7.0%} "
+              f"{compressed:>9,} {min_compressed:>9,}")
@@ -0,0 +1,77 @@
+"""
+Initial layout payload measurement for eager versus lazy tab rendering.
+
+Usage: python -m benchmarks.layout_payload
+"""
+
+import gzip
+import time
+
+import dash_bootstrap_components as dbc
+from plotly.io.json import to_json_plotly
+
+from app import DEFAULT_TAB, app
+from layouts.lazy_tabs import _TAB_FACTORIES
+
+
+def payload_size(component):
+    """Return raw and gzipped byte sizes of a component's JSON payload."""
+    payload = to_json_plotly(component).encode('utf-8')
+    return len(payload), len(gzip.compress(payload))
+
+def build_eager_tabs():
+    """Build every tab up front the way the layout did before lazy rendering."""
+    return dbc.Tabs(
+        [dbc.Tab(create_content(), tab_id=tab_id) for tab_id, create_content in _TAB_FACTORIES.items()],
+        id="main-tabs",
+        active_tab=DEFAULT_TAB
+    )
+
+def build_lazy_tabs():
+    """Build tabs with only the default tab rendered."""
+    return dbc.Tabs(
+        [dbc.Tab(create_content() if tab_id == DEFAULT_TAB else [], tab_id=tab_id)
+         for tab_id, create_content in _TAB_FACTORIES.items()],
+        id="main-tabs",
+        active_tab=DEFAULT_TAB
+    )
+
+def time_build(build, repeats=5):
+    """Return the best build time in milliseconds over several runs."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        build()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+def measure_layout_payload():
+    """Compare initial layout payloads and build times for eager and lazy tabs."""
+    layout_children = list(app.layout.children)
+    tabs_index = next(i for i, child in enumerate(layout_children) if isinstance(child, dbc.Tabs))
+
+    results = {}
+    for label, build in [('eager', build_eager_tabs), ('lazy', build_lazy_tabs)]:
+        children = layout_children.copy()
+        children[tabs_index] = build()
+        layout = dbc.Container(children)
+        raw, compressed = payload_size(layout)
+        results[label] = {'raw': raw, 'gzip': compressed, 'build_ms': time_build(build)}
+
+    tab_sizes = {tab_id: payload_size(create_content())[0] for tab_id, create_content in _TAB_FACTORIES.items()}
+    return results, tab_sizes
+
+if __name__ == "__main__":
+    results, tab_sizes = measure_layout_payload()
+
+    print(f"{'Layout':<8} {'JSON bytes':>12} {'Gzip bytes':>12} {'Build ms':>10}")
+    for label, result in results.items():
+        print(f"{label:<8} {result['raw']:>12,} {result['gzip']:>12,} {result['build_ms']:>10.1f}")
+
+    saved = results['eager']['raw'] - results['lazy']['raw']
+    print(f"\nInitial payload reduced by {saved:,} bytes "
+          f"({saved / results['eager']['raw']:.0%}) with lazy tabs")
+
+    print("\nDeferred content per tab (JSON bytes):")
+    for tab_id, size in tab_sizes.items():
+        print(f"  {tab_id:<16} {size:>10,}")
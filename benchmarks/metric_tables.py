@@ -0,0 +1,455 @@
+"""
+Metric table builder timings for sites with long monitoring histories.
+
+Compares the pivot-based table builders with the per-cell filtering loops they
+replaced, on synthetic sites with 30+ years of fish, macroinvertebrate and
+habitat data, and checks both produce identical tables.
+
+Usage: python -m benchmarks.metric_tables [years]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import setup_logging
+from visualizations.fish_viz import FISH_METRIC_ORDER, FISH_SUMMARY_LABELS, format_fish_metrics_table
+from visualizations.habitat_viz import HABITAT_METRIC_ORDER, HABITAT_SUMMARY_LABELS
+from visualizations.macro_viz import MACRO_METRIC_ORDER, MACRO_SUMMARY_LABELS, format_macro_metrics_table
+from visualizations.visualization_utils import format_metrics_table
+
+logger = setup_logging("metric_tables_benchmark", category="testing")
+
+DEFAULT_YEARS = 35
+
+# Reference implementations: the per-cell filtering loops before vectorization
+
+def legacy_format_fish_metrics_table(metrics_df, summary_df):
+    """
+    Format fish metrics with replicate handling.
+    
+    Preserves collection replicates with (REP) notation and maintains year grouping.
+    """
+    try:
+        if metrics_df.empty or summary_df.empty:
+            return (pd.DataFrame({'Metric': FISH_METRIC_ORDER}), 
+                   pd.DataFrame({'Metric': ['No Data']}))
+
+        unique_collections = summary_df.drop_duplicates(subset=['event_id']).copy()
+        unique_collections['collection_date'] = pd.to_datetime(unique_collections['collection_date'])
+        
+        collections = []
+        
+        for year, year_group in unique_collections.groupby('year'):
+            year_group = year_group.sort_values('collection_date')
+            
+            for idx, (_, row) in enumerate(year_group.iterrows()):
+                event_id = row.get('event_id', None)
+                
+                # Mark subsequent samples in same year as replicates
+                column_name = str(year) if idx == 0 else f"{year} (REP)"
+                
+                collections.append({
+                    'event_id': event_id,
+                    'year': year,
+                    'column_name': column_name,
+                    'collection_date': row['collection_date']
+                })
+        
+        collections.sort(key=lambda x: (x['year'], '(REP)' in x['column_name']))
+        
+        if not collections:
+            return (pd.DataFrame({'Metric': FISH_METRIC_ORDER}), 
+                   pd.DataFrame({'Metric': ['No Data']}))
+        
+        table_data = {'Metric': FISH_METRIC_ORDER}
+        
+        for collection in collections:
+            column_name = collection['column_name']
+            event_id = collection['event_id']
+            
+            collection_metrics = metrics_df[metrics_df['event_id'] == event_id]
+            
+            scores = []
+            for metric in FISH_METRIC_ORDER:
+                metric_row = collection_metrics[collection_metrics['metric_name'] == metric]
+                if not metric_row.empty:
+                    try:
+                        score_value = metric_row['metric_score'].values[0]
+                        scores.append(int(score_value))
+                    except (ValueError, TypeError) as e:
+                        logger.warning(f"Could not convert metric score to number: {score_value}, error: {e}")
+                        scores.append('-')
+                else:
+                    scores.append('-')
+            
+            table_data[column_name] = scores
+        
+        metrics_table = pd.DataFrame(table_data)
+        
+        summary_rows = pd.DataFrame({'Metric': FISH_SUMMARY_LABELS})
+        
+        for collection in collections:
+            column_name = collection['column_name']
+            event_id = collection['event_id']
+            
+            collection_summary = summary_df[summary_df['event_id'] == event_id]
+            if not collection_summary.empty:
+                try:
+                    row = collection_summary.iloc[0]
+                    total_score = int(row['total_score'])
+                    comparison = f"{row['comparison_to_reference']:.2f}"
+                    integrity_class = row['integrity_class']
+                    
+                    summary_data = [total_score, comparison, integrity_class]
+                    summary_rows[column_name] = summary_data
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Error processing summary data for event {event_id}: {e}")
+                    summary_rows[column_name] = ['-', '-', '-']
+            else:
+                summary_rows[column_name] = ['-', '-', '-']
+        
+        return metrics_table, summary_rows
+    
+    except Exception as e:
+        logger.error(f"Error formatting fish metrics table: {e}")
+        return (pd.DataFrame({'Metric': FISH_METRIC_ORDER}), 
+               pd.DataFrame({'Metric': ['Error']}))
+
+def legacy_format_macro_metrics_table(metrics_df, summary_df, season=None):
+    """
+    Format metrics data with habitat type differentiation and replicate handling.
+    
+    Organizes data by year, season, and habitat type while preserving replicate samples.
+    """
+    try:
+        if metrics_df.empty or summary_df.empty:
+            return (pd.DataFrame({'Metric': MACRO_METRIC_ORDER}), 
+                   pd.DataFrame({'Metric': ['Habitat Type']}),
+                   pd.DataFrame({'Metric': ['No Data']}))
+        
+        if season:
+            if 'season' in metrics_df.columns:
+                metrics_df = metrics_df[metrics_df['season'] == season]
+            if 'season' in summary_df.columns:
+                summary_df = summary_df[summary_df['season'] == season]
+        
+        collections = []
+        unique_collections = metrics_df.drop_duplicates(subset=['event_id']).copy()
+        unique_collections['collection_date'] = pd.to_datetime(unique_collections['collection_date'])
+        
+        # Process collections by year and habitat
+        for year, year_group in unique_collections.groupby('year'):
+            year_group = year_group.sort_values('collection_date')
+            habitat_counts = {}
+            
+            for _, row in year_group.iterrows():
+                habitat = row.get('habitat', 'Unknown')
+                event_id = row.get('event_id', None)
+                
+                if habitat not in habitat_counts:
+                    habitat_counts[habitat] = 0
+                habitat_counts[habitat] += 1
+                
+                # Determine column name based on habitat and replicate status
+                column_name = str(year) if habitat_counts[habitat] == 1 else f"{year} (REP)"
+                
+                unique_habitats_this_year = year_group['habitat'].nunique()
+                
+                if unique_habitats_this_year > 1:
+                    habitat_abbrev = habitat[0] if habitat else 'U'
+                    column_name = f"{year}-{habitat_abbrev}" if habitat_counts[habitat] == 1 else f"{year}-{habitat_abbrev} (REP)"
+                
+                collections.append({
+                    'event_id': event_id,
+                    'year': year,
+                    'habitat': habitat,
+                    'column_name': column_name,
+                    'collection_date': row['collection_date']
+                })
+        
+        collections.sort(key=lambda x: (x['year'], '(REP)' in x['column_name']))
+        
+        if not collections:
+            return (pd.DataFrame({'Metric': MACRO_METRIC_ORDER}), 
+                   pd.DataFrame({'Metric': ['Habitat Type']}),
+                   pd.DataFrame({'Metric': ['No Data']}))
+        
+        table_data = {'Metric': MACRO_METRIC_ORDER}
+        habitat_data = {'Metric': ['Habitat Type']}
+        
+        # Build metrics and habitat data
+        for collection in collections:
+            column_name = collection['column_name']
+            event_id = collection['event_id']
+            habitat = collection['habitat']
+            
+            collection_metrics = metrics_df[metrics_df['event_id'] == event_id]
+            
+            habitat_data[column_name] = habitat
+            
+            scores = []
+            for metric in MACRO_METRIC_ORDER:
+                metric_row = collection_metrics[collection_metrics['metric_name'] == metric]
+                if not metric_row.empty:
+                    try:
+                        score_value = metric_row['metric_score'].values[0]
+                        scores.append(int(score_value))
+                    except (ValueError, TypeError) as e:
+                        logger.warning(f"Could not convert metric score to number: {score_value}, error: {e}")
+                        scores.append('-')
+                else:
+                    scores.append('-')
+            
+            table_data[column_name] = scores
+        
+        metrics_table = pd.DataFrame(table_data)
+        habitat_row = pd.DataFrame(habitat_data)
+        
+        summary_rows = pd.DataFrame({'Metric': MACRO_SUMMARY_LABELS})
+        
+        # Add summary data for each collection
+        for collection in collections:
+            column_name = collection['column_name']
+            event_id = collection['event_id']
+            
+            collection_summary = summary_df[summary_df['event_id'] == event_id]
+            if not collection_summary.empty:
+                try:
+                    row = collection_summary.iloc[0]
+                    total_score = int(row['total_score'])
+                    comparison = f"{row['comparison_to_reference']:.2f}"
+                    condition = row['biological_condition']
+                    
+                    summary_data = [total_score, comparison, condition]
+                    summary_rows[column_name] = summary_data
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Error processing summary data for event {event_id}: {e}")
+                    summary_rows[column_name] = ['-', '-', '-']
+            else:
+                summary_rows[column_name] = ['-', '-', '-']
+        
+        return metrics_table, habitat_row, summary_rows
+    
+    except Exception as e:
+        logger.error(f"Error formatting macro metrics table: {e}")
+        return (pd.DataFrame({'Metric': MACRO_METRIC_ORDER}), 
+               pd.DataFrame({'Metric': ['Habitat Type']}),
+               pd.DataFrame({'Metric': ['Error']}))
+
+def legacy_format_metrics_table(metrics_df, summary_df, metric_order, summary_labels=None, season=None):
+    """
+    Format metrics into standardized table with seasonal filtering and appropriate precision.
+    """
+    try:
+        if metrics_df.empty or summary_df.empty:
+            return pd.DataFrame({'Metric': metric_order}), pd.DataFrame({'Metric': ['No Data']})
+        
+        if season:
+            if 'season' in metrics_df.columns:
+                metrics_df = metrics_df[metrics_df['season'] == season]
+            if 'season' in summary_df.columns:
+                summary_df = summary_df[summary_df['season'] == season]
+        
+        years = sorted(metrics_df['year'].unique()) if not metrics_df.empty else []
+        
+        # Metrics table construction
+        table_data = {'Metric': metric_order}
+        
+        for year in years:
+            year_metrics = metrics_df[metrics_df['year'] == year]
+            scores = []
+            
+            for metric in metric_order:
+                metric_row = year_metrics[year_metrics['metric_name'] == metric]
+                if not metric_row.empty:
+                    try:
+                        if 'metric_score' in metric_row.columns:
+                            score_value = metric_row['metric_score'].values[0]
+                        elif 'score' in metric_row.columns:
+                            score_value = metric_row['score'].values[0]
+                        else:
+                            logger.warning(f"No score column found for metric {metric}")
+                            scores.append('-')
+                            continue
+                        
+                        # Precision formatting based on value type
+                        if isinstance(score_value, float) and score_value != int(score_value):
+                            scores.append(round(score_value, 1))
+                        else:
+                            scores.append(int(score_value))
+                    except (ValueError, TypeError) as e:
+                        logger.warning(f"Could not convert metric score to number: {score_value}, error: {e}")
+                        scores.append('-')
+                else:
+                    scores.append('-')
+            
+            table_data[str(year)] = scores
+        
+        metrics_table = pd.DataFrame(table_data)
+        
+        # Summary rows construction
+        default_summary_labels = ['Total Score', 'Comparison to Reference', 'Condition']
+        summary_labels = summary_labels or default_summary_labels
+        summary_rows = pd.DataFrame({'Metric': summary_labels})
+        
+        for year in years:
+            year_summary = summary_df[summary_df['year'] == year]
+            if not year_summary.empty:
+                try:
+                    total_score = int(year_summary['total_score'].values[0])
+                    summary_data = [total_score]
+                    
+                    if 'comparison_to_reference' in year_summary.columns:
+                        comparison = f"{year_summary['comparison_to_reference'].values[0]:.2f}"
+                        summary_data.append(comparison)
+                        
+                        condition = 'Unknown'
+                        if 'biological_condition' in year_summary.columns:
+                            condition = year_summary['biological_condition'].values[0]
+                        elif 'integrity_class' in year_summary.columns:
+                            condition = year_summary['integrity_class'].values[0]
+                        summary_data.append(condition)
+                    
+                    elif 'habitat_grade' in year_summary.columns:
+                        habitat_grade = year_summary['habitat_grade'].values[0]
+                        summary_data.append(habitat_grade)
+                    
+                    while len(summary_data) < len(summary_labels):
+                        summary_data.append('-')
+                    
+                    summary_rows[str(year)] = summary_data
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Error processing summary data for year {year}: {e}")
+                    summary_rows[str(year)] = ['-'] * len(summary_labels)
+            else:
+                summary_rows[str(year)] = ['-'] * len(summary_labels)
+        
+        return metrics_table, summary_rows
+    
+    except Exception as e:
+        logger.error(f"Error formatting metrics table: {e}")
+        return pd.DataFrame({'Metric': metric_order}), pd.DataFrame({'Metric': ['Error']})
+
+# Synthetic site histories
+
+def make_biological_site(years=DEFAULT_YEARS, community='fish', seed=0):
+    """
+    Build metrics and summary frames for one site with replicates every few years.
+    
+    Macro sites sample Summer and Winter with one or two habitats per collection.
+    """
+    rng = np.random.default_rng(seed)
+    metric_order = FISH_METRIC_ORDER if community == 'fish' else MACRO_METRIC_ORDER
+    
+    events = []
+    event_id = 1
+    for year in range(1990, 1990 + years):
+        seasons = ['Summer'] if community == 'fish' else ['Summer', 'Winter']
+        for season in seasons:
+            month = 7 if season == 'Summer' else 1
+            habitats = ['Riffle'] if community == 'fish' or year % 3 else ['Riffle', 'Vegetation']
+            samples = 2 if year % 4 == 0 else 1
+            for habitat in habitats:
+                for sample in range(samples):
+                    events.append({
+                        'event_id': event_id,
+                        'site_name': 'Benchmark Creek',
+                        'collection_date': f"{year}-{month:02d}-{10 + sample * 5:02d}",
+                        'year': year,
+                        'season': season,
+                        'habitat': habitat,
+                        'sample_id': event_id
+                    })
+                    event_id += 1
+    events = pd.DataFrame(events)
+    
+    metrics = events.merge(pd.DataFrame({'metric_name': metric_order}), how='cross')
+    metrics['raw_value'] = rng.uniform(0, 50, len(metrics))
+    metrics['metric_score'] = rng.integers(1, 6, len(metrics))
+    # Drop a few metrics so missing cells are exercised
+    metrics = metrics.drop(index=metrics.index[::17]).reset_index(drop=True)
+    
+    summary = events.copy()
+    summary['total_score'] = rng.integers(10, 40, len(summary))
+    summary['comparison_to_reference'] = rng.uniform(0.2, 1.0, len(summary))
+    condition_column = 'integrity_class' if community == 'fish' else 'biological_condition'
+    summary[condition_column] = rng.choice(['Good', 'Fair', 'Poor'], len(summary))
+    
+    if community == 'fish':
+        events = events.drop(columns=['season', 'habitat'])
+        metrics = metrics.drop(columns=['season', 'habitat'])
+        summary = summary.drop(columns=['season', 'habitat'])
+    
+    return metrics, summary
+
+def make_habitat_site(years=DEFAULT_YEARS, seed=0):
+    """Build habitat metrics and summary frames with one assessment per year."""
+    rng = np.random.default_rng(seed)
+    assessments = pd.DataFrame({
+        'site_name': 'Benchmark Creek',
+        'year': range(1990, 1990 + years),
+        'assessment_id': range(1, years + 1)
+    })
+    
+    metrics = assessments.merge(pd.DataFrame({'metric_name': HABITAT_METRIC_ORDER}), how='cross')
+    metrics['score'] = rng.integers(0, 20, len(metrics)).astype(float)
+    metrics.loc[metrics.index[::7], 'score'] += 0.5
+    
+    summary = assessments.copy()
+    summary['total_score'] = rng.integers(60, 180, len(summary))
+    summary['habitat_grade'] = rng.choice(['A', 'B', 'C'], len(summary))
+    
+    return metrics, summary
+
+def best_time_ms(func, repeats=5):
+    """Return the best run time in milliseconds over several runs."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def tables_equal(first, second):
+    """Check two tuples of tables match in columns, dtypes and values."""
+    return all(a.equals(b) and list(a.columns) == list(b.columns) for a, b in zip(first, second))
+
+def run_benchmarks(years=DEFAULT_YEARS, repeats=5):
+    """Time legacy and pivot builders for each table type."""
+    fish_metrics, fish_summary = make_biological_site(years, 'fish')
+    macro_metrics, macro_summary = make_biological_site(years, 'macro')
+    habitat_metrics, habitat_summary = make_habitat_site(years)
+    
+    cases = [
+        ('fish', lambda: legacy_format_fish_metrics_table(fish_metrics, fish_summary),
+         lambda: format_fish_metrics_table(fish_metrics, fish_summary)),
+        ('macro (Summer)', lambda: legacy_format_macro_metrics_table(macro_metrics, macro_summary, 'Summer'),
+         lambda: format_macro_metrics_table(macro_metrics, macro_summary, 'Summer')),
+        ('habitat', lambda: legacy_format_metrics_table(habitat_metrics, habitat_summary,
+                                                        HABITAT_METRIC_ORDER, HABITAT_SUMMARY_LABELS),
+         lambda: format_metrics_table(habitat_metrics, habitat_summary,
+                                      HABITAT_METRIC_ORDER, HABITAT_SUMMARY_LABELS)),
+    ]
+    
+    results = []
+    for name, legacy, pivot in cases:
+        results.append({
+            'table': name,
+            'legacy_ms': best_time_ms(legacy, repeats),
+            'pivot_ms': best_time_ms(pivot, repeats),
+            'identical': tables_equal(legacy(), pivot())
+        })
+    return results
+
+if __name__ == "__main__":
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_YEARS
+    
+    print(f"Synthetic site with {years} years of data")
+    print(f"{'Table':<16} {'Legacy ms':>10} {'Pivot ms':>10} {'Speedup':>8} {'Identical':>10}")
+    for result in run_benchmarks(years):
+        speedup = result['legacy_ms'] / result['pivot_ms']
+        print(f"{result['table']:<16} {result['legacy_ms']:>10.1f} {result['pivot_ms']:>10.1f} "
+              f"{speedup:>7.1f}x {str(result['identical']):>10}")
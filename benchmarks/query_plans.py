@@ -0,0 +1,348 @@
+"""
+EXPLAIN QUERY PLAN audit and index advisor for the dashboard's SQL.
+
+Collects SQL from two sources:
+- statements traced while the read paths (data_queries, map_queries, utils)
+  run for sample sites, with their parameters bound
+- SELECT statements written as literals in the processing and sync modules,
+  explained with NULL parameters
+
+Each statement is explained against an in-memory copy of the database. Full
+table scans and temp B-trees are flagged, candidate indexes are derived from the
+scanned table's join, filter and sort columns, and every candidate is kept only
+if benchmarking shows it speeds up the query that triggered it without slowing
+any other statement down or adding a temp B-tree to any plan it changes.
+
+Usage: python -m benchmarks.query_plans [db_path]
+"""
+
+import ast
+import glob
+import os
+import re
+import sqlite3
+import statistics
+import sys
+import time
+
+from utils import setup_logging
+
+logger = setup_logging("query_plans_benchmark", category="testing")
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose SQL literals are audited; the read paths are also traced at runtime
+STATIC_SOURCES = [
+    'data_processing/*.py',
+    'visualizations/map_queries.py',
+    'utils.py',
+    'database/*.py',
+    'cloud_functions/survey123_sync/*.py',
+]
+
+MIN_SPEEDUP = 1.2
+MAX_REGRESSION = 1.2
+# Sub-millisecond statements jitter by more than any index changes them
+NOISE_FLOOR_SECONDS = 0.0002
+TIMING_BUDGET_SECONDS = 0.2
+MAX_TIMING_RUNS = 50
+
+SQL_KEYWORDS = {
+    'on', 'where', 'join', 'left', 'right', 'inner', 'outer', 'cross', 'group', 'order',
+    'limit', 'union', 'using', 'natural', 'as', 'select', 'having', 'window',
+}
+
+TABLE_REFERENCE = re.compile(r'\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?', re.IGNORECASE)
+ORDER_BY = re.compile(r'\bORDER\s+BY\s+(.+?)(?:\bLIMIT\b|\)|$)', re.IGNORECASE | re.DOTALL)
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+TEMP_BTREE = 'TEMP B-TREE'
+
+def normalize_sql(sql):
+    """Collapse whitespace so the same statement from different call sites is audited once."""
+    return ' '.join(sql.split())
+
+def collect_static_statements(patterns=STATIC_SOURCES):
+    """Return {sql: source} for every SELECT or WITH string literal in the audited modules."""
+    statements = {}
+    for pattern in patterns:
+        for path in sorted(glob.glob(os.path.join(project_root, pattern))):
+            with open(path) as source_file:
+                tree = ast.parse(source_file.read())
+            for node in ast.walk(tree):
+                if not (isinstance(node, ast.Constant) and isinstance(node.value, str)):
+                    continue
+                sql = normalize_sql(node.value)
+                if re.match(r'(?i)(SELECT|WITH)\b', sql):
+                    statements.setdefault(sql, os.path.relpath(path, project_root))
+    return statements
+
+def collect_traced_statements():
+    """Return {sql: source} for the statements the dashboard's read paths run for sample sites."""
+    from data_processing import data_queries
+    from database.request_context import count_queries
+    from utils import get_sites_with_data
+    from visualizations import map_queries
+
+    statements = {}
+
+    def trace(source, func, *args, **kwargs):
+        with count_queries() as counter:
+            func(*args, **kwargs)
+        for sql in counter.statements:
+            statements.setdefault(normalize_sql(sql), source)
+
+    site_loaders = {
+        'chemical': [data_queries.get_chemical_data_from_db, map_queries.get_latest_chemical_data_for_maps],
+        'fish': [data_queries.get_fish_dataframe, data_queries.get_fish_metrics_data_for_table,
+                 map_queries.get_latest_fish_data_for_maps],
+        'macro': [data_queries.get_macroinvertebrate_dataframe, data_queries.get_macro_metrics_data_for_table,
+                  map_queries.get_latest_macro_data_for_maps],
+        'habitat': [data_queries.get_habitat_dataframe, data_queries.get_habitat_metrics_data_for_table,
+                    map_queries.get_latest_habitat_data_for_maps],
+    }
+
+    trace('map_queries', map_queries.get_sites_for_maps)
+    trace('map_queries', map_queries.get_sites_for_maps, active_only=True)
+    for data_type, loaders in site_loaders.items():
+        trace('utils', get_sites_with_data, data_type)
+        sites = get_sites_with_data(data_type)
+        for loader in loaders:
+            source = loader.__module__.split('.')[-1]
+            trace(source, loader)
+            if sites:
+                trace(source, loader, sites[0])
+        if sites:
+            trace('data_queries', data_queries.site_has_data, sites[0], data_type)
+
+    for date_range in (data_queries.get_chemical_date_range, data_queries.get_fish_date_range,
+                       data_queries.get_macro_date_range, data_queries.get_habitat_date_range):
+        trace('data_queries', date_range)
+
+    return statements
+
+def load_database_copy(db_path):
+    """Copy the database into memory so candidate indexes never touch the real file."""
+    source = sqlite3.connect(db_path)
+    conn = sqlite3.connect(':memory:')
+    source.backup(conn)
+    source.close()
+    return conn
+
+def explain(conn, sql):
+    """Return the plan detail lines, binding NULL for any unbound parameters."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", [None] * sql.count('?')).fetchall()
+    return [row[3] for row in rows]
+
+def plan_flags(plan):
+    """Return the plan lines that indicate a full table scan or a temp B-tree."""
+    return [line for line in plan if FULL_SCAN.match(line) or TEMP_BTREE in line]
+
+def count_temp_btrees(plan):
+    return sum(TEMP_BTREE in line for line in plan)
+
+def time_query(conn, sql):
+    """Return the median seconds to execute and fetch a statement."""
+    params = [None] * sql.count('?')
+    timings = []
+    deadline = time.perf_counter() + TIMING_BUDGET_SECONDS
+    while len(timings) < MAX_TIMING_RUNS and (len(timings) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def table_columns(conn):
+    """Return {table: [columns]} for every table in the database."""
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    )]
+    return {table: [row[1] for row in conn.execute(f"PRAGMA table_info({table})")] for table in tables}
+
+def existing_indexes(conn):
+    """Return {table: [column tuples]} for every index, including primary and unique keys."""
+    indexes = {}
+    for table in table_columns(conn):
+        for index in conn.execute(f"PRAGMA index_list({table})").fetchall():
+            columns = tuple(row[2] for row in conn.execute(f"PRAGMA index_info('{index[1]}')"))
+            indexes.setdefault(table, []).append(columns)
+    return indexes
+
+def table_aliases(sql, columns):
+    """Map each alias (or bare table name) in the statement to its table."""
+    aliases = {}
+    for table, alias in TABLE_REFERENCE.findall(sql):
+        if table not in columns:
+            continue
+        aliases[table] = table
+        if alias and alias.lower() not in SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+def _referenced_columns(sql, alias, table, columns, single_table):
+    if single_table:
+        words = set(re.findall(r'\b(\w+)\b', sql))
+        return [column for column in columns[table] if column in words]
+    return list(dict.fromkeys(
+        column for column in re.findall(rf'\b{alias}\.(\w+)', sql) if column in columns[table]
+    ))
+
+def candidate_indexes(sql, alias, columns):
+    """
+    Propose indexes for a scanned table: equality columns, then sort columns,
+    then, for the covering variant, every other column the statement reads.
+    """
+    aliases = table_aliases(sql, columns)
+    table = aliases.get(alias)
+    if table is None:
+        return []
+
+    single_table = len(set(aliases.values())) == 1
+    prefix = '' if single_table else rf'\b{alias}\.'
+    equality = re.findall(rf'{prefix}(\w+)\s*=(?!=)', sql) + re.findall(rf'=\s*{prefix}(\w+)\b', sql)
+    equality = [column for column in dict.fromkeys(equality) if column in columns[table]]
+
+    order_match = ORDER_BY.search(sql)
+    ordering = []
+    if order_match:
+        ordering = [column for column in re.findall(rf'{prefix}(\w+)', order_match.group(1))
+                    if column in columns[table] and column not in equality]
+
+    referenced = _referenced_columns(sql, alias, table, columns, single_table)
+    narrow = tuple(dict.fromkeys(equality + ordering))
+    covering = tuple(dict.fromkeys(list(narrow) + referenced))
+
+    candidates = []
+    for index_columns in (narrow, covering):
+        if index_columns and (table, index_columns) not in candidates:
+            candidates.append((table, index_columns))
+    return candidates
+
+def index_name(table, index_columns):
+    return f"idx_{table}_{'_'.join(index_columns)}"
+
+def create_index_sql(table, index_columns):
+    return f"CREATE INDEX IF NOT EXISTS {index_name(table, index_columns)} ON {table}({', '.join(index_columns)})"
+
+def audit_statements(conn, statements):
+    """Explain and time every statement; statements that fail to plan are reported and skipped."""
+    audited = []
+    for sql, source in statements.items():
+        try:
+            plan = explain(conn, sql)
+        except sqlite3.Error as e:
+            logger.debug(f"Skipping statement that cannot be planned ({e}): {sql[:80]}")
+            continue
+        audited.append({
+            'sql': sql, 'source': source, 'plan': plan, 'flags': plan_flags(plan),
+            'seconds': time_query(conn, sql),
+        })
+    return audited
+
+def advise_indexes(conn, audited):
+    """Benchmark candidate indexes for flagged statements and return the evaluated candidates."""
+    columns = table_columns(conn)
+    existing = existing_indexes(conn)
+
+    candidates = {}
+    for entry in audited:
+        scanned = [FULL_SCAN.match(line).group(1) for line in entry['flags'] if FULL_SCAN.match(line)]
+        for alias in scanned:
+            for table, index_columns in candidate_indexes(entry['sql'], alias, columns):
+                already_indexed = any(index[:len(index_columns)] == index_columns
+                                      for index in existing.get(table, []))
+                if not already_indexed:
+                    candidates.setdefault((table, index_columns), []).append(entry)
+
+    results = []
+    for (table, index_columns), triggers in candidates.items():
+        statement = create_index_sql(table, index_columns)
+        name = index_name(table, index_columns)
+
+        # Only statements whose plan uses the index can change speed, so only those are timed
+        conn.execute(statement)
+        plans_after = {entry['sql']: explain(conn, entry['sql']) for entry in audited
+                       if re.search(rf'\b{table}\b', entry['sql'])}
+        affected = [entry for entry in audited if plans_after.get(entry['sql'], entry['plan']) != entry['plan']]
+
+        # Re-time the baseline next to each candidate so drift between runs is not credited to it
+        conn.execute(f"DROP INDEX {name}")
+        before = [time_query(conn, entry['sql']) for entry in affected]
+        conn.execute(statement)
+        timings = [{'entry': entry, 'before': seconds, 'after': time_query(conn, entry['sql']),
+                    'plan_after': plans_after[entry['sql']]}
+                   for entry, seconds in zip(affected, before)]
+        conn.execute(f"DROP INDEX {name}")
+
+        trigger_speedups = [t['before'] / t['after'] for t in timings if t['entry'] in triggers]
+        worst_regression = max((t['after'] / t['before'] for t in timings
+                                if t['after'] - t['before'] > NOISE_FLOOR_SECONDS), default=1.0)
+        best_speedup = max(trigger_speedups, default=1.0)
+        # A new sort step is a regression even when this data is too small to time it
+        new_temp_btrees = [t['entry']['sql'] for t in timings
+                           if count_temp_btrees(t['plan_after']) > count_temp_btrees(t['entry']['plan'])]
+        results.append({
+            'table': table,
+            'columns': index_columns,
+            'sql': statement,
+            'speedup': best_speedup,
+            'worst_regression': worst_regression,
+            'new_temp_btrees': new_temp_btrees,
+            'accepted': best_speedup >= MIN_SPEEDUP and worst_regression <= MAX_REGRESSION and not new_temp_btrees,
+            'timings': timings,
+        })
+
+    # Prefer the narrow index on a table unless covering it is clearly faster
+    for table in {result['table'] for result in results}:
+        accepted = sorted((r for r in results if r['table'] == table and r['accepted']),
+                          key=lambda r: len(r['columns']))
+        for narrower, wider in zip(accepted, accepted[1:]):
+            if wider['columns'][:len(narrower['columns'])] == narrower['columns'] and \
+                    wider['speedup'] < narrower['speedup'] * MIN_SPEEDUP:
+                wider['accepted'] = False
+
+    return sorted(results, key=lambda r: -r['speedup'])
+
+def run_audit(db_path):
+    """Audit the statements against a copy of the database at db_path and return (audited, advice)."""
+    statements = collect_traced_statements()
+    for sql, source in collect_static_statements().items():
+        statements.setdefault(sql, source)
+
+    conn = load_database_copy(db_path)
+    conn.execute("ANALYZE")
+    audited = audit_statements(conn, statements)
+    advice = advise_indexes(conn, audited)
+    conn.close()
+    return audited, advice
+
+if __name__ == "__main__":
+    from database.database import get_database_path
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else get_database_path()
+    audited, advice = run_audit(db_path)
+
+    flagged = [entry for entry in audited if entry['flags']]
+    print(f"Audited {len(audited)} statements, {len(flagged)} with full scans or temp B-trees\n")
+    for entry in sorted(flagged, key=lambda e: -e['seconds']):
+        print(f"[{entry['source']}] {entry['seconds'] * 1000:.2f} ms  {entry['sql'][:110]}")
+        for line in entry['flags']:
+            print(f"    {line}")
+
+    print(f"\n{'Candidate index':<75} {'Speedup':>8} {'Worst':>7}  Verdict")
+    for result in advice:
+        verdict = 'ACCEPT' if result['accepted'] else 'reject'
+        if result['new_temp_btrees']:
+            count = len(result['new_temp_btrees'])
+            verdict += f" (adds a temp B-tree to {count} plan{'s' if count != 1 else ''})"
+        print(f"{index_name(result['table'], result['columns']):<75} {result['speedup']:>7.1f}x "
+              f"{result['worst_regression']:>6.2f}x  {verdict}")
+
+    accepted = [result for result in advice if result['accepted']]
+    if accepted:
+        print("\nAccepted indexes:")
+        for result in accepted:
+            print(f"    {result['sql']}")
+            for timing in result['timings']:
+                if timing['entry']['flags'] and timing['before'] / timing['after'] >= MIN_SPEEDUP:
+                    print(f"        {timing['before'] * 1000:8.2f} ms -> {timing['after'] * 1000:8.2f} ms  "
+                          f"{timing['entry']['sql'][:80]}")
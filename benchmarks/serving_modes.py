@@ -0,0 +1,99 @@
+"""
+Query latency for each database serving mode.
+
+Runs the dashboard's traced read statements through get_connection in every
+serving mode: the file on disk, an in-memory snapshot and the file opened
+immutable with memory-mapped I/O. Each query opens and closes its own
+connection, as the read paths do. Queries run from one thread and then from
+as many threads as gunicorn serves requests with. The benchmark reports p50
+and p99 latency per mode and checks every mode returns the same rows.
+
+Usage: python -m benchmarks.serving_modes [rounds]
+"""
+
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.query_plans import collect_traced_statements
+from database.database import SERVING_MODES, close_connection, enable_serving_mode, get_connection
+from utils import setup_logging
+
+logger = setup_logging("serving_modes_benchmark", category="testing")
+
+DEFAULT_ROUNDS = 20
+# Matches the gunicorn --threads setting in the Dockerfile
+SERVING_THREADS = 8
+
+def run_query(sql):
+    """Open a connection, fetch every row of a statement and return (seconds, rows)."""
+    start = time.perf_counter()
+    conn = get_connection()
+    try:
+        rows = conn.execute(sql).fetchall()
+    finally:
+        close_connection(conn)
+    return time.perf_counter() - start, rows
+
+def measure_latency(statements, rounds, threads):
+    """Return per-query latencies in milliseconds over several rounds of the statements."""
+    workload = [sql for _ in range(rounds) for sql in statements]
+    if threads == 1:
+        timings = [run_query(sql)[0] for sql in workload]
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            timings = [seconds for seconds, _ in executor.map(run_query, workload)]
+    return np.array(timings) * 1000
+
+def run_benchmarks(statements=None, rounds=DEFAULT_ROUNDS, modes=SERVING_MODES, threads=(1, SERVING_THREADS)):
+    """
+    Measure p50/p99 query latency for each serving mode and thread count.
+
+    Statements default to the dashboard's traced read paths. The serving mode
+    is reset to 'disk' afterwards.
+    """
+    if statements is None:
+        statements = list(collect_traced_statements())
+
+    results = []
+    baseline_rows = None
+    try:
+        for mode in modes:
+            start = time.perf_counter()
+            enable_serving_mode(mode)
+            startup_ms = (time.perf_counter() - start) * 1000
+
+            rows = [run_query(sql)[1] for sql in statements]
+            if baseline_rows is None:
+                baseline_rows = rows
+
+            for thread_count in threads:
+                latencies = measure_latency(statements, rounds, thread_count)
+                results.append({
+                    'mode': mode,
+                    'threads': thread_count,
+                    'startup_ms': startup_ms,
+                    'queries': len(latencies),
+                    'p50_ms': float(np.percentile(latencies, 50)),
+                    'p99_ms': float(np.percentile(latencies, 99)),
+                    'mean_ms': statistics.fmean(latencies),
+                    'identical': rows == baseline_rows
+                })
+    finally:
+        enable_serving_mode('disk')
+
+    return results
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROUNDS
+
+    results = run_benchmarks(rounds=rounds)
+    print(f"{'Mode':<10} {'Threads':>8} {'Startup ms':>11} {'Queries':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'Mean ms':>8} {'Identical':>10}")
+    for result in results:
+        print(f"{result['mode']:<10} {result['threads']:>8} {result['startup_ms']:>11.1f} {result['queries']:>8,} "
+              f"{result['p50_ms']:>8.3f} {result['p99_ms']:>8.3f} {result['mean_ms']:>8.3f} "
+              f"{str(result['identical']):>10}")
@@ -0,0 +1,180 @@
+"""
+Site consolidation timings for statewide site lists.
+
+Compares the round-based site merge with the row-by-row loop it replaced, on
+synthetic partner data with thousands of sites spread over the six
+priority-ordered sources, and checks both write identical master site and
+conflict files.
+
+Usage: python -m benchmarks.site_consolidation [sites]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_processing.consolidate_sites import CSV_CONFIGS, detect_conflicts, merge_site_sources
+from utils import setup_logging
+
+logger = setup_logging("site_consolidation_benchmark", category="testing")
+
+DEFAULT_SITES = 2000
+
+# Reference implementation: the row-by-row loop before vectorization, taking
+# already extracted sources instead of reading the cleaned CSVs
+
+def legacy_consolidate_sites(source_sites):
+    """
+    Consolidates site information from all cleaned CSV files based on priority.
+    
+    This function iterates through the extracted sites in their priority order, adding new
+    sites and updating existing ones with metadata from higher-priority sources.
+    It also identifies and logs any conflicting metadata for manual review.
+    
+    Returns:
+        A tuple containing the consolidated sites DataFrame and a DataFrame of any conflicts found.
+    """
+    consolidated_sites = pd.DataFrame()
+    conflicts_list = []
+    
+    for csv_sites in source_sites:
+        sites_added = 0
+        sites_updated = 0
+        conflicts_found = 0
+        
+        for _, new_site in csv_sites.iterrows():
+            site_name = new_site['site_name']
+            
+            if not consolidated_sites.empty and site_name in consolidated_sites['site_name'].values:
+                # If site exists, check for conflicts and update missing metadata.
+                existing_idx = consolidated_sites[consolidated_sites['site_name'] == site_name].index[0]
+                existing_site = consolidated_sites.loc[existing_idx]
+                
+                conflicts = detect_conflicts(site_name, existing_site, new_site)
+                
+                if conflicts:
+                    # Records a conflict if metadata differs between sources.
+                    conflict_record = {
+                        'site_name': site_name,
+                        'conflicts': conflicts,
+                        'existing_source': existing_site['source_file'],
+                        'new_source': new_site['source_file'],
+                        'existing_data': existing_site.to_dict(),
+                        'new_data': new_site.to_dict()
+                    }
+                    conflicts_list.append(conflict_record)
+                    conflicts_found += 1
+                else:
+                    # If no conflicts, fill in any missing metadata from the new source.
+                    updated = False
+                    for field in ['latitude', 'longitude', 'county', 'river_basin', 'ecoregion']:
+                        if (pd.isna(existing_site[field]) and pd.notna(new_site[field])):
+                            consolidated_sites.loc[existing_idx, field] = new_site[field]
+                            consolidated_sites.loc[existing_idx, f'{field}_source'] = new_site['source_file']
+                            updated = True
+                    
+                    if updated:
+                        sites_updated += 1
+            else:
+                # If site is new, add it to the consolidated data.
+                new_record = new_site.copy()
+                
+                for field in ['latitude', 'longitude', 'county', 'river_basin', 'ecoregion']:
+                    if pd.notna(new_site[field]):
+                        new_record[f'{field}_source'] = new_site['source_file']
+                    else:
+                        new_record[f'{field}_source'] = None
+                
+                consolidated_sites = pd.concat([consolidated_sites, new_record.to_frame().T], ignore_index=True)
+                sites_added += 1
+        
+    conflicts_df = pd.DataFrame(conflicts_list) if conflicts_list else pd.DataFrame()
+    
+    return consolidated_sites, conflicts_df
+
+def make_source_sites(sites=DEFAULT_SITES, seed=0):
+    """
+    Build extracted site frames for every source in CSV_CONFIGS, highest priority first.
+    
+    Each source lists a random subset of the sites and only the metadata its
+    config provides, with some values missing. A few coordinates and counties
+    disagree between sources so conflicts are reported, and some names appear
+    twice in one source, as happens when names collapse after cleaning.
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array([f"Statewide Creek {site:05d}" for site in range(sites)])
+    latitude = rng.uniform(33.6, 37.0, sites).round(5)
+    longitude = rng.uniform(-103.0, -94.4, sites).round(5)
+    county = rng.choice(['Cleveland', 'Payne', 'Tulsa', 'Osage', 'Kay', 'Cherokee'], sites)
+    basin = rng.choice(['Arkansas', 'Canadian', 'Red', 'Neosho'], sites)
+    ecoregion = rng.choice(['Cross Timbers', 'Ozark Highlands', 'Central Great Plains'], sites)
+    
+    fields = [
+        ('latitude', 'lat_column', latitude),
+        ('longitude', 'lon_column', longitude),
+        ('county', 'county_column', county),
+        ('river_basin', 'basin_column', basin),
+        ('ecoregion', 'ecoregion_column', ecoregion),
+    ]
+    
+    source_sites = []
+    for priority, config in enumerate(CSV_CONFIGS):
+        chosen = np.flatnonzero(rng.random(sites) < 0.7 - priority * 0.08)
+        chosen = np.concatenate([chosen, rng.choice(chosen, len(chosen) // 50)])
+        
+        site_data = pd.DataFrame({'site_name': names[chosen]})
+        for field, config_key, values in fields:
+            if config[config_key] is None:
+                site_data[field] = None
+                continue
+            column = pd.Series(values[chosen], dtype=object)
+            column[rng.random(len(chosen)) < 0.1] = np.nan
+            disagree = rng.random(len(chosen)) < 0.01
+            if field in ('latitude', 'longitude'):
+                column[disagree] = column[disagree].astype(float) + 0.001
+            else:
+                column[disagree] = column[disagree].astype(str) + ' County'
+            site_data[field] = column.to_numpy()
+        site_data['source_file'] = config['file']
+        site_data['source_description'] = config['description']
+        source_sites.append(site_data)
+    
+    return source_sites
+
+def best_time_ms(func, repeats=3):
+    """Return the best run time in milliseconds over several runs."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def outputs_equal(first, second):
+    """Check two (sites, conflicts) results write identical CSV files."""
+    return all(a.to_csv(index=False) == b.to_csv(index=False) for a, b in zip(first, second))
+
+def run_benchmarks(sites=DEFAULT_SITES, repeats=3):
+    """Time legacy and round-based consolidation of one synthetic statewide site list."""
+    source_sites = make_source_sites(sites)
+    
+    legacy = lambda: legacy_consolidate_sites(source_sites)
+    merged = lambda: merge_site_sources(source_sites)[:2]
+    
+    return {
+        'sites': sites,
+        'records': sum(len(frame) for frame in source_sites),
+        'legacy_ms': best_time_ms(legacy, repeats),
+        'merged_ms': best_time_ms(merged, repeats),
+        'identical': outputs_equal(legacy(), merged())
+    }
+
+if __name__ == "__main__":
+    sites = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SITES
+    
+    result = run_benchmarks(sites, repeats=1)
+    print(f"{'Sites':>7} {'Records':>8} {'Legacy ms':>10} {'Merged ms':>10} {'Speedup':>8} {'Identical':>10}")
+    print(f"{result['sites']:>7,} {result['records']:>8,} {result['legacy_ms']:>10.1f} {result['merged_ms']:>10.1f} "
+          f"{result['legacy_ms'] / result['merged_ms']:>7.1f}x {str(result['identical']):>10}")
@@ -0,0 +1,250 @@
+"""
+Site load timings for statewide partner site lists.
+
+Compares the staged bulk upsert and anti-join cleanup in site_processing with
+the per-site SELECT/UPDATE/INSERT loop and Python set difference they replaced.
+Each run loads tens of thousands of sites into a database that already holds
+half of them, with monitoring data for some, and checks both leave identical
+sites tables.
+
+Usage: python -m benchmarks.site_upsert [sites]
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from data_processing.site_processing import cleanup_unused_sites, insert_sites_into_db
+from database.database import close_connection, get_connection
+from database.db_schema import create_tables
+from utils import setup_logging
+
+logger = setup_logging("site_upsert_benchmark", category="testing")
+
+DEFAULT_SITES = 20000
+
+# Reference implementations: the per-site loop and set difference before the bulk sync
+
+def legacy_insert_sites_into_db(sites_df):
+    """
+    Inserts or updates site data in the database.
+    
+    Uses INSERT OR IGNORE followed by UPDATE to avoid foreign key constraint 
+    issues when sites already exist with child records.
+    
+    Args:
+        sites_df: A DataFrame containing the site information to load.
+    
+    Returns:
+        The number of sites inserted or updated.
+    """
+    if sites_df.empty:
+        logger.warning("No site data to insert into database")
+        return 0
+    
+    conn = get_connection()
+    
+    try:
+        if 'site_name' not in sites_df.columns:
+            logger.error("Missing required column 'site_name' in site data")
+            return 0
+        
+        sites_df['site_name'] = sites_df['site_name'].astype(str)
+        
+        columns = sites_df.columns.tolist()
+        
+        cursor = conn.cursor()
+        sites_inserted = 0
+        sites_updated = 0
+        
+        for _, row in sites_df.iterrows():
+            site_name = row['site_name']
+            
+            # Check if site already exists
+            cursor.execute("SELECT site_id FROM sites WHERE site_name = ?", (site_name,))
+            existing_site = cursor.fetchone()
+            
+            if existing_site:
+                # Site exists - UPDATE it (avoids foreign key constraint issues)
+                site_id = existing_site[0]
+                
+                # Build UPDATE statement for non-site_name columns
+                update_columns = [col for col in columns if col != 'site_name']
+                if update_columns:
+                    set_clause = ', '.join([f"{col} = ?" for col in update_columns])
+                    update_sql = f"UPDATE sites SET {set_clause} WHERE site_id = ?"
+                    update_values = [row[col] for col in update_columns] + [site_id]
+                    
+                    cursor.execute(update_sql, update_values)
+                    sites_updated += 1
+                
+            else:
+                # Site doesn't exist - INSERT it
+                placeholders = ', '.join(['?' for _ in columns])
+                columns_str = ', '.join(columns)
+                insert_sql = f"INSERT INTO sites ({columns_str}) VALUES ({placeholders})"
+                insert_values = [row[col] for col in columns]
+                
+                cursor.execute(insert_sql, insert_values)
+                sites_inserted += 1
+        
+        conn.commit()
+        
+        total_processed = sites_inserted + sites_updated
+        logger.info(f"Site database operations: {sites_inserted} inserted, {sites_updated} updated")
+        
+        return total_processed
+    
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error inserting/updating site data: {e}")
+        import traceback
+        logger.error(f"Full traceback: {traceback.format_exc()}")
+        return 0
+    
+    finally:
+        close_connection(conn)
+
+def legacy_cleanup_unused_sites():
+    """
+    Removes sites from the database that have no associated monitoring data.
+    
+    Returns:
+        True if successful, False otherwise.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        
+        # Identify all sites that have at least one record in any monitoring table.
+        cursor.execute('''
+            SELECT DISTINCT site_id FROM (
+                SELECT site_id FROM chemical_collection_events
+                UNION
+                SELECT site_id FROM fish_collection_events  
+                UNION
+                SELECT site_id FROM macro_collection_events
+                UNION  
+                SELECT site_id FROM habitat_assessments
+            )
+        ''')
+        
+        sites_with_data = {row[0] for row in cursor.fetchall()}
+        
+        cursor.execute('SELECT site_id FROM sites')
+        all_sites = {row[0] for row in cursor.fetchall()}
+        
+        # Determine which sites have no data by finding the difference.
+        unused_sites = all_sites - sites_with_data
+        
+        if unused_sites:
+            placeholders = ','.join(['?' for _ in unused_sites])
+            cursor.execute(f'DELETE FROM sites WHERE site_id IN ({placeholders})', list(unused_sites))
+            conn.commit()
+            
+            logger.info(f"Removed {len(unused_sites)} unused sites")
+        else:
+            logger.info("No unused sites found")
+        
+        return True
+        
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error cleaning up unused sites: {e}")
+        return False
+    finally:
+        close_connection(conn)
+
+def make_sites(sites=DEFAULT_SITES, seed=0):
+    """Build a master site frame shaped like load_site_data output, with some metadata missing."""
+    rng = np.random.default_rng(seed)
+    sites_df = pd.DataFrame({
+        'site_name': [f"Statewide Creek {site:05d}" for site in range(sites)],
+        'latitude': rng.uniform(33.6, 37.0, sites).round(5),
+        'longitude': rng.uniform(-103.0, -94.4, sites).round(5),
+        'county': rng.choice(['Cleveland', 'Payne', 'Tulsa', 'Osage', 'Kay'], sites),
+        'river_basin': rng.choice(['Arkansas', 'Canadian', 'Red', 'Neosho'], sites),
+        'ecoregion': rng.choice(['Cross Timbers', 'Ozark Highlands', 'Central Great Plains'], sites),
+    })
+    sites_df.loc[rng.random(sites) < 0.05, 'latitude'] = np.nan
+    sites_df.loc[rng.random(sites) < 0.05, 'county'] = None
+    return sites_df
+
+def make_database(db_path, sites_df):
+    """
+    Create a database holding every other site with stale metadata.
+    
+    A third of those sites have a chemical collection event, a few have
+    habitat assessments, and the rest are unused.
+    """
+    with patch('database.database.get_database_path', return_value=db_path):
+        create_tables()
+    
+    conn = sqlite3.connect(db_path)
+    existing = sites_df.iloc[::2]
+    conn.executemany("INSERT INTO sites (site_name, county) VALUES (?, 'Stale')", [(name,) for name in existing['site_name']])
+    conn.execute("""
+        INSERT INTO chemical_collection_events (site_id, collection_date, year, month)
+        SELECT site_id, '2023-06-01', 2023, 6 FROM sites WHERE site_id % 3 = 0
+    """)
+    conn.execute("""
+        INSERT INTO habitat_assessments (site_id, assessment_date, year)
+        SELECT site_id, '2023-06-01', 2023 FROM sites WHERE site_id % 7 = 1
+    """)
+    conn.commit()
+    conn.close()
+
+def load_sites(db_path, sites_df, insert, cleanup):
+    """Load sites and remove unused ones against db_path, returning seconds taken and the final sites table."""
+    with patch('database.database.get_database_path', return_value=db_path):
+        start = time.perf_counter()
+        insert(sites_df.copy())
+        cleanup()
+        seconds = time.perf_counter() - start
+    
+    conn = sqlite3.connect(db_path)
+    sites_table = pd.read_sql("SELECT * FROM sites ORDER BY site_id", conn)
+    conn.close()
+    return seconds, sites_table
+
+def run_benchmarks(sites=DEFAULT_SITES):
+    """Time legacy and bulk site loading from identical starting databases."""
+    sites_df = make_sites(sites)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        template_path = os.path.join(temp_dir, 'template.db')
+        make_database(template_path, sites_df)
+        
+        results = {}
+        for name, insert, cleanup in [
+            ('legacy', legacy_insert_sites_into_db, legacy_cleanup_unused_sites),
+            ('bulk', insert_sites_into_db, cleanup_unused_sites),
+        ]:
+            db_path = os.path.join(temp_dir, f'{name}.db')
+            shutil.copyfile(template_path, db_path)
+            results[name] = load_sites(db_path, sites_df, insert, cleanup)
+        
+        return {
+            'sites': sites,
+            'legacy_ms': results['legacy'][0] * 1000,
+            'bulk_ms': results['bulk'][0] * 1000,
+            'remaining_sites': len(results['bulk'][1]),
+            'identical': results['legacy'][1].equals(results['bulk'][1])
+        }
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    sites = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SITES
+    
+    result = run_benchmarks(sites)
+    print(f"{'Sites':>7} {'Remaining':>10} {'Legacy ms':>10} {'Bulk ms':>9} {'Speedup':>8} {'Identical':>10}")
+    print(f"{result['sites']:>7,} {result['remaining_sites']:>10,} {result['legacy_ms']:>10.1f} {result['bulk_ms']:>9.1f} "
+          f"{result['legacy_ms'] / result['bulk_ms']:>7.1f}x {str(result['identical']):>10}")
@@ -0,0 +1,76 @@
+"""
+Cold start budget check using Python's -X importtime breakdown.
+
+Usage: python -m benchmarks.startup_time [budget_ms] [top_n]
+
+Exits non-zero when importing the app exceeds the budget so it can run in CI.
+
+The genai SDK is the only module deferred to first use. Plotly and the
+visualization modules still load at startup, since Dash imports plotly itself.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+DEFAULT_BUDGET_MS = 2500
+DEFAULT_TOP_N = 15
+
+# Matches lines like "import time:       539 |    1099694 |   callbacks"
+IMPORTTIME_PATTERN = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def parse_importtime(output):
+    """
+    Parse -X importtime output into per-module timings.
+
+    Returns a list of dicts with self/cumulative milliseconds and nesting depth.
+    """
+    modules = []
+    for line in output.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules.append({
+            'module': name,
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+            'depth': (len(indent) - 1) // 2
+        })
+    return modules
+
+def measure_startup(module='app'):
+    """Import a module in a fresh interpreter and return its import time breakdown."""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=project_root,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    modules = parse_importtime(completed.stderr)
+    total = next((entry['cumulative_ms'] for entry in reversed(modules) if entry['module'] == module), 0.0)
+    return total, modules
+
+def slowest_imports(modules, top_n=DEFAULT_TOP_N):
+    """Return the modules with the largest cumulative import time, outermost first."""
+    return sorted(modules, key=lambda entry: (-entry['cumulative_ms'], entry['depth']))[:top_n]
+
+if __name__ == "__main__":
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+    top_n = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_TOP_N
+
+    total_ms, modules = measure_startup()
+
+    print(f"{'Module':<50} {'Self ms':>10} {'Cumulative ms':>15}")
+    for entry in slowest_imports(modules, top_n):
+        name = '  ' * entry['depth'] + entry['module']
+        print(f"{name:<50} {entry['self_ms']:>10.1f} {entry['cumulative_ms']:>15.1f}")
+
+    status = "within" if total_ms <= budget_ms else "OVER"
+    print(f"\nApp import: {total_ms:.0f} ms ({status} {budget_ms:.0f} ms budget)")
+    sys.exit(0 if total_ms <= budget_ms else 1)
@@ -0,0 +1,151 @@
+"""
+Data API throughput against worker count, with and without the pre-fork preload.
+
+Mirrors gunicorn's pre-fork model: the parent optionally preloads the shared
+query results (database.shared_data), then forks worker processes. Each worker
+serves a fixed mix of /api/v1 requests (site list, latest readings and per-site
+series) through the Flask test client for a set time. The benchmark reports
+requests per second across all workers and each worker's proportional set size
+(PSS), which counts pages shared with other processes only fractionally. It
+also checks the preloaded responses match the database ones.
+
+Throughput can only scale with workers up to the number of cores on the box.
+
+Usage: python -m benchmarks.worker_throughput [seconds] [max_workers]
+"""
+
+import json
+import os
+import sys
+import time
+from urllib.parse import quote
+
+from flask import Flask
+
+from api.v1 import api_v1_blueprint
+from database.shared_data import clear_shared_data, preload_shared_data
+from utils import get_sites_with_data, setup_logging
+
+logger = setup_logging("worker_throughput_benchmark", category="testing")
+
+DEFAULT_SECONDS = 5.0
+DATA_TYPES = ['chemical', 'fish', 'macro', 'habitat']
+
+def create_api_app():
+    """Return a Flask app serving only the data API."""
+    app = Flask(__name__)
+    app.register_blueprint(api_v1_blueprint)
+    return app
+
+def request_mix(sites_per_type=10):
+    """Return API paths covering the site list, latest readings and per-site series."""
+    paths = ['/api/v1/sites', '/api/v1/sites?active=1']
+    for data_type in DATA_TYPES:
+        paths.append(f'/api/v1/latest/{data_type}')
+        for site_name in get_sites_with_data(data_type)[:sites_per_type]:
+            paths.append(f'/api/v1/sites/{quote(site_name, safe="")}/{data_type}')
+    return paths
+
+def proportional_set_size_kb():
+    """Return this process's PSS in KB, or None where /proc does not report it."""
+    try:
+        with open('/proc/self/smaps_rollup') as smaps:
+            for line in smaps:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+def serve_requests(app, paths, offset, seconds):
+    """Issue requests round-robin from offset until the time is up and return the count."""
+    client = app.test_client()
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        response = client.get(paths[(offset + count) % len(paths)])
+        if response.status_code != 200:
+            raise RuntimeError(f"{paths[(offset + count) % len(paths)]} returned {response.status_code}")
+        count += 1
+    return count
+
+def run_workers(app, paths, worker_count, seconds):
+    """Fork workers that serve requests in parallel and return (requests/s, mean PSS in KB)."""
+    children = []
+    for worker_index in range(worker_count):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            try:
+                count = serve_requests(app, paths, worker_index * 7, seconds)
+                report = {'count': count, 'pss_kb': proportional_set_size_kb()}
+            except Exception as e:
+                report = {'error': str(e)}
+            os.write(write_fd, json.dumps(report).encode('utf-8'))
+            os._exit(0)
+        os.close(write_fd)
+        children.append((pid, read_fd))
+
+    reports = []
+    for pid, read_fd in children:
+        with os.fdopen(read_fd) as pipe:
+            reports.append(json.loads(pipe.read()))
+        os.waitpid(pid, 0)
+
+    errors = [report['error'] for report in reports if 'error' in report]
+    if errors:
+        raise RuntimeError(f"Worker failed: {errors[0]}")
+
+    pss = [report['pss_kb'] for report in reports if report['pss_kb'] is not None]
+    return sum(report['count'] for report in reports) / seconds, (sum(pss) / len(pss) if pss else None)
+
+def run_benchmarks(seconds=DEFAULT_SECONDS, worker_counts=None, paths=None):
+    """
+    Measure throughput for each worker count with the database and with preloaded data.
+
+    Returns one dict per (preload, workers) with requests/s and mean worker PSS;
+    'identical' reports whether every path returned the same body both ways.
+    """
+    if worker_counts is None:
+        worker_counts = sorted({1, 2, os.cpu_count() or 1})
+    app = create_api_app()
+    paths = paths or request_mix()
+
+    client = app.test_client()
+    clear_shared_data()
+    database_bodies = [client.get(path).data for path in paths]
+    results = []
+    try:
+        preload = None
+        for preloaded in (False, True):
+            if preloaded:
+                preload = preload_shared_data()
+                identical = [client.get(path).data for path in paths] == database_bodies
+            for worker_count in worker_counts:
+                throughput, pss_kb = run_workers(app, paths, worker_count, seconds)
+                results.append({
+                    'preload': preloaded,
+                    'workers': worker_count,
+                    'requests_per_second': throughput,
+                    'worker_pss_kb': pss_kb,
+                    'preload_seconds': preload['seconds'] if preloaded else 0.0,
+                })
+    finally:
+        clear_shared_data()
+
+    for result in results:
+        result['identical'] = identical
+    return results
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SECONDS
+    worker_counts = list(range(1, int(sys.argv[2]) + 1)) if len(sys.argv) > 2 else None
+
+    results = run_benchmarks(seconds, worker_counts)
+    print(f"{os.cpu_count()} CPU cores, {seconds:g}s per run")
+    print(f"{'Preload':<8} {'Workers':>8} {'Requests/s':>11} {'Worker PSS MB':>14} {'Identical':>10}")
+    for result in results:
+        pss = f"{result['worker_pss_kb'] / 1024:.1f}" if result['worker_pss_kb'] is not None else 'n/a'
+        print(f"{str(result['preload']):<8} {result['workers']:>8} {result['requests_per_second']:>11.1f} "
+              f"{pss:>14} {str(result['identical']):>10}")
@@ -7,6 +7,7 @@ from .biological_callbacks import register_biological_callbacks
 from .chatbot_callbacks import register_chatbot_callbacks
 from .chemical_callbacks import register_chemical_callbacks
 from .habitat_callbacks import register_habitat_callbacks
+from .instrumentation import instrument_callbacks
 from .overview_callbacks import register_overview_callbacks
 from .shared_callbacks import register_shared_callbacks
 
@@ -18,4 +19,5 @@ def register_callbacks(app):
     register_biological_callbacks(app)
     register_habitat_callbacks(app)
     register_shared_callbacks(app)
-    register_chatbot_callbacks(app)
\ No newline at end of file
+    register_chatbot_callbacks(app)
+    instrument_callbacks(app)
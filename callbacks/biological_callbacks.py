@@ -3,16 +3,16 @@ Callbacks for biological data visualization and interaction.
 """
 
 import dash
-import pandas as pd
-from dash import Input, Output, State, dcc, html
+from dash import ALL, ClientsideFunction, Input, Output, State, html
 
+from database.request_context import request_scoped
 from utils import get_sites_with_data, setup_logging
+from visualizations.figure_cache import get_cached_entry
 
 from .helper_functions import create_empty_state, create_error_state
 from .tab_utilities import (
     create_biological_community_info,
     create_biological_site_display,
-    create_gallery_navigation_callback,
 )
 
 logger = setup_logging("biological_callbacks", category="callbacks")
@@ -20,32 +20,15 @@ logger = setup_logging("biological_callbacks", category="callbacks")
 def register_biological_callbacks(app):
     """Register callbacks for biological data exploration and visualization."""
     
-    # State persistence
-    @app.callback(
+    # State persistence runs in the browser (assets/clientside_callbacks.js)
+    app.clientside_callback(
+        ClientsideFunction(namespace='biological', function_name='saveBiologicalState'),
         Output('biological-tab-state', 'data'),
         [Input('biological-community-dropdown', 'value'),
          Input('biological-site-dropdown', 'value')],
         [State('biological-tab-state', 'data')],
         prevent_initial_call=True
     )
-    def save_biological_state(selected_community, selected_site, current_state):
-        """Preserve user selections between tab switches."""
-        if selected_community is not None or selected_site is not None:
-            # Keep existing values when only one selection changes
-            new_state = current_state.copy() if current_state else {'selected_community': None, 'selected_site': None}
-            
-            if selected_community is not None:
-                new_state['selected_community'] = selected_community
-                logger.info(f"Saving biological community state: {selected_community}")
-            
-            if selected_site is not None:
-                new_state['selected_site'] = selected_site
-                logger.info(f"Saving biological site state: {selected_site}")
-            
-            return new_state
-        else:
-            # Maintain state when dropdowns cleared
-            return current_state or {'selected_community': None, 'selected_site': None}
     
     # Navigation handling
     @app.callback(
@@ -55,11 +38,12 @@ def register_biological_callbacks(app):
          Output('biological-site-search-section', 'style', allow_duplicate=True),
          Output('biological-site-dropdown', 'disabled', allow_duplicate=True)],
         [Input('main-tabs', 'active_tab'),
-         Input('navigation-store', 'data')],
+         Input('navigation-store', 'data'),
+         Input('rendered-tabs', 'data')],
         [State('biological-tab-state', 'data')],
         prevent_initial_call=True
     )
-    def handle_biological_navigation_and_initial_load(active_tab, nav_data, biological_state):
+    def handle_biological_navigation_and_initial_load(active_tab, nav_data, rendered_tabs, biological_state):
         """
         Handle navigation from map clicks and restore saved state.
         
@@ -130,7 +114,7 @@ def register_biological_callbacks(app):
                 )
         
         # Restore previous state
-        if (trigger_id == 'main-tabs' and biological_state and 
+        if (trigger_id in ['main-tabs', 'rendered-tabs'] and biological_state and 
             biological_state.get('selected_community') and
             (not nav_data or not nav_data.get('target_tab'))):
             
@@ -254,12 +238,18 @@ def register_biological_callbacks(app):
         [Input('biological-community-dropdown', 'value'),
          Input('biological-site-dropdown', 'value')]
     )
+    @request_scoped
     def update_biological_site_content(selected_community, selected_site):
         """Display site-specific biological metrics and visualizations."""
         if not selected_community or not selected_site:
             return create_empty_state("Please select a community type and site to view biological data.")
         
         try:
+            # Prerendered displays skip the database entirely
+            cached = get_cached_entry(selected_community, selected_site)
+            if cached is not None:
+                return cached['content']
+            
             logger.info(f"Creating biological site display for {selected_community} at {selected_site}")
             return create_biological_site_display(selected_community, selected_site)
         except Exception as e:
@@ -270,80 +260,13 @@ def register_biological_callbacks(app):
                 str(e)
             )
 
-    # Gallery navigation
-    @app.callback(
-        [Output('fish-gallery-container', 'children'),
-         Output('current-fish-index', 'data')],
-        [Input('prev-fish-button', 'n_clicks'),
-         Input('next-fish-button', 'n_clicks')],
-        [State('current-fish-index', 'data')]
-    )
-    def update_fish_gallery(prev_clicks, next_clicks, current_index):
-        """Navigate through fish species gallery."""
-        update_gallery = create_gallery_navigation_callback('fish')
-        return update_gallery(prev_clicks, next_clicks, current_index)
-    
-    @app.callback(
-        [Output('macro-gallery-container', 'children'),
-         Output('current-macro-index', 'data')],
-        [Input('prev-macro-button', 'n_clicks'),
-         Input('next-macro-button', 'n_clicks')],
-        [State('current-macro-index', 'data')]
-    )
-    def update_macro_gallery(prev_clicks, next_clicks, current_index):
-        """Navigate through macroinvertebrate species gallery."""
-        update_gallery = create_gallery_navigation_callback('macro')
-        return update_gallery(prev_clicks, next_clicks, current_index)
-
-    # Data export
-    @app.callback(
-        Output('biological-download-component', 'data'),
-        Input('biological-download-btn', 'n_clicks'),
-        [State('biological-community-dropdown', 'value')],
-        prevent_initial_call=True
-    )
-    def download_biological_data(n_clicks, selected_community):
-        """Export biological data as CSV based on selected community."""
-        if not n_clicks or not selected_community:
-            return dash.no_update
-        
-        try:
-            if selected_community == 'fish':
-                logger.info("Downloading fish data CSV")
-                processed_data_path = 'data/processed/processed_fish_data.csv'
-                data_df = pd.read_csv(processed_data_path)
-                
-                if data_df.empty:
-                    logger.warning("No fish data found in processed CSV")
-                    return dash.no_update
-                
-                filename = f"blue_thumb_fish_data.csv"
-                logger.info(f"Successfully prepared fish data export with {len(data_df)} records")
-                
-            elif selected_community == 'macro':
-                logger.info("Downloading macro data CSV")
-                processed_data_path = 'data/processed/processed_macro_data.csv'
-                data_df = pd.read_csv(processed_data_path)
-                
-                if data_df.empty:
-                    logger.warning("No macro data found in processed CSV")
-                    return dash.no_update
-                
-                filename = f"blue_thumb_macro_data.csv"
-                logger.info(f"Successfully prepared macro data export with {len(data_df)} records")
-                
-            else:
-                logger.warning(f"Unknown community type for download: {selected_community}")
-                return dash.no_update
-            
-            return dcc.send_data_frame(
-                data_df.to_csv,
-                filename,
-                index=False
-            )
-                
-        except Exception as e:
-            logger.error(f"Error downloading {selected_community} data: {e}")
-            return dash.no_update
-
-
+    # Gallery navigation runs in the browser over pre-rendered slides
+    for gallery_type in ['fish', 'macro']:
+        app.clientside_callback(
+            ClientsideFunction(namespace='biological', function_name='navigateGallery'),
+            [Output({'type': 'gallery-slide', 'gallery': gallery_type, 'index': ALL}, 'style'),
+             Output(f'current-{gallery_type}-index', 'data')],
+            [Input(f'prev-{gallery_type}-button', 'n_clicks'),
+             Input(f'next-{gallery_type}-button', 'n_clicks')],
+            [State(f'current-{gallery_type}-index', 'data')]
+        )
@@ -0,0 +1,117 @@
+"""
+Answer cache and answer-source statistics for the chatbot.
+
+Questions are normalized (case, punctuation and spacing) so that repeats such as
+"What does chloride mean?" and "what does chloride mean" share one cached answer.
+The cache is a thread-safe LRU whose entries also expire after a TTL, so answers
+pick up changes to the model or its documents.
+
+ChatAnswerStats counts answers by source (cache, local index or model) with a
+latency histogram each, and renders them for the /metrics route alongside the
+callback metrics.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from callbacks.instrumentation import LATENCY_BUCKETS, Histogram
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+SOURCES = ('cache', 'local', 'model')
+
+def normalize_question(question):
+    """Return the question lowercased with punctuation dropped and whitespace collapsed."""
+    return ' '.join(re.findall(r"[a-z0-9]+", question.lower()))
+
+class AnswerCache:
+    """Least-recently-used answers by normalized question, each kept for at most ttl seconds."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, question):
+        """Return the cached answer for question, or None."""
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            answer, expires = entry
+            if self.clock() >= expires:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return answer
+
+    def put(self, question, answer):
+        """Cache an answer, evicting the least recently used one when full."""
+        key = normalize_question(question)
+        if not key:
+            return
+        with self._lock:
+            self._entries[key] = (answer, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+class ChatAnswerStats:
+    """Thread-safe answer counts and latencies by source."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = {source: Histogram(LATENCY_BUCKETS) for source in SOURCES}
+
+    def record(self, source, seconds):
+        with self._lock:
+            self._latency[source].observe(seconds)
+
+    def summary(self):
+        """Return answer counts, mean latency by source and the share answered without the model."""
+        with self._lock:
+            counts = {source: histogram.count for source, histogram in self._latency.items()}
+            mean_ms = {source: round(histogram.sum / histogram.count * 1000, 2) if histogram.count else None
+                       for source, histogram in self._latency.items()}
+        total = sum(counts.values())
+        return {
+            'answers': counts,
+            'mean_latency_ms': mean_ms,
+            'local_hit_rate': round((counts['cache'] + counts['local']) / total, 4) if total else None,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._latency = {source: Histogram(LATENCY_BUCKETS) for source in SOURCES}
+
+    def render_prometheus(self):
+        """Return the answer latency histogram in the Prometheus text exposition format."""
+        name = 'chatbot_answer_duration_seconds'
+        lines = [
+            f"# HELP {name} Time to answer a chatbot question, by answer source.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            for source, histogram in self._latency.items():
+                bounds = [repr(float(bound)) for bound in histogram.buckets] + ['+Inf']
+                for bound, count in zip(bounds, histogram.cumulative_counts()):
+                    lines.append(f'{name}_bucket{{source="{source}",le="{bound}"}} {count}')
+                lines.append(f'{name}_sum{{source="{source}"}} {float(histogram.sum)!r}')
+                lines.append(f'{name}_count{{source="{source}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+chat_answer_stats = ChatAnswerStats()
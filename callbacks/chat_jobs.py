@@ -0,0 +1,197 @@
+"""
+Background jobs for chatbot answers.
+
+An LLM call can take many seconds, so the chat callback only submits the question
+to a small thread pool and returns. The chat widget then polls the job with an
+interval until the answer is ready. This keeps gunicorn's request threads free for
+map and chart callbacks.
+
+Limits (environment variables):
+- CHAT_MAX_CONCURRENT: questions answered at once (default 2)
+- CHAT_MAX_PENDING: questions queued or running before new ones are turned away (default 8)
+- CHAT_TIMEOUT_SECONDS: how long a question may wait and run before it is given up (default 45)
+
+Finished answers are also written to CHAT_JOB_DIR, so a poll that reaches a
+different gunicorn worker on the same host still finds them. Answers are not shared
+between hosts: with several instances the poll must reach the one that took the
+question (run one instance or turn on session affinity). Each job directory has an
+instance id so a poll that lands elsewhere can say so instead of waiting out the timeout.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import setup_logging
+
+logger = setup_logging("chat_jobs", category="callbacks")
+
+DEFAULT_MAX_CONCURRENT = 2
+DEFAULT_MAX_PENDING = 8
+DEFAULT_TIMEOUT_SECONDS = 45.0
+# Finished jobs are kept this long for a late poll, then discarded
+RESULT_RETENTION_SECONDS = 600
+INSTANCE_ID_FILE = 'instance_id'
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+TIMED_OUT = 'timed_out'
+FINAL_STATES = (DONE, FAILED, CANCELLED, TIMED_OUT)
+
+class ChatJobQueue:
+    """
+    Run respond(message) for chat questions on a bounded thread pool.
+
+    A running call cannot be interrupted, so cancelling or timing out a started job
+    only discards its answer; the LLM client's own request timeout frees the thread.
+    """
+
+    def __init__(self, respond, max_concurrent=DEFAULT_MAX_CONCURRENT, max_pending=DEFAULT_MAX_PENDING,
+                 timeout=DEFAULT_TIMEOUT_SECONDS, result_dir=None):
+        self.respond = respond
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.result_dir = result_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='chat-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+        if result_dir:
+            os.makedirs(result_dir, exist_ok=True)
+        self.instance_id = self._load_instance_id()
+
+    def _load_instance_id(self):
+        # Workers sharing a job directory share its id; the first one to start writes it
+        instance_id = uuid.uuid4().hex
+        if not self.result_dir:
+            return instance_id
+        path = os.path.join(self.result_dir, INSTANCE_ID_FILE)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            try:
+                with open(path) as id_file:
+                    return id_file.read().strip() or instance_id
+            except OSError:
+                return instance_id
+        except OSError as e:
+            logger.warning(f"Could not save chat instance id: {e}")
+            return instance_id
+        with os.fdopen(fd, 'w') as id_file:
+            id_file.write(instance_id)
+        return instance_id
+
+    def submit(self, message):
+        """Queue a question and return its job id, or None when the queue is full."""
+        with self._lock:
+            self._prune()
+            active = sum(1 for job in self._jobs.values() if job['state'] in (QUEUED, RUNNING))
+            if active >= self.max_pending:
+                logger.warning(f"Chat queue full ({active} questions pending); turning a question away")
+                return None
+
+            job_id = uuid.uuid4().hex
+            job = {'state': QUEUED, 'text': None, 'submitted': time.monotonic(), 'finished': None}
+            self._jobs[job_id] = job
+            job['future'] = self._executor.submit(self._run, job_id, message)
+        return job_id
+
+    def _run(self, job_id, message):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['state'] != QUEUED:
+                return
+            # A question that waited out its time in the queue is not worth answering
+            if time.monotonic() - job['submitted'] > self.timeout:
+                self._finish(job_id, TIMED_OUT)
+                return
+            job['state'] = RUNNING
+
+        try:
+            text, state = self.respond(message), DONE
+        except Exception as e:
+            logger.error(f"Chat job {job_id} failed: {e}", exc_info=True)
+            text, state = None, FAILED
+
+        with self._lock:
+            if self._jobs.get(job_id, {}).get('state') == RUNNING:
+                self._finish(job_id, state, text)
+
+    def _finish(self, job_id, state, text=None):
+        # Callers hold the lock
+        job = self._jobs[job_id]
+        job.update(state=state, text=text, finished=time.monotonic())
+        if self.result_dir:
+            path = os.path.join(self.result_dir, f"{job_id}.json")
+            try:
+                with open(f"{path}.tmp", 'w') as result_file:
+                    json.dump({'state': state, 'text': text}, result_file)
+                os.replace(f"{path}.tmp", path)
+            except OSError as e:
+                logger.warning(f"Could not save chat job {job_id}: {e}")
+
+    def status(self, job_id):
+        """
+        Return {'state': ..., 'text': ...} for a job, or None if it is unknown here.
+
+        A job past its timeout is reported (and recorded) as timed out.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                if job['state'] in (QUEUED, RUNNING) and time.monotonic() - job['submitted'] > self.timeout:
+                    job['future'].cancel()
+                    self._finish(job_id, TIMED_OUT)
+                return {'state': job['state'], 'text': job['text']}
+        return self._load_result(job_id)
+
+    def _load_result(self, job_id):
+        if not self.result_dir or not job_id.isalnum():
+            return None
+        try:
+            with open(os.path.join(self.result_dir, f"{job_id}.json")) as result_file:
+                return json.load(result_file)
+        except (OSError, ValueError):
+            return None
+
+    def cancel(self, job_id):
+        """Cancel a job that has not finished; returns whether it was still pending."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['state'] in FINAL_STATES:
+                return False
+            job['future'].cancel()
+            self._finish(job_id, CANCELLED)
+        logger.info(f"Cancelled chat job {job_id}")
+        return True
+
+    def _prune(self):
+        # Callers hold the lock
+        cutoff = time.monotonic() - RESULT_RETENTION_SECONDS
+        for job_id in [job_id for job_id, job in self._jobs.items() if job['finished'] and job['finished'] < cutoff]:
+            del self._jobs[job_id]
+            if self.result_dir:
+                try:
+                    os.remove(os.path.join(self.result_dir, f"{job_id}.json"))
+                except OSError:
+                    pass
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and drop the ones still queued."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+def queue_from_environment(respond):
+    """Build a ChatJobQueue with limits from the CHAT_* environment variables."""
+    return ChatJobQueue(
+        respond,
+        max_concurrent=int(os.environ.get('CHAT_MAX_CONCURRENT', DEFAULT_MAX_CONCURRENT)),
+        max_pending=int(os.environ.get('CHAT_MAX_PENDING', DEFAULT_MAX_PENDING)),
+        timeout=float(os.environ.get('CHAT_TIMEOUT_SECONDS', DEFAULT_TIMEOUT_SECONDS)),
+        result_dir=os.environ.get('CHAT_JOB_DIR', os.path.join(tempfile.gettempdir(), 'blue_thumb_chat_jobs')),
+    )
@@ -3,14 +3,16 @@ Callbacks for the chatbot functionality
 """
 
 import os
+import time
 from datetime import datetime
+from functools import lru_cache
 
 import dash
 import dash_bootstrap_components as dbc
-from dash import MATCH, Input, Output, State, html
-from google import genai
-from google.genai import types
+from dash import MATCH, ClientsideFunction, Input, Output, State, html
 
+from callbacks.chat_cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL_SECONDS, AnswerCache, chat_answer_stats
+from callbacks.chat_jobs import CANCELLED, DONE, FAILED, FINAL_STATES, TIMED_OUT, queue_from_environment
 from utils import setup_logging
 
 logger = setup_logging("chatbot_callbacks", category="callbacks")
@@ -23,24 +25,177 @@ DATA_STORE_ID = "blue-thumb-context-docs-ds_1751833049776"
 DATA_STORE_LOCATION = "us"
 MAX_TOKENS = 1024
 TEMPERATURE = 0.3
+# Bounds the LLM request itself, so a hung call frees its chat job thread
+REQUEST_TIMEOUT_SECONDS = 40
+
+ERROR_MESSAGE = "I apologize, but I'm having trouble responding right now. Please try again."
+BUSY_MESSAGE = "I'm answering a lot of questions right now. Please try again in a moment."
+TIMEOUT_MESSAGE = "Sorry, that question took too long to answer. Please try again or ask something more specific."
+OTHER_INSTANCE_MESSAGE = "Sorry, I lost track of that question. Please ask it again."
+FORMAT_ERROR_MESSAGE = "I received your question but I'm having trouble formatting my response. Could you try rephrasing your question?"
+
+# --- Local Retrieval ---
+# Passages from the local index attached to each question sent to the model
+CONTEXT_PASSAGES = 3
+# A passage answers a question on its own only if it contains every query term
+# and its title carries at least half of their weight (e.g. "what is chloride")
+LOCAL_ANSWER_MIN_COVERAGE = 1.0
+LOCAL_ANSWER_MIN_TITLE_COVERAGE = 0.5
+# Diagram captions describe an image rather than answer a question
+LOCAL_ANSWER_KINDS = ('section', 'species', 'action')
 
 # --- Client Initialization ---
-client = genai.Client(
-    vertexai=True,
-    project=PROJECT_ID,
-    location=LOCATION,
-)
+# The genai SDK takes most of worker boot time to import, so it loads on the first chat request
+@lru_cache(maxsize=1)
+def get_genai_client():
+    """Create the Vertex AI client on first use."""
+    from google import genai
+    from google.genai import types
+
+    logger.info("Initializing Vertex AI client")
+    return genai.Client(
+        vertexai=True,
+        project=PROJECT_ID,
+        location=LOCATION,
+        http_options=types.HttpOptions(timeout=REQUEST_TIMEOUT_SECONDS * 1000),
+    )
 
 # --- Tool and System Instruction Configuration ---
 data_store_path = ("projects/blue-thumb-dashboard/locations/us/collections/default_collection/dataStores/blue-thumb-context-docs-ds_1751833049776")
-grounding_tool = types.Tool(retrieval=types.Retrieval(vertex_ai_search=types.VertexAISearch(datastore=data_store_path)))
-google_search_tool = types.Tool(google_search=types.GoogleSearch())
 
 system_instruction = """You are a helpful stream health expert. Your main goal is to answer questions about water quality and aquatic ecosystems. 
                         Base your answers on the provided documents from the data store first. If you cannot find the answer in the documents, use Google Search. 
                         All answers should be framed through the lens of stream health. IMPORTANT: Keep responses concise and to the point, ideally 2-4 sentences. 
                         Avoid unnecessary detail unless asked. Always end with complete sentences - never cut off mid-thought."""
 
+@lru_cache(maxsize=1)
+def get_generation_config():
+    """Build generation settings and grounding tools on first use."""
+    from google.genai import types
+
+    grounding_tool = types.Tool(retrieval=types.Retrieval(vertex_ai_search=types.VertexAISearch(datastore=data_store_path)))
+    google_search_tool = types.Tool(google_search=types.GoogleSearch())
+
+    return types.GenerateContentConfig(
+        temperature=TEMPERATURE,
+        top_p=1,
+        max_output_tokens=MAX_TOKENS,
+        safety_settings=[
+            types.SafetySetting(
+                category="HARM_CATEGORY_HATE_SPEECH",
+                threshold="BLOCK_ONLY_HIGH"
+            ),
+            types.SafetySetting(
+                category="HARM_CATEGORY_DANGEROUS_CONTENT",
+                threshold="BLOCK_ONLY_HIGH"
+            ),
+            types.SafetySetting(
+                category="HARM_CATEGORY_SEXUALLY_EXPLICIT",
+                threshold="BLOCK_ONLY_HIGH"
+            ),
+            types.SafetySetting(
+                category="HARM_CATEGORY_HARASSMENT",
+                threshold="BLOCK_ONLY_HIGH"
+            )
+        ],
+        tools=[grounding_tool, google_search_tool],
+        system_instruction=[types.Part.from_text(text=system_instruction)],
+    )
+
+@lru_cache(maxsize=1)
+def get_chat_index():
+    """Load the local passage index built by prepare_chatbot_data."""
+    from data_processing.chatbot_index import load_index
+
+    return load_index()
+
+@lru_cache(maxsize=1)
+def get_answer_cache():
+    """Return the process-wide cache of answers by normalized question."""
+    return AnswerCache(
+        max_entries=int(os.environ.get('CHAT_CACHE_SIZE', DEFAULT_MAX_ENTRIES)),
+        ttl=float(os.environ.get('CHAT_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS)),
+    )
+
+def build_prompt(message, passages):
+    """Put the question after the local passages most relevant to it."""
+    context = '\n\n'.join(f"[{passage['title']}]\n{passage['text']}" for passage in passages)
+    return f"Dashboard documents that may help:\n\n{context}\n\nQuestion: {message}"
+
+def generate_response(message, passages=()):
+    """Ask the model one question and return the answer text, or a fallback message on failure."""
+    logger.info(f"Received user query: {message}")
+
+    try:
+        generation_config = get_generation_config()
+
+        # Generate content using the new client
+        response = get_genai_client().models.generate_content(
+            model=CHAT_MODEL_NAME,
+            contents=[build_prompt(message, passages) if passages else message],
+            config=generation_config,
+        )
+
+        if response.candidates and response.candidates[0].grounding_metadata:
+            logger.info("Response was grounded.")
+        else:
+            logger.info("Response was not grounded.")
+
+        assistant_message = response.text
+
+        # Check for truncation
+        if response.candidates and response.candidates[0].finish_reason.name == "MAX_TOKENS":
+            assistant_message += "\n\n[Response truncated due to length. Ask me for more specific details if needed.]"
+
+    except ValueError:
+        assistant_message = FORMAT_ERROR_MESSAGE
+        logger.warning(
+            f"Response object exists but couldn't extract text content."
+        )
+    except Exception as e:
+        assistant_message = ERROR_MESSAGE
+        logger.error(f"Error in chat response: {e}", exc_info=True)
+
+    logger.info(f"Sending assistant response: {assistant_message}")
+    return assistant_message
+
+def answer_instantly(message):
+    """Return a cached answer or a confident local match for message, or None if the model is needed."""
+    from data_processing.chatbot_index import summarize_passage
+
+    start = time.perf_counter()
+    answer = get_answer_cache().get(message)
+    source = 'cache'
+    if answer is None:
+        source = 'local'
+        for match in get_chat_index().search(message):
+            if (match['kind'] in LOCAL_ANSWER_KINDS and match['coverage'] >= LOCAL_ANSWER_MIN_COVERAGE
+                    and match['title_coverage'] >= LOCAL_ANSWER_MIN_TITLE_COVERAGE):
+                answer = summarize_passage(match)
+                break
+    if not answer:
+        return None
+
+    chat_answer_stats.record(source, time.perf_counter() - start)
+    logger.info(f"Answered from {source}: {message}")
+    return answer
+
+def answer_from_model(message):
+    """Ask the model with the top local passages attached, caching a successful answer."""
+    start = time.perf_counter()
+    passages = get_chat_index().search(message, limit=CONTEXT_PASSAGES)
+    answer = generate_response(message, passages)
+    if answer not in (ERROR_MESSAGE, FORMAT_ERROR_MESSAGE):
+        get_answer_cache().put(message, answer)
+    chat_answer_stats.record('model', time.perf_counter() - start)
+    return answer
+
+# Each worker process gets its own pool on first use, after any gunicorn fork
+@lru_cache(maxsize=1)
+def get_chat_queue():
+    """Return the process-wide background queue that answers chat questions."""
+    return queue_from_environment(answer_from_model)
+
 def format_message(text, is_user=True, timestamp=None, is_typing=False):
     """Format a chat message with appropriate styling and an avatar."""
     if timestamp is None:
@@ -76,133 +231,118 @@ def format_message(text, is_user=True, timestamp=None, is_typing=False):
     ])
 
 def register_chatbot_callbacks(app):
-    @app.callback(
+    # Panel toggling runs in the browser (assets/clientside_callbacks.js)
+    app.clientside_callback(
+        ClientsideFunction(namespace='chatbot', function_name='toggleChatCollapse'),
         Output({"type": "chat-collapse", "tab": MATCH}, "is_open"),
         [Input({"type": "chat-toggle", "tab": MATCH}, "n_clicks"),
          Input({"type": "chat-close", "tab": MATCH}, "n_clicks")],
         [State({"type": "chat-collapse", "tab": MATCH}, "is_open")],
         prevent_initial_call=True
     )
-    def toggle_chat_collapse(toggle_clicks, close_clicks, is_open):
-        """Toggle the chat panel open/closed"""
-        if toggle_clicks is None and close_clicks is None:
-            return is_open
-        return not is_open
 
-    @app.callback(
+    app.clientside_callback(
+        ClientsideFunction(namespace='chatbot', function_name='hideChatCallout'),
         Output({'type': 'chat-callout', 'tab': MATCH}, 'style'),
         [Input({'type': 'chat-callout-interval', 'tab': MATCH}, 'n_intervals'),
          Input({"type": "chat-toggle", "tab": MATCH}, "n_clicks")],
         prevent_initial_call=True
     )
-    def hide_chat_callout(n_intervals, n_clicks):
-        """Hide the chat callout after a delay or on click."""
-        return {'display': 'none'}
 
     @app.callback(
         [Output({"type": "chat-messages", "tab": MATCH}, "children", allow_duplicate=True),
          Output({"type": "chat-input", "tab": MATCH}, "value"),
-         Output({'type': 'chat-request-store', 'tab': MATCH}, 'data')],
+         Output({'type': 'chat-request-store', 'tab': MATCH}, 'data'),
+         Output({'type': 'chat-poll-interval', 'tab': MATCH}, 'disabled', allow_duplicate=True)],
         [Input({"type": "chat-submit", "tab": MATCH}, "n_clicks"),
          Input({"type": "chat-input", "tab": MATCH}, "n_submit")],
         [State({"type": "chat-input", "tab": MATCH}, "value"),
-         State({"type": "chat-messages", "tab": MATCH}, "children")],
+         State({"type": "chat-messages", "tab": MATCH}, "children"),
+         State({'type': 'chat-request-store', 'tab': MATCH}, 'data')],
         prevent_initial_call=True
     )
     def display_user_message_and_trigger_response(
-        n_clicks, n_submit, message, existing_messages
+        n_clicks, n_submit, message, existing_messages, previous_request
     ):
         """
-        Display the user's message immediately and trigger the AI response.
+        Display the user's message immediately and answer it from the cache or local
+        index, or queue it for a background answer from the model.
         """
         if (n_clicks is None and n_submit is None) or not message:
-            return existing_messages or [], "", dash.no_update
+            return existing_messages or [], "", dash.no_update, dash.no_update
 
         if existing_messages is None:
             existing_messages = []
 
+        queue = get_chat_queue()
+
+        # A new question replaces one still being answered
+        if previous_request and previous_request.get('job_id') and queue.cancel(previous_request['job_id']):
+            if existing_messages:
+                existing_messages[-1] = format_message("(Stopped to answer your new question.)", is_user=False)
+
         # Add user message
         existing_messages.append(format_message(message, is_user=True))
-        # Add typing indicator
+
+        # Repeated and well-covered questions are answered without the model
+        answer = answer_instantly(message)
+        if answer is not None:
+            existing_messages.append(format_message(answer, is_user=False))
+            return existing_messages, "", None, True
+
+        job_id = queue.submit(message)
+        if job_id is None:
+            existing_messages.append(format_message(BUSY_MESSAGE, is_user=False))
+            return existing_messages, "", None, True
+
+        # Add typing indicator, replaced once the poll finds the answer
         existing_messages.append(format_message("", is_user=False, is_typing=True))
+        request_data = {'job_id': job_id, 'instance': queue.instance_id, 'submitted': time.time()}
 
-        # Store the user's message to trigger the next callback
-        request_data = {'message': message}
-        
-        return existing_messages, "", request_data
+        return existing_messages, "", request_data, False
 
     @app.callback(
-        Output({"type": "chat-messages", "tab": MATCH}, "children", allow_duplicate=True),
-        Input({'type': 'chat-request-store', 'tab': MATCH}, 'data'),
-        State({"type": "chat-messages", "tab": MATCH}, "children"),
+        [Output({"type": "chat-messages", "tab": MATCH}, "children", allow_duplicate=True),
+         Output({'type': 'chat-poll-interval', 'tab': MATCH}, 'disabled', allow_duplicate=True)],
+        Input({'type': 'chat-poll-interval', 'tab': MATCH}, 'n_intervals'),
+        [State({'type': 'chat-request-store', 'tab': MATCH}, 'data'),
+         State({"type": "chat-messages", "tab": MATCH}, "children")],
         prevent_initial_call=True
     )
-    def fetch_assistant_response(request_data, existing_messages):
+    def fetch_assistant_response(n_intervals, request_data, existing_messages):
         """
-        Fetch the AI response and update the chat, replacing the indicator.
+        Poll the background job and replace the typing indicator once it has an answer.
         """
-        if not request_data or 'message' not in request_data:
-            return dash.no_update
-
-        message = request_data['message']
-        logger.info(f"Received user query: {message}")
-
-        try:
-            # Configure generation settings
-            generation_config = types.GenerateContentConfig(
-                temperature=TEMPERATURE,
-                top_p=1,
-                max_output_tokens=MAX_TOKENS,
-                safety_settings=[
-                    types.SafetySetting(
-                        category="HARM_CATEGORY_HATE_SPEECH",
-                        threshold="BLOCK_ONLY_HIGH"
-                    ),
-                    types.SafetySetting(
-                        category="HARM_CATEGORY_DANGEROUS_CONTENT",
-                        threshold="BLOCK_ONLY_HIGH"
-                    ),
-                    types.SafetySetting(
-                        category="HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                        threshold="BLOCK_ONLY_HIGH"
-                    ),
-                    types.SafetySetting(
-                        category="HARM_CATEGORY_HARASSMENT",
-                        threshold="BLOCK_ONLY_HIGH"
-                    )
-                ],
-                tools=[grounding_tool, google_search_tool],
-                system_instruction=[types.Part.from_text(text=system_instruction)],
-            )
+        if not request_data or not request_data.get('job_id'):
+            return dash.no_update, True
 
-            # Generate content using the new client
-            response = client.models.generate_content(
-                model=CHAT_MODEL_NAME,
-                contents=[message],
-                config=generation_config,
-            )
+        queue = get_chat_queue()
+        status = queue.status(request_data['job_id'])
 
-            if response.candidates and response.candidates[0].grounding_metadata:
-                logger.info("Response was grounded.")
+        if status is None:
+            if request_data.get('instance', queue.instance_id) != queue.instance_id:
+                # Another instance took the question and its answer is not shared with this one
+                logger.warning(f"Chat job {request_data['job_id']} was polled on another instance; "
+                               "chat needs a single instance or session affinity")
+                status = {'state': FAILED, 'text': OTHER_INSTANCE_MESSAGE}
+            # Unknown here: another worker's job whose answer has not been saved yet
+            elif time.time() - request_data.get('submitted', 0) <= queue.timeout:
+                return dash.no_update, False
             else:
-                logger.info("Response was not grounded.")
-
-            assistant_message = response.text
+                status = {'state': TIMED_OUT, 'text': None}
+        elif status['state'] not in FINAL_STATES:
+            return dash.no_update, False
+        elif status['state'] == CANCELLED:
+            return dash.no_update, True
 
-            # Check for truncation
-            if response.candidates and response.candidates[0].finish_reason.name == "MAX_TOKENS":
-                assistant_message += "\n\n[Response truncated due to length. Ask me for more specific details if needed.]"
-
-        except ValueError:
-            assistant_message = "I received your question but I'm having trouble formatting my response. Could you try rephrasing your question?"
-            logger.warning(
-                f"Response object exists but couldn't extract text content."
-            )
-        except Exception as e:
-            assistant_message = "I apologize, but I'm having trouble responding right now. Please try again."
-            logger.error(f"Error in chat response: {e}", exc_info=True)
-            
-        logger.info(f"Sending assistant response: {assistant_message}")
+        if status['state'] == DONE:
+            assistant_message = status['text']
+        elif status['state'] == TIMED_OUT:
+            assistant_message = TIMEOUT_MESSAGE
+        elif status['text']:
+            assistant_message = status['text']
+        else:
+            assistant_message = ERROR_MESSAGE
 
         # Replace the typing indicator with the actual response
         if existing_messages and len(existing_messages) > 0:
@@ -210,32 +350,11 @@ def register_chatbot_callbacks(app):
                 assistant_message, is_user=False
             )
 
-        return existing_messages
+        return existing_messages, True
 
     # This clientside callback handles auto-scrolling
     app.clientside_callback(
-        """
-        function(children) {
-            // Give a brief moment for the DOM to update
-            setTimeout(function() {
-                try {
-                    const elements = document.querySelectorAll('.chat-messages-container');
-                    // Find the one visible element and scroll it
-                    for (let i = 0; i < elements.length; i++) {
-                        const element = elements[i];
-                        // offsetParent is null for hidden elements
-                        if (element.offsetParent !== null) {
-                            element.scrollTop = element.scrollHeight;
-                            break; // Exit after scrolling the first visible one
-                        }
-                    }
-                } catch (e) {
-                    console.error("Error scrolling chat:", e);
-                }
-            }, 50);
-            return window.dash_clientside.no_update;
-        }
-        """,
+        ClientsideFunction(namespace='chatbot', function_name='scrollToLatestMessage'),
         # A dummy output is required for clientside callbacks
         Output({'type': 'chat-scroll-store', 'tab': MATCH}, 'data'),
         Input({'type': 'chat-messages', 'tab': MATCH}, 'children'),
@@ -3,10 +3,11 @@ Callbacks for habitat assessment visualization and interaction.
 """
 
 import dash
-import pandas as pd
-from dash import Input, Output, State, dcc
+from dash import ClientsideFunction, Input, Output, State
 
+from database.request_context import request_scoped
 from utils import get_sites_with_data, setup_logging
+from visualizations.figure_cache import get_cached_entry
 
 from .helper_functions import create_empty_state, create_error_state
 from .tab_utilities import create_habitat_display
@@ -16,32 +17,26 @@ logger = setup_logging("habitat_callbacks", category="callbacks")
 def register_habitat_callbacks(app):
     """Register callbacks for habitat data exploration and visualization."""
     
-    # State persistence
-    @app.callback(
+    # State persistence runs in the browser (assets/clientside_callbacks.js)
+    app.clientside_callback(
+        ClientsideFunction(namespace='habitat', function_name='saveHabitatState'),
         Output('habitat-tab-state', 'data'),
         Input('habitat-site-dropdown', 'value'),
         [State('habitat-tab-state', 'data')],
         prevent_initial_call=True
     )
-    def save_habitat_state(selected_site, current_state):
-        """Preserve site selection between tab switches."""
-        if selected_site is not None:
-            logger.info(f"Saving habitat state: {selected_site}")
-            return {'selected_site': selected_site}
-        else:
-            # Maintain state when dropdown cleared
-            return current_state or {'selected_site': None}
     
     # Site selection
     @app.callback(
         [Output('habitat-site-dropdown', 'options'),
          Output('habitat-site-dropdown', 'value', allow_duplicate=True)],
         [Input('main-tabs', 'active_tab'),
-         Input('navigation-store', 'data')],
+         Input('navigation-store', 'data'),
+         Input('rendered-tabs', 'data')],
         [State('habitat-tab-state', 'data')],
         prevent_initial_call=True
     )
-    def populate_habitat_sites_and_handle_navigation(active_tab, nav_data, habitat_state):
+    def populate_habitat_sites_and_handle_navigation(active_tab, nav_data, rendered_tabs, habitat_state):
         """
         Handle site selection from map clicks and restore saved state.
         
@@ -78,7 +73,7 @@ def register_habitat_callbacks(app):
                     logger.warning(f"Navigation target site '{target_site}' not found in available sites")
             
             # Restore previous state
-            if (trigger_id == 'main-tabs' and habitat_state and habitat_state.get('selected_site') and
+            if (trigger_id in ['main-tabs', 'rendered-tabs'] and habitat_state and habitat_state.get('selected_site') and
                 (not nav_data or not nav_data.get('target_tab'))):
                 saved_site = habitat_state.get('selected_site')
                 if saved_site in sites:
@@ -97,26 +92,27 @@ def register_habitat_callbacks(app):
             return [], dash.no_update
     
     # Content display
-    @app.callback(
+    app.clientside_callback(
+        ClientsideFunction(namespace='habitat', function_name='showHabitatControls'),
         Output('habitat-controls-content', 'style'),
         Input('habitat-site-dropdown', 'value')
     )
-    def show_habitat_controls(selected_site):
-        """Show habitat assessment controls when site is selected."""
-        if selected_site:
-            logger.info(f"Habitat site selected: {selected_site}")
-            return {'display': 'block'}
-        return {'display': 'none'}
     
     @app.callback(
         Output('habitat-content-container', 'children'),
         Input('habitat-site-dropdown', 'value'),
         prevent_initial_call=True
     )
+    @request_scoped
     def update_habitat_content(selected_site):
         """Display habitat assessment metrics and visualizations."""        
         if selected_site:
             try:
+                # Prerendered displays skip the database entirely
+                cached = get_cached_entry('habitat', selected_site)
+                if cached is not None:
+                    return cached['content']
+                
                 logger.info(f"Creating habitat display for {selected_site}")
                 content = create_habitat_display(selected_site)
                 return content
@@ -130,37 +126,3 @@ def register_habitat_callbacks(app):
                 return error_content
         
         return create_empty_state("Select a site above to view habitat assessment data.")
-
-    # Data export
-    @app.callback(
-        Output('habitat-download-component', 'data'),
-        Input('habitat-download-btn', 'n_clicks'),
-        prevent_initial_call=True
-    )
-    def download_habitat_data(n_clicks):
-        """Export habitat assessment data as CSV."""
-        if not n_clicks:
-            return dash.no_update
-        
-        try:
-            logger.info("Downloading habitat data CSV")
-            processed_habitat_path = 'data/processed/processed_habitat_data.csv'
-            habitat_df = pd.read_csv(processed_habitat_path)
-            
-            if habitat_df.empty:
-                logger.warning("No habitat data found in processed CSV")
-                return dash.no_update
-            
-            filename = f"blue_thumb_habitat_data.csv"
-            logger.info(f"Successfully prepared habitat data export with {len(habitat_df)} records")
-            
-            return dcc.send_data_frame(
-                habitat_df.to_csv,
-                filename,
-                index=False
-            )
-                
-        except Exception as e:
-            logger.error(f"Error downloading habitat data: {e}")
-            return dash.no_update
-
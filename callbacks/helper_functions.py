@@ -50,6 +50,17 @@ def create_error_state(title, message, error_details=None):
     
     return html.Div(error_components, className="mt-3")
 
+def is_error_state(component):
+    """Return True if a component was built by create_error_state."""
+    children = getattr(component, 'children', None)
+    return (
+        isinstance(component, html.Div)
+        and isinstance(children, list)
+        and bool(children)
+        and isinstance(children[0], html.H4)
+        and children[0].className == "text-danger"
+    )
+
 def create_loading_state(message="Loading data..."):
     """Show loading feedback during data fetching and processing."""
     return html.Div([
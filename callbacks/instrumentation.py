@@ -0,0 +1,209 @@
+"""
+Latency, error, payload and SQL metrics for server-side Dash callbacks.
+
+Every registered callback is wrapped once after registration, and the collected
+metrics are rendered in the Prometheus text format for the /metrics route.
+Setting CALLBACK_PROFILING=always profiles every call with cProfile, and
+CALLBACK_PROFILING=header profiles only requests sending X-Profile-Callback.
+"""
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+
+from dash.exceptions import PreventUpdate
+from flask import has_request_context, request
+
+from database.request_context import count_queries
+from utils import setup_logging
+
+logger = setup_logging("instrumentation", category="callbacks")
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_DIR = os.environ.get('CALLBACK_PROFILE_DIR', os.path.join(project_root, 'logs', 'profiles'))
+PROFILE_HEADER = 'X-Profile-Callback'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PAYLOAD_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6)
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        total = 0
+        for count in self.counts:
+            total += count
+            yield total
+
+class CallbackStats:
+    """Metrics for one callback."""
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.payload = Histogram(PAYLOAD_BUCKETS)
+        self.errors = 0
+        self.prevented = 0
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+
+class CallbackMetrics:
+    """Thread-safe registry of per-callback metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, callback, seconds, payload_bytes=None, error=False, prevented=False,
+               sql_queries=0, sql_seconds=0.0):
+        with self._lock:
+            stats = self._stats.setdefault(callback, CallbackStats())
+            stats.latency.observe(seconds)
+            if payload_bytes is not None:
+                stats.payload.observe(payload_bytes)
+            stats.errors += error
+            stats.prevented += prevented
+            stats.sql_queries += sql_queries
+            stats.sql_seconds += sql_seconds
+
+    def get(self, callback):
+        with self._lock:
+            return self._stats.get(callback)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def render_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            stats = sorted(self._stats.items())
+            lines = []
+            _render_histogram(lines, 'dash_callback_duration_seconds', 'Callback wall time.',
+                              [(name, s.latency) for name, s in stats])
+            _render_histogram(lines, 'dash_callback_response_bytes', 'Serialized callback response size.',
+                              [(name, s.payload) for name, s in stats])
+            _render_counter(lines, 'dash_callback_errors_total', 'Callbacks that raised an exception.',
+                            [(name, s.errors) for name, s in stats])
+            _render_counter(lines, 'dash_callback_prevented_total', 'Callbacks that raised PreventUpdate.',
+                            [(name, s.prevented) for name, s in stats])
+            _render_counter(lines, 'dash_callback_sql_queries_total', 'SQL statements run by callbacks.',
+                            [(name, s.sql_queries) for name, s in stats])
+            _render_counter(lines, 'dash_callback_sql_seconds_total', 'Time spent executing and fetching SQL.',
+                            [(name, s.sql_seconds) for name, s in stats])
+        return '\n'.join(lines) + '\n'
+
+def _label(callback):
+    escaped = callback.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'callback="{escaped}"'
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _render_counter(lines, name, help_text, samples):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for callback, value in samples:
+        lines.append(f"{name}{{{_label(callback)}}} {_format_value(value)}")
+
+def _render_histogram(lines, name, help_text, samples):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for callback, histogram in samples:
+        label = _label(callback)
+        bounds = [repr(float(bound)) for bound in histogram.buckets] + ['+Inf']
+        for bound, count in zip(bounds, histogram.cumulative_counts()):
+            lines.append(f'{name}_bucket{{{label},le="{bound}"}} {count}')
+        lines.append(f"{name}_sum{{{label}}} {_format_value(float(histogram.sum))}")
+        lines.append(f"{name}_count{{{label}}} {histogram.count}")
+
+callback_metrics = CallbackMetrics()
+
+# cProfile cannot run in several threads at once, so only one call is profiled at a time
+_profile_lock = threading.Lock()
+
+def _profiling_requested():
+    mode = os.environ.get('CALLBACK_PROFILING', '').lower()
+    if mode == 'always':
+        return True
+    return mode == 'header' and has_request_context() and PROFILE_HEADER in request.headers
+
+def _save_profile(profiler, callback):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{callback}-{time.strftime('%Y%m%d-%H%M%S')}-{time.monotonic_ns()}.prof")
+    profiler.dump_stats(path)
+
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(15)
+    logger.info(f"Profiled {callback} to {path}\n{summary.getvalue()}")
+
+def instrument(func, callback, metrics=callback_metrics):
+    """Wrap a Dash dispatch function so every call records its metrics."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = None
+        if _profiling_requested() and _profile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+
+        error = prevented = False
+        result = None
+        start = time.perf_counter()
+        try:
+            with count_queries() as counter:
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    result = func(*args, **kwargs)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+            return result
+        except PreventUpdate:
+            prevented = True
+            raise
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.record(
+                callback, elapsed,
+                payload_bytes=len(result) if isinstance(result, (str, bytes)) else None,
+                error=error, prevented=prevented,
+                sql_queries=counter.count, sql_seconds=counter.seconds,
+            )
+            if profiler is not None:
+                try:
+                    _save_profile(profiler, callback)
+                finally:
+                    _profile_lock.release()
+
+    wrapper.instrumented = True
+    return wrapper
+
+def instrument_callbacks(app, metrics=callback_metrics):
+    """Wrap every server-side callback registered on the app. Safe to call more than once."""
+    wrapped = 0
+    for spec in app.callback_map.values():
+        func = spec.get('callback')
+        if func is None or getattr(func, 'instrumented', False):
+            continue
+        spec['callback'] = instrument(func, func.__name__, metrics)
+        wrapped += 1
+    logger.info(f"Instrumented {wrapped} callbacks")
+    return wrapped
@@ -4,8 +4,9 @@ Interactive map visualization and parameter exploration callbacks.
 
 import dash
 import plotly.graph_objects as go
-from dash import Input, Output, State
+from dash import ClientsideFunction, Input, Output, State
 
+from database.request_context import request_scoped
 from utils import setup_logging
 from visualizations.map_viz import (
     add_parameter_colors_to_map,
@@ -25,26 +26,15 @@ logger = setup_logging("overview_callbacks", category="callbacks")
 def register_overview_callbacks(app):
     """Register callbacks for interactive map exploration and filtering."""
     
-    # State persistence
-    @app.callback(
+    # State persistence runs in the browser (assets/clientside_callbacks.js)
+    app.clientside_callback(
+        ClientsideFunction(namespace='overview', function_name='saveOverviewTabState'),
         Output('overview-tab-state', 'data'),
         [Input('parameter-dropdown', 'value'),
          Input('active-sites-only-toggle', 'value')],
         [State('overview-tab-state', 'data')],
         prevent_initial_call=True
     )
-    def save_overview_tab_state(parameter_value, active_sites_toggle, current_state):
-        """Preserve user selections between tab switches."""
-        try:
-            updated_state = current_state.copy() if current_state else {}
-            updated_state['selected_parameter'] = parameter_value
-            updated_state['active_sites_only'] = active_sites_toggle
-            
-            return updated_state
-            
-        except Exception as e:
-            logger.error(f"Error saving overview tab state: {e}")
-            return current_state or {'selected_parameter': None, 'active_sites_only': False}
     
     # Map initialization
     @app.callback(
@@ -56,6 +46,7 @@ def register_overview_callbacks(app):
         [Input('main-tabs', 'active_tab')],
         [State('overview-tab-state', 'data')]
     )
+    @request_scoped
     def load_basic_map_on_tab_open(active_tab, overview_state):
         """
         Initialize map visualization with saved state.
@@ -142,6 +133,7 @@ def register_overview_callbacks(app):
         [State('site-map-graph', 'figure')],
         prevent_initial_call=True
     )
+    @request_scoped
     def update_map_with_parameter_selection(parameter_value, active_only_toggle, current_figure):
         """
         Update map visualization based on parameter selection and filtering.
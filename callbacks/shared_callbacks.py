@@ -3,57 +3,99 @@ Core callbacks shared across the dashboard.
 """
 
 import dash
-from dash.dependencies import Input, Output, State
+from dash.dependencies import ALL, ClientsideFunction, Input, Output, State
 
+from layouts.lazy_tabs import get_tab_content
 from utils import setup_logging
 
+from .helper_functions import create_error_state
+
 logger = setup_logging("shared_callbacks", category="callbacks")
 
 def register_shared_callbacks(app):
     """Register shared callbacks for modals and navigation."""
     
-    # Modal controls
-    @app.callback(
-        Output("attribution-modal", "is_open"),
-        [Input("attribution-link", "n_clicks"), 
-        Input("close-attribution", "n_clicks")],
-        [State("attribution-modal", "is_open")]
-    )
-    def toggle_attribution_modal(n1, n2, is_open):
-        """Toggle attribution modal visibility."""
-        if n1 or n2:
-            return not is_open
-        return is_open
+    # Modal controls run in the browser (assets/clientside_callbacks.js)
+    for modal_id, link_id, close_id in [
+        ("attribution-modal", "attribution-link", "close-attribution"),
+        ("image-credits-modal", "image-credits-link", "close-image-credits"),
+    ]:
+        app.clientside_callback(
+            ClientsideFunction(namespace='shared', function_name='toggleModal'),
+            Output(modal_id, "is_open"),
+            [Input(link_id, "n_clicks"), 
+            Input(close_id, "n_clicks")],
+            [State(modal_id, "is_open")]
+        )
 
+    # Chart point budgets scale with the browser width
+    app.clientside_callback(
+        ClientsideFunction(namespace='shared', function_name='recordViewportWidth'),
+        Output('viewport-width', 'data'),
+        Input('main-tabs', 'active_tab')
+    )
+    
+    # Lazy tab rendering
     @app.callback(
-        Output("image-credits-modal", "is_open"),
-        [Input("image-credits-link", "n_clicks"), 
-        Input("close-image-credits", "n_clicks")],
-        [State("image-credits-modal", "is_open")]
+        [Output({'type': 'lazy-tab-content', 'tab': ALL}, 'children'),
+         Output('rendered-tabs', 'data')],
+        Input('main-tabs', 'active_tab'),
+        State('rendered-tabs', 'data'),
+        prevent_initial_call=True
     )
-    def toggle_image_credits_modal(n1, n2, is_open):
-        """Toggle image credits modal visibility."""
-        if n1 or n2:
-            return not is_open
-        return is_open
+    def render_active_tab(active_tab, rendered_tabs):
+        """
+        Render tab content the first time a tab is opened in this page load.
+        
+        Updating rendered-tabs lets navigation callbacks run once the tab's
+        components exist.
+        """
+        ctx = dash.callback_context
+        tab_ids = [output['id']['tab'] for output in ctx.outputs_list[0]]
+        rendered_tabs = rendered_tabs or []
+        
+        if not active_tab or active_tab in rendered_tabs:
+            return [dash.no_update] * len(tab_ids), dash.no_update
+        
+        try:
+            content = get_tab_content(active_tab)
+        except Exception as e:
+            logger.error(f"Error rendering {active_tab}: {e}")
+            content = create_error_state(
+                "Error Loading Tab",
+                "Could not load this tab. Please refresh the page.",
+                str(e)
+            )
+        
+        return (
+            [content if tab_id == active_tab else dash.no_update for tab_id in tab_ids],
+            rendered_tabs + [active_tab]
+        )
+    
+    # Overview links live in lazily rendered tabs, so each gets its own callback
+    for link_id in ['chemical-overview-link', 'biological-overview-link', 'habitat-overview-link']:
+        app.clientside_callback(
+            ClientsideFunction(namespace='shared', function_name='returnToOverview'),
+            [Output("main-tabs", "active_tab", allow_duplicate=True),
+             Output("navigation-store", "data", allow_duplicate=True)],
+            Input(link_id, "n_clicks"),
+            prevent_initial_call=True
+        )
 
-    # Map and overview navigation
+    # Map navigation
     @app.callback(
         [Output("main-tabs", "active_tab"),
          Output("navigation-store", "data")],
         [Input("site-map-graph", "clickData"),
-         Input("parameter-dropdown", "value"),
-         Input("chemical-overview-link", "n_clicks"),
-         Input("biological-overview-link", "n_clicks"),
-         Input("habitat-overview-link", "n_clicks")],
+         Input("parameter-dropdown", "value")],
         prevent_initial_call=True
     )
-    def handle_navigation(click_data, current_parameter, chemical_clicks, biological_clicks, habitat_clicks):
+    def handle_navigation(click_data, current_parameter):
         """
-        Route user to appropriate tab based on map clicks and overview links.
+        Route user to appropriate tab based on map clicks.
         
         Extracts site and parameter info from map clicks to navigate to the correct
-        detail tab. Overview links return to the main map view.
+        detail tab.
         """
         ctx = dash.callback_context
         
@@ -62,10 +104,6 @@ def register_shared_callbacks(app):
         
         trigger_id = ctx.triggered[0]['prop_id'].split('.')[0]
         
-        # Return to overview map
-        if trigger_id in ['chemical-overview-link', 'biological-overview-link', 'habitat-overview-link']:
-            return "overview-tab", {'target_tab': None, 'target_site': None}
-        
         # Handle map click navigation
         if trigger_id == 'site-map-graph' and click_data and current_parameter:
             try:
@@ -2,13 +2,14 @@
 Tab-specific visualization and UI components for data exploration.
 """
 
-import dash
 import dash_bootstrap_components as dbc
 from dash import dcc, html
 
+from api.downloads import download_url
 from data_processing.data_queries import (
-    get_fish_dataframe,
-    get_macroinvertebrate_dataframe,
+    get_biological_site_bundle,
+    get_chemical_date_range,
+    site_has_data,
 )
 from layouts.helpers import create_species_gallery
 from layouts.ui_data import (
@@ -28,6 +29,9 @@ from visualizations.chemical_viz import (
     create_all_parameters_view,
     create_time_series_plot,
 )
+from visualizations.downsampling import point_budget
+from visualizations.figure_cache import get_cached_entry
+from visualizations.figure_payload import minimize_figure
 from visualizations.fish_viz import create_fish_metrics_accordion, create_fish_viz
 from visualizations.habitat_viz import (
     create_habitat_metrics_accordion,
@@ -250,35 +254,23 @@ def create_macro_dual_display(item):
         ], style={'min-height': '80px'})
     ], style={'min-height': '400px'})
 
-def create_gallery_navigation_callback(gallery_type):
-    """Enable circular navigation through species galleries."""
-    data = FISH_DATA if gallery_type == 'fish' else MACRO_DATA
+def create_gallery_slides(gallery_type):
+    """
+    Pre-render every species slide so gallery navigation runs in the browser.
     
-    def update_gallery(prev_clicks, next_clicks, current_index):
-        """Update gallery display based on navigation button clicks."""
-        ctx = dash.callback_context
-        
-        if not ctx.triggered:
-            if gallery_type == 'macro':
-                return create_macro_dual_display(data[0]), 0
-            else:
-                return create_species_display(data[0]), 0
-        
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        
-        if f'prev-{gallery_type}-button' in button_id:
-            new_index = (current_index - 1) % len(data)
-        else:
-            new_index = (current_index + 1) % len(data)
-        
-        item = data[new_index]
-        
-        if gallery_type == 'macro':
-            return create_macro_dual_display(item), new_index
-        else:
-            return create_species_display(item), new_index
+    Only the first slide is visible; the clientside callback toggles display styles.
+    """
+    data = FISH_DATA if gallery_type == 'fish' else MACRO_DATA
+    create_display = create_macro_dual_display if gallery_type == 'macro' else create_species_display
     
-    return update_gallery
+    return [
+        html.Div(
+            create_display(item),
+            id={'type': 'gallery-slide', 'gallery': gallery_type, 'index': index},
+            style={'display': 'block' if index == 0 else 'none'}
+        )
+        for index, item in enumerate(data)
+    ]
 
 def create_biological_community_info(selected_community):
     """Display community overview with species gallery and interpretation."""
@@ -293,7 +285,7 @@ def create_biological_community_info(selected_community):
                 ], width=6),
                 
                 dbc.Col([
-                    create_species_gallery(selected_community)
+                    create_species_gallery(selected_community, slides=create_gallery_slides(selected_community))
                 ], width=6, className="d-flex align-items-center"),
             ], className="mb-4"),
             
@@ -317,45 +309,45 @@ def create_biological_community_info(selected_community):
 def create_biological_site_display(selected_community, selected_site):
     """Generate site-specific biological metrics and visualizations."""
     try:
+        if selected_community not in ('fish', 'macro'):
+            return create_error_state(
+                "Invalid Community Type",
+                f"'{selected_community}' is not a valid community type."
+            )
+        
+        community_label = 'fish' if selected_community == 'fish' else 'macroinvertebrate'
+        
+        # Cheap existence probe before fetching any rows
+        if not site_has_data(selected_site, selected_community):
+            return create_empty_state(f"No {community_label} data available for {selected_site}")
+        
+        # Chart and tables share one site-scoped fetch
+        site_data = get_biological_site_bundle(selected_community, selected_site)
+        
         if selected_community == 'fish':
-            site_data = get_fish_dataframe(selected_site)
-            
-            if site_data.empty:
-                return create_empty_state(f"No fish data available for {selected_site}")
-            
-            viz_figure = create_fish_viz(selected_site)
-            metrics_accordion = create_fish_metrics_accordion(selected_site)
+            viz_figure = create_fish_viz(selected_site, fish_df=site_data['summary'])
+            metrics_accordion = create_fish_metrics_accordion(
+                selected_site, site_data['metrics'], site_data['summary']
+            )
             
             download_text = [html.I(className="fas fa-download me-2"), "Download Fish Data"]
             
-        elif selected_community == 'macro':
-            all_macro_data = get_macroinvertebrate_dataframe()
-            
-            if all_macro_data.empty:
-                return create_empty_state("No macroinvertebrate data available in database")
-            
-            site_data = all_macro_data[all_macro_data['site_name'] == selected_site]
-            
-            if site_data.empty:
-                return create_empty_state(f"No macroinvertebrate data available for {selected_site}")
-            
-            viz_figure = create_macro_viz(selected_site)
-            metrics_accordion = create_macro_metrics_accordion(selected_site)
-            
-            download_text = [html.I(className="fas fa-download me-2"), "Download Macroinvertebrate Data"]
-            
         else:
-            return create_error_state(
-                "Invalid Community Type",
-                f"'{selected_community}' is not a valid community type."
+            viz_figure = create_macro_viz(selected_site, macro_df=site_data['summary'])
+            metrics_accordion = create_macro_metrics_accordion(
+                selected_site, site_data['metrics'], site_data['summary']
             )
             
+            download_text = [html.I(className="fas fa-download me-2"), "Download Macroinvertebrate Data"]
+            
         content = html.Div([
             dbc.Row([
                 dbc.Col([
                     dbc.Button(
                         download_text,
                         id="biological-download-btn",
+                        href=download_url(selected_community),
+                        external_link=True,
                         color="success",
                         size="sm",
                         style={'display': 'block'}
@@ -365,7 +357,7 @@ def create_biological_site_display(selected_community, selected_site):
             
             dbc.Row([
                 dbc.Col([
-                    dcc.Graph(figure=viz_figure)
+                    dcc.Graph(figure=minimize_figure(viz_figure))
                 ], width=12)
             ], className="mb-2"),
             
@@ -390,45 +382,78 @@ def create_biological_site_display(selected_community, selected_site):
 # CHEMICAL TAB UTILITIES
 # ===========================================================================================
 
-def create_single_parameter_visualization(df_filtered, parameter, reference_values, highlight_thresholds, site_name=None):
+def filter_chemical_data(df, year_range, selected_months):
+    """Filter chemical data to a year range and, if given, a set of months."""
+    if df.empty:
+        return df
+    
+    df = df[(df['Year'] >= year_range[0]) & (df['Year'] <= year_range[1])]
+    
+    if selected_months:
+        df = df[df['Month'].isin(selected_months)]
+    
+    return df
+
+def _matches_live_render(cached, viewport_width, columns=1):
+    # Series are downsampled to the budget only when longer than it, so the cached
+    # chart matches when neither budget cuts it or both budgets are the same
+    render_budget = cached.get('render_budget', point_budget(None, columns=columns))
+    viewer_budget = point_budget(viewport_width, columns=columns)
+    return cached['points'] <= min(render_budget, viewer_budget) or render_budget == viewer_budget
+
+def get_cached_chemical_view(site_name, parameter, year_range, selected_months, highlight_thresholds,
+                             viewport_width=None):
+    """
+    Return prerendered chemical outputs when the default filters are selected, or None.
+    
+    The point budget depends on the viewer's screen width, so a cached chart is only
+    served when it holds the same points a live render for this viewer would.
+    """
+    if not highlight_thresholds or (selected_months and set(selected_months) != set(range(1, 13))):
+        return None
+    
+    min_year, max_year = get_chemical_date_range()
+    if year_range[0] > min_year or year_range[1] < max_year:
+        return None
+    
+    cached = get_cached_entry('chemical', site_name, parameter)
+    if cached is None:
+        return None
+    
+    if parameter == 'all_parameters':
+        if not _matches_live_render(cached, viewport_width, columns=2):
+            return None
+        return cached['content'], html.Div(), html.Div()
+    
+    if not _matches_live_render(cached, viewport_width):
+        return None
+    explanation, diagram = create_parameter_explanation(parameter)
+    return cached['content'], explanation, diagram
+
+def create_single_parameter_visualization(df_filtered, parameter, reference_values, highlight_thresholds, site_name=None,
+                                          viewport_width=None):
     """Create focused view of a single chemical parameter's trends."""
     try:
         if df_filtered.empty or parameter not in df_filtered.columns:
             empty_state = create_empty_state(f"No {parameter} data available for the selected time period.")
             return empty_state, html.Div(), html.Div()
         
-        parameter_name = get_parameter_name(parameter)
-        
         fig = create_time_series_plot(
             df_filtered, 
             parameter, 
             reference_values,
             y_label=get_parameter_label('chem', parameter),
             highlight_thresholds=highlight_thresholds,
-            site_name=site_name
+            site_name=site_name,
+            viewport_width=viewport_width
         )
         
         graph = dcc.Graph(
-            figure=fig,
+            figure=minimize_figure(fig),
             style={'height': '450px'}
         )
         
-        file_path = f"chemical/{parameter_name.lower().replace(' ', '_')}.md"
-        explanation = load_markdown_content(file_path)
-        
-        if parameter in CHEMICAL_DIAGRAMS:
-            diagram = html.Div([
-                create_image_with_caption(
-                    src=CHEMICAL_DIAGRAMS[parameter],
-                    caption=CHEMICAL_DIAGRAM_CAPTIONS.get(parameter, "")
-                )
-            ], className="d-flex h-100 align-items-center justify-content-center", 
-            style={'height': '100%'})
-        else:
-            diagram = html.Div(
-                "No diagram available for this parameter.", 
-                className="d-flex h-100 align-items-center justify-content-center"
-            )
+        explanation, diagram = create_parameter_explanation(parameter)
         
         return graph, explanation, diagram
         
@@ -441,17 +466,43 @@ def create_single_parameter_visualization(df_filtered, parameter, reference_valu
         )
         return error_state, html.Div(), html.Div()
 
-def create_all_parameters_visualization(df_filtered, key_parameters, reference_values, highlight_thresholds, site_name=None):
+def create_parameter_explanation(parameter):
+    """Build the explanation text and diagram shown beside a single parameter chart."""
+    parameter_name = get_parameter_name(parameter)
+    file_path = f"chemical/{parameter_name.lower().replace(' ', '_')}.md"
+    explanation = load_markdown_content(file_path)
+    
+    if parameter in CHEMICAL_DIAGRAMS:
+        diagram = html.Div([
+            create_image_with_caption(
+                src=CHEMICAL_DIAGRAMS[parameter],
+                caption=CHEMICAL_DIAGRAM_CAPTIONS.get(parameter, "")
+            )
+        ], className="d-flex h-100 align-items-center justify-content-center", 
+        style={'height': '100%'})
+    else:
+        diagram = html.Div(
+            "No diagram available for this parameter.", 
+            className="d-flex h-100 align-items-center justify-content-center"
+        )
+    
+    return explanation, diagram
+
+def create_all_parameters_visualization(df_filtered, key_parameters, reference_values, highlight_thresholds, site_name=None,
+                                        viewport_width=None):
     """Create comprehensive view of all chemical parameters."""
     try:
         if df_filtered.empty:
             empty_state = create_empty_state("No data available for the selected time period.")
             return empty_state, html.Div(), html.Div()
         
-        fig = create_all_parameters_view(df_filtered, key_parameters, reference_values, highlight_thresholds, site_name=site_name)
+        fig = create_all_parameters_view(
+            df_filtered, key_parameters, reference_values, highlight_thresholds,
+            site_name=site_name, viewport_width=viewport_width
+        )
         
         graph = dcc.Graph(
-            figure=fig,
+            figure=minimize_figure(fig),
             style={'height': '800px'},  
             config={'displayModeBar': True, 'toImageButtonOptions': {'width': 1200, 'height': 800}}
         )
@@ -479,7 +530,7 @@ def create_habitat_display(site_name):
         
         display = html.Div([
             dcc.Graph(
-                figure=habitat_fig,
+                figure=minimize_figure(habitat_fig),
                 config={'displayModeBar': False},
                 style={'height': '500px'}
             ),
@@ -283,6 +283,11 @@ def survey123_daily_sync(request):
             else:
                 logger.info(f"Site classification updated: {classification_result['active_count']} active, {classification_result['historic_count']} historic")
             
+            # Refresh planner statistics and upload a compacted, integrity-checked file;
+            # chemical_processor has already put the repository root on the path
+            from database.db_optimize import optimize_database
+            optimization = optimize_database(temp_db.name)
+            
             if not db_manager.upload_database(temp_db.name):
                 raise Exception("Failed to upload updated database")
         
@@ -307,6 +312,13 @@ def survey123_daily_sync(request):
                 'historic_count': classification_result.get('historic_count', 0)
             }
         
+        result['database_optimization'] = {
+            'size_before': optimization['size_before'],
+            'size_after': optimization['size_after'],
+            'page_size': optimization['page_size'],
+            'quick_check': optimization['quick_check'][0]
+        }
+        
         logger.info(f"Sync completed successfully: {result}")
         return result
         
@@ -0,0 +1,30 @@
+"""
+Logging levels and sampling configuration for the Blue Thumb Dashboard.
+
+Levels can be overridden per category with environment variables such as
+LOG_LEVEL_DATABASE=WARNING, or globally with LOG_LEVEL.
+"""
+
+import os
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+DEFAULT_LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+
+# Categories match the logs/<category>/ directories
+CATEGORY_LOG_LEVELS = {
+    'callbacks': DEFAULT_LOG_LEVEL,
+    'database': DEFAULT_LOG_LEVEL,
+    'general': DEFAULT_LOG_LEVEL,
+    'processing': DEFAULT_LOG_LEVEL,
+    'utils': DEFAULT_LOG_LEVEL,
+    'visualization': DEFAULT_LOG_LEVEL,
+}
+
+# High-frequency call sites log one in every N records
+HIGH_FREQUENCY_SAMPLE_RATE = int(os.environ.get('LOG_SAMPLE_RATE', '20'))
+
+def get_category_log_level(category):
+    """Resolve the log level name for a category, honoring environment overrides."""
+    level = os.environ.get(f'LOG_LEVEL_{category.upper()}') or CATEGORY_LOG_LEVELS.get(category, DEFAULT_LOG_LEVEL)
+    return level.upper()
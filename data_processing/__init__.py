@@ -14,7 +14,7 @@ _project_root = os.path.dirname(_current_dir)
 if _project_root not in sys.path:
     sys.path.insert(0, _project_root)
 
-from utils import setup_logging
+from utils import sampled, setup_logging
 
 # Re-export for easy access
-__all__ = ['setup_logging']
+__all__ = ['sampled', 'setup_logging']
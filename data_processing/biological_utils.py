@@ -2,9 +2,11 @@
 Shared utilities for validating, inserting, and cleaning biological data.
 """
 
+import numpy as np
 import pandas as pd
 
 from data_processing import setup_logging
+from data_processing.data_loader import bulk_insert
 
 # Configure logging
 logger = setup_logging("biological_utils", category="processing")
@@ -38,15 +40,31 @@ def validate_collection_event_data(df, grouping_columns, required_columns=None):
     logger.debug(f"Data validation passed for {len(df)} rows")
     return True
 
-def insert_collection_events(cursor, df, table_name, grouping_columns, column_mapping):
+def get_site_id_map(cursor):
+    """Return {site_name: site_id} for every site, so events resolve sites without a query each."""
+    cursor.execute("SELECT site_name, site_id FROM sites")
+    return dict(cursor.fetchall())
+
+def _event_mapping_keys(events, grouping_columns):
+    """Key events the way child records look them up: sample_id for fish, (sample_id, habitat) for macro."""
+    if len(grouping_columns) == 2 and 'sample_id' in grouping_columns:
+        return list(events['sample_id'])
+    if len(grouping_columns) == 3 and 'habitat' in grouping_columns:
+        return list(zip(events['sample_id'], events['habitat']))
+    return list(events[grouping_columns].itertuples(index=False, name=None))
+
+def insert_collection_events(cursor, df, table_name, grouping_columns, column_mapping, id_column='event_id'):
     """
     Insert biological collection events with proper site relationships.
     
     Workflow:
     1. Validate input data structure
-    2. Look up site_id for each event
+    2. Resolve site_id for every event from one site lookup
     3. Map DataFrame columns to database schema
-    4. Create event_id mapping for child records
+    4. Assign event ids up front and insert all events with one executemany
+    
+    Events that violate a table constraint are skipped, as are events whose
+    site is missing.
     
     Returns dict mapping sample keys to event_ids:
     - Fish: {sample_id: event_id}
@@ -55,71 +73,45 @@ def insert_collection_events(cursor, df, table_name, grouping_columns, column_ma
     try:
         validate_collection_event_data(df, grouping_columns)
         
-        if df.empty:
-            logger.warning(f"No data to insert into {table_name}")
-            return {}
+        unique_events = df.drop_duplicates(subset=grouping_columns)
+        logger.info(f"Processing {len(unique_events)} unique events for {table_name}")
         
-        event_id_map = {}
-        events_inserted = 0
-        events_skipped = 0
+        site_ids = unique_events['site_name'].map(get_site_id_map(cursor))
+        for site_name in unique_events.loc[site_ids.isna(), 'site_name'].unique():
+            logger.error(f"Site '{site_name}' not found in database. Skipping its events.")
+        events_skipped = int(site_ids.isna().sum())
+        unique_events = unique_events[site_ids.notna()]
         
-        unique_events = df.drop_duplicates(subset=grouping_columns).copy()
-        logger.info(f"Processing {len(unique_events)} unique events for {table_name}")
+        insert_data = pd.DataFrame({'site_id': site_ids[site_ids.notna()].astype(int)})
+        for db_column, df_column in column_mapping.items():
+            if db_column == 'site_id':
+                continue  # Already handled
+            
+            if df_column in unique_events.columns:
+                insert_data[db_column] = unique_events[df_column]
+            else:
+                logger.warning(f"Column '{df_column}' not found in data for {db_column}")
         
-        for _, event_row in unique_events.iterrows():
-            try:
-                site_name = event_row['site_name']
-                cursor.execute("SELECT site_id FROM sites WHERE site_name = ?", (site_name,))
-                site_result = cursor.fetchone()
-                
-                if not site_result:
-                    logger.error(f"Site '{site_name}' not found in database. Skipping event.")
-                    events_skipped += 1
-                    continue
-                
-                site_id = site_result[0]
-                
-                insert_data = {'site_id': site_id}
-                
-                for db_column, df_column in column_mapping.items():
-                    if db_column == 'site_id':
-                        continue  # Already handled
-                    
-                    if df_column in event_row:
-                        insert_data[db_column] = event_row[df_column]
-                    else:
-                        logger.warning(f"Column '{df_column}' not found in data for {db_column}")
-                
-                columns = list(insert_data.keys())
-                placeholders = ', '.join(['?' for _ in columns])
-                columns_str = ', '.join(columns)
-                values = [insert_data[col] for col in columns]
-                
-                sql = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})"
-                cursor.execute(sql, values)
-                event_id = cursor.lastrowid
-                
-                # Create mapping key based on data type (fish vs. macroinvertebrate)
-                if len(grouping_columns) == 2 and 'sample_id' in grouping_columns:
-                    # Fish events are identified by a single sample_id
-                    mapping_key = event_row['sample_id']
-                elif len(grouping_columns) == 3 and 'habitat' in grouping_columns:
-                    # Macroinvertebrate events are unique by sample_id and habitat
-                    mapping_key = (event_row['sample_id'], event_row['habitat'])
-                else:
-                    # Fallback for other biological data types
-                    mapping_key = tuple(event_row[col] for col in grouping_columns)
-                
-                event_id_map[mapping_key] = event_id
-                events_inserted += 1
-                
-            except Exception as e:
-                logger.error(f"Error inserting event for site '{site_name}': {e}")
-                events_skipped += 1
-                continue
+        # Ids are assigned here rather than read back per row, so the whole batch is one
+        # executemany; the range above the current maximum belongs to this batch alone
+        cursor.execute(f"SELECT COALESCE(MAX({id_column}), 0) FROM {table_name}")
+        first_id = cursor.fetchone()[0] + 1
+        event_ids = range(first_id, first_id + len(insert_data))
+        insert_data.insert(0, id_column, list(event_ids))
+        bulk_insert(cursor, table_name, insert_data, or_ignore=True)
+        
+        cursor.execute(f"SELECT {id_column} FROM {table_name} WHERE {id_column} >= ?", (first_id,))
+        inserted_ids = {row[0] for row in cursor.fetchall()}
+        events_skipped += len(insert_data) - len(inserted_ids)
+        
+        event_id_map = {
+            key: event_id
+            for key, event_id in zip(_event_mapping_keys(unique_events, grouping_columns), event_ids)
+            if event_id in inserted_ids
+        }
         
         logger.info(f"Collection events summary for {table_name}:")
-        logger.info(f"  - Inserted: {events_inserted}")
+        logger.info(f"  - Inserted: {len(inserted_ids)}")
         logger.info(f"  - Skipped: {events_skipped}")
         logger.info(f"  - Total event_id mappings: {len(event_id_map)}")
         
@@ -129,6 +121,74 @@ def insert_collection_events(cursor, df, table_name, grouping_columns, column_ma
         logger.error(f"Error in insert_collection_events for {table_name}: {e}")
         raise
 
+def map_event_ids(df, key_columns, event_id_map, id_column='event_id'):
+    """
+    Return the first row of each sample with its event id attached.
+    
+    Samples missing from event_id_map are dropped with a warning. Keys follow
+    insert_collection_events: a single column maps by value, several by tuple.
+    """
+    samples = df.dropna(subset=key_columns).sort_values(key_columns, kind='stable')
+    samples = samples.drop_duplicates(subset=key_columns)
+    
+    if len(key_columns) == 1:
+        ids = samples[key_columns[0]].map(event_id_map)
+    else:
+        ids = pd.Series(list(zip(*(samples[col] for col in key_columns))), index=samples.index).map(event_id_map)
+    
+    missing = samples.loc[ids.isna(), key_columns]
+    if not missing.empty:
+        logger.warning(f"No {id_column} found for {len(missing)} samples, e.g. {missing.iloc[0].to_dict()}")
+    
+    samples = samples[ids.notna()].copy()
+    samples[id_column] = ids[ids.notna()].astype(int)
+    return samples
+
+def melt_metrics(samples, id_column, metric_columns, value_names):
+    """
+    Melt wide metric columns into one row per (id, metric).
+    
+    metric_columns maps each metric name to its source columns, one per entry in
+    value_names. Metrics whose columns are absent are skipped, and rows missing
+    any value are dropped. Rows are ordered by sample, then by metric.
+    """
+    available = {
+        name: columns for name, columns in metric_columns.items()
+        if all(col in samples.columns for col in columns)
+    }
+    if not available or samples.empty:
+        return pd.DataFrame(columns=[id_column, 'metric_name', *value_names])
+    
+    names = list(available)
+    long_df = pd.DataFrame({
+        id_column: np.tile(samples[id_column].to_numpy(), len(names)),
+        'metric_name': np.repeat(names, len(samples)),
+    })
+    for position, value_name in enumerate(value_names):
+        # Column-major flattening lines up with the tile/repeat above
+        source = samples[[columns[position] for columns in available.values()]]
+        long_df[value_name] = source.to_numpy(dtype=object).ravel(order='F')
+    
+    sample_order = np.tile(np.arange(len(samples)), len(names))
+    long_df = long_df.iloc[np.argsort(sample_order, kind='stable')].reset_index(drop=True)
+    long_df[list(value_names)] = long_df[list(value_names)].apply(pd.to_numeric, errors='coerce')
+    return long_df.dropna(subset=list(value_names))
+
+def write_biological_records(cursor, id_column, ids, records):
+    """
+    Replace the child records of a batch of events.
+    
+    Existing rows for the ids are deleted from every table in records, then each
+    table's DataFrame is inserted with one executemany. Returns {table: rows inserted}.
+    """
+    id_params = [(int(event_id),) for event_id in ids]
+    counts = {}
+    for table_name, df in records.items():
+        # Clearing first keeps reloads of the same events idempotent
+        cursor.executemany(f"DELETE FROM {table_name} WHERE {id_column} = ?", id_params)
+        counts[table_name] = bulk_insert(cursor, table_name, df)
+    return counts
+
 def remove_invalid_biological_values(df, invalid_values=None, score_columns=None):
     """
     Remove rows containing known invalid sentinel values (-999, -99).
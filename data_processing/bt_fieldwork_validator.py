@@ -4,6 +4,7 @@ Validates fish collection dates and identifies replicates using Blue Thumb field
 
 import difflib
 
+import numpy as np
 import pandas as pd
 
 from data_processing import setup_logging
@@ -57,35 +58,19 @@ def find_bt_site_match(db_site_name, bt_sites, threshold=0.9):
     else:
         return None
 
-def detect_replicates_by_dates(bt_df, site_name, year):
-    """
-    Find legitimate replicates by checking for multiple collection dates.
-    
-    Detection logic:
-    1. Find matching BT site name
-    2. Check target year ±1 for multiple dates
-    3. Conclude that multiple dates indicate legitimate replicates
-    """
+def match_bt_sites(site_names, bt_df):
+    """Return {site_name: BT site or None}, fuzzy matching each distinct site name only once."""
     if bt_df.empty or 'Site_Clean' not in bt_df.columns:
-        return None
-
-    bt_sites = set(bt_df['Site_Clean'].unique())
-    bt_site_match = find_bt_site_match(site_name, bt_sites)
-    
-    if not bt_site_match:
-        return None
+        bt_sites = set()
+    else:
+        bt_sites = set(bt_df['Site_Clean'].unique())
+    return {site_name: find_bt_site_match(site_name, bt_sites) for site_name in pd.unique(site_names)}
 
-    for check_year in [year, year-1, year+1]:
-        potential_dates = bt_df[
-            (bt_df['Site_Clean'] == bt_site_match) & 
-            (bt_df['Year'] == check_year)
-        ]
-        
-        if len(potential_dates) >= 2:
-            logger.debug(f"Found {len(potential_dates)} dates for {site_name} in {check_year}: date-based replicates")
-            return potential_dates.sort_values('Date_Clean')
-    
-    return None
+def _lookup_bt_dates(bt_sites, years, bt_df):
+    """Return the first BT date in calendar file order for each (BT site, year) pair, NaT when absent."""
+    first_dates = bt_df.drop_duplicates(subset=['Site_Clean', 'Year'])[['Site_Clean', 'Year', 'Date_Clean']]
+    pairs = pd.DataFrame({'Site_Clean': list(bt_sites), 'Year': list(years)})
+    return pairs.merge(first_dates, how='left', on=['Site_Clean', 'Year'])['Date_Clean'].to_numpy()
 
 def correct_collection_dates(fish_df, bt_df=None):
     """
@@ -116,91 +101,42 @@ def correct_collection_dates(fish_df, bt_df=None):
     
     logger.info(f"Found {len(mismatched_records)} records with year/date mismatches")
     
-    if bt_df.empty or 'Site_Clean' not in bt_df.columns:
-        bt_sites = set()
-    else:
-        bt_sites = set(bt_df['Site_Clean'].unique())
-    
-    corrections_applied = 0
-    bt_corrections = 0
-    year_field_corrections = 0
-    correction_log = []
-    
-    for idx, record in mismatched_records.iterrows():
-        site_name = record['site_name']
-        db_year = record['year']  
-        date_year = record['year_from_date']  
-        original_date = record['collection_date']
-        
-        correction_applied = False
-        correction_source = None
-        new_date = None
-        
-        bt_site_match = find_bt_site_match(site_name, bt_sites)
-        
-        if bt_site_match:
-            potential_bt_matches = bt_df[
-                (bt_df['Site_Clean'] == bt_site_match) & 
-                (bt_df['Year'].isin([db_year, date_year]))
-            ]
-            
-            if not potential_bt_matches.empty:
-                # Prefer database year match if available
-                db_year_match = potential_bt_matches[potential_bt_matches['Year'] == db_year]
-                if not db_year_match.empty:
-                    bt_date = db_year_match.iloc[0]['Date_Clean']
-                else:
-                    bt_date = potential_bt_matches.iloc[0]['Date_Clean']
-                
-                fish_corrected.at[idx, 'collection_date'] = bt_date
-                fish_corrected.at[idx, 'collection_date_str'] = bt_date.strftime('%Y-%m-%d')
-                fish_corrected.at[idx, 'year'] = bt_date.year
-                
-                new_date = bt_date
-                correction_applied = True
-                correction_source = "BT_truth"
-                bt_corrections += 1
-                
-                correction_log.append({
-                    'site_name': site_name,
-                    'sample_id': record.get('sample_id', 'unknown'),
-                    'original_date': original_date.strftime('%Y-%m-%d'),
-                    'original_year': db_year,
-                    'corrected_date': new_date.strftime('%Y-%m-%d'),
-                    'corrected_year': new_date.year,
-                    'correction_source': correction_source,
-                    'bt_site_match': bt_site_match
-                })
-        
-        # Fall back to YEAR field if no BT match is found
-        if not correction_applied:
-            try:
-                corrected_date = original_date.replace(year=db_year)
-                fish_corrected.at[idx, 'collection_date'] = corrected_date
-                fish_corrected.at[idx, 'collection_date_str'] = corrected_date.strftime('%Y-%m-%d')
-                
-                new_date = corrected_date
-                correction_applied = True
-                correction_source = "year_field_truth"
-                year_field_corrections += 1
-                
-                correction_log.append({
-                    'site_name': site_name,
-                    'sample_id': record.get('sample_id', 'unknown'),
-                    'original_date': original_date.strftime('%Y-%m-%d'),
-                    'original_year': date_year,
-                    'corrected_date': new_date.strftime('%Y-%m-%d'),
-                    'corrected_year': db_year,
-                    'correction_source': correction_source,
-                    'bt_site_match': bt_site_match if bt_site_match else 'no_match'
-                })
-                
-            except ValueError as e:
-                logger.warning(f"Could not correct date for {site_name} sample {record.get('sample_id', 'unknown')}: {e}")
-        
-        if correction_applied:
-            corrections_applied += 1
-    
+    # Prefer the BT date in the database year, then one in the year the date says
+    bt_dates = pd.Series(pd.NaT, index=mismatched_records.index, dtype='datetime64[ns]')
+    if not bt_df.empty and 'Site_Clean' in bt_df.columns:
+        bt_site_matches = mismatched_records['site_name'].map(match_bt_sites(mismatched_records['site_name'], bt_df))
+        db_year_dates = _lookup_bt_dates(bt_site_matches, mismatched_records['year'], bt_df)
+        date_year_dates = _lookup_bt_dates(bt_site_matches, mismatched_records['year_from_date'], bt_df)
+        bt_dates = pd.Series(db_year_dates, index=mismatched_records.index).fillna(
+            pd.Series(date_year_dates, index=mismatched_records.index))
+    
+    bt_corrected = bt_dates.index[bt_dates.notna()]
+    if len(bt_corrected):
+        fish_corrected.loc[bt_corrected, 'collection_date'] = bt_dates[bt_corrected]
+        fish_corrected.loc[bt_corrected, 'collection_date_str'] = bt_dates[bt_corrected].dt.strftime('%Y-%m-%d')
+        fish_corrected.loc[bt_corrected, 'year'] = bt_dates[bt_corrected].dt.year
+    
+    # Fall back to YEAR field if no BT match is found, keeping the month, day and time
+    fallback = mismatched_records.loc[bt_dates.isna()]
+    original_dates = fallback['collection_date']
+    year_field_dates = pd.to_datetime(pd.DataFrame({
+        'year': fallback['year'],
+        'month': original_dates.dt.month,
+        'day': original_dates.dt.day,
+    }), errors='coerce') + (original_dates - original_dates.dt.normalize())
+    
+    for _, record in fallback[year_field_dates.isna()].iterrows():
+        logger.warning(f"Could not correct date for {record['site_name']} sample {record.get('sample_id', 'unknown')}: "
+                       f"{record['collection_date'].date()} does not exist in {record['year']}")
+    year_field_corrected = year_field_dates.index[year_field_dates.notna()]
+    if len(year_field_corrected):
+        fish_corrected.loc[year_field_corrected, 'collection_date'] = year_field_dates[year_field_corrected]
+        fish_corrected.loc[year_field_corrected, 'collection_date_str'] = \
+            year_field_dates[year_field_corrected].dt.strftime('%Y-%m-%d')
+    
+    bt_corrections = len(bt_corrected)
+    year_field_corrections = len(year_field_corrected)
+    corrections_applied = bt_corrections + year_field_corrections
     if corrections_applied > 0:
         logger.info(f"Date correction complete: {corrections_applied} corrections applied")
         logger.info(f"  - BT truth corrections: {bt_corrections} ({bt_corrections/corrections_applied*100:.1f}%)")
@@ -209,6 +145,29 @@ def correct_collection_dates(fish_df, bt_df=None):
     
     return fish_corrected
 
+def find_replicate_years(groups, bt_df):
+    """
+    Return the BT year whose calendar proves each (site_name, year) group holds replicates.
+    
+    A group is a replicate group when its BT site has two or more field-work
+    dates in the year, or failing that the year before or after. Groups with no
+    such year get NaN.
+    """
+    bt_years = pd.Series(np.nan, index=groups.index)
+    if bt_df.empty or 'Site_Clean' not in bt_df.columns:
+        return bt_years, pd.Series(None, index=groups.index, dtype=object)
+    
+    bt_sites = groups['site_name'].map(match_bt_sites(groups['site_name'], bt_df))
+    calendar = bt_df.groupby(['Site_Clean', 'Year']).size().rename('dates').reset_index()
+    
+    for offset in (0, -1, 1):
+        candidates = pd.DataFrame({'Site_Clean': bt_sites.to_numpy(), 'Year': (groups['year'] + offset).to_numpy()})
+        dates = candidates.merge(calendar, how='left', on=['Site_Clean', 'Year'])['dates'].to_numpy()
+        found = bt_years.isna().to_numpy() & (dates >= 2)
+        bt_years[found] = candidates['Year'].to_numpy()[found]
+    
+    return bt_years, bt_sites
+
 def categorize_and_process_duplicates(fish_df, bt_df):
     """
     Process duplicates using date-based detection for replicates.
@@ -223,106 +182,53 @@ def categorize_and_process_duplicates(fish_df, bt_df):
     if fish_df.empty:
         return fish_processed
     
-    if bt_df.empty or 'Site_Clean' not in bt_df.columns:
-        pass
-    else:
-        set(bt_df['Site_Clean'].unique())
-    
-    rep_groups_processed = 0
-    duplicate_groups_averaged = 0
-    date_assignments = []
+    keys = ['site_name', 'year']
+    group_sizes = fish_df.groupby(keys)[keys[0]].transform('size')
+    in_duplicate_group = group_sizes > 1
     
-    duplicate_groups = fish_df.groupby(['site_name', 'year']).filter(lambda x: len(x) > 1)
-    
-    if duplicate_groups.empty:
+    if not in_duplicate_group.any():
         return fish_processed
     
-    unique_duplicate_groups = duplicate_groups.groupby(['site_name', 'year']).size().reset_index()
-    unique_duplicate_groups.columns = ['site_name', 'year', 'sample_count']
-    
-    records_to_remove = []
-    records_to_add = []
-    
-    for _, group_info in unique_duplicate_groups.iterrows():
-        site_name = group_info['site_name']
-        year = group_info['year']
-        group_info['sample_count']
+    groups = fish_df.loc[in_duplicate_group, keys].drop_duplicates().sort_values(keys).reset_index(drop=True)
+    groups['bt_year'], groups['bt_site'] = find_replicate_years(groups, bt_df)
+    is_replicate = groups['bt_year'].notna()
+    
+    # Replicates: the nth sample by sample_id takes the nth BT date of the year; extra samples keep theirs
+    samples = fish_df.loc[in_duplicate_group].reset_index().merge(groups[is_replicate], on=keys)
+    samples = samples.sort_values([*keys, 'sample_id'], kind='stable')
+    samples['rank'] = samples.groupby(keys).cumcount()
+    bt_calendar = bt_df.sort_values('Date_Clean', kind='stable') if not bt_df.empty else bt_df
+    if not samples.empty:
+        bt_calendar = bt_calendar.assign(rank=bt_calendar.groupby(['Site_Clean', 'Year']).cumcount())
+        assigned = samples.merge(
+            bt_calendar[['Site_Clean', 'Year', 'rank', 'Date_Clean']],
+            how='inner', left_on=['bt_site', 'bt_year', 'rank'], right_on=['Site_Clean', 'Year', 'rank']
+        ).set_index('index')['Date_Clean']
+        fish_processed.loc[assigned.index, 'collection_date'] = assigned
+        fish_processed.loc[assigned.index, 'collection_date_str'] = assigned.dt.strftime('%Y-%m-%d')
+        fish_processed.loc[assigned.index, 'year'] = assigned.dt.year
+    
+    # Duplicates: no multiple BT dates were found, so average each group into its first record
+    duplicate_groups = groups.loc[~is_replicate, keys]
+    duplicate_rows = fish_df.loc[in_duplicate_group]
+    duplicate_rows = duplicate_rows[
+        pd.MultiIndex.from_frame(duplicate_rows[keys]).isin(pd.MultiIndex.from_frame(duplicate_groups))
+    ]
+    
+    if not duplicate_rows.empty:
+        grouped = duplicate_rows.groupby(keys)
+        averaged = grouped.head(1).set_index(keys).sort_index()
+        averaged['comparison_to_reference'] = grouped.agg(
+            comparison_to_reference=('comparison_to_reference', 'mean')
+        )['comparison_to_reference']
+        score_columns = [col for col in averaged.columns if 'score' in str(col).lower() and col != 'comparison_to_reference']
+        averaged[score_columns] = None
+        averaged = averaged.reset_index()[fish_df.columns]
         
-        group_samples = fish_df[
-            (fish_df['site_name'] == site_name) & 
-            (fish_df['year'] == year)
-        ].copy()
-        
-        replicate_dates = detect_replicates_by_dates(bt_df, site_name, year)
-        
-        if replicate_dates is not None and len(replicate_dates) >= 2:
-            # Replicates: Multiple BT dates were found, so assign them chronologically
-            replicate_dates_sorted = replicate_dates.sort_values('Date_Clean')
-            group_samples_sorted = group_samples.sort_values('sample_id')
-            
-            for i, (idx, sample) in enumerate(group_samples_sorted.iterrows()):
-                if i < len(replicate_dates_sorted):
-                    bt_date = replicate_dates_sorted.iloc[i]['Date_Clean']
-                    fish_processed.at[idx, 'collection_date'] = bt_date
-                    fish_processed.at[idx, 'collection_date_str'] = bt_date.strftime('%Y-%m-%d')
-                    fish_processed.at[idx, 'year'] = bt_date.year
-                    assignment_type = f"Date_{i+1}" if i > 0 else "Original"
-                else:
-                    assignment_type = f"Extra_{i+1}"
-                
-                year_used = replicate_dates_sorted.iloc[0]['Year']
-                date_assignments.append({
-                    'site_name': site_name,
-                    'original_year': year,
-                    'bt_year_used': year_used,
-                    'sample_id': sample['sample_id'],
-                    'assignment_type': assignment_type,
-                    'assigned_date': fish_processed.at[idx, 'collection_date_str'],
-                    'year_buffer_used': year_used != year,
-                    'detection_method': 'date_based'
-                })
-            
-            rep_groups_processed += 1
-            logger.debug(f"Processed {site_name} ({year}) as replicates: {len(replicate_dates_sorted)} BT dates found")
-            
-        else:
-            # Duplicates: No multiple BT dates were found, so average the records
-            averaged_record = average_group_samples(group_samples)
-            records_to_remove.extend(group_samples.index)
-            records_to_add.append(averaged_record)
-            duplicate_groups_averaged += 1
-            logger.debug(f"Processed {site_name} ({year}) as duplicates: no multiple BT dates found")
-    
-    if records_to_remove:
-        fish_processed = fish_processed.drop(records_to_remove)
+        fish_processed = fish_processed.drop(duplicate_rows.index)
+        fish_processed = pd.concat([fish_processed, averaged], ignore_index=True)
     
-    if records_to_add:
-        fish_processed = pd.concat([fish_processed, pd.DataFrame(records_to_add)], ignore_index=True)
-    
-    logger.info(f"Fish duplicate processing (date-based): {rep_groups_processed} replicate groups, {duplicate_groups_averaged} groups averaged, {len(date_assignments)} date assignments")
+    logger.info(f"Fish duplicate processing (date-based): {int(is_replicate.sum())} replicate groups, "
+                f"{len(duplicate_groups)} groups averaged, {len(samples)} date assignments")
     
     return fish_processed
-
-def average_group_samples(group):
-    """
-    Average duplicate samples while preserving key metadata.
-    
-    Averaging rules:
-    1. Average comparison_to_reference values
-    2. Keep first record's metadata
-    3. Set individual scores to NULL to avoid misinterpretation of an averaged categorical scale
-    """
-    comparison_values = group['comparison_to_reference'].dropna().tolist()
-    if comparison_values:
-        avg_comparison = sum(comparison_values) / len(comparison_values)
-    else:
-        avg_comparison = None
-    
-    averaged_row = group.iloc[0].copy()
-    averaged_row['comparison_to_reference'] = avg_comparison
-    
-    score_columns = [col for col in averaged_row.index if 'score' in str(col).lower() and col != 'comparison_to_reference']
-    for col in score_columns:
-        averaged_row[col] = None
-    
-    return averaged_row
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+Offline BM25 index over the chatbot's context documents.
+
+prepare_chatbot_data builds the index from data/processed/chatbot_data and saves
+it as data/processed/chatbot_index.json. Markdown files are split into one
+passage per section; the short action card, species and caption files are one
+passage each. The chatbot searches it to answer common questions without the
+LLM and to attach the most relevant passages to the questions it does send.
+"""
+
+import json
+import math
+import pathlib
+import re
+from collections import Counter
+
+from data_processing import setup_logging
+
+logger = setup_logging("chatbot_index", category="processing")
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+CORPUS_DIR = PROJECT_ROOT / "data" / "processed" / "chatbot_data"
+INDEX_PATH = PROJECT_ROOT / "data" / "processed" / "chatbot_index.json"
+INDEX_VERSION = 1
+
+# Standard BM25 term-saturation and length-normalization parameters
+K1 = 1.5
+B = 0.75
+
+STOPWORDS = frozenset("""
+    a about all also am an and any are as at be been being but by can could did do does doing for from
+    had has have how i if in into is it its me mean means meaning my of on or our so some tell than that
+    the their them there these they this those to was we were what when where which who why will with
+    would you your
+""".split())
+
+# Card files start with labelled lines; the first of these names the passage
+TITLE_LABELS = ('Title:', 'Name:', 'Topic:')
+# Labelled lines that only describe the card, left out of summaries
+HEADER_LABELS = TITLE_LABELS + ('Category:', 'Species Type:')
+# File name prefixes prepare_chatbot_data gives each kind of card
+CARD_KINDS = {'action-card-': 'action', 'species-': 'species', 'caption-': 'caption'}
+
+def tokenize(text):
+    """Lowercase words without stopwords, with plural 's' endings removed."""
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+def _markdown_passages(name, text):
+    topic = name.replace('_', ' ').title()
+    passages = []
+    heading = None
+    for block in re.split(r'\n(?=#{1,6} )', text.strip()):
+        lines = block.strip().splitlines()
+        if lines and lines[0].startswith('#'):
+            heading = lines[0].lstrip('#').strip()
+            lines = lines[1:]
+        body = '\n'.join(lines).strip()
+        if body:
+            passages.append({'title': f"{topic}: {heading}" if heading else topic, 'text': body, 'kind': 'section'})
+    return passages
+
+def _card_passage(name, text):
+    title = name.replace('-', ' ').title()
+    for line in text.splitlines():
+        if line.startswith(TITLE_LABELS):
+            title = line.split(':', 1)[1].strip()
+            break
+    kind = next((kind for prefix, kind in CARD_KINDS.items() if name.startswith(prefix)), 'card')
+    return {'title': title, 'text': text.strip(), 'kind': kind}
+
+def load_passages(corpus_dir=CORPUS_DIR):
+    """Split every .md and .txt file in corpus_dir into passages with a title, text, kind and source file."""
+    passages = []
+    for path in sorted(pathlib.Path(corpus_dir).iterdir()):
+        text = path.read_text(encoding="utf-8")
+        if path.suffix == '.md':
+            found = _markdown_passages(path.stem, text)
+        elif path.suffix == '.txt':
+            found = [_card_passage(path.stem, text)]
+        else:
+            continue
+        for passage in found:
+            passage['source'] = path.name
+        passages.extend(found)
+    return passages
+
+class ChatbotIndex:
+    """BM25 search over titled passages."""
+
+    def __init__(self, passages, postings, lengths):
+        self.passages = passages
+        self.postings = postings
+        self.lengths = lengths
+        self.average_length = sum(lengths) / len(lengths) if lengths else 0.0
+        self.title_terms = [set(tokenize(passage['title'])) for passage in passages]
+        count = len(passages)
+        self.idf = {term: math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                    for term, posting in postings.items()}
+        # Words the corpus never uses weigh as much as its rarest ones when judging coverage
+        self.unknown_idf = math.log(1 + (count + 0.5) / 0.5)
+
+    @classmethod
+    def build(cls, passages):
+        """Index passages (dicts with 'title' and 'text'); titles count as passage text."""
+        postings = {}
+        lengths = []
+        for passage_id, passage in enumerate(passages):
+            tokens = tokenize(f"{passage['title']}\n{passage['text']}")
+            lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                postings.setdefault(term, []).append((passage_id, frequency))
+        return cls(passages, postings, lengths)
+
+    def search(self, query, limit=3):
+        """
+        Return up to limit matches for query, best first.
+
+        Each match is the passage dict plus 'score' (BM25), 'coverage': the share of
+        the query's term weight (idf) that the passage contains, from 0 to 1, and
+        'title_coverage': the same share for the passage title alone.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.passages:
+            return []
+
+        scores = Counter()
+        matched = {}
+        for term in terms:
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for passage_id, frequency in self.postings[term]:
+                length_norm = K1 * (1 - B + B * self.lengths[passage_id] / self.average_length)
+                scores[passage_id] += idf * frequency * (K1 + 1) / (frequency + length_norm)
+                matched[passage_id] = matched.get(passage_id, 0.0) + idf
+
+        query_weight = sum(self.idf.get(term, self.unknown_idf) for term in terms)
+        results = []
+        for passage_id, score in scores.most_common(limit):
+            title_weight = sum(self.idf[term] for term in terms if term in self.title_terms[passage_id])
+            results.append(dict(
+                self.passages[passage_id],
+                score=round(score, 4),
+                coverage=round(matched[passage_id] / query_weight, 4),
+                title_coverage=round(title_weight / query_weight, 4),
+            ))
+        return results
+
+    def to_dict(self):
+        return {
+            'version': INDEX_VERSION,
+            'passages': self.passages,
+            'lengths': self.lengths,
+            'postings': self.postings,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported chatbot index version {data.get('version')}")
+        postings = {term: [tuple(entry) for entry in posting] for term, posting in data['postings'].items()}
+        return cls(data['passages'], postings, data['lengths'])
+
+def summarize_passage(passage, max_sentences=3):
+    """Return the first sentences of a passage's text, without the card's labelled header lines."""
+    lines = []
+    for line in passage['text'].splitlines():
+        line = line.strip()
+        # Tip lists read poorly as prose, so summaries keep to the paragraphs
+        if not line or line.startswith(HEADER_LABELS) or line.startswith('- ') or line.endswith(':'):
+            continue
+        # 'Description: ...' and similar keep their text without the label
+        label, separator, rest = line.partition(': ')
+        if separator and len(label.split()) <= 4 and label[:1].isupper():
+            line = rest
+        lines.append(line)
+    sentences = re.split(r'(?<=[.!?])\s+', ' '.join(lines))
+    return ' '.join(sentences[:max_sentences]).strip()
+
+def build_index(corpus_dir=CORPUS_DIR, index_path=INDEX_PATH):
+    """Index the corpus, save it to index_path and return it."""
+    index = ChatbotIndex.build(load_passages(corpus_dir))
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index.to_dict(), f, separators=(',', ':'), sort_keys=True)
+    logger.info(f"Indexed {len(index.passages)} passages and {len(index.postings)} terms to {index_path}")
+    return index
+
+def load_index(index_path=INDEX_PATH, corpus_dir=CORPUS_DIR):
+    """Load the saved index, or build one in memory from the corpus if it is missing or unreadable."""
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            return ChatbotIndex.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Chatbot index unavailable ({e}); indexing {corpus_dir} in memory")
+    return ChatbotIndex.build(load_passages(corpus_dir))
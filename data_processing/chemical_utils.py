@@ -7,6 +7,7 @@ import pandas as pd
 
 from data_processing import setup_logging
 from database.database import close_connection, get_connection
+from database.shared_data import shared_cached
 from utils import round_parameter_value
 
 logger = setup_logging("chemical_utils", category="processing")
@@ -279,6 +280,7 @@ def determine_status(parameter, value, reference_values):
                 
     return "Normal"
 
+@shared_cached
 def get_reference_values():
     """
     Retrieves chemical reference values from the database.
@@ -10,6 +10,7 @@ This script runs a two-phase pipeline:
 import os
 import sys
 
+import numpy as np
 import pandas as pd
 
 from data_processing import setup_logging
@@ -25,6 +26,8 @@ PROCESSED_DATA_DIR = os.path.join(BASE_DIR, 'data', 'processed')
 os.makedirs(INTERIM_DATA_DIR, exist_ok=True)
 os.makedirs(PROCESSED_DATA_DIR, exist_ok=True)
 
+METADATA_FIELDS = ['latitude', 'longitude', 'county', 'river_basin', 'ecoregion']
+
 # Defines CSV files and their configurations, ordered from highest to lowest priority for data consolidation.
 CSV_CONFIGS = [
     {
@@ -237,7 +240,7 @@ def detect_conflicts(site_name, existing_site, new_site):
     """
     conflicts = []
     
-    for field in ['latitude', 'longitude', 'county', 'river_basin', 'ecoregion']:
+    for field in METADATA_FIELDS:
         existing_val = existing_site.get(field)
         new_val = new_site.get(field)
         
@@ -248,13 +251,96 @@ def detect_conflicts(site_name, existing_site, new_site):
     
     return conflicts
 
+def merge_site_sources(source_sites):
+    """
+    Merges extracted site frames, given in priority order, into one record per site.
+    
+    All sources are stacked and each site's records are numbered in priority
+    order. Round k then applies every site's k-th record at once: a record whose
+    non-null metadata differs from the consolidated record is reported as a
+    conflict and skipped, otherwise it fills the fields still missing and is
+    credited as their source. Records only interact with their own site, so this
+    gives the same result as applying them one at a time.
+    
+    Args:
+        source_sites: A list of DataFrames from extract_sites_from_csv, highest priority first.
+        
+    Returns:
+        A tuple of the consolidated sites DataFrame, a DataFrame of conflicts, and
+        a list of (added, updated, conflicts) counts for each source.
+    """
+    if not source_sites:
+        return pd.DataFrame(), pd.DataFrame(), []
+    
+    stacked = pd.concat([sites.astype(object) for sites in source_sites], ignore_index=True)
+    source_rank = np.repeat(np.arange(len(source_sites)), [len(sites) for sites in source_sites])
+    position = stacked.groupby('site_name', sort=False).cumcount().to_numpy()
+    
+    # The first record of each site seeds it, crediting its source for every field it has
+    first_records = stacked[position == 0]
+    consolidated_sites = first_records.copy()
+    for field in METADATA_FIELDS:
+        consolidated_sites[f'{field}_source'] = first_records['source_file'].where(first_records[field].notna(), None)
+    consolidated_sites.index = first_records['site_name'].to_numpy()
+    
+    added = np.bincount(source_rank[position == 0], minlength=len(source_sites))
+    updated = np.zeros(len(source_sites), dtype=int)
+    conflicted = np.zeros(len(source_sites), dtype=int)
+    conflicts_list = []
+    
+    for round_number in range(1, position.max() + 1):
+        in_round = np.flatnonzero(position == round_number)
+        new_sites = stacked.iloc[in_round]
+        existing_sites = consolidated_sites.loc[new_sites['site_name'].to_numpy()]
+        
+        field_conflicts = {}
+        for field in METADATA_FIELDS:
+            existing_values = existing_sites[field].to_numpy()
+            new_values = new_sites[field].to_numpy()
+            field_conflicts[field] = pd.notna(existing_values) & pd.notna(new_values) & (existing_values != new_values)
+        has_conflict = np.logical_or.reduce(list(field_conflicts.values()))
+        
+        # The masks find conflicting records at once; detect_conflicts describes each one
+        for i in np.flatnonzero(has_conflict):
+            existing_site = existing_sites.iloc[i]
+            new_site = new_sites.iloc[i]
+            conflicts_list.append((in_round[i], {
+                'site_name': new_site['site_name'],
+                'conflicts': detect_conflicts(new_site['site_name'], existing_site, new_site),
+                'existing_source': existing_site['source_file'],
+                'new_source': new_site['source_file'],
+                'existing_data': existing_site.to_dict(),
+                'new_data': new_site.to_dict()
+            }))
+        
+        # Records without conflicts fill in any missing metadata from their source
+        filled = np.zeros(len(in_round), dtype=bool)
+        for field in METADATA_FIELDS:
+            fill = ~has_conflict & pd.isna(existing_sites[field].to_numpy()) & pd.notna(new_sites[field].to_numpy())
+            if fill.any():
+                filled_names = new_sites['site_name'].to_numpy()[fill]
+                consolidated_sites.loc[filled_names, field] = new_sites[field].to_numpy()[fill]
+                consolidated_sites.loc[filled_names, f'{field}_source'] = new_sites['source_file'].to_numpy()[fill]
+                filled |= fill
+        
+        updated += np.bincount(source_rank[in_round[filled]], minlength=len(source_sites))
+        conflicted += np.bincount(source_rank[in_round[has_conflict]], minlength=len(source_sites))
+    
+    # Conflicts are reported in the order the records were read, as priority order dictates
+    conflicts_list.sort(key=lambda entry: entry[0])
+    conflicts_df = pd.DataFrame([record for _, record in conflicts_list]) if conflicts_list else pd.DataFrame()
+    
+    counts = list(zip(added.tolist(), updated.tolist(), conflicted.tolist()))
+    return consolidated_sites.reset_index(drop=True), conflicts_df, counts
+
 def consolidate_sites():
     """
     Consolidates site information from all cleaned CSV files based on priority.
     
-    This function iterates through the CSV files in their priority order, adding new
-    sites and updating existing ones with metadata from higher-priority sources.
-    It also identifies and logs any conflicting metadata for manual review.
+    This function extracts the sites from each CSV file in priority order and merges
+    them, adding new sites and filling missing metadata on existing ones from
+    lower-priority sources. It also identifies and logs any conflicting metadata
+    for manual review.
     
     Returns:
         A tuple containing the consolidated sites DataFrame and a DataFrame of any conflicts found.
@@ -264,8 +350,8 @@ def consolidate_sites():
     logger.info("=" * 60)
     logger.info("Starting site consolidation process...")
     
-    consolidated_sites = pd.DataFrame()
-    conflicts_list = []
+    source_sites = []
+    source_configs = []
     
     for i, config in enumerate(CSV_CONFIGS):
         logger.info(f"\nProcessing priority {i+1}: {config['description']}")
@@ -276,60 +362,15 @@ def consolidate_sites():
             logger.warning(f"No sites extracted from {config['file']}")
             continue
         
-        sites_added = 0
-        sites_updated = 0
-        conflicts_found = 0
-        
-        for _, new_site in csv_sites.iterrows():
-            site_name = new_site['site_name']
-            
-            if not consolidated_sites.empty and site_name in consolidated_sites['site_name'].values:
-                # If site exists, check for conflicts and update missing metadata.
-                existing_idx = consolidated_sites[consolidated_sites['site_name'] == site_name].index[0]
-                existing_site = consolidated_sites.loc[existing_idx]
-                
-                conflicts = detect_conflicts(site_name, existing_site, new_site)
-                
-                if conflicts:
-                    # Records a conflict if metadata differs between sources.
-                    conflict_record = {
-                        'site_name': site_name,
-                        'conflicts': conflicts,
-                        'existing_source': existing_site['source_file'],
-                        'new_source': new_site['source_file'],
-                        'existing_data': existing_site.to_dict(),
-                        'new_data': new_site.to_dict()
-                    }
-                    conflicts_list.append(conflict_record)
-                    conflicts_found += 1
-                else:
-                    # If no conflicts, fill in any missing metadata from the new source.
-                    updated = False
-                    for field in ['latitude', 'longitude', 'county', 'river_basin', 'ecoregion']:
-                        if (pd.isna(existing_site[field]) and pd.notna(new_site[field])):
-                            consolidated_sites.loc[existing_idx, field] = new_site[field]
-                            consolidated_sites.loc[existing_idx, f'{field}_source'] = new_site['source_file']
-                            updated = True
-                    
-                    if updated:
-                        sites_updated += 1
-            else:
-                # If site is new, add it to the consolidated data.
-                new_record = new_site.copy()
-                
-                for field in ['latitude', 'longitude', 'county', 'river_basin', 'ecoregion']:
-                    if pd.notna(new_site[field]):
-                        new_record[f'{field}_source'] = new_site['source_file']
-                    else:
-                        new_record[f'{field}_source'] = None
-                
-                consolidated_sites = pd.concat([consolidated_sites, new_record.to_frame().T], ignore_index=True)
-                sites_added += 1
-        
-        if sites_added > 0 or sites_updated > 0 or conflicts_found > 0:
-            logger.info(f"  Added: {sites_added}, Updated: {sites_updated}, Conflicts: {conflicts_found}")
+        source_sites.append(csv_sites)
+        source_configs.append(config)
+    
+    consolidated_sites, conflicts_df, counts = merge_site_sources(source_sites)
     
-    conflicts_df = pd.DataFrame(conflicts_list) if conflicts_list else pd.DataFrame()
+    for config, (sites_added, sites_updated, conflicts_found) in zip(source_configs, counts):
+        if sites_added > 0 or sites_updated > 0 or conflicts_found > 0:
+            logger.info(f"  {config['description']} - Added: {sites_added}, Updated: {sites_updated}, "
+                        f"Conflicts: {conflicts_found}")
     
     logger.info(f"\nConsolidation complete!")
     logger.info(f"Total consolidated sites: {len(consolidated_sites)}")
@@ -209,6 +209,21 @@ def save_processed_data(df, data_type):
         logger.error(f"Error saving processed {data_type} data: {e}")
         return False
 
+def to_sql_rows(df):
+    """Convert a DataFrame to parameter tuples of built-in Python types, with NaN as NULL."""
+    values = df.astype(object).where(df.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+def bulk_insert(cursor, table_name, df, or_ignore=False):
+    """Insert every row of a DataFrame with a single executemany."""
+    if df.empty:
+        return 0
+    columns = list(df.columns)
+    verb = "INSERT OR IGNORE" if or_ignore else "INSERT"
+    sql = f"{verb} INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    cursor.executemany(sql, to_sql_rows(df))
+    return len(df)
+
 def clean_column_names(df):
     """
     Standardizes all column names in a DataFrame.
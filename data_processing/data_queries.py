@@ -9,14 +9,17 @@ import sqlite3
 
 import pandas as pd
 
-from data_processing import setup_logging
+from data_processing import sampled, setup_logging
 from data_processing.chemical_utils import KEY_PARAMETERS
 from database.database import close_connection, get_connection
+from database.request_context import request_cached
+from database.shared_data import shared_cached
 
 logger = setup_logging("data_queries", category="processing")
 
 # Chemical Data Queries
 
+@request_cached
 def get_chemical_date_range():
     """
     Gets the date range (min and max years) for all chemical data in the database.
@@ -35,7 +38,7 @@ def get_chemical_date_range():
         
         if result and result[0] is not None and result[1] is not None:
             min_year, max_year = result
-            logger.info(f"Chemical data date range: {min_year} to {max_year}")
+            logger.info(f"Chemical data date range: {min_year} to {max_year}", extra=sampled())
             return min_year, max_year
         else:
             logger.warning("No chemical data found in database, using default range")
@@ -51,6 +54,8 @@ def get_chemical_date_range():
         if conn:
             close_connection(conn)
 
+@request_cached
+@shared_cached
 def get_chemical_data_from_db(site_name=None):
     """
     Retrieves chemical data from the database, including calculated status columns.
@@ -129,6 +134,7 @@ def get_chemical_data_from_db(site_name=None):
 
 # Fish Data Queries
 
+@request_cached
 def get_fish_date_range():
     """
     Gets the date range (min and max years) for all fish data in the database.
@@ -147,7 +153,7 @@ def get_fish_date_range():
         
         if result and result[0] is not None and result[1] is not None:
             min_year, max_year = result
-            logger.info(f"Fish data date range: {min_year} to {max_year}")
+            logger.info(f"Fish data date range: {min_year} to {max_year}", extra=sampled())
             return min_year, max_year
         else:
             logger.warning("No fish data found in database, using default range")
@@ -163,6 +169,8 @@ def get_fish_date_range():
         if conn:
             close_connection(conn)
 
+@request_cached
+@shared_cached
 def get_fish_dataframe(site_name=None):
     """
     Retrieves fish data with summary scores from the database.
@@ -210,7 +218,7 @@ def get_fish_dataframe(site_name=None):
             else:
                 logger.warning("No fish data found in the database")
         else: 
-            logger.info(f"Retrieved {len(fish_df)} fish collection records")
+            logger.info(f"Retrieved {len(fish_df)} fish collection records", extra=sampled())
     
         return fish_df
     except sqlite3.Error as e:
@@ -223,6 +231,7 @@ def get_fish_dataframe(site_name=None):
         if conn:
             close_connection(conn)
 
+@request_cached
 def get_fish_metrics_data_for_table(site_name=None):
     """
     Retrieves detailed fish metrics and summary data for table displays.
@@ -300,6 +309,7 @@ def get_fish_metrics_data_for_table(site_name=None):
 
 # Macroinvertebrate Data Queries
 
+@request_cached
 def get_macro_date_range():
     """
     Gets the date range (min and max years) for all macroinvertebrate data in the database.
@@ -317,7 +327,7 @@ def get_macro_date_range():
         
         if result and result[0] is not None and result[1] is not None:
             min_year, max_year = result
-            logger.info(f"Macroinvertebrate data date range: {min_year} to {max_year}")
+            logger.info(f"Macroinvertebrate data date range: {min_year} to {max_year}", extra=sampled())
             return min_year, max_year
         else:
             logger.warning("No macroinvertebrate data found in database, using default range")
@@ -333,6 +343,8 @@ def get_macro_date_range():
         if conn:
             close_connection(conn)
 
+@request_cached
+@shared_cached
 def get_macroinvertebrate_dataframe(site_name=None):
     """
     Retrieves macroinvertebrate data with summary scores from the database.
@@ -384,7 +396,7 @@ def get_macroinvertebrate_dataframe(site_name=None):
             else:
                 logger.warning("No macroinvertebrate data found in the database")
         else: 
-            logger.info(f"Retrieved {len(macro_df)} macroinvertebrate collection records")
+            logger.info(f"Retrieved {len(macro_df)} macroinvertebrate collection records", extra=sampled())
 
             missing_values = macro_df.isnull().sum().sum()
             if missing_values > 0:
@@ -401,6 +413,7 @@ def get_macroinvertebrate_dataframe(site_name=None):
         if conn:
             close_connection(conn)
 
+@request_cached
 def get_macro_metrics_data_for_table(site_name=None):
     """
     Retrieves detailed macroinvertebrate metrics and summary data for table displays.
@@ -484,8 +497,106 @@ def get_macro_metrics_data_for_table(site_name=None):
         if conn:
             close_connection(conn)
 
+# Biological Site Queries
+
+# A site "has data" when it has scored events, matching utils.get_sites_with_data
+SITE_DATA_EXISTS_QUERIES = {
+    'chemical': """
+        SELECT EXISTS (
+            SELECT 1 FROM sites s
+            JOIN chemical_collection_events c ON s.site_id = c.site_id
+            JOIN chemical_measurements m ON c.event_id = m.event_id
+            WHERE s.site_name = ?
+        )
+    """,
+    'fish': """
+        SELECT EXISTS (
+            SELECT 1 FROM sites s
+            JOIN fish_collection_events f ON s.site_id = f.site_id
+            JOIN fish_summary_scores fs ON f.event_id = fs.event_id
+            WHERE s.site_name = ?
+        )
+    """,
+    'macro': """
+        SELECT EXISTS (
+            SELECT 1 FROM sites s
+            JOIN macro_collection_events m ON s.site_id = m.site_id
+            JOIN macro_summary_scores ms ON m.event_id = ms.event_id
+            WHERE s.site_name = ?
+        )
+    """,
+    'habitat': """
+        SELECT EXISTS (
+            SELECT 1 FROM sites s
+            JOIN habitat_assessments h ON s.site_id = h.site_id
+            JOIN habitat_summary_scores hs ON h.assessment_id = hs.assessment_id
+            WHERE s.site_name = ?
+        )
+    """
+}
+
+@request_cached
+def site_has_data(site_name, data_type):
+    """
+    Checks whether a site has any data of the given type.
+    
+    Uses an EXISTS probe on the site and event indexes, so the cost does not grow
+    with the size of the data tables.
+    
+    Args:
+        site_name: The name of the site to check.
+        data_type: One of 'chemical', 'fish', 'macro' or 'habitat'.
+    
+    Returns:
+        True if the site has data, otherwise False.
+    """
+    if data_type not in SITE_DATA_EXISTS_QUERIES:
+        logger.error(f"Unknown data type: {data_type}")
+        return False
+    
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(SITE_DATA_EXISTS_QUERIES[data_type], (site_name,))
+        return bool(cursor.fetchone()[0])
+    
+    except Exception as e:
+        logger.error(f"Error checking {data_type} data for site {site_name}: {e}")
+        return False
+    
+    finally:
+        if conn:
+            close_connection(conn)
+
+def get_biological_site_bundle(community, site_name):
+    """
+    Retrieves everything the biological site view needs for one site.
+    
+    The summary rows carry the same columns as the chart queries, so a single
+    site-scoped metrics and summary fetch feeds both the chart and the tables.
+    
+    Args:
+        community: Either 'fish' or 'macro'.
+        site_name: The name of the site.
+    
+    Returns:
+        A dict with 'metrics' and 'summary' DataFrames for the site.
+    """
+    loaders = {
+        'fish': get_fish_metrics_data_for_table,
+        'macro': get_macro_metrics_data_for_table
+    }
+    
+    if community not in loaders:
+        raise ValueError(f"Unknown community type: {community}")
+    
+    metrics_df, summary_df = loaders[community](site_name)
+    return {'metrics': metrics_df, 'summary': summary_df}
+
 # Habitat Data Queries
 
+@request_cached
 def get_habitat_date_range():
     """
     Gets the date range (min and max years) for all habitat data in the database.
@@ -503,7 +614,7 @@ def get_habitat_date_range():
         
         if result and result[0] is not None and result[1] is not None:
             min_year, max_year = result
-            logger.info(f"Habitat data date range: {min_year} to {max_year}")
+            logger.info(f"Habitat data date range: {min_year} to {max_year}", extra=sampled())
             return min_year, max_year
         else:
             logger.warning("No habitat data found in database, using default range")
@@ -519,6 +630,8 @@ def get_habitat_date_range():
         if conn:
             close_connection(conn)
 
+@request_cached
+@shared_cached
 def get_habitat_dataframe(site_name=None):
     """
     Retrieves habitat data with summary scores from the database.
@@ -564,7 +677,7 @@ def get_habitat_dataframe(site_name=None):
             else:
                 logger.warning("No habitat data found in the database")
         else: 
-            logger.info(f"Retrieved {len(habitat_df)} habitat assessment records")
+            logger.info(f"Retrieved {len(habitat_df)} habitat assessment records", extra=sampled())
 
             missing_values = habitat_df.isnull().sum().sum()
             if missing_values > 0:
@@ -581,6 +694,7 @@ def get_habitat_dataframe(site_name=None):
         if conn:
             close_connection(conn)
 
+@request_cached
 def get_habitat_metrics_data_for_table(site_name=None):
     """
     Retrieves detailed habitat metrics and summary data for table displays.
@@ -0,0 +1,265 @@
+"""
+Pre-generated CSV export artifacts for bulk data downloads.
+
+Each data type is exported once per data version as gzip-compressed CSV, for
+all sites and for each site, so downloads are served straight from disk
+instead of being rebuilt and pushed through a Dash callback on every click.
+
+Artifacts are published alongside the data: reload_all_data, prerendering and
+snapshot installs call publish_export_artifacts. A download for a version nobody
+published yet, e.g. on a fresh container, publishes it under the same
+cross-process lock. A published version is never rebuilt or replaced, and an
+older version is only removed once no worker still reports serving it.
+
+Usage: python -m data_processing.export_artifacts
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from data_processing.data_queries import get_chemical_data_from_db
+from database.database import get_data_version
+from database.snapshot_watcher import file_lock
+from utils import setup_logging
+
+logger = setup_logging("export_artifacts", category="processing")
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXPORT_CACHE_DIR = os.environ.get('EXPORT_CACHE_DIR', os.path.join(project_root, 'data', 'cache', 'exports'))
+
+# Biological and habitat exports come from the processed CSVs rather than the database
+PROCESSED_EXPORT_FILES = {
+    'fish': os.path.join(project_root, 'data', 'processed', 'processed_fish_data.csv'),
+    'macro': os.path.join(project_root, 'data', 'processed', 'processed_macro_data.csv'),
+    'habitat': os.path.join(project_root, 'data', 'processed', 'processed_habitat_data.csv'),
+}
+
+EXPORT_DATA_TYPES = ['chemical', 'fish', 'macro', 'habitat']
+
+# Column used to split each export into per-site artifacts
+SITE_COLUMNS = {'chemical': 'Site_Name', 'fish': 'site_name', 'macro': 'site_name', 'habitat': 'site_name'}
+
+MANIFEST_FILE = 'manifest.json'
+PUBLISH_LOCK_FILE = '.publish.lock'
+
+# Each worker records the version it serves here, one file per process id
+WORKERS_DIR = '.workers'
+
+_manifests = {}
+
+def export_filename(data_type, site_name=None):
+    """Return the download filename for an export, matching the names used before artifacts."""
+    if site_name is None:
+        return f"blue_thumb_{data_type}_data.csv"
+    site_slug = site_name.replace(' ', '_').replace(':', '').replace('(', '').replace(')', '').replace(',', '')
+    return f"{site_slug}_{data_type}_data.csv"
+
+def get_export_version():
+    """Return a version covering the database and the processed CSVs exports are built from."""
+    data_version = get_data_version()
+    if data_version is None:
+        return None
+
+    digest = hashlib.sha1(data_version.encode('utf-8'))
+    for path in PROCESSED_EXPORT_FILES.values():
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+        except FileNotFoundError:
+            digest.update(f"{path}:missing".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def load_export_frame(data_type):
+    """Load the full export table for a data type."""
+    if data_type == 'chemical':
+        df = get_chemical_data_from_db()
+        return df[[col for col in df.columns if not col.endswith('_status')]]
+
+    return pd.read_csv(PROCESSED_EXPORT_FILES[data_type])
+
+def _write_artifact(export_dir, df, data_type, site_name=None):
+    """Write one gzip CSV artifact and return its manifest record."""
+    download_name = export_filename(data_type, site_name)
+    file_name = (
+        f"{data_type}/all.csv.gz" if site_name is None
+        else f"{data_type}/sites/{hashlib.sha1(site_name.encode('utf-8')).hexdigest()[:20]}.csv.gz"
+    )
+    path = os.path.join(export_dir, file_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # A fixed gzip timestamp keeps artifacts, and so their ETags, reproducible
+    csv_bytes = df.to_csv(index=False).encode('utf-8')
+    with open(path, 'wb') as artifact_file:
+        artifact_file.write(gzip.compress(csv_bytes, mtime=0))
+
+    with open(path, 'rb') as artifact_file:
+        etag = hashlib.sha1(artifact_file.read()).hexdigest()
+
+    return {
+        'file': file_name,
+        'download_name': download_name,
+        'etag': etag,
+        'rows': len(df),
+        'csv_bytes': len(csv_bytes),
+    }
+
+def build_export_artifacts(export_dir):
+    """Write all-site and per-site artifacts for every data type and return the manifest."""
+    manifest = {'artifacts': {}, 'sites': {}}
+    os.makedirs(export_dir, exist_ok=True)
+
+    for data_type in EXPORT_DATA_TYPES:
+        try:
+            df = load_export_frame(data_type)
+        except Exception as e:
+            logger.error(f"Error loading {data_type} data for export: {e}")
+            continue
+
+        if df.empty:
+            logger.warning(f"No {data_type} data to export")
+            continue
+
+        manifest['artifacts'][data_type] = _write_artifact(export_dir, df, data_type)
+
+        site_artifacts = {}
+        for site_name, site_df in df.groupby(SITE_COLUMNS[data_type], sort=True):
+            site_artifacts[site_name] = _write_artifact(export_dir, site_df, data_type, site_name)
+        manifest['sites'][data_type] = site_artifacts
+
+        logger.info(f"Exported {len(df)} {data_type} records for {len(site_artifacts)} sites")
+
+    with open(os.path.join(export_dir, MANIFEST_FILE), 'w') as manifest_file:
+        json.dump(manifest, manifest_file)
+
+    return manifest
+
+def publish_export_artifacts(cache_dir=EXPORT_CACHE_DIR):
+    """
+    Build artifacts for the current data version unless they are already published.
+
+    Publishing holds a lock shared by every process on the host, and a version whose
+    manifest exists is left untouched. Returns (export_dir, manifest).
+    """
+    version = get_export_version()
+    if version is None:
+        raise FileNotFoundError("No database found to export from")
+
+    export_dir = os.path.join(cache_dir, version)
+    manifest_path = os.path.join(export_dir, MANIFEST_FILE)
+    os.makedirs(cache_dir, exist_ok=True)
+    with file_lock(os.path.join(cache_dir, PUBLISH_LOCK_FILE)):
+        if os.path.exists(manifest_path):
+            logger.info(f"Export artifacts for version {version} already published")
+        else:
+            staging_dir = tempfile.mkdtemp(prefix=f".staging-{version}-", dir=cache_dir)
+            try:
+                build_export_artifacts(staging_dir)
+                os.rename(staging_dir, export_dir)
+            finally:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            logger.info(f"Published export artifacts for version {version}")
+            _remove_stale_versions(cache_dir, version)
+
+    with open(manifest_path) as manifest_file:
+        return export_dir, json.load(manifest_file)
+
+def _process_alive(pid):
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _report_serving(cache_dir, version):
+    """Record that this worker serves downloads from version."""
+    workers_dir = os.path.join(cache_dir, WORKERS_DIR)
+    os.makedirs(workers_dir, exist_ok=True)
+    with open(os.path.join(workers_dir, str(os.getpid())), 'w') as report_file:
+        report_file.write(version)
+
+def _versions_in_use(cache_dir):
+    """Return the versions live workers report serving, dropping reports from exited workers."""
+    workers_dir = os.path.join(cache_dir, WORKERS_DIR)
+    versions = set()
+    for name in os.listdir(workers_dir) if os.path.isdir(workers_dir) else []:
+        path = os.path.join(workers_dir, name)
+        if not name.isdigit() or not _process_alive(int(name)):
+            os.remove(path)
+            continue
+        with open(path) as report_file:
+            versions.add(report_file.read().strip())
+    return versions
+
+def _remove_stale_versions(cache_dir, current_version):
+    """Delete artifact directories from older versions that no worker still serves."""
+    in_use = _versions_in_use(cache_dir)
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name == current_version or name.startswith('.') or not os.path.isdir(path):
+            continue
+        if name in in_use:
+            logger.info(f"Keeping export artifacts {name} while a worker still serves them")
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Removed stale export artifacts {name}")
+
+def load_export_manifest(cache_dir=EXPORT_CACHE_DIR):
+    """
+    Return (export_dir, manifest) for the current version, or (None, None) if unavailable.
+
+    A version nobody has published yet is published first.
+    """
+    version = get_export_version()
+    if version is None:
+        return None, None
+
+    export_dir = os.path.join(cache_dir, version)
+    if export_dir not in _manifests:
+        try:
+            manifest_path = os.path.join(export_dir, MANIFEST_FILE)
+            if os.path.exists(manifest_path):
+                with open(manifest_path) as manifest_file:
+                    manifest = json.load(manifest_file)
+            else:
+                logger.info(f"Export artifacts for version {version} are not published yet, publishing")
+                export_dir, manifest = publish_export_artifacts(cache_dir)
+        except Exception as e:
+            logger.error(f"Error loading export artifacts for version {version}: {e}")
+            return None, None
+        _report_serving(cache_dir, os.path.basename(export_dir))
+        _manifests[export_dir] = manifest
+
+    return export_dir, _manifests[export_dir]
+
+def get_export_artifact(data_type, site_name=None, cache_dir=EXPORT_CACHE_DIR):
+    """Return the manifest record for an export with its absolute 'path', or None if unavailable."""
+    export_dir, manifest = load_export_manifest(cache_dir)
+    if manifest is None:
+        return None
+
+    if site_name is None:
+        artifact = manifest['artifacts'].get(data_type)
+    else:
+        artifact = manifest['sites'].get(data_type, {}).get(site_name)
+
+    if artifact is None:
+        return None
+    return dict(artifact, path=os.path.join(export_dir, artifact['file']))
+
+if __name__ == "__main__":
+    export_dir, manifest = publish_export_artifacts()
+    for data_type, artifact in manifest['artifacts'].items():
+        site_count = len(manifest['sites'].get(data_type, {}))
+        print(f"{data_type:<10} {artifact['rows']:>7,} rows  {artifact['csv_bytes']:>10,} CSV bytes  "
+              f"{site_count:>4} site files")
+    print(f"Artifacts in {export_dir}")
@@ -8,13 +8,17 @@ It validates IBI scores, inserts collection events, and loads detailed metrics.
 
 import sqlite3
 
+import numpy as np
 import pandas as pd
 
 from data_processing import setup_logging
 from data_processing.biological_utils import (
     convert_columns_to_numeric,
     insert_collection_events,
+    map_event_ids,
+    melt_metrics,
     remove_invalid_biological_values,
+    write_biological_records,
 )
 from data_processing.bt_fieldwork_validator import (
     categorize_and_process_duplicates,
@@ -30,6 +34,19 @@ from database.database import close_connection, get_connection
 
 logger = setup_logging("fish_processing", category="processing")
 
+# Standardized metric names and their (raw value, score) columns
+FISH_METRICS = {
+    'Total No. of species': ('total_species', 'total_species_score'),
+    'No. of sensitive benthic species': ('sensitive_benthic_species', 'sensitive_benthic_score'),
+    'No. of sunfish species': ('sunfish_species', 'sunfish_species_score'),
+    'No. of intolerant species': ('intolerant_species', 'intolerant_species_score'),
+    'Proportion tolerant individuals': ('proportion_tolerant', 'tolerant_score'),
+    'Proportion insectivorous cyprinid': ('proportion_insectivorous', 'insectivorous_score'),
+    'Proportion lithophilic spawners': ('proportion_lithophilic', 'lithophilic_score'),
+}
+
+VALID_INTEGRITY_CLASSES = ["Excellent", "Good", "Fair", "Poor", "Very Poor"]
+
 # Helper functions
 
 def validate_ibi_scores(fish_df):
@@ -196,6 +213,31 @@ def insert_fish_collection_events(cursor, fish_df):
         logger.error(f"Error inserting fish collection events: {e}")
         return {}
 
+def calculate_integrity_classes(samples):
+    """
+    Return each sample's integrity class, preferring the value from the CSV.
+    
+    Missing classes are calculated from comparison_to_reference, and anything
+    outside the valid classes becomes "Unknown".
+    """
+    comparison = pd.to_numeric(samples['comparison_to_reference'], errors='coerce') * 100
+    calculated = pd.Series(np.select(
+        [comparison >= 97, comparison >= 76, comparison >= 60, comparison >= 47, comparison.notna()],
+        ["Excellent", "Good", "Fair", "Poor", "Very Poor"],
+        default="Unknown",
+    ), index=samples.index)
+    
+    if 'integrity_class' in samples.columns:
+        provided = samples['integrity_class'].where(samples['integrity_class'].notna(), '').astype(str).str.strip()
+        classes = provided.where(provided != '', calculated)
+    else:
+        classes = calculated
+    
+    invalid = ~classes.isin(VALID_INTEGRITY_CLASSES)
+    for sample_id, integrity_class in zip(samples.loc[invalid, 'sample_id'], classes[invalid]):
+        logger.warning(f"Invalid integrity_class '{integrity_class}' for sample_id={sample_id}, setting to Unknown")
+    return classes.where(~invalid, "Unknown")
+
 def insert_metrics_data(cursor, fish_df, event_id_map):
     """
     Inserts fish metrics and summary scores into the database for each collection event.
@@ -209,106 +251,43 @@ def insert_metrics_data(cursor, fish_df, event_id_map):
         The total number of metrics records inserted.
     """
     try:
-        metric_mappings = [
-            ('Total No. of species', 'total_species', 'total_species_score'),
-            ('No. of sensitive benthic species', 'sensitive_benthic_species', 'sensitive_benthic_score'),
-            ('No. of sunfish species', 'sunfish_species', 'sunfish_species_score'),
-            ('No. of intolerant species', 'intolerant_species', 'intolerant_species_score'),
-            ('Proportion tolerant individuals', 'proportion_tolerant', 'tolerant_score'),
-            ('Proportion insectivorous cyprinid', 'proportion_insectivorous', 'insectivorous_score'),
-            ('Proportion lithophilic spawners', 'proportion_lithophilic', 'lithophilic_score')
-        ]
-        
-        metrics_count = 0
-        summary_count = 0
-        
         # Determine which metrics are actually available in the DataFrame to avoid errors.
-        available_metrics = []
-        for metric_name, raw_col, score_col in metric_mappings:
-            if raw_col in fish_df.columns and score_col in fish_df.columns:
-                available_metrics.append((metric_name, raw_col, score_col))
-        
-        if not available_metrics:
+        if not any(raw in fish_df.columns and score in fish_df.columns for raw, score in FISH_METRICS.values()):
             logger.error("No metric data available in CSV")
             return 0
-            
-        for sample_id, sample_df in fish_df.groupby('sample_id'):
-            if pd.isna(sample_id) or sample_id not in event_id_map:
-                if not pd.isna(sample_id):
-                    logger.warning(f"No event_id found for sample_id={sample_id}")
-                continue
-                
-            event_id = event_id_map[sample_id]
-            
-            # Clear existing data for this event to handle updates and prevent duplicates.
-            cursor.execute('DELETE FROM fish_metrics WHERE event_id = ?', (event_id,))
-            cursor.execute('DELETE FROM fish_summary_scores WHERE event_id = ?', (event_id,))
-            
-            # Use the first row in case duplicates still exist after processing.
-            row = sample_df.iloc[0]
-            
-            for metric_name, raw_col, score_col in available_metrics:
-                if pd.notna(row.get(raw_col)) and pd.notna(row.get(score_col)):
-                    # For proportion-based metrics, the raw value is stored as the result.
-                    metric_result = row[raw_col] if metric_name.startswith('Proportion') else None
-                    
-                    cursor.execute('''
-                        INSERT INTO fish_metrics 
-                        (event_id, metric_name, raw_value, metric_result, metric_score)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (
-                        event_id,
-                        metric_name,
-                        row[raw_col],
-                        metric_result,
-                        row[score_col]
-                    ))
-                    metrics_count += 1
-            
-            # Determine integrity class, prioritizing the pre-calculated value from the CSV.
-            integrity_class = "Unknown"
-
-            if 'integrity_class' in row and pd.notna(row['integrity_class']) and str(row['integrity_class']).strip():
-                integrity_class = str(row['integrity_class']).strip()
-            else:
-                # Fallback to calculating the class if it's not provided.
-                if 'comparison_to_reference' in row and pd.notna(row['comparison_to_reference']):
-                    comparison_value = float(row['comparison_to_reference']) * 100
-                    
-                    if comparison_value >= 97:
-                        integrity_class = "Excellent"
-                    elif comparison_value >= 76:
-                        integrity_class = "Good"
-                    elif comparison_value >= 60:
-                        integrity_class = "Fair"
-                    elif comparison_value >= 47:
-                        integrity_class = "Poor"
-                    else:
-                        integrity_class = "Very Poor"
-
-            # Ensure the integrity class is a valid, expected value before insertion.
-            valid_classes = ["Excellent", "Good", "Fair", "Poor", "Very Poor"]
-            if integrity_class not in valid_classes:
-                logger.warning(f"Invalid integrity_class '{integrity_class}' for sample_id={sample_id}, setting to Unknown")
-                integrity_class = "Unknown"
-
-            if all(col in row for col in ['total_score', 'comparison_to_reference']) and integrity_class != "Unknown":
-                cursor.execute('''
-                    INSERT INTO fish_summary_scores
-                    (event_id, total_score, comparison_to_reference, integrity_class)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    event_id,
-                    row['total_score'],
-                    round(float(row['comparison_to_reference']), 2),
-                    integrity_class
-                ))
-                summary_count += 1
-            else:
-                logger.warning(f"Missing required columns for summary scores for sample_id={sample_id}")
         
-        logger.info(f"Inserted {metrics_count} fish metrics and {summary_count} summary records")
-        return metrics_count
+        # Use the first row per sample in case duplicates still exist after processing.
+        samples = map_event_ids(fish_df, ['sample_id'], event_id_map)
+        if samples.empty:
+            return 0
+        
+        metrics = melt_metrics(samples, 'event_id', FISH_METRICS, ['raw_value', 'metric_score'])
+        # For proportion-based metrics, the raw value is stored as the result.
+        metrics['metric_result'] = metrics['raw_value'].where(metrics['metric_name'].str.startswith('Proportion'))
+        metrics = metrics[['event_id', 'metric_name', 'raw_value', 'metric_result', 'metric_score']]
+        
+        summary = pd.DataFrame(columns=['event_id', 'total_score', 'comparison_to_reference', 'integrity_class'])
+        if all(col in samples.columns for col in ['total_score', 'comparison_to_reference']):
+            integrity_classes = calculate_integrity_classes(samples)
+            scored = integrity_classes != "Unknown"
+            summary = pd.DataFrame({
+                'event_id': samples['event_id'],
+                'total_score': samples['total_score'],
+                'comparison_to_reference': pd.to_numeric(samples['comparison_to_reference']).round(2),
+                'integrity_class': integrity_classes,
+            })[scored]
+            if (~scored).any():
+                logger.warning(f"Missing integrity class for summary scores of {(~scored).sum()} fish samples")
+        else:
+            logger.warning("Missing required columns for fish summary scores")
+        
+        counts = write_biological_records(cursor, 'event_id', samples['event_id'], {
+            'fish_metrics': metrics,
+            'fish_summary_scores': summary,
+        })
+        
+        logger.info(f"Inserted {counts['fish_metrics']} fish metrics and {counts['fish_summary_scores']} summary records")
+        return counts['fish_metrics']
         
     except Exception as e:
         logger.error(f"Error inserting metrics data: {e}")
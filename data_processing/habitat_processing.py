@@ -12,6 +12,12 @@ from datetime import datetime
 import pandas as pd
 
 from data_processing import setup_logging
+from data_processing.biological_utils import (
+    insert_collection_events,
+    map_event_ids,
+    melt_metrics,
+    write_biological_records,
+)
 from data_processing.data_loader import (
     clean_column_names,
     load_csv_data,
@@ -22,6 +28,22 @@ from database.database import close_connection, get_connection
 
 logger = setup_logging("habitat_processing", category="processing")
 
+HABITAT_METRICS = [
+    'instream_cover',
+    'pool_bottom_substrate',
+    'pool_variability',
+    'canopy_cover',
+    'rocky_runs_riffles',
+    'flow',
+    'channel_alteration',
+    'channel_sinuosity',
+    'bank_stability',
+    'bank_vegetation_stability',
+    'streamside_cover'
+]
+
+VALID_HABITAT_GRADES = ["A", "B", "C", "D", "F"]
+
 # Helper functions
 
 def resolve_habitat_duplicates(habitat_df):
@@ -37,85 +59,38 @@ def resolve_habitat_duplicates(habitat_df):
         A DataFrame with duplicate assessments resolved through averaging.
     """
     try:
-        metric_columns = [
-            'instream_cover',
-            'pool_bottom_substrate', 
-            'pool_variability',
-            'canopy_cover',
-            'rocky_runs_riffles',
-            'flow',
-            'channel_alteration',
-            'channel_sinuosity',
-            'bank_stability',
-            'bank_vegetation_stability',
-            'streamside_cover'
-        ]
-        
-        existing_metric_columns = [col for col in metric_columns if col in habitat_df.columns]
+        existing_metric_columns = [col for col in HABITAT_METRICS if col in habitat_df.columns]
         
         if not existing_metric_columns and 'total_score' not in habitat_df.columns:
             logger.warning("No habitat metric columns found for averaging")
             return habitat_df
         
-        grouped = habitat_df.groupby(['site_name', 'assessment_date'])
-        
-        duplicate_groups = []
-        unique_records = []
-        
-        for (site_name, date_str), group in grouped:
-            if len(group) > 1:
-                duplicate_groups.append((site_name, date_str, group))
-            else:
-                unique_records.append(group)
+        keys = ['site_name', 'assessment_date']
+        group_sizes = habitat_df.groupby(keys)[keys[0]].transform('size')
         
-        if not duplicate_groups:
+        if not (group_sizes > 1).any():
             return habitat_df
         
-        averaged_records = []
+        unique_df = habitat_df[group_sizes == 1].sort_values(keys, kind='stable')
         
-        for site_name, date_str, group in duplicate_groups:
-            # Use the first record as a template for the averaged entry.
-            averaged_record = group.iloc[0].copy()
-            
-            for col in existing_metric_columns:
-                values = group[col].dropna()
-                
-                if len(values) > 0:
-                    avg_value = values.mean()
-                    averaged_record[col] = round(avg_value, 1)
-                else:
-                    averaged_record[col] = None
-            
-            if 'total_score' in habitat_df.columns:
-                total_values = group['total_score'].dropna()
-                
-                if len(total_values) > 0:
-                    avg_total = total_values.mean()
-                    averaged_record['total_score'] = round(avg_total)
-                else:
-                    averaged_record['total_score'] = None
-            
-            # Recalculate the habitat grade based on the new averaged score.
-            if pd.notna(averaged_record['total_score']):
-                averaged_record['habitat_grade'] = calculate_habitat_grade(averaged_record['total_score'])
-            else:
-                averaged_record['habitat_grade'] = "Unknown"
-            
-            averaged_records.append(averaged_record)
+        # Each averaged entry keeps its first record as a template, with NaN-skipping means on top
+        grouped = habitat_df[group_sizes > 1].groupby(keys)
+        averages = grouped.agg(
+            **{col: (col, 'mean') for col in existing_metric_columns},
+            total_score=('total_score', 'mean'),
+        )
+        averaged_df = grouped.head(1).set_index(keys).sort_index()
+        averaged_df[existing_metric_columns] = averages[existing_metric_columns].round(1)
+        averaged_df['total_score'] = averages['total_score'].round()
         
-        if unique_records:
-            unique_df = pd.concat(unique_records, ignore_index=True)
-        else:
-            unique_df = pd.DataFrame()
-        
-        if averaged_records:
-            averaged_df = pd.DataFrame(averaged_records)
-            if not unique_df.empty:
-                result_df = pd.concat([unique_df, averaged_df], ignore_index=True)
-            else:
-                result_df = averaged_df
-        else:
-            result_df = unique_df
+        # Recalculate the habitat grade based on the new averaged score.
+        averaged_df['habitat_grade'] = averaged_df['total_score'].map(calculate_habitat_grade)
+        output_columns = list(habitat_df.columns)
+        if 'habitat_grade' not in output_columns:
+            output_columns.append('habitat_grade')
+        averaged_df = averaged_df.reset_index()[output_columns]
+        
+        result_df = pd.concat([unique_df, averaged_df], ignore_index=True)
         
         original_count = len(habitat_df)
         final_count = len(result_df)
@@ -294,46 +269,26 @@ def insert_habitat_assessments(cursor, habitat_df):
         A dictionary mapping sample_ids to their new assessment_ids.
     """
     try:
-        assessment_id_map = {}
-        
         if 'site_name' not in habitat_df.columns or 'sample_id' not in habitat_df.columns:
             logger.error("Missing required columns site_name or sample_id")
-            return assessment_id_map
-            
-        unique_assessments = habitat_df.drop_duplicates(subset=['site_name', 'sample_id']).copy()
-        
-        for _, assessment in unique_assessments.iterrows():
-            cursor.execute("SELECT site_id FROM sites WHERE site_name = ?", (assessment['site_name'],))
-            site_result = cursor.fetchone()
-
-            if site_result:
-                site_id = site_result[0]
-            else:
-                logger.error(f"Site '{assessment['site_name']}' not found in database. Run site processing first.")
-                continue
-            
-            assessment_date = assessment.get('assessment_date_str', None)
-            if assessment_date is None and 'assessment_date' in assessment:
-                try:
-                    assessment_date = pd.to_datetime(assessment['assessment_date']).strftime('%Y-%m-%d')
-                except:
-                    assessment_date = None
-            
-            year = assessment.get('year')
-            
-            cursor.execute('''
-                INSERT INTO habitat_assessments 
-                (site_id, assessment_date, year)
-                VALUES (?, ?, ?)
-            ''', (
-                site_id, 
-                assessment_date, 
-                year
-            ))
-            
-            assessment_id = cursor.lastrowid
-            
-            assessment_id_map[assessment['sample_id']] = assessment_id
+            return {}
+        
+        if 'assessment_date_str' not in habitat_df.columns and 'assessment_date' in habitat_df.columns:
+            dates = pd.to_datetime(habitat_df['assessment_date'], errors='coerce')
+            habitat_df = habitat_df.assign(assessment_date_str=dates.dt.strftime('%Y-%m-%d'))
+        
+        assessment_id_map = insert_collection_events(
+            cursor=cursor,
+            df=habitat_df,
+            table_name='habitat_assessments',
+            grouping_columns=['site_name', 'sample_id'],
+            column_mapping={
+                'site_id': 'site_name',
+                'assessment_date': 'assessment_date_str',
+                'year': 'year'
+            },
+            id_column='assessment_id'
+        )
         
         logger.info(f"Inserted {len(assessment_id_map)} habitat assessments")
         return assessment_id_map
@@ -355,96 +310,48 @@ def insert_metrics_data(cursor, habitat_df, assessment_id_map):
         The total number of metrics records inserted.
     """
     try:
-        expected_metrics = [
-            'instream_cover',
-            'pool_bottom_substrate',
-            'pool_variability',
-            'canopy_cover', 
-            'rocky_runs_riffles',
-            'flow',
-            'channel_alteration',
-            'channel_sinuosity',
-            'bank_stability',
-            'bank_vegetation_stability',
-            'streamside_cover'
-        ]
-        
         # Determine which metrics are actually available in the DataFrame.
-        available_metrics = [col for col in expected_metrics if col in habitat_df.columns]
-        
-        if not available_metrics:
+        if not any(col in habitat_df.columns for col in HABITAT_METRICS):
             logger.error("No habitat metrics columns found in data")
             return 0
-            
-        metrics_count = 0
-        summary_count = 0
-        
-        for sample_id, sample_df in habitat_df.groupby('sample_id'):
-            if pd.isna(sample_id) or sample_id not in assessment_id_map:
-                if not pd.isna(sample_id):
-                    logger.warning(f"No assessment_id found for sample_id={sample_id}")
-                continue
-                
-            assessment_id = assessment_id_map[sample_id]
-            
-            # Clear existing data to prevent duplicates and handle updates.
-            cursor.execute('DELETE FROM habitat_metrics WHERE assessment_id = ?', (assessment_id,))
-            cursor.execute('DELETE FROM habitat_summary_scores WHERE assessment_id = ?', (assessment_id,))
-            
-            # Use the first row in case duplicates still exist after processing.
-            row = sample_df.iloc[0]
-            
-            for metric_name in available_metrics:
-                if pd.notna(row.get(metric_name)):
-                    try:
-                        # Format the metric name for display purposes (e.g., 'instream_cover' -> 'Instream Cover').
-                        display_name = metric_name.replace('_', ' ').title()
-                        
-                        metric_value = round(float(row[metric_name]), 1)
-                        
-                        cursor.execute('''
-                            INSERT INTO habitat_metrics 
-                            (assessment_id, metric_name, score)
-                            VALUES (?, ?, ?)
-                        ''', (
-                            assessment_id,
-                            display_name,
-                            metric_value
-                        ))
-                        metrics_count += 1
-                    except Exception as e:
-                        logger.error(f"Error inserting metric {metric_name}: {e}")
-            
-            # Use the habitat grade from duplicate resolution, which may have been recalculated.
-            habitat_grade = row.get('habitat_grade', "Unknown")
-            
-            # Ensure the habitat grade is a valid, expected value.
-            valid_grades = ["A", "B", "C", "D", "F"]
-            if habitat_grade not in valid_grades:
-                logger.warning(f"Invalid habitat_grade '{habitat_grade}' for sample_id={sample_id}, setting to Unknown")
-                habitat_grade = "Unknown"
-            
-            if 'total_score' in row and pd.notna(row['total_score']) and habitat_grade != "Unknown":
-                try:
-                    total_score = round(float(row['total_score']))
-                    
-                    cursor.execute('''
-                        INSERT INTO habitat_summary_scores
-                        (assessment_id, total_score, habitat_grade)
-                        VALUES (?, ?, ?)
-                    ''', (
-                        assessment_id,
-                        total_score,
-                        habitat_grade
-                    ))
-                    summary_count += 1
-                except Exception as e:
-                    logger.error(f"Error inserting summary score for sample_id={sample_id}: {e}")
-            else:
-                logger.warning(f"Missing required data for summary scores for sample_id={sample_id}")
-        
-        logger.info(f"Inserted {metrics_count} habitat metrics and {summary_count} summary records")
-        return metrics_count
+        
+        # Use the first row per sample in case duplicates still exist after processing.
+        samples = map_event_ids(habitat_df, ['sample_id'], assessment_id_map, id_column='assessment_id')
+        if samples.empty:
+            return 0
+        
+        # Format metric names for display purposes (e.g., 'instream_cover' -> 'Instream Cover').
+        metric_columns = {col.replace('_', ' ').title(): (col,) for col in HABITAT_METRICS}
+        metrics = melt_metrics(samples, 'assessment_id', metric_columns, ['score'])
+        metrics['score'] = metrics['score'].astype(float).round(1)
+        
+        # Use the habitat grade from duplicate resolution, which may have been recalculated.
+        grades = samples['habitat_grade'] if 'habitat_grade' in samples.columns else pd.Series("Unknown", index=samples.index)
+        invalid = ~grades.isin(VALID_HABITAT_GRADES)
+        for sample_id, grade in zip(samples.loc[invalid, 'sample_id'], grades[invalid]):
+            logger.warning(f"Invalid habitat_grade '{grade}' for sample_id={sample_id}, setting to Unknown")
+        
+        summary = pd.DataFrame(columns=['assessment_id', 'total_score', 'habitat_grade'])
+        if 'total_score' in samples.columns:
+            total_scores = pd.to_numeric(samples['total_score'], errors='coerce')
+            scored = total_scores.notna() & ~invalid
+            summary = pd.DataFrame({
+                'assessment_id': samples['assessment_id'],
+                'total_score': total_scores.round(),
+                'habitat_grade': grades,
+            })[scored]
+            if (~scored).any():
+                logger.warning(f"Missing required data for summary scores of {(~scored).sum()} habitat samples")
+        else:
+            logger.warning("Missing required data for habitat summary scores")
+        
+        counts = write_biological_records(cursor, 'assessment_id', samples['assessment_id'], {
+            'habitat_metrics': metrics,
+            'habitat_summary_scores': summary,
+        })
+        
+        logger.info(f"Inserted {counts['habitat_metrics']} habitat metrics and {counts['habitat_summary_scores']} summary records")
+        return counts['habitat_metrics']
         
     except Exception as e:
         logger.error(f"Error inserting metrics data: {e}")
@@ -8,13 +8,17 @@ biological condition based on Blue Thumb protocols.
 
 import sqlite3
 
+import numpy as np
 import pandas as pd
 
 from data_processing import setup_logging
 from data_processing.biological_utils import (
     convert_columns_to_numeric,
     insert_collection_events,
+    map_event_ids,
+    melt_metrics,
     remove_invalid_biological_values,
+    write_biological_records,
 )
 from data_processing.data_loader import (
     clean_column_names,
@@ -26,6 +30,16 @@ from database.database import close_connection, get_connection
 
 logger = setup_logging("macro_processing", category="processing")
 
+# Standardized metric names and their (raw value, score) columns
+MACRO_METRICS = {
+    'Taxa Richness': ('taxa_richness', 'taxa_richness_score'),
+    'EPT Taxa Richness': ('ept_taxa_richness', 'ept_taxa_richness_score'),
+    'EPT Abundance': ('ept_abundance', 'ept_abundance_score'),
+    'HBI Score': ('hbi_score', 'hbi_score_score'),
+    '% Contribution Dominants': ('contribution_dominants', 'contribution_dominants_score'),
+    'Shannon-Weaver': ('shannon_weaver', 'shannon_weaver_score'),
+}
+
 # Main processing functions
 
 def process_macro_csv_data(site_name=None):
@@ -174,6 +188,15 @@ def insert_macro_collection_events(cursor, macro_df):
         logger.error(f"Error inserting macro collection events: {e}")
         return {}
     
+def calculate_biological_conditions(comparison_to_reference):
+    """Map comparison-to-reference ratios to biological condition using the official thresholds."""
+    comparison = pd.to_numeric(comparison_to_reference, errors='coerce') * 100
+    return pd.Series(np.select(
+        [comparison >= 83, comparison >= 54, comparison >= 17, comparison.notna()],
+        ["Non-impaired", "Slightly Impaired", "Moderately Impaired", "Severely Impaired"],
+        default="Unknown",
+    ), index=comparison.index)
+
 def insert_metrics_data(cursor, macro_df, event_id_map):
     """
     Inserts macroinvertebrate metrics and summary scores for each collection event.
@@ -187,97 +210,42 @@ def insert_metrics_data(cursor, macro_df, event_id_map):
         The total number of metrics records inserted.
     """
     try:
-        # Map standardized metric names to their corresponding data columns.
-        metric_mappings = [
-            ('Taxa Richness', 'taxa_richness', 'taxa_richness_score'),
-            ('EPT Taxa Richness', 'ept_taxa_richness', 'ept_taxa_richness_score'),
-            ('EPT Abundance', 'ept_abundance', 'ept_abundance_score'),
-            ('HBI Score', 'hbi_score', 'hbi_score_score'),
-            ('% Contribution Dominants', 'contribution_dominants', 'contribution_dominants_score'),
-            ('Shannon-Weaver', 'shannon_weaver', 'shannon_weaver_score')
-        ]
-        
-        metrics_count = 0
-        summary_count = 0
-        
         # To avoid errors, check which metric columns are present in the dataframe.
-        available_metrics = []
-        for metric_name, raw_col, score_col in metric_mappings:
-            if raw_col in macro_df.columns and score_col in macro_df.columns:
-                available_metrics.append((metric_name, raw_col, score_col))
-        
-        if not available_metrics:
+        if not any(raw in macro_df.columns and score in macro_df.columns for raw, score in MACRO_METRICS.values()):
             logger.error("No metric data available in CSV")
             return 0
-            
-        for (sample_id, habitat), sample_df in macro_df.groupby(['sample_id', 'habitat']):
-            # Skip records if the sample identifier is missing or has no corresponding event.
-            mapping_key = (sample_id, habitat)
-            if pd.isna(sample_id) or mapping_key not in event_id_map:
-                if not pd.isna(sample_id):
-                    logger.warning(f"No event_id found for sample_id={sample_id}, habitat={habitat}")
-                continue
-                
-            event_id = event_id_map[mapping_key]
-            
-            # Ensure data idempotency by clearing existing records for this event.
-            cursor.execute('DELETE FROM macro_metrics WHERE event_id = ?', (event_id,))
-            cursor.execute('DELETE FROM macro_summary_scores WHERE event_id = ?', (event_id,))
-            
-            # Use the first row of the group as the representative record.
-            row = sample_df.iloc[0]
-            
-            # In the insert_metrics_data function, update the metrics insertion:
-            for metric_name, raw_col, score_col in available_metrics:
-                if pd.notna(row.get(raw_col)) and pd.notna(row.get(score_col)):
-                    cursor.execute('''
-                        INSERT INTO macro_metrics 
-                        (event_id, metric_name, raw_value, metric_score)
-                        VALUES (?, ?, ?, ?)
-                    ''', (
-                        event_id,
-                        metric_name,
-                        float(row[raw_col]),  
-                        int(row[score_col])  
-                    ))
-                    metrics_count += 1
-            
-            # Determine biological condition based on official comparison-to-reference thresholds.
-            biological_condition = "Unknown" # Default fallback
-            
-            if 'comparison_to_reference' in row and pd.notna(row['comparison_to_reference']):
-                comparison_value = float(row['comparison_to_reference']) * 100  # Convert to percentage
-                
-                if comparison_value >= 83:
-                    biological_condition = "Non-impaired"
-                elif comparison_value >= 54:
-                    biological_condition = "Slightly Impaired"
-                elif comparison_value >= 17:
-                    biological_condition = "Moderately Impaired"
-                else:
-                    biological_condition = "Severely Impaired"
-                    
-                logger.debug(f"Calculated biological_condition: {biological_condition} (score: {comparison_value}%)")
-            else:
-                logger.warning(f"Cannot determine biological condition for sample_id={sample_id}, habitat={habitat} - missing comparison_to_reference data")
-            
-            if all(col in row for col in ['total_score', 'comparison_to_reference']) and biological_condition:
-                cursor.execute('''
-                    INSERT INTO macro_summary_scores
-                    (event_id, total_score, comparison_to_reference, biological_condition)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    event_id,
-                    int(row['total_score']),             
-                    round(float(row['comparison_to_reference']), 2),
-                    biological_condition
-                ))
-                summary_count += 1
-            else:
-                logger.warning(f"Missing required columns for summary scores for sample_id={sample_id}, habitat={habitat}")
         
-        logger.info(f"Inserted {metrics_count} macro metrics and {summary_count} summary records")
-        return metrics_count
+        # Use the first row of each (sample_id, habitat) group as the representative record.
+        samples = map_event_ids(macro_df, ['sample_id', 'habitat'], event_id_map)
+        if samples.empty:
+            return 0
+        
+        metrics = melt_metrics(samples, 'event_id', MACRO_METRICS, ['raw_value', 'metric_score'])
+        metrics['raw_value'] = metrics['raw_value'].astype(float)
+        metrics['metric_score'] = metrics['metric_score'].astype(int)
+        
+        summary = pd.DataFrame(columns=['event_id', 'total_score', 'comparison_to_reference', 'biological_condition'])
+        if all(col in samples.columns for col in ['total_score', 'comparison_to_reference']):
+            conditions = calculate_biological_conditions(samples['comparison_to_reference'])
+            if (conditions == "Unknown").any():
+                logger.warning(f"Cannot determine biological condition for {(conditions == 'Unknown').sum()} "
+                               "macro samples - missing comparison_to_reference data")
+            summary = pd.DataFrame({
+                'event_id': samples['event_id'],
+                'total_score': samples['total_score'].astype(int),
+                'comparison_to_reference': pd.to_numeric(samples['comparison_to_reference']).round(2),
+                'biological_condition': conditions,
+            })
+        else:
+            logger.warning("Missing required columns for macro summary scores")
+        
+        counts = write_biological_records(cursor, 'event_id', samples['event_id'], {
+            'macro_metrics': metrics,
+            'macro_summary_scores': summary,
+        })
+        
+        logger.info(f"Inserted {counts['macro_metrics']} macro metrics and {counts['macro_summary_scores']} summary records")
+        return counts['macro_metrics']
         
     except Exception as e:
         logger.error(f"Error inserting metrics data: {e}")
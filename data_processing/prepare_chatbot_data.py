@@ -16,8 +16,9 @@ from layouts.ui_data import (
     RECREATION_CARDS,
     RURAL_CARDS,
 )
+from data_processing.chatbot_index import INDEX_PATH, build_index
+from utils import markdown_registry
 
-TEXT_DIR = PROJECT_ROOT / "text"
 OUTPUT_DIR = PROJECT_ROOT / "data" / "processed" / "chatbot_data"
 
 def sanitize_filename(name):
@@ -30,9 +31,10 @@ def sanitize_filename(name):
 def process_markdown_files():
     """Processes all markdown files from the text directory."""
     print("Processing markdown files...")
-    md_files = list(TEXT_DIR.glob("**/*.md"))
+    md_files = markdown_registry.list_files()
     for md_file in md_files:
-        shutil.copy(md_file, OUTPUT_DIR / md_file.name)
+        output_path = OUTPUT_DIR / pathlib.PurePosixPath(md_file).name
+        output_path.write_text(markdown_registry.get_text(md_file), encoding="utf-8")
     print(f"-> Copied {len(md_files)} markdown files.")
 
 def process_action_cards():
@@ -133,6 +135,10 @@ def main():
     process_action_cards()
     process_species_data()
     process_diagram_captions()
+
+    print("Building local search index...")
+    index = build_index(OUTPUT_DIR, INDEX_PATH)
+    print(f"-> Indexed {len(index.passages)} passages to {INDEX_PATH.name}.")
     print("\nData preparation complete.")
     print(f"All context files have been saved to:\n{OUTPUT_DIR.resolve()}")
 
@@ -12,7 +12,7 @@ from datetime import datetime, timedelta
 import pandas as pd
 
 from data_processing import setup_logging
-from data_processing.data_loader import PROCESSED_DATA_DIR
+from data_processing.data_loader import PROCESSED_DATA_DIR, to_sql_rows
 from database.database import close_connection, get_connection
 
 logger = setup_logging("site_processing", category="processing")
@@ -75,8 +75,9 @@ def insert_sites_into_db(sites_df):
     """
     Inserts or updates site data in the database.
     
-    Uses INSERT OR IGNORE followed by UPDATE to avoid foreign key constraint 
-    issues when sites already exist with child records.
+    The incoming sites are staged in a temp table and applied with a single
+    INSERT ... ON CONFLICT(site_name) DO UPDATE, which updates existing sites
+    in place to avoid foreign key constraint issues with their child records.
     
     Args:
         sites_df: A DataFrame containing the site information to load.
@@ -98,46 +99,46 @@ def insert_sites_into_db(sites_df):
         sites_df['site_name'] = sites_df['site_name'].astype(str)
         
         columns = sites_df.columns.tolist()
+        columns_str = ', '.join(columns)
         
         cursor = conn.cursor()
-        sites_inserted = 0
-        sites_updated = 0
         
-        for _, row in sites_df.iterrows():
-            site_name = row['site_name']
-            
-            # Check if site already exists
-            cursor.execute("SELECT site_id FROM sites WHERE site_name = ?", (site_name,))
-            existing_site = cursor.fetchone()
-            
-            if existing_site:
-                # Site exists - UPDATE it (avoids foreign key constraint issues)
-                site_id = existing_site[0]
-                
-                # Build UPDATE statement for non-site_name columns
-                update_columns = [col for col in columns if col != 'site_name']
-                if update_columns:
-                    set_clause = ', '.join([f"{col} = ?" for col in update_columns])
-                    update_sql = f"UPDATE sites SET {set_clause} WHERE site_id = ?"
-                    update_values = [row[col] for col in update_columns] + [site_id]
-                    
-                    cursor.execute(update_sql, update_values)
-                    sites_updated += 1
-                
-            else:
-                # Site doesn't exist - INSERT it
-                placeholders = ', '.join(['?' for _ in columns])
-                columns_str = ', '.join(columns)
-                insert_sql = f"INSERT INTO sites ({columns_str}) VALUES ({placeholders})"
-                insert_values = [row[col] for col in columns]
-                
-                cursor.execute(insert_sql, insert_values)
-                sites_inserted += 1
+        # Stage the incoming sites with the same column affinities as the sites table
+        cursor.execute("DROP TABLE IF EXISTS temp.incoming_sites")
+        cursor.execute(f"CREATE TEMP TABLE incoming_sites AS SELECT {columns_str} FROM sites WHERE 0")
+        cursor.executemany(
+            f"INSERT INTO incoming_sites ({columns_str}) VALUES ({', '.join('?' * len(columns))})",
+            to_sql_rows(sites_df)
+        )
+        sites_staged = len(sites_df)
+        
+        cursor.execute("""
+            SELECT COUNT(DISTINCT site_name) FROM incoming_sites
+            WHERE site_name NOT IN (SELECT site_name FROM sites)
+        """)
+        sites_inserted = cursor.fetchone()[0]
+        
+        # Later rows for a name already staged update it, as they would one at a time
+        update_columns = [col for col in columns if col != 'site_name']
+        if update_columns:
+            conflict_action = "DO UPDATE SET " + ', '.join(f"{col} = excluded.{col}" for col in update_columns)
+            sites_updated = sites_staged - sites_inserted
+        else:
+            conflict_action = "DO NOTHING"
+            sites_updated = 0
+        
+        # WHERE true keeps the parser from reading ON CONFLICT as a join constraint
+        cursor.execute(f"""
+            INSERT INTO sites ({columns_str})
+            SELECT {columns_str} FROM incoming_sites WHERE true ORDER BY rowid
+            ON CONFLICT(site_name) {conflict_action}
+        """)
+        cursor.execute("DROP TABLE temp.incoming_sites")
         
         conn.commit()
         
         total_processed = sites_inserted + sites_updated
-        logger.info(f"Site database operations: {sites_inserted} inserted, {sites_updated} updated")
+        logger.info(f"Site database operations: {sites_staged} staged, {sites_inserted} inserted, {sites_updated} updated")
         
         return total_processed
     
@@ -186,33 +187,19 @@ def cleanup_unused_sites():
     try:
         cursor = conn.cursor()
         
-        # Identify all sites that have at least one record in any monitoring table.
+        # Anti-join against every monitoring table; each lookup uses that table's site index
         cursor.execute('''
-            SELECT DISTINCT site_id FROM (
-                SELECT site_id FROM chemical_collection_events
-                UNION
-                SELECT site_id FROM fish_collection_events  
-                UNION
-                SELECT site_id FROM macro_collection_events
-                UNION  
-                SELECT site_id FROM habitat_assessments
-            )
+            DELETE FROM sites
+            WHERE NOT EXISTS (SELECT 1 FROM chemical_collection_events e WHERE e.site_id = sites.site_id)
+              AND NOT EXISTS (SELECT 1 FROM fish_collection_events e WHERE e.site_id = sites.site_id)
+              AND NOT EXISTS (SELECT 1 FROM macro_collection_events e WHERE e.site_id = sites.site_id)
+              AND NOT EXISTS (SELECT 1 FROM habitat_assessments e WHERE e.site_id = sites.site_id)
         ''')
-        
-        sites_with_data = {row[0] for row in cursor.fetchall()}
-        
-        cursor.execute('SELECT site_id FROM sites')
-        all_sites = {row[0] for row in cursor.fetchall()}
-        
-        # Determine which sites have no data by finding the difference.
-        unused_sites = all_sites - sites_with_data
+        unused_sites = cursor.rowcount
+        conn.commit()
         
         if unused_sites:
-            placeholders = ','.join(['?' for _ in unused_sites])
-            cursor.execute(f'DELETE FROM sites WHERE site_id IN ({placeholders})', list(unused_sites))
-            conn.commit()
-            
-            logger.info(f"Removed {len(unused_sites)} unused sites")
+            logger.info(f"Removed {unused_sites} unused sites")
         else:
             logger.info("No unused sites found")
         
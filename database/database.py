@@ -1,11 +1,230 @@
+import hashlib
+import itertools
 import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import quote
+
+from database.request_context import get_query_counter
+from utils import setup_logging
+
+logger = setup_logging("database", category="database")
+
+# Data version per database file, recomputed when the file changes
+_data_versions = {}
+
+# How the dashboard's connections read the database: from the file, from an in-memory
+# snapshot of it, or from the file opened immutable with memory-mapped I/O. The pipeline
+# and the Survey123 sync never enable a serving mode, so their writes always go to the file.
+SERVING_MODES = ('disk', 'memory', 'immutable')
+MMAP_SIZE = 256 * 1024 * 1024
+
+_serving = {'mode': 'disk', 'uri': None, 'holder': None, 'data_version': None}
+_serving_lock = threading.Lock()
+_snapshot_ids = itertools.count(1)
+_pinned_snapshot = ContextVar('pinned_snapshot', default=None)
+
+def get_database_path():
+    """Return the path of the SQLite database file."""
+    return os.path.join(os.path.dirname(__file__), 'blue_thumb.db')
+
+def get_data_version():
+    """
+    Return a short content hash identifying the current database contents.
+    
+    Caches keyed on the data version go stale automatically after a reload or sync.
+    Returns None if the database file does not exist.
+    """
+    # An in-memory snapshot keeps its version until the next one is loaded
+    pinned = _pinned_snapshot.get()
+    if pinned is not None:
+        return pinned['data_version']
+    if _serving['mode'] == 'memory':
+        return _serving['data_version']
+    return file_data_version(get_database_path())
+
+def file_data_version(db_path):
+    """Return the content hash of a database file, or None if it does not exist."""
+    try:
+        stat = os.stat(db_path)
+    except FileNotFoundError:
+        return None
+    
+    signature = (db_path, stat.st_size, stat.st_mtime_ns)
+    if signature not in _data_versions:
+        digest = hashlib.sha256()
+        with open(db_path, 'rb') as db_file:
+            for block in iter(lambda: db_file.read(1 << 20), b''):
+                digest.update(block)
+        _data_versions.clear()
+        _data_versions[signature] = digest.hexdigest()[:16]
+    
+    return _data_versions[signature]
+
+class _TimedCursor(sqlite3.Cursor):
+    """Cursor that adds the time spent executing and fetching to a query counter."""
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(self, *args)
+        finally:
+            self.connection.query_counter.record_time(time.perf_counter() - start)
+
+    def execute(self, *args):
+        return self._timed(sqlite3.Cursor.execute, *args)
+
+    def executemany(self, *args):
+        return self._timed(sqlite3.Cursor.executemany, *args)
+
+    def fetchone(self):
+        return self._timed(sqlite3.Cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._timed(sqlite3.Cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._timed(sqlite3.Cursor.fetchall)
+
+class _TimedConnection(sqlite3.Connection):
+    """Connection whose cursors report SQL time to the active query counter."""
+
+    query_counter = None
+
+    def cursor(self, factory=_TimedCursor):
+        return super().cursor(factory)
+
+    # The built-in shortcuts create plain cursors, bypassing cursor()
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+def load_snapshot(db_path=None):
+    """
+    Copy a database file into a new shared in-memory database and serve reads from it.
+    
+    The swap is atomic: connections opened afterwards read the new snapshot, while
+    connections already open, and requests inside pinned_snapshot, keep reading the
+    one they started on.
+    Returns the data version of the loaded snapshot.
+    """
+    db_path = db_path or get_database_path()
+    uri = f"file:blue_thumb_snapshot_{next(_snapshot_ids)}?mode=memory&cache=shared"
+    
+    # A shared in-memory database lives as long as a connection to it is open
+    holder = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    try:
+        source = sqlite3.connect(f"file:{quote(db_path)}?mode=ro", uri=True)
+        try:
+            source.backup(holder)
+        finally:
+            source.close()
+    except Exception:
+        holder.close()
+        raise
+    data_version = file_data_version(db_path)
+    
+    with _serving_lock:
+        previous = _serving['holder']
+        _serving.update(mode='memory', uri=uri, holder=holder, data_version=data_version)
+    if previous is not None:
+        previous.close()
+    
+    return data_version
+
+@contextmanager
+def pinned_snapshot():
+    """
+    Keep every connection opened inside the block on the current in-memory snapshot.
+    
+    A request that starts before a snapshot swap finishes on the snapshot it started
+    with, and reports its data version. Outside memory mode, and in nested blocks,
+    this does nothing.
+    """
+    if _pinned_snapshot.get() is not None or _serving['mode'] != 'memory':
+        yield
+        return
+    
+    # Opened under the lock so the snapshot cannot be released before it is held
+    with _serving_lock:
+        pinned = {'uri': _serving['uri'], 'data_version': _serving['data_version']}
+        keeper = sqlite3.connect(pinned['uri'], uri=True)
+    token = _pinned_snapshot.set(pinned)
+    try:
+        yield
+    finally:
+        _pinned_snapshot.reset(token)
+        keeper.close()
+
+def enable_serving_mode(mode=None):
+    """
+    Route the dashboard's connections through a serving mode, read-only.
+    
+    The mode defaults to the DATABASE_SERVING_MODE environment variable, and to
+    'disk' (plain file connections) when that is unset. Memory mode falls back to
+    disk when there is no database file yet to copy.
+    """
+    mode = mode or os.environ.get('DATABASE_SERVING_MODE', 'disk')
+    if mode not in SERVING_MODES:
+        raise ValueError(f"Unknown database serving mode '{mode}', expected one of {SERVING_MODES}")
+    
+    if mode == 'memory':
+        if os.path.exists(get_database_path()):
+            load_snapshot()
+            return
+        logger.warning("No database file to load into memory, serving reads from disk instead")
+        mode = 'disk'
+    
+    uri = f"file:{quote(get_database_path())}?immutable=1" if mode == 'immutable' else None
+    with _serving_lock:
+        previous = _serving['holder']
+        _serving.update(mode=mode, uri=uri, holder=None, data_version=None)
+    if previous is not None:
+        previous.close()
+
+def get_serving_mode():
+    """Return the active serving mode: 'disk', 'memory' or 'immutable'."""
+    return _serving['mode']
+
+def _connect(uri):
+    """Open a connection to a serving URI, or to the database file when uri is None."""
+    if uri is not None:
+        target, kwargs = uri, {'uri': True}
+    else:
+        target, kwargs = get_database_path(), {}
+    
+    # Report statements and their timings to the active query counter, if any
+    counter = get_query_counter()
+    if counter is not None:
+        conn = sqlite3.connect(target, factory=_TimedConnection, **kwargs)
+        conn.query_counter = counter
+        conn.set_trace_callback(counter.record)
+    else:
+        conn = sqlite3.connect(target, **kwargs)
+    return conn
 
 def get_connection():
     """Create and return a database connection."""
-    db_path = os.path.join(os.path.dirname(__file__), 'blue_thumb.db')
-    conn = sqlite3.connect(db_path)
+    pinned = _pinned_snapshot.get()
+    if pinned is not None:
+        uri = pinned['uri']
+        conn = _connect(uri)
+    else:
+        # Opened under the lock so a snapshot swap cannot release it before it is held
+        with _serving_lock:
+            uri = _serving['uri']
+            conn = _connect(uri)
+    
     conn.execute("PRAGMA foreign_keys = ON")
+    if uri is not None:
+        conn.execute("PRAGMA query_only = ON")
+        if 'immutable=1' in uri:
+            conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
     
     return conn
 
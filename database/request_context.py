@@ -0,0 +1,119 @@
+"""
+Request-scoped query memoization and query counting.
+
+Callbacks decorated with request_scoped share fetched DataFrames across every
+viz and table builder they call, and report how many SQL statements they ran.
+"""
+
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import pandas as pd
+
+from utils import setup_logging
+
+logger = setup_logging("request_context", category="database")
+
+_request_cache = ContextVar('request_cache', default=None)
+_query_counter = ContextVar('query_counter', default=None)
+
+class QueryCounter:
+    """Collects the SQL statements executed, and the time spent in them, while it is active."""
+
+    def __init__(self, parent=None):
+        self.statements = []
+        self.seconds = 0.0
+        self.parent = parent
+
+    def record(self, statement):
+        # Connection setup pragmas are not data queries
+        if statement.lstrip().upper().startswith('PRAGMA'):
+            return
+        self.statements.append(statement)
+        if self.parent is not None:
+            self.parent.record(statement)
+
+    def record_time(self, seconds):
+        self.seconds += seconds
+        if self.parent is not None:
+            self.parent.record_time(seconds)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+def get_query_counter():
+    """Return the active QueryCounter, or None outside count_queries."""
+    return _query_counter.get()
+
+@contextmanager
+def count_queries():
+    """Count SQL statements run on connections opened inside the block."""
+    counter = QueryCounter(parent=_query_counter.get())
+    token = _query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_counter.reset(token)
+
+@contextmanager
+def data_request_context():
+    """
+    Memoize request_cached queries until the block exits. Nested blocks share the outer cache.
+
+    The block also stays on the database snapshot it started on, so a hot reload
+    never mixes old and new data within one request.
+    """
+    if _request_cache.get() is not None:
+        yield
+        return
+
+    # Imported here because database.database imports this module
+    from database.database import pinned_snapshot
+
+    token = _request_cache.set({})
+    try:
+        with pinned_snapshot():
+            yield
+    finally:
+        _request_cache.reset(token)
+
+def _copy_result(result):
+    """Copy DataFrames so one caller's in-place edits do not leak into another's."""
+    if isinstance(result, pd.DataFrame):
+        return result.copy()
+    if isinstance(result, tuple):
+        return tuple(_copy_result(item) for item in result)
+    return result
+
+def request_cached(func):
+    """Memoize a query function for the duration of the active data_request_context."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        cache = _request_cache.get()
+        if cache is None:
+            return func(*args, **kwargs)
+
+        key = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return func(*args, **kwargs)
+
+        if key not in cache:
+            cache[key] = func(*args, **kwargs)
+        return _copy_result(cache[key])
+
+    return wrapper
+
+def request_scoped(func):
+    """Run a callback inside a data_request_context and log the queries it ran."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with data_request_context(), count_queries() as counter:
+            result = func(*args, **kwargs)
+        logger.debug(f"{func.__name__} ran {counter.count} queries")
+        return result
+
+    return wrapper
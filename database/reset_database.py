@@ -6,7 +6,8 @@ Use this script to quickly rebuild your database after schema changes.
 import os
 import time
 import traceback
-from database.database import get_connection, close_connection
+from database.database import get_connection, close_connection, get_database_path
+from database.db_optimize import optimize_database
 from database.db_schema import create_tables
 from data_processing.consolidate_sites import verify_cleaned_csvs, consolidate_sites_from_csvs
 from data_processing.site_processing import process_site_data, classify_active_sites, cleanup_unused_sites
@@ -16,6 +17,7 @@ from data_processing.updated_chemical_processing import load_updated_chemical_da
 from data_processing.fish_processing import load_fish_data
 from data_processing.macro_processing import load_macroinvertebrate_data
 from data_processing.habitat_processing import load_habitat_data
+from data_processing.export_artifacts import publish_export_artifacts
 from utils import setup_logging
 
 logger = setup_logging("reset_database", category="database")
@@ -217,7 +219,19 @@ def reload_all_data():
         if not cleanup_result:
             logger.warning("Site cleanup had issues, but continuing...")
         
-        # Step 13: Generate final data summary
+        # Step 13: Refresh planner statistics and compact the finished database
+        try:
+            optimize_database(get_database_path())
+        except Exception as e:
+            logger.warning(f"Database optimization had issues: {e}")
+        
+        # Step 14: Publish CSV download artifacts for the finished database
+        try:
+            publish_export_artifacts()
+        except Exception as e:
+            logger.warning(f"Export artifact publishing had issues: {e}")
+        
+        # Step 15: Generate final data summary
         final_summary = generate_final_data_summary()
         
         elapsed_time = time.time() - start_time
@@ -0,0 +1,200 @@
+"""
+Query results preloaded once and shared by every gunicorn worker.
+
+With SHARED_DATA_PRELOAD=1, gunicorn.conf.py turns on preload_app and the master
+process runs the dashboard's hot read queries before forking: the site table,
+the latest reading per site, the chemical reference values and every site's
+series. DataFrame results are kept as read-only NumPy arrays, with text columns
+dictionary-encoded, so forked workers share the pages copy-on-write instead of
+each querying and caching its own copy.
+
+Functions decorated with shared_cached return a fresh copy of the preloaded
+result for the same arguments while the data version matches the one preloaded,
+and query the database otherwise (including after a snapshot hot reload).
+"""
+
+import copy
+import functools
+import inspect
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from database.database import get_data_version
+from utils import setup_logging
+
+logger = setup_logging("shared_data", category="database")
+
+PRELOAD_ENV = 'SHARED_DATA_PRELOAD'
+
+_store = {'data_version': None, 'entries': {}}
+
+def preload_enabled():
+    """Return whether SHARED_DATA_PRELOAD asks for a pre-fork preload."""
+    return os.environ.get(PRELOAD_ENV, '').lower() in ('1', 'true', 'yes')
+
+def _read_only(values):
+    values = np.array(values, copy=True)
+    values.flags.writeable = False
+    return values
+
+class SharedFrame:
+    """A DataFrame held as read-only NumPy arrays and rebuilt as a new DataFrame on every read."""
+
+    def __init__(self, df):
+        self.columns = df.columns
+        self.columns_data = [self._encode(df.iloc[:, position]) for position in range(df.shape[1])]
+        default_index = isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1
+        self.index = None if default_index else (self._encode(df.index.to_series()), df.index.name)
+        self.length = len(df)
+
+    @staticmethod
+    def _encode(series):
+        dtype = series.dtype
+        if isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+            return ('values', _read_only(series.to_numpy()))
+        if dtype == object:
+            # Text columns become integer codes into a small table of distinct values
+            missing = series[series.isna()]
+            if missing.map(type).nunique() <= 1:
+                codes, uniques = pd.factorize(series)
+                na_value = missing.iloc[0] if len(missing) else None
+                return ('codes', _read_only(codes.astype(np.int32)), np.asarray(uniques, dtype=object), na_value)
+        # Extension types and mixed missing values keep their own copy
+        return ('array', series.array.copy())
+
+    @staticmethod
+    def _decode(encoded):
+        kind = encoded[0]
+        if kind == 'values':
+            return encoded[1].copy()
+        if kind == 'codes':
+            _, codes, uniques, na_value = encoded
+            values = uniques.take(codes) if len(uniques) else np.empty(len(codes), dtype=object)
+            values[codes < 0] = na_value
+            return values
+        return encoded[1].copy()
+
+    def to_frame(self):
+        """Return a new, writable DataFrame equal to the one stored."""
+        index = None
+        if self.index is not None:
+            encoded, name = self.index
+            index = pd.Index(self._decode(encoded), name=name)
+        data = {position: self._decode(encoded) for position, encoded in enumerate(self.columns_data)}
+        df = pd.DataFrame(data, index=index if index is not None else pd.RangeIndex(self.length), copy=False)
+        df.columns = self.columns
+        return df
+
+    @property
+    def nbytes(self):
+        """Bytes held in shareable arrays."""
+        return sum(encoded[1].nbytes for encoded in self.columns_data if encoded[0] != 'array')
+
+def _call_key(func, args, kwargs):
+    """Key a call by its bound arguments, so positional, keyword and default forms match."""
+    bound = func.__signature__.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return (func.__module__, func.__qualname__, tuple(bound.arguments.items()))
+
+def shared_cached(func):
+    """Serve a query from the preloaded results when they cover the call and the current data."""
+    func.__signature__ = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        entries = _store['entries']
+        if not entries:
+            return func(*args, **kwargs)
+
+        try:
+            key = _call_key(func, args, kwargs)
+            entry = entries.get(key)
+        except TypeError:
+            entry = None
+        if entry is None or _store['data_version'] != get_data_version():
+            return func(*args, **kwargs)
+
+        if isinstance(entry, SharedFrame):
+            return entry.to_frame()
+        return copy.deepcopy(entry)
+
+    wrapper.__wrapped_query__ = func
+    return wrapper
+
+def _store_result(entries, func, args, result):
+    """Add one query result to entries, unless it cannot be rebuilt exactly."""
+    query = func.__wrapped_query__
+    key = _call_key(query, args, {})
+    if not isinstance(result, pd.DataFrame):
+        entries[key] = copy.deepcopy(result)
+        return 0
+
+    shared = SharedFrame(result)
+    rebuilt = shared.to_frame()
+    if not (rebuilt.equals(result) and rebuilt.dtypes.equals(result.dtypes)):
+        logger.warning(f"Not preloading {query.__qualname__}{args}: it does not round-trip exactly")
+        return 0
+    entries[key] = shared
+    return shared.nbytes
+
+def preload_calls():
+    """Return the (query, args) pairs preloaded: site tables, latest readings, references and series."""
+    from data_processing import data_queries
+    from data_processing.chemical_utils import get_reference_values
+    from utils import get_sites_with_data
+    from visualizations import map_queries
+
+    calls = [
+        (map_queries.get_sites_for_maps, (False,)),
+        (map_queries.get_sites_for_maps, (True,)),
+        (get_reference_values, ()),
+    ]
+    series_queries = {
+        'chemical': (map_queries.get_latest_chemical_data_for_maps, data_queries.get_chemical_data_from_db),
+        'fish': (map_queries.get_latest_fish_data_for_maps, data_queries.get_fish_dataframe),
+        'macro': (map_queries.get_latest_macro_data_for_maps, data_queries.get_macroinvertebrate_dataframe),
+        'habitat': (map_queries.get_latest_habitat_data_for_maps, data_queries.get_habitat_dataframe),
+    }
+    for data_type, (latest_query, series_query) in series_queries.items():
+        calls.append((latest_query, (None,)))
+        calls.append((series_query, (None,)))
+        calls.extend((series_query, (site_name,)) for site_name in get_sites_with_data(data_type))
+    return calls
+
+def preload_shared_data(calls=None):
+    """
+    Run the preload queries and publish their results for shared_cached functions.
+
+    Call before forking workers. Returns a summary with the entry count, bytes held
+    in shareable arrays, the data version and elapsed seconds.
+    """
+    start_time = time.perf_counter()
+    data_version = get_data_version()
+    if data_version is None:
+        raise FileNotFoundError("No database found to preload from")
+
+    # Queries run against the database while the store is empty
+    clear_shared_data()
+    entries = {}
+    shared_bytes = 0
+    for func, args in (calls if calls is not None else preload_calls()):
+        shared_bytes += _store_result(entries, func, args, func(*args))
+
+    _store.update(data_version=data_version, entries=entries)
+
+    summary = {
+        'entries': len(entries),
+        'shared_bytes': shared_bytes,
+        'data_version': data_version,
+        'seconds': round(time.perf_counter() - start_time, 2),
+    }
+    logger.info(f"Preloaded {summary['entries']} query results ({shared_bytes / 1024:,.0f} KB of shared arrays) "
+                f"for data version {data_version} in {summary['seconds']:.1f}s")
+    return summary
+
+def clear_shared_data():
+    """Drop every preloaded result so decorated functions query the database again."""
+    _store.update(data_version=None, entries={})
@@ -0,0 +1,288 @@
+"""
+Hot reload of new database snapshots while the dashboard is running.
+
+A background thread polls a snapshot source for a new generation of the database,
+downloads it next to the served file, checks it, and swaps it in. The data version
+is a hash of the database contents, so it changes with the swap. Every cache keyed
+on it invalidates at once: prerendered figures, exports, API ETags and tab content.
+In memory serving mode, requests already running finish on the old snapshot (see
+pinned_snapshot).
+
+Every gunicorn worker runs a watcher. A file lock beside the database lets one
+worker at a time fetch and install a generation; the others find it installed
+and only reload their in-memory snapshot from the new file. The installing worker
+also publishes the CSV download artifacts for the new version while it holds the lock.
+
+Sources:
+- LocalSnapshotSource: a file path, e.g. a mounted volume or a local stand-in for the bucket
+- GCSSnapshotSource: the blob the Survey123 sync uploads to
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from database.database import (
+    file_data_version,
+    get_data_version,
+    get_database_path,
+    get_serving_mode,
+    load_snapshot,
+)
+from database.db_optimize import quick_check
+from utils import setup_logging
+
+# Set up logging
+logger = setup_logging("snapshot_watcher", category="database")
+
+DEFAULT_POLL_SECONDS = 300
+# A file that passes quick_check but lacks these tables is not a dashboard database
+REQUIRED_TABLES = ('sites', 'chemical_collection_events')
+
+_watcher = None
+
+class LocalSnapshotSource:
+    """Snapshot source backed by a file on the local filesystem."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def generation(self):
+        """Return a token that changes whenever the file does, or None if it is missing."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+    def fetch(self, generation, destination):
+        """Copy the file to destination."""
+        shutil.copyfile(self.path, destination)
+
+    def __repr__(self):
+        return f"LocalSnapshotSource({self.path!r})"
+
+class GCSSnapshotSource:
+    """Snapshot source backed by a Cloud Storage blob, versioned by object generation."""
+
+    def __init__(self, bucket_name, blob_name='blue_thumb.db'):
+        from google.cloud import storage
+
+        self.bucket = storage.Client().bucket(bucket_name)
+        self.blob_name = blob_name
+
+    def generation(self):
+        """Return the blob's generation, or None if it does not exist."""
+        blob = self.bucket.get_blob(self.blob_name)
+        return None if blob is None else blob.generation
+
+    def fetch(self, generation, destination):
+        """Download exactly the given generation, even if a newer one lands meanwhile."""
+        self.bucket.blob(self.blob_name, generation=generation).download_to_filename(destination)
+
+    def __repr__(self):
+        return f"GCSSnapshotSource(gs://{self.bucket.name}/{self.blob_name})"
+
+def source_from_location(location):
+    """Return the snapshot source for a gs://bucket/blob URL or a file path."""
+    if location.startswith('gs://'):
+        bucket_name, _, blob_name = location[len('gs://'):].partition('/')
+        return GCSSnapshotSource(bucket_name, blob_name or 'blue_thumb.db')
+    return LocalSnapshotSource(location)
+
+def verify_snapshot(db_path):
+    """Raise ValueError unless db_path passes quick_check and has the dashboard's tables."""
+    try:
+        messages = quick_check(db_path)
+        if messages != ['ok']:
+            raise ValueError(f"quick_check failed: {'; '.join(messages[:5])}")
+
+        conn = sqlite3.connect(f"file:{quote(db_path)}?mode=ro", uri=True)
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"not a readable database: {e}") from e
+    missing = [table for table in REQUIRED_TABLES if table not in tables]
+    if missing:
+        raise ValueError(f"missing tables: {', '.join(missing)}")
+
+@contextmanager
+def file_lock(lock_path):
+    """Hold an exclusive lock on lock_path, shared by every process and thread on the host."""
+    try:
+        import fcntl
+    except ImportError:
+        # No flock outside POSIX; the dev server there runs a single process
+        yield
+        return
+
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def install_lock(db_path):
+    """Hold the lock for installing a snapshot into db_path."""
+    return file_lock(f"{db_path}.install.lock")
+
+def installed_generation(db_path):
+    """Return the source generation last installed into db_path, or None."""
+    try:
+        with open(f"{db_path}.generation") as generation_file:
+            return generation_file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def record_generation(db_path, generation):
+    with open(f"{db_path}.generation", 'w') as generation_file:
+        generation_file.write(str(generation))
+
+def reload_installed_snapshot(db_path):
+    """
+    Serve a database file another process installed and return its data version, or None if already served.
+
+    Outside memory mode connections read the file directly, so there is nothing to reload.
+    """
+    if get_serving_mode() != 'memory' or file_data_version(db_path) == get_data_version():
+        return None
+    return load_snapshot(db_path)
+
+def install_snapshot(staged_path):
+    """
+    Atomically replace the served database with a verified file and return the new data version.
+
+    The file is renamed over the database, so connections already open keep reading
+    the old file. In memory serving mode the new file is also loaded into a fresh
+    in-memory snapshot.
+    """
+    db_path = get_database_path()
+    os.replace(staged_path, db_path)
+    if get_serving_mode() == 'memory':
+        load_snapshot(db_path)
+    return get_data_version()
+
+def publish_snapshot_exports():
+    """Publish CSV download artifacts for a newly installed snapshot, logging any failure."""
+    # Imported here so the database package does not depend on data_processing at import time
+    from data_processing.export_artifacts import publish_export_artifacts
+    try:
+        publish_export_artifacts()
+    except Exception as e:
+        logger.error(f"Error publishing export artifacts for the new snapshot: {e}")
+
+class SnapshotWatcher:
+    """Poll a snapshot source in a background thread and install each new generation."""
+
+    def __init__(self, source, interval=DEFAULT_POLL_SECONDS):
+        self.source = source
+        self.interval = interval
+        self.generation = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll_once(self):
+        """
+        Check the source once and install a new generation if there is one.
+
+        Returns the new data version when a snapshot was installed, otherwise None.
+        """
+        generation = self.source.generation()
+        if generation is None or generation == self.generation:
+            return None
+
+        db_path = get_database_path()
+        with install_lock(db_path):
+            # Another worker may have installed this generation already
+            if installed_generation(db_path) == str(generation):
+                self.generation = generation
+                data_version = reload_installed_snapshot(db_path)
+                if data_version is not None:
+                    logger.info(f"Reloaded snapshot generation {generation} installed by another worker")
+                return data_version
+
+            data_version = self._fetch_and_install(generation, db_path)
+            if data_version is None:
+                return None
+
+        self.generation = generation
+        logger.info(f"Installed snapshot generation {generation} from {self.source} "
+                    f"as data version {data_version}")
+        return data_version
+
+    def _fetch_and_install(self, generation, db_path):
+        # Staged beside the database so the final rename stays on one filesystem;
+        # the unique name keeps concurrent fetches from writing the same file
+        descriptor, staged_path = tempfile.mkstemp(
+            dir=os.path.dirname(db_path), prefix=f"{os.path.basename(db_path)}.", suffix='.incoming'
+        )
+        os.close(descriptor)
+        try:
+            self.source.fetch(generation, staged_path)
+            try:
+                verify_snapshot(staged_path)
+            except ValueError as e:
+                # A bad upload is not retried until the source publishes another generation
+                logger.error(f"Rejected snapshot generation {generation} from {self.source}: {e}")
+                self.generation = generation
+                return None
+
+            # The first poll may find the snapshot already being served
+            if file_data_version(staged_path) == get_data_version():
+                record_generation(db_path, generation)
+                self.generation = generation
+                return None
+
+            data_version = install_snapshot(staged_path)
+            record_generation(db_path, generation)
+            publish_snapshot_exports()
+            return data_version
+        finally:
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.warning(f"Snapshot poll of {self.source} failed: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start polling in a daemon thread."""
+        self._thread = threading.Thread(target=self._run, name='snapshot-watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop polling and wait for an in-progress poll to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+def start_snapshot_watcher(location=None, interval=None):
+    """
+    Start the process-wide watcher, configured by SNAPSHOT_SOURCE and SNAPSHOT_POLL_SECONDS.
+
+    Does nothing and returns None when no source is configured.
+    """
+    global _watcher
+
+    location = location or os.environ.get('SNAPSHOT_SOURCE')
+    if not location:
+        return None
+    if _watcher is not None:
+        return _watcher
+
+    interval = interval or float(os.environ.get('SNAPSHOT_POLL_SECONDS', DEFAULT_POLL_SECONDS))
+    _watcher = SnapshotWatcher(source_from_location(location), interval).start()
+    logger.info(f"Watching {_watcher.source} for new snapshots every {interval:g}s")
+    return _watcher
@@ -0,0 +1,24 @@
+"""
+Gunicorn settings for the dashboard container.
+
+WEB_CONCURRENCY sets the worker count. With SHARED_DATA_PRELOAD=1 the app is
+loaded in the master, which preloads the hot query results into read-only
+arrays (database.shared_data) that the forked workers share copy-on-write.
+"""
+
+import os
+
+from database.shared_data import preload_enabled
+
+bind = f":{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+timeout = 0
+preload_app = preload_enabled()
+
+def post_fork(server, worker):
+    """Start the per-process data services, which cannot be inherited across a fork."""
+    if preload_app:
+        import app
+
+        app.start_data_services()
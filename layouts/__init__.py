@@ -2,6 +2,8 @@
 Layout functions for the dashboard.
 """
 
+from .lazy_tabs import create_lazy_tab, get_tab_content
+
 # Import modal creation functions
 from .modals import create_icon_attribution_modal, create_image_credits_modal
 from .tabs.biological import create_biological_tab
@@ -23,5 +25,7 @@ __all__ = [
     'create_protect_our_streams_tab',
     'create_source_data_tab',
     'create_icon_attribution_modal',
-    'create_image_credits_modal'
+    'create_image_credits_modal',
+    'create_lazy_tab',
+    'get_tab_content'
 ] 
\ No newline at end of file
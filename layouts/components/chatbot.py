@@ -5,6 +5,9 @@ Floating chatbot component for Blue Thumb dashboard
 import dash_bootstrap_components as dbc
 from dash import dcc, html
 
+# How often an open question is checked for its answer
+POLL_INTERVAL_MS = 500
+
 
 def create_floating_chatbot(tab_name):
     """
@@ -117,6 +120,13 @@ def create_floating_chatbot(tab_name):
                 "zIndex": "1040"
             }
         ),
+        # Polls for the answer to a queued question; enabled only while one is pending
+        dcc.Interval(
+            id={'type': 'chat-poll-interval', 'tab': tab_name},
+            interval=POLL_INTERVAL_MS,
+            n_intervals=0,
+            disabled=True,
+        ),
         dcc.Store(id={'type': 'chat-request-store', 'tab': tab_name}),
         dcc.Store(id={'type': 'chat-scroll-store', 'tab': tab_name})
     ]) 
\ No newline at end of file
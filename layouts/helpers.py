@@ -6,12 +6,13 @@ import dash_bootstrap_components as dbc
 from dash import dcc, html
 
 
-def create_species_gallery(species_type):
+def create_species_gallery(species_type, slides=None):
     """
     Create a gallery layout for either fish or macroinvertebrates.
     
     Args:
         species_type: Type of species gallery ('fish' or 'macro')
+        slides: Pre-rendered species slides toggled by the clientside navigation
         
     Returns:
         HTML layout for the species gallery
@@ -31,6 +32,7 @@ def create_species_gallery(species_type):
         html.H5(title, className="text-center mt-4"),
         
         html.Div(
+            slides or [],
             id=container_id,
             className="text-center",
             style={'min-height': '400px'}  
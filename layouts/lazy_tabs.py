@@ -0,0 +1,41 @@
+"""
+Lazy tab rendering that builds tab content on first activation.
+"""
+
+from functools import lru_cache
+
+import dash_bootstrap_components as dbc
+from dash import html
+
+from database.database import get_data_version
+
+# Populated as tabs are declared in the app layout
+_TAB_FACTORIES = {}
+
+def create_lazy_tab(label, tab_id, create_content, active_tab):
+    """
+    Declare a tab whose content is rendered only when first activated.
+
+    The active tab is rendered up front so the initial page is usable; other tabs
+    ship an empty container that the render callback fills on activation.
+    """
+    _TAB_FACTORIES[tab_id] = create_content
+    children = get_tab_content(tab_id) if tab_id == active_tab else []
+
+    return dbc.Tab(
+        html.Div(children, id={'type': 'lazy-tab-content', 'tab': tab_id}),
+        label=label,
+        tab_id=tab_id
+    )
+
+def get_tab_content(tab_id):
+    """Build tab content once per data version and reuse it for every session."""
+    if tab_id not in _TAB_FACTORIES:
+        raise KeyError(f"Unknown tab: {tab_id}")
+
+    # Tabs embed data such as the chemical date range, so a new snapshot rebuilds them
+    return _build_tab_content(tab_id, get_data_version())
+
+@lru_cache(maxsize=32)
+def _build_tab_content(tab_id, data_version):
+    return _TAB_FACTORIES[tab_id]()
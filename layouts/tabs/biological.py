@@ -11,8 +11,6 @@ from ..components.chatbot import create_floating_chatbot
 def create_biological_tab():
     """Create the biological data tab layout with searchable dropdown for site selection."""
     tab_content = html.Div([
-        dcc.Download(id="biological-download-component"),
-
         # Description section
         html.Div([
             html.H3("Biological Assessment", className="mb-3"),
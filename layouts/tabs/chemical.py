@@ -5,6 +5,7 @@ Chemical tab layout for the dashboard
 import dash_bootstrap_components as dbc
 from dash import dcc, html
 
+from api.downloads import download_url
 from data_processing.data_queries import get_chemical_date_range
 from layouts.components.chatbot import create_floating_chatbot
 
@@ -16,7 +17,8 @@ def create_chemical_tab():
     min_year, max_year = get_chemical_date_range()
     
     return html.Div([
-        dcc.Download(id="chemical-download-component"),
+        # Year bounds for the clientside end-year filter
+        dcc.Store(id='chemical-year-bounds', data={'min_year': min_year, 'max_year': max_year}),
 
         # Add chatbot
         create_floating_chatbot("chemical"),
@@ -174,6 +176,7 @@ def create_chemical_tab():
                     dbc.Button(
                         [html.I(className="fas fa-download me-2"), "Download Site Data"],
                         id="chemical-download-site-btn",
+                        external_link=True,
                         color="success",
                         size="sm",
                         style={'display': 'none', 'marginRight': '10px'}  # Initially hidden
@@ -181,6 +184,8 @@ def create_chemical_tab():
                     dbc.Button(
                         [html.I(className="fas fa-download me-2"), "Download All Chemical Data"],
                         id="chemical-download-btn",
+                        href=download_url('chemical'),
+                        external_link=True,
                         color="success",
                         size="sm",
                         style={'display': 'none'}  # Initially hidden
@@ -5,6 +5,7 @@ Habitat tab layout for the dashboard
 import dash_bootstrap_components as dbc
 from dash import dcc, html
 
+from api.downloads import download_url
 from layouts.ui_data import HABITAT_DIAGRAM_CAPTIONS, HABITAT_DIAGRAMS
 from utils import create_image_with_caption, load_markdown_content
 
@@ -14,8 +15,6 @@ from ..components.chatbot import create_floating_chatbot
 def create_habitat_tab():
     """Create the habitat assessment tab with searchable dropdown for site selection."""
     tab_content = html.Div([
-        dcc.Download(id="habitat-download-component"),
-        
         # Description section
         html.Div([
             html.H3("Habitat Assessment", className="mb-3"),
@@ -58,6 +57,8 @@ def create_habitat_tab():
                         dbc.Button(
                             [html.I(className="fas fa-download me-2"), "Download Habitat Data"],
                             id="habitat-download-btn",
+                            href=download_url('habitat'),
+                            external_link=True,
                             color="success",
                             size="sm",
                         )
@@ -0,0 +1,248 @@
+"""
+Tests for the read-only data API
+
+This file tests the /api/v1 routes including:
+- Endpoint to query mapping
+- Cursor pagination and field selection
+- Conditional GET via data-version ETags
+- Versions and rows read from one snapshot
+- Columnar, NumPy and Arrow response formats
+"""
+
+import io
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+from flask import Flask
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from api import register_routes
+from api import v1
+from api.v1 import decode_cursor, encode_cursor
+from utils import setup_logging
+
+# Set up logging for tests
+logger = setup_logging("test_api_v1", category="testing")
+
+SITES_DF = pd.DataFrame({
+    'site_name': ['Site A', 'Site B', 'Site C'],
+    'latitude': [36.1, 36.2, np.nan],
+    'longitude': [-95.1, -95.2, -95.3],
+    'active': [True, False, True],
+})
+
+CHEMICAL_DF = pd.DataFrame({
+    'Site_Name': ['Site A', 'Site A'],
+    'Date': pd.to_datetime(['2020-01-15', '2020-02-15']),
+    'pH': [7.1, 7.4],
+})
+
+
+class ApiTestCase(unittest.TestCase):
+    """Base class with a test client and fixed query results."""
+
+    def setUp(self):
+        server = Flask(__name__)
+        register_routes(server)
+        self.client = server.test_client()
+
+        self.sites_query = MagicMock(return_value=SITES_DF)
+        self.chemical_query = MagicMock(return_value=CHEMICAL_DF)
+        self.data_version = 'v1'
+        patchers = [
+            patch('api.v1.get_data_version', side_effect=lambda: self.data_version),
+            patch('api.v1.get_sites_for_maps', self.sites_query),
+            patch.dict(v1.SITE_QUERIES, {'chemical': self.chemical_query}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get(self, url, **headers):
+        return self.client.get(url, headers=headers)
+
+
+class TestEndpoints(ApiTestCase):
+    """Test endpoints return their query results."""
+
+    def test_sites(self):
+        """Test sites are returned as JSON rows with NaN as null."""
+        body = self.get('/api/v1/sites').get_json()
+
+        self.assertEqual(len(body['data']), 3)
+        self.assertIsNone(body['data'][2]['latitude'])
+        self.assertIsNone(body['next_cursor'])
+        self.assertEqual(body['data_version'], 'v1')
+        self.sites_query.assert_called_once_with(active_only=False)
+
+    def test_active_sites(self):
+        """Test the active filter is passed to the query."""
+        self.get('/api/v1/sites?active=1')
+        self.sites_query.assert_called_once_with(active_only=True)
+
+    def test_site_series(self):
+        """Test per-site series pass the site name and format dates as ISO strings."""
+        body = self.get('/api/v1/sites/Site%20A/chemical').get_json()
+
+        self.chemical_query.assert_called_once_with('Site A')
+        self.assertEqual([row['Date'] for row in body['data']], ['2020-01-15', '2020-02-15'])
+
+    def test_latest_passes_site(self):
+        """Test latest-by-site queries can be limited to one site."""
+        latest_query = MagicMock(return_value=SITES_DF)
+        with patch.dict(v1.LATEST_QUERIES, {'fish': latest_query}):
+            self.get('/api/v1/latest/fish?site=Site%20B')
+        latest_query.assert_called_once_with(site_name='Site B')
+
+    def test_unknown_data_type(self):
+        """Test unknown data types return 404."""
+        self.assertEqual(self.get('/api/v1/latest/weather').status_code, 404)
+        self.assertEqual(self.get('/api/v1/sites/Site%20A/weather').status_code, 404)
+
+    def test_query_error(self):
+        """Test query failures surface as a 500 with the error message."""
+        self.sites_query.return_value = pd.DataFrame({'error': ['Database error occurred']})
+        response = self.get('/api/v1/sites')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json(), {'error': 'Database error occurred'})
+
+    def test_version_and_query_share_request_context(self):
+        """Test the data version and the query both run inside one pinned request context."""
+        from database import request_context
+
+        contexts = []
+        def version_in_context():
+            contexts.append(request_context._request_cache.get())
+            return self.data_version
+        def query_in_context(active_only):
+            contexts.append(request_context._request_cache.get())
+            return SITES_DF
+
+        self.sites_query.side_effect = query_in_context
+        with patch('api.v1.get_data_version', side_effect=version_in_context):
+            self.assertEqual(self.get('/api/v1/sites').status_code, 200)
+
+        self.assertEqual(len(contexts), 2)
+        self.assertIsNotNone(contexts[0])
+        self.assertIs(contexts[0], contexts[1])
+
+    def test_no_database(self):
+        """Test requests fail cleanly when no database exists."""
+        self.data_version = None
+        self.assertEqual(self.get('/api/v1/sites').status_code, 503)
+
+
+class TestPagination(ApiTestCase):
+    """Test cursor pagination and field selection."""
+
+    def test_walk_pages(self):
+        """Test following next_cursor visits every row exactly once."""
+        names = []
+        url = '/api/v1/sites?limit=2'
+        while url:
+            body = self.get(url).get_json()
+            names.extend(row['site_name'] for row in body['data'])
+            url = f"/api/v1/sites?limit=2&cursor={body['next_cursor']}" if body['next_cursor'] else None
+
+        self.assertEqual(names, ['Site A', 'Site B', 'Site C'])
+
+    def test_cursor_expires_with_data_version(self):
+        """Test cursors from an older data version are rejected."""
+        cursor = self.get('/api/v1/sites?limit=1').get_json()['next_cursor']
+        self.data_version = 'v2'
+
+        self.assertEqual(self.get(f'/api/v1/sites?limit=1&cursor={cursor}').status_code, 410)
+
+    def test_cursor_round_trip(self):
+        """Test cursors encode the offset and reject garbage."""
+        from api.v1 import ApiError
+
+        self.assertEqual(decode_cursor(encode_cursor('v1', 40), 'v1'), 40)
+        with self.assertRaises(ApiError):
+            decode_cursor('not-a-cursor', 'v1')
+
+    def test_invalid_limit(self):
+        """Test out of range page sizes are rejected."""
+        self.assertEqual(self.get('/api/v1/sites?limit=0').status_code, 400)
+        self.assertEqual(self.get('/api/v1/sites?limit=many').status_code, 400)
+
+    def test_field_selection(self):
+        """Test only the requested fields are returned."""
+        body = self.get('/api/v1/sites?fields=site_name,active').get_json()
+        self.assertEqual(set(body['data'][0]), {'site_name', 'active'})
+
+    def test_unknown_field(self):
+        """Test unknown fields are rejected with the available fields listed."""
+        response = self.get('/api/v1/sites?fields=site_name,elevation')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('elevation', response.get_json()['error'])
+
+
+class TestConditionalRequests(ApiTestCase):
+    """Test ETags keyed to the data version."""
+
+    def test_not_modified_skips_query(self):
+        """Test a matching If-None-Match returns 304 without running the query."""
+        etag = self.get('/api/v1/sites').headers['ETag']
+        response = self.get('/api/v1/sites', **{'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.sites_query.call_count, 1)
+
+    def test_etag_changes_with_data_version_and_request(self):
+        """Test ETags differ across data versions and query strings."""
+        first = self.get('/api/v1/sites').headers['ETag']
+        other_page = self.get('/api/v1/sites?limit=1').headers['ETag']
+        self.data_version = 'v2'
+        new_version = self.get('/api/v1/sites').headers['ETag']
+
+        self.assertEqual(len({first, other_page, new_version}), 3)
+
+
+class TestResponseFormats(ApiTestCase):
+    """Test columnar and binary response formats."""
+
+    def test_columns_format(self):
+        """Test the columns format returns one array per field."""
+        body = self.get('/api/v1/sites?format=columns&fields=site_name').get_json()
+        self.assertEqual(body['data'], {'site_name': ['Site A', 'Site B', 'Site C']})
+
+    def test_npz_format(self):
+        """Test the NumPy format loads without pickle and carries pagination in headers."""
+        response = self.get('/api/v1/sites?format=npz&limit=2')
+        arrays = np.load(io.BytesIO(response.data), allow_pickle=False)
+
+        self.assertEqual(arrays['site_name'].tolist(), ['Site A', 'Site B'])
+        self.assertEqual(arrays['latitude'].dtype, np.float64)
+        self.assertEqual(response.headers['X-Total-Count'], '3')
+        self.assertIn('X-Next-Cursor', response.headers)
+
+    def test_unknown_format(self):
+        """Test unsupported formats are rejected."""
+        self.assertEqual(self.get('/api/v1/sites?format=xml').status_code, 400)
+
+    def test_arrow_without_pyarrow(self):
+        """Test Arrow requests are refused when pyarrow is not installed."""
+        with patch('api.v1.pa', None):
+            response = self.get('/api/v1/sites', Accept='application/vnd.apache.arrow.stream')
+        self.assertEqual(response.status_code, 406)
+
+    @unittest.skipIf(v1.pa is None, "pyarrow not installed")
+    def test_arrow_format(self):
+        """Test Arrow IPC responses decode to the same table."""
+        response = self.get('/api/v1/sites?format=arrow')
+        table = v1.pa.ipc.open_stream(response.data).read_all()
+        self.assertEqual(table.column('site_name').to_pylist(), ['Site A', 'Site B', 'Site C'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
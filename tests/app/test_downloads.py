@@ -0,0 +1,272 @@
+"""
+Tests for bulk CSV downloads
+
+This file tests the pre-built export artifacts and the Flask route serving them:
+- Per-type and per-site artifact generation
+- Publishing once per data version and never replacing a published version
+- Publishing on the first download of an unpublished version
+- Keeping versions a worker still serves
+- ETag, Last-Modified and Range handling
+- gzip and identity content encodings
+"""
+
+import gzip
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+from flask import Flask
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from api import register_routes
+from data_processing import export_artifacts
+from data_processing.export_artifacts import get_export_artifact, publish_export_artifacts
+from utils import setup_logging
+
+# Set up logging for tests
+logger = setup_logging("test_downloads", category="testing")
+
+CHEMICAL_DF = pd.DataFrame({
+    'Site_Name': ['Site A', 'Site A', 'Site B (East), OK'],
+    'Date': ['2020-01-01', '2020-02-01', '2020-01-01'],
+    'pH': [7.1, 7.3, 6.9],
+    'pH_status': ['Normal', 'Normal', 'Normal'],
+})
+
+HABITAT_DF = pd.DataFrame({'site_name': ['Site A', 'Site B (East), OK'], 'total_score': [110, 95]})
+
+
+class ExportTestCase(unittest.TestCase):
+    """Base class building artifacts from fixed data into a temporary directory."""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.version = 'v1'
+        patchers = [
+            patch('data_processing.export_artifacts.EXPORT_CACHE_DIR', self.cache_dir),
+            patch('data_processing.export_artifacts.get_export_version', side_effect=lambda: self.version),
+            patch('data_processing.export_artifacts.load_export_frame', side_effect=self.load_frame),
+            patch.dict(export_artifacts._manifests, clear=True),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        self.loads = 0
+        self.load_seconds = 0
+
+    def publish(self):
+        return publish_export_artifacts(self.cache_dir)
+
+    def versions(self):
+        return sorted(name for name in os.listdir(self.cache_dir) if not name.startswith('.'))
+
+    def load_frame(self, data_type):
+        self.loads += 1
+        time.sleep(self.load_seconds)
+        if data_type == 'chemical':
+            return CHEMICAL_DF.drop(columns=['pH_status'])
+        if data_type == 'habitat':
+            return HABITAT_DF
+        return pd.DataFrame()
+
+    def read_artifact(self, artifact):
+        with gzip.open(artifact['path'], 'rt') as artifact_file:
+            return pd.read_csv(artifact_file)
+
+
+class TestExportArtifacts(ExportTestCase):
+    """Test artifact publishing and versioning."""
+
+    def test_all_and_site_artifacts(self):
+        """Test each data type gets an all-sites file and one file per site."""
+        self.publish()
+        all_chemical = get_export_artifact('chemical', cache_dir=self.cache_dir)
+        site_chemical = get_export_artifact('chemical', 'Site A', cache_dir=self.cache_dir)
+
+        self.assertEqual(all_chemical['download_name'], 'blue_thumb_chemical_data.csv')
+        self.assertEqual(all_chemical['rows'], 3)
+        self.assertEqual(len(self.read_artifact(all_chemical)), 3)
+        self.assertEqual(site_chemical['download_name'], 'Site_A_chemical_data.csv')
+        self.assertEqual(self.read_artifact(site_chemical)['Site_Name'].unique().tolist(), ['Site A'])
+
+    def test_site_filename_slug(self):
+        """Test site filenames strip punctuation the same way as before."""
+        self.publish()
+        artifact = get_export_artifact('habitat', 'Site B (East), OK', cache_dir=self.cache_dir)
+        self.assertEqual(artifact['download_name'], 'Site_B_East_OK_habitat_data.csv')
+
+    def test_missing_exports(self):
+        """Test unknown sites and empty data types have no artifact."""
+        self.publish()
+        self.assertIsNone(get_export_artifact('chemical', 'Unknown Site', cache_dir=self.cache_dir))
+        self.assertIsNone(get_export_artifact('fish', cache_dir=self.cache_dir))
+
+    def test_unpublished_version_published_on_read(self):
+        """Test reading artifacts for a version nobody published publishes it once."""
+        self.assertEqual(get_export_artifact('chemical', cache_dir=self.cache_dir)['rows'], 3)
+        self.assertEqual(get_export_artifact('habitat', cache_dir=self.cache_dir)['rows'], 2)
+        self.assertEqual(self.loads, 4)
+
+    def test_published_once_per_version(self):
+        """Test a published version is skipped and a new version replaces the old one."""
+        export_dir, _ = self.publish()
+        inode = os.stat(export_dir).st_ino
+        self.publish()
+        self.assertEqual(self.loads, 4)
+        self.assertEqual(os.stat(export_dir).st_ino, inode)
+
+        self.version = 'v2'
+        self.publish()
+        self.assertEqual(self.loads, 8)
+        self.assertEqual(self.versions(), ['v2'])
+
+    def test_concurrent_reads_publish_once(self):
+        """Test simultaneous first downloads wait for one build rather than each building."""
+        self.load_seconds = 0.05
+        artifacts = []
+        threads = [threading.Thread(target=lambda: artifacts.append(
+            get_export_artifact('chemical', cache_dir=self.cache_dir))) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.loads, 4)
+        self.assertEqual(len({artifact['path'] for artifact in artifacts}), 1)
+        self.assertEqual(self.versions(), ['v1'])
+
+    def test_served_version_kept(self):
+        """Test an old version stays while a live worker reports it and goes once none does."""
+        get_export_artifact('chemical', cache_dir=self.cache_dir)
+        self.version = 'v2'
+        self.publish()
+        self.assertEqual(self.versions(), ['v1', 'v2'])
+
+        # This worker moves on to v2, and a worker that exited still reports v1
+        get_export_artifact('chemical', cache_dir=self.cache_dir)
+        with open(os.path.join(self.cache_dir, export_artifacts.WORKERS_DIR, '999999999'), 'w') as f:
+            f.write('v1')
+        self.version = 'v3'
+        self.publish()
+        self.assertEqual(self.versions(), ['v2', 'v3'])
+        self.assertEqual(os.listdir(os.path.join(self.cache_dir, export_artifacts.WORKERS_DIR)), [str(os.getpid())])
+
+    def test_reproducible_etags(self):
+        """Test rebuilding the same data produces identical artifacts."""
+        self.publish()
+        first = get_export_artifact('chemical', cache_dir=self.cache_dir)['etag']
+        export_artifacts._manifests.clear()
+        shutil.rmtree(os.path.join(self.cache_dir, self.version))
+
+        self.publish()
+        self.assertEqual(get_export_artifact('chemical', cache_dir=self.cache_dir)['etag'], first)
+
+    def test_no_database(self):
+        """Test downloads are unavailable and nothing is published without a database."""
+        self.version = None
+        self.assertIsNone(get_export_artifact('chemical', cache_dir=self.cache_dir))
+        with self.assertRaises(FileNotFoundError):
+            self.publish()
+
+
+class TestDownloadRoute(ExportTestCase):
+    """Test the Flask route serving artifacts."""
+
+    def setUp(self):
+        super().setUp()
+        server = Flask(__name__)
+        register_routes(server)
+        self.client = server.test_client()
+        artifact_patcher = patch(
+            'api.downloads.get_export_artifact',
+            side_effect=lambda data_type, site_name=None: get_export_artifact(data_type, site_name, self.cache_dir)
+        )
+        artifact_patcher.start()
+        self.addCleanup(artifact_patcher.stop)
+        self.publish()
+
+    def get(self, url, **headers):
+        headers.setdefault('Accept-Encoding', 'gzip')
+        response = self.client.get(url, headers=headers)
+        self.addCleanup(response.close)
+        return response
+
+    def test_gzip_download(self):
+        """Test gzip-capable clients receive the stored artifact as-is."""
+        response = self.get('/downloads/chemical.csv')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertIn('blue_thumb_chemical_data.csv', response.headers['Content-Disposition'])
+        self.assertIsNotNone(response.headers.get('ETag'))
+        self.assertIsNotNone(response.headers.get('Last-Modified'))
+        self.assertEqual(len(pd.read_csv(io.BytesIO(gzip.decompress(response.data)))), 3)
+
+    def test_identity_download(self):
+        """Test clients without gzip support receive plain CSV under a separate ETag."""
+        gzip_etag = self.get('/downloads/habitat.csv').headers['ETag']
+        response = self.get('/downloads/habitat.csv', **{'Accept-Encoding': 'identity'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertNotEqual(response.headers['ETag'], gzip_etag)
+        self.assertTrue(response.data.startswith(b'site_name,total_score'))
+
+    def test_site_download(self):
+        """Test the site query parameter selects a per-site artifact."""
+        response = self.get('/downloads/chemical.csv?site=Site%20B%20(East)%2C%20OK')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Site_B_East_OK_chemical_data.csv', response.headers['Content-Disposition'])
+        self.assertEqual(len(pd.read_csv(io.BytesIO(gzip.decompress(response.data)))), 1)
+
+    def test_conditional_request(self):
+        """Test a matching If-None-Match returns 304 without a body."""
+        etag = self.get('/downloads/chemical.csv').headers['ETag']
+        response = self.get('/downloads/chemical.csv', **{'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+    def test_range_request(self):
+        """Test partial content is served for resumed downloads."""
+        full = self.get('/downloads/chemical.csv').data
+        response = self.get('/downloads/chemical.csv', Range='bytes=0-9')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, full[:10])
+
+    def test_not_found(self):
+        """Test unknown data types and sites return 404."""
+        self.assertEqual(self.get('/downloads/secrets.csv').status_code, 404)
+        self.assertEqual(self.get('/downloads/chemical.csv?site=Nowhere').status_code, 404)
+        self.assertEqual(self.get('/downloads/fish.csv').status_code, 404)
+
+    def test_unpublished_version_published(self):
+        """Test a download for a version nobody published builds it instead of returning 404."""
+        self.version = 'v2'
+        self.assertEqual(self.get('/downloads/habitat.csv').status_code, 200)
+        self.assertEqual(self.loads, 8)
+
+    def test_registered_on_app_server(self):
+        """Test the dashboard's Flask server exposes the download route."""
+        from app import server
+
+        rules = {rule.rule for rule in server.url_map.iter_rules()}
+        self.assertIn('/downloads/<data_type>.csv', rules)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
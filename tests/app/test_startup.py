@@ -0,0 +1,70 @@
+"""
+Tests for application cold start behavior
+
+This file tests startup performance safeguards including:
+- Import time breakdown parsing
+- Deferred loading of the genai SDK
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from benchmarks.startup_time import parse_importtime, slowest_imports
+
+
+class TestImportTimeParsing(unittest.TestCase):
+    """Test parsing of -X importtime output."""
+
+    SAMPLE_OUTPUT = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       200 |        200 |     utils",
+        "import time:       500 |       1500 |   callbacks",
+        "2025-01-01 00:00:00 - INFO - unrelated log line",
+        "import time:      1000 |       4000 | app",
+    ])
+
+    def test_parse_importtime_entries(self):
+        """Test timings and nesting depth are extracted."""
+        modules = parse_importtime(self.SAMPLE_OUTPUT)
+
+        self.assertEqual([entry['module'] for entry in modules], ['utils', 'callbacks', 'app'])
+        self.assertEqual(modules[0]['depth'], 2)
+        self.assertEqual(modules[2]['depth'], 0)
+        self.assertAlmostEqual(modules[1]['self_ms'], 0.5)
+        self.assertAlmostEqual(modules[2]['cumulative_ms'], 4.0)
+
+    def test_slowest_imports_ordering(self):
+        """Test modules are ranked by cumulative time."""
+        modules = parse_importtime(self.SAMPLE_OUTPUT)
+
+        ranked = slowest_imports(modules, top_n=2)
+
+        self.assertEqual([entry['module'] for entry in ranked], ['app', 'callbacks'])
+
+
+class TestDeferredImports(unittest.TestCase):
+    """Test the genai SDK stays out of worker boot."""
+
+    def test_app_import_defers_genai(self):
+        """Test importing the app does not load the genai SDK or build a client."""
+        script = "import sys, app; print('google.genai' in sys.modules)"
+        completed = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=project_root,
+            capture_output=True,
+            text=True,
+            timeout=120
+        )
+
+        self.assertEqual(completed.returncode, 0, completed.stderr[-2000:])
+        self.assertEqual(completed.stdout.strip().splitlines()[-1], 'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+Tests for the chatbot answer cache, local answers and answer statistics
+
+This file tests:
+- Question normalization, LRU eviction and TTL expiry
+- Cached and local-index answers skipping the model
+- Local passages attached to questions sent to the model
+- Answer statistics and the chatbot histogram on /metrics
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from callbacks import chatbot_callbacks
+from callbacks.chat_cache import AnswerCache, ChatAnswerStats, normalize_question
+from data_processing.chatbot_index import ChatbotIndex
+from tests.callbacks.test_chatbot_callbacks import StubClient
+
+PASSAGES = [
+    {'title': 'Chloride: Description', 'kind': 'section', 'source': 'chloride.md',
+     'text': "Chloride is a salt ion. Road salt raises it in winter. It does not break down. It builds up."},
+    {'title': 'Chloride', 'kind': 'caption', 'source': 'caption-chloride.txt',
+     'text': "Caption: Illustration of chloride sources."},
+    {'title': 'Turbidity', 'kind': 'section', 'source': 'turbidity.md',
+     'text': "Turbidity measures cloudy water from sediment."},
+]
+
+
+class TestAnswerCache(unittest.TestCase):
+    """Test the LRU and TTL answer cache."""
+
+    def setUp(self):
+        self.now = 0.0
+        self.cache = AnswerCache(max_entries=2, ttl=60, clock=lambda: self.now)
+
+    def test_normalized_questions_share_an_entry(self):
+        """Test case, punctuation and spacing differences hit the same answer."""
+        self.assertEqual(normalize_question("  What does Chloride   MEAN?! "), "what does chloride mean")
+
+        self.cache.put("What does chloride mean?", "Salt.")
+        self.assertEqual(self.cache.get("what does chloride mean"), "Salt.")
+        self.assertIsNone(self.cache.get("what does chloride do"))
+
+    def test_least_recently_used_evicted(self):
+        """Test the least recently read answer is evicted when the cache is full."""
+        self.cache.put("a", "1")
+        self.cache.put("b", "2")
+        self.cache.get("a")
+        self.cache.put("c", "3")
+
+        self.assertEqual(self.cache.get("a"), "1")
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(len(self.cache), 2)
+
+    def test_entries_expire(self):
+        """Test answers older than the TTL are dropped."""
+        self.cache.put("a", "1")
+        self.now = 59.9
+        self.assertEqual(self.cache.get("a"), "1")
+        self.now = 60.0
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestAnswerSources(unittest.TestCase):
+    """Test questions answered from the cache, the local index and the model."""
+
+    def setUp(self):
+        self.client = StubClient()
+        self.cache = AnswerCache()
+        self.stats = ChatAnswerStats()
+        for target, value in [('get_genai_client', self.client), ('get_generation_config', None),
+                              ('get_chat_index', ChatbotIndex.build(PASSAGES)), ('get_answer_cache', self.cache)]:
+            patcher = patch.object(chatbot_callbacks, target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(chatbot_callbacks, 'chat_answer_stats', self.stats)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_confident_local_match(self):
+        """Test a question covered by a passage title is answered from its first sentences."""
+        answer = chatbot_callbacks.answer_instantly("What is chloride?")
+
+        self.assertEqual(answer, "Chloride is a salt ion. Road salt raises it in winter. It does not break down.")
+        self.assertEqual(self.client.calls, [])
+        self.assertEqual(self.stats.summary()['answers'], {'cache': 0, 'local': 1, 'model': 0})
+
+    def test_weak_match_goes_to_model_with_passages(self):
+        """Test a partly covered question reaches the model with the top passages attached."""
+        question = "Is chloride dangerous for crayfish?"
+        self.assertIsNone(chatbot_callbacks.answer_instantly(question))
+
+        answer = chatbot_callbacks.answer_from_model(question)
+
+        prompt = self.client.calls[0]
+        self.assertTrue(prompt.endswith(f"Question: {question}"))
+        self.assertIn("[Chloride: Description]\nChloride is a salt ion.", prompt)
+        self.assertNotIn("Turbidity", prompt)
+        self.assertEqual(answer, f"Answer to: {prompt}")
+
+    def test_model_answer_cached(self):
+        """Test a repeat of a model-answered question is served from the cache."""
+        answer = chatbot_callbacks.answer_from_model("How warm do streams get?")
+
+        self.assertEqual(chatbot_callbacks.answer_instantly("how warm do streams get"), answer)
+        self.assertEqual(len(self.client.calls), 1)
+        summary = self.stats.summary()
+        self.assertEqual(summary['answers'], {'cache': 1, 'local': 0, 'model': 1})
+        self.assertEqual(summary['local_hit_rate'], 0.5)
+
+    def test_failed_answer_not_cached(self):
+        """Test the fallback apology is not cached, so a repeat asks the model again."""
+        self.client.error = RuntimeError("quota exceeded")
+        self.assertEqual(chatbot_callbacks.answer_from_model("How warm do streams get?"), chatbot_callbacks.ERROR_MESSAGE)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_metrics_route_reports_answers(self):
+        """Test /metrics includes the chatbot answer histogram by source."""
+        from flask import Flask
+
+        from api import register_routes
+
+        server = Flask(__name__)
+        register_routes(server)
+        chatbot_callbacks.answer_instantly("What is chloride?")
+        with patch('api.metrics.chat_answer_stats', self.stats):
+            body = server.test_client().get('/metrics').get_data(as_text=True)
+
+        self.assertIn('chatbot_answer_duration_seconds_count{source="local"} 1', body)
+        self.assertIn('chatbot_answer_duration_seconds_count{source="model"} 0', body)
+
+
+class TestChatbotAnswersBenchmark(unittest.TestCase):
+    """Test the answer benchmark runs on the real index."""
+
+    def test_benchmark_answers_match(self):
+        """Test cached answers equal the model's and repeats avoid the model."""
+        from benchmarks.chatbot_answers import run_benchmarks
+
+        result = run_benchmarks(model_seconds=0)
+
+        self.assertTrue(result['identical'])
+        self.assertGreater(result['answers']['cache'], 0)
+        self.assertEqual(sum(result['answers'].values()), result['questions'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,300 @@
+"""
+Tests for chatbot_callbacks.py and the chat job queue
+
+This file tests background chat answers including:
+- Answers delivered through the queue by a stub LLM client
+- Concurrency and pending limits
+- Timeouts and cancellation on a new question
+- Polls that reach another instance
+- The submit and poll callbacks through Dash dispatch
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import dash
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from callbacks.chat_cache import AnswerCache
+from callbacks.chat_jobs import CANCELLED, DONE, QUEUED, RUNNING, TIMED_OUT, ChatJobQueue
+from callbacks.chatbot_callbacks import (
+    BUSY_MESSAGE,
+    ERROR_MESSAGE,
+    OTHER_INSTANCE_MESSAGE,
+    TIMEOUT_MESSAGE,
+    generate_response,
+    register_chatbot_callbacks,
+)
+from data_processing.chatbot_index import ChatbotIndex
+from layouts.components.chatbot import create_floating_chatbot
+
+
+class StubClient:
+    """Stands in for the genai client, answering each question by echoing it."""
+
+    def __init__(self, release=None, error=None):
+        self.release = release
+        self.error = error
+        self.models = self
+        self.calls = []
+
+    def generate_content(self, model, contents, config):
+        self.calls.append(contents[0])
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        candidate = SimpleNamespace(grounding_metadata=None, finish_reason=SimpleNamespace(name='STOP'))
+        return SimpleNamespace(text=f"Answer to: {contents[0]}", candidates=[candidate])
+
+
+def wait_for(queue, job_id, states, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = queue.status(job_id)
+        if status and status['state'] in states:
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} never reached {states}")
+
+
+class ChatQueueTestCase(unittest.TestCase):
+    """Base class with a temporary result directory and queue cleanup."""
+
+    def setUp(self):
+        self.result_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.result_dir, ignore_errors=True)
+        self.release = threading.Event()
+
+    def make_queue(self, respond, **kwargs):
+        queue = ChatJobQueue(respond, result_dir=self.result_dir, **kwargs)
+        self.addCleanup(queue.shutdown)
+        # Unblock any stub call still waiting before the pool shuts down
+        self.addCleanup(self.release.set)
+        return queue
+
+
+class TestChatJobQueue(ChatQueueTestCase):
+    """Test the background queue with stub responders."""
+
+    def test_answer_delivered(self):
+        """Test a queued question is answered by the stub client."""
+        client = StubClient()
+        with patch('callbacks.chatbot_callbacks.get_genai_client', return_value=client), \
+             patch('callbacks.chatbot_callbacks.get_generation_config', return_value=None):
+            queue = self.make_queue(generate_response)
+            job_id = queue.submit("What does chloride mean?")
+            status = wait_for(queue, job_id, (DONE,))
+
+        self.assertEqual(status['text'], "Answer to: What does chloride mean?")
+        self.assertEqual(client.calls, ["What does chloride mean?"])
+
+    def test_client_error_becomes_apology(self):
+        """Test an LLM error is answered with the fallback message rather than failing the job."""
+        client = StubClient(error=RuntimeError("quota exceeded"))
+        with patch('callbacks.chatbot_callbacks.get_genai_client', return_value=client), \
+             patch('callbacks.chatbot_callbacks.get_generation_config', return_value=None):
+            queue = self.make_queue(generate_response)
+            status = wait_for(queue, queue.submit("question"), (DONE,))
+
+        self.assertEqual(status['text'], ERROR_MESSAGE)
+
+    def test_concurrency_limit(self):
+        """Test questions beyond max_concurrent wait in the queue."""
+        queue = self.make_queue(lambda message: self.release.wait(5) and message, max_concurrent=1)
+        first = queue.submit("first")
+        second = queue.submit("second")
+
+        wait_for(queue, first, (RUNNING,))
+        self.assertEqual(queue.status(second)['state'], QUEUED)
+
+        self.release.set()
+        self.assertEqual(wait_for(queue, second, (DONE,))['text'], "second")
+
+    def test_pending_limit(self):
+        """Test a full queue turns new questions away."""
+        queue = self.make_queue(lambda message: self.release.wait(5), max_concurrent=1, max_pending=2)
+
+        self.assertIsNotNone(queue.submit("first"))
+        self.assertIsNotNone(queue.submit("second"))
+        self.assertIsNone(queue.submit("third"))
+
+    def test_timeout(self):
+        """Test a job running past its timeout is reported as timed out and its late answer dropped."""
+        queue = self.make_queue(lambda message: self.release.wait(5) and message, timeout=0.05)
+        job_id = queue.submit("slow")
+        wait_for(queue, job_id, (RUNNING,))
+        time.sleep(0.1)
+
+        self.assertEqual(queue.status(job_id)['state'], TIMED_OUT)
+        self.release.set()
+        time.sleep(0.05)
+        self.assertEqual(queue.status(job_id), {'state': TIMED_OUT, 'text': None})
+
+    def test_cancel(self):
+        """Test cancelling queued and running jobs discards their answers."""
+        queue = self.make_queue(lambda message: self.release.wait(5) and message, max_concurrent=1)
+        running = queue.submit("running")
+        queued = queue.submit("queued")
+        wait_for(queue, running, (RUNNING,))
+
+        self.assertTrue(queue.cancel(queued))
+        self.assertTrue(queue.cancel(running))
+        self.release.set()
+        time.sleep(0.05)
+
+        self.assertEqual(queue.status(running)['state'], CANCELLED)
+        self.assertEqual(queue.status(queued)['state'], CANCELLED)
+        self.assertFalse(queue.cancel(running))
+
+    def test_failed_job(self):
+        """Test a responder that raises leaves the job failed rather than pending."""
+        def respond(message):
+            raise RuntimeError("down")
+
+        queue = self.make_queue(respond)
+        self.assertIsNone(wait_for(queue, queue.submit("question"), ('failed',))['text'])
+
+    def test_result_visible_to_other_worker(self):
+        """Test a finished answer can be read by a queue in another worker sharing the directory."""
+        queue = self.make_queue(lambda message: message.upper())
+        job_id = queue.submit("hello")
+        wait_for(queue, job_id, (DONE,))
+
+        other_worker = self.make_queue(lambda message: message)
+        self.assertEqual(other_worker.status(job_id), {'state': DONE, 'text': 'HELLO'})
+        self.assertIsNone(other_worker.status('0' * 32))
+
+    def test_instance_id_shared_by_job_directory(self):
+        """Test workers sharing a job directory report one instance and another directory a different one."""
+        queue = self.make_queue(lambda message: message)
+        other_worker = self.make_queue(lambda message: message)
+        other_host = ChatJobQueue(lambda message: message, result_dir=tempfile.mkdtemp(dir=self.result_dir))
+        self.addCleanup(other_host.shutdown)
+
+        self.assertEqual(queue.instance_id, other_worker.instance_id)
+        self.assertNotEqual(queue.instance_id, other_host.instance_id)
+
+
+class TestChatCallbacks(ChatQueueTestCase):
+    """Test the submit and poll callbacks through Dash dispatch."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = StubClient(release=self.release)
+        self.queue = self.make_queue(generate_response, max_concurrent=1)
+        # An empty index and cache send every question to the queue
+        for target, value in [('get_chat_queue', self.queue), ('get_genai_client', self.client),
+                              ('get_generation_config', None), ('get_chat_index', ChatbotIndex.build([])),
+                              ('get_answer_cache', AnswerCache())]:
+            patcher = patch(f'callbacks.chatbot_callbacks.{target}', return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.app = dash.Dash(__name__)
+        self.app.layout = create_floating_chatbot('test')
+        register_chatbot_callbacks(self.app)
+        self.server_client = self.app.server.test_client()
+
+    def dispatch(self, callback_name, inputs, state):
+        """Call a registered callback for the 'test' tab and return its response, or None for no update."""
+        output_key, spec = next((key, spec) for key, spec in self.app.callback_map.items()
+                                if spec.get('callback') and spec['callback'].__name__ == callback_name)
+
+        def concrete(component_id):
+            return dict(json.loads(component_id), tab='test')
+
+        body = {
+            'output': output_key,
+            'outputs': [{'id': concrete(output.component_id_str()), 'property': output.component_property}
+                        for output in spec['output']],
+            'inputs': [dict(entry, id=concrete(entry['id']), value=value) for entry, value in zip(spec['inputs'], inputs)],
+            'changedPropIds': [],
+            'state': [dict(entry, id=concrete(entry['id']), value=value) for entry, value in zip(spec['state'], state)],
+        }
+        response = self.server_client.post('/_dash-update-component', json=body)
+        if response.status_code == 204:
+            return None
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        return response.get_json()['response']
+
+    def submit(self, message, messages, previous_request=None):
+        return self.dispatch('display_user_message_and_trigger_response',
+                             [1, None], [message, messages, previous_request])
+
+    def poll(self, request_data, messages):
+        return self.dispatch('fetch_assistant_response', [1], [request_data, messages])
+
+    def test_question_answered_by_polling(self):
+        """Test the submit returns at once and a later poll swaps in the answer."""
+        response = self.submit("What is pH?", [])
+        (messages_out, input_out, store_out, interval_out) = [list(value.values())[0] for value in response.values()]
+        self.assertEqual(len(messages_out), 2)
+        self.assertFalse(interval_out)
+        request_data = store_out
+
+        # Still running: nothing changes and polling continues
+        still_running = self.poll(request_data, messages_out)
+        self.assertEqual(list(still_running.values()), [{'disabled': False}])
+
+        self.release.set()
+        wait_for(self.queue, request_data['job_id'], (DONE,))
+        answered = self.poll(request_data, messages_out)
+        messages, disabled = [list(value.values())[0] for value in answered.values()]
+        self.assertIn("Answer to: What is pH?", str(messages[-1]))
+        self.assertEqual(len(messages), 2)
+        self.assertTrue(disabled)
+
+    def test_new_question_cancels_previous(self):
+        """Test a second question cancels the first and replaces its typing indicator."""
+        first = self.submit("first", [])
+        messages, _, first_request, _ = [list(value.values())[0] for value in first.values()]
+
+        second = self.submit("second", messages, first_request)
+        messages, _, second_request, _ = [list(value.values())[0] for value in second.values()]
+
+        self.assertEqual(self.queue.status(first_request['job_id'])['state'], CANCELLED)
+        self.assertEqual(len(messages), 4)
+        self.assertIn("Stopped", str(messages[1]))
+        self.assertNotEqual(first_request['job_id'], second_request['job_id'])
+
+    def test_busy_queue(self):
+        """Test a question turned away by a full queue gets an immediate busy reply."""
+        self.queue.max_pending = 0
+        response = self.submit("question", [])
+        messages, _, request_data, disabled = [list(value.values())[0] for value in response.values()]
+
+        self.assertIn(BUSY_MESSAGE, str(messages[-1]))
+        self.assertIsNone(request_data)
+        self.assertTrue(disabled)
+
+    def test_unknown_job_times_out(self):
+        """Test a poll for a job no worker knows about gives up after the timeout."""
+        stale_request = {'job_id': 'f' * 32, 'submitted': time.time() - self.queue.timeout - 1}
+        messages, disabled = [list(value.values())[0] for value in self.poll(stale_request, [{}]).values()]
+
+        self.assertIn(TIMEOUT_MESSAGE, str(messages[-1]))
+        self.assertTrue(disabled)
+
+    def test_job_from_other_instance_fails_fast(self):
+        """Test a poll that reaches another instance replies at once instead of waiting out the timeout."""
+        request_data = {'job_id': 'f' * 32, 'instance': 'another-instance', 'submitted': time.time()}
+        messages, disabled = [list(value.values())[0] for value in self.poll(request_data, [{}]).values()]
+
+        self.assertIn(OTHER_INSTANCE_MESSAGE, str(messages[-1]))
+        self.assertTrue(disabled)
+
+
+if __name__ == '__main__':
+    unittest.main()
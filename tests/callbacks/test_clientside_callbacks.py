@@ -0,0 +1,223 @@
+"""
+Tests for assets/clientside_callbacks.js
+
+Runs the browser callbacks under Node to confirm they match the server callbacks
+they replaced, and checks that each callback module registers them clientside.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+
+import dash
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CLIENTSIDE_JS = os.path.join(project_root, 'assets', 'clientside_callbacks.js')
+NO_UPDATE = '__no_update__'
+
+NODE = shutil.which('node')
+requires_node = pytest.mark.skipif(NODE is None, reason="Node.js is required to run clientside callbacks")
+
+NODE_RUNNER = """
+global.window = {dash_clientside: {no_update: %(no_update)s}};
+const clientside = require(%(path)s);
+clientside.callback_context = %(context)s;
+window.dash_clientside = clientside;
+const result = clientside[%(namespace)s][%(function)s](...%(args)s);
+process.stdout.write(JSON.stringify(result === undefined ? null : result));
+"""
+
+def run_clientside(namespace, function, *args, triggered=None, outputs_list=None):
+    """Execute a clientside callback in Node and return its JSON result."""
+    context = {
+        'triggered': [{'prop_id': prop_id, 'value': 1} for prop_id in (triggered or [])],
+        'outputs_list': outputs_list or [],
+    }
+    script = NODE_RUNNER % {
+        'no_update': json.dumps(NO_UPDATE),
+        'path': json.dumps(CLIENTSIDE_JS),
+        'context': json.dumps(context),
+        'namespace': json.dumps(namespace),
+        'function': json.dumps(function),
+        'args': json.dumps(list(args)),
+    }
+    completed = subprocess.run([NODE, '-e', script], capture_output=True, text=True, timeout=30)
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout)
+
+@requires_node
+class TestStateCallbacks:
+    """Test tab state persistence matches the previous server logic."""
+
+    def test_chemical_state_merges_partial_updates(self):
+        """Test chemical state keeps existing values when only some controls change."""
+        current = {'selected_site': 'Site A', 'selected_parameter': 'pH', 'year_range': [2010, 2020],
+                   'selected_months': [1, 2], 'highlight_thresholds': True}
+
+        result = run_clientside('chemical', 'saveChemicalState',
+                                None, 'Chloride', None, None, None, None, current)
+
+        assert result['selected_site'] == 'Site A'
+        assert result['selected_parameter'] == 'Chloride'
+        assert result['year_range'] == [2010, 2020]
+
+    def test_chemical_state_year_range_requires_both_years(self):
+        """Test year range is only saved when start and end years are set."""
+        result = run_clientside('chemical', 'saveChemicalState',
+                                'Site A', None, 2015, None, None, False, None)
+
+        assert result['year_range'] is None
+        assert result['highlight_thresholds'] is False
+
+    def test_chemical_state_defaults_when_cleared(self):
+        """Test empty state falls back to defaults when all controls are cleared."""
+        result = run_clientside('chemical', 'saveChemicalState',
+                                None, None, None, None, None, None, {})
+
+        assert result == {'selected_site': None, 'selected_parameter': None, 'year_range': None,
+                          'selected_months': None, 'highlight_thresholds': None}
+
+    def test_overview_state_records_both_controls(self):
+        """Test overview state stores parameter and active sites toggle."""
+        result = run_clientside('overview', 'saveOverviewTabState',
+                                'chem:pH', True, {'other': 1})
+
+        assert result == {'other': 1, 'selected_parameter': 'chem:pH', 'active_sites_only': True}
+
+    def test_biological_state_preserved_when_cleared(self):
+        """Test biological state is kept when both dropdowns are cleared."""
+        current = {'selected_community': 'fish', 'selected_site': 'Site A'}
+
+        assert run_clientside('biological', 'saveBiologicalState', None, None, current) == current
+        assert run_clientside('biological', 'saveBiologicalState', 'macro', None, current) == {
+            'selected_community': 'macro', 'selected_site': 'Site A'
+        }
+
+    def test_habitat_state(self):
+        """Test habitat state replaces site and keeps state when cleared."""
+        assert run_clientside('habitat', 'saveHabitatState', 'Site B', {'selected_site': 'Site A'}) == {
+            'selected_site': 'Site B'
+        }
+        assert run_clientside('habitat', 'saveHabitatState', None, None) == {'selected_site': None}
+
+@requires_node
+class TestControlCallbacks:
+    """Test pure UI control callbacks."""
+
+    def test_modal_toggle(self):
+        """Test modal toggles only when a button has been clicked."""
+        assert run_clientside('shared', 'toggleModal', 1, 0, False) is True
+        assert run_clientside('shared', 'toggleModal', 0, 1, True) is False
+        assert run_clientside('shared', 'toggleModal', 0, None, True) is True
+
+    def test_return_to_overview(self):
+        """Test overview links switch tabs and clear navigation targets."""
+        assert run_clientside('shared', 'returnToOverview', 1) == [
+            'overview-tab', {'target_tab': None, 'target_site': None}
+        ]
+        assert run_clientside('shared', 'returnToOverview', None) == [NO_UPDATE, NO_UPDATE]
+
+    def test_record_viewport_width(self):
+        """Test an unknown browser width is stored as null so the server default applies."""
+        assert run_clientside('shared', 'recordViewportWidth', 'overview-tab') is None
+
+    def test_chemical_controls_visibility(self):
+        """Test download buttons only show once a parameter is selected."""
+        assert run_clientside('chemical', 'showChemicalControls', 'Site A', 'pH') == [
+            {'display': 'block'}, {'display': 'block'}, {'display': 'block', 'marginRight': '10px'}
+        ]
+        assert run_clientside('chemical', 'showChemicalControls', 'Site A', None) == [
+            {'display': 'block'}, {'display': 'none'}, {'display': 'none'}
+        ]
+        assert run_clientside('chemical', 'showChemicalControls', None, None) == [{'display': 'none'}] * 3
+
+    def test_site_download_href(self):
+        """Test the site download link points at the export route with an encoded site name."""
+        assert run_clientside('chemical', 'siteDownloadHref', 'Site B (East), OK') == (
+            '/downloads/chemical.csv?site=Site%20B%20(East)%2C%20OK'
+        )
+        assert run_clientside('chemical', 'siteDownloadHref', None) is None
+
+    def test_month_selection_by_season(self):
+        """Test season buttons map to their months."""
+        assert run_clientside('chemical', 'updateMonthSelection', triggered=['select-winter.n_clicks']) == [12, 1, 2]
+        assert run_clientside('chemical', 'updateMonthSelection',
+                              triggered=['select-all-months.n_clicks']) == list(range(1, 13))
+        assert run_clientside('chemical', 'updateMonthSelection') == NO_UPDATE
+
+    def test_end_year_options_follow_start_year(self):
+        """Test end year options only include years on or after the start year."""
+        start_options, end_options = run_clientside(
+            'chemical', 'updateYearDropdownOptions', 2018, 2020, {'min_year': 2015, 'max_year': 2020}
+        )
+
+        assert [option['value'] for option in start_options] == list(range(2015, 2021))
+        assert [option['value'] for option in end_options] == [2018, 2019, 2020]
+        assert end_options[0]['label'] == '2018'
+
+    def test_habitat_controls_visibility(self):
+        """Test habitat controls show when a site is selected."""
+        assert run_clientside('habitat', 'showHabitatControls', 'Site A') == {'display': 'block'}
+        assert run_clientside('habitat', 'showHabitatControls', None) == {'display': 'none'}
+
+    def test_chat_collapse_toggle(self):
+        """Test chat panel toggles once either button has been clicked."""
+        assert run_clientside('chatbot', 'toggleChatCollapse', None, None, False) is False
+        assert run_clientside('chatbot', 'toggleChatCollapse', 1, None, False) is True
+
+@requires_node
+class TestGalleryNavigation:
+    """Test circular navigation over pre-rendered gallery slides."""
+
+    SLIDES = [[{'id': {'type': 'gallery-slide', 'gallery': 'fish', 'index': i}} for i in range(3)], {}]
+
+    def test_initial_call_shows_first_slide(self):
+        """Test the first slide is shown when the gallery is rendered."""
+        styles, index = run_clientside('biological', 'navigateGallery', None, None, 0,
+                                       outputs_list=self.SLIDES)
+
+        assert index == 0
+        assert styles == [{'display': 'block'}, {'display': 'none'}, {'display': 'none'}]
+
+    def test_previous_wraps_to_last_slide(self):
+        """Test previous button wraps from the first slide to the last."""
+        styles, index = run_clientside('biological', 'navigateGallery', 1, None, 0,
+                                       triggered=['prev-fish-button.n_clicks'], outputs_list=self.SLIDES)
+
+        assert index == 2
+        assert styles[2] == {'display': 'block'}
+
+    def test_next_wraps_to_first_slide(self):
+        """Test next button wraps from the last slide to the first."""
+        _, index = run_clientside('biological', 'navigateGallery', None, 3, 2,
+                                  triggered=['next-fish-button.n_clicks'], outputs_list=self.SLIDES)
+
+        assert index == 0
+
+class TestClientsideRegistration:
+    """Test UI callbacks are registered as clientside callbacks."""
+
+    def test_ui_callbacks_registered_clientside(self):
+        """Test pure UI callbacks no longer have server-side handlers."""
+        from callbacks.biological_callbacks import register_biological_callbacks
+        from callbacks.chemical_callbacks import register_chemical_callbacks
+        from callbacks.habitat_callbacks import register_habitat_callbacks
+        from callbacks.shared_callbacks import register_shared_callbacks
+
+        app = dash.Dash(__name__, suppress_callback_exceptions=True)
+        for register in (register_shared_callbacks, register_chemical_callbacks,
+                         register_biological_callbacks, register_habitat_callbacks):
+            register(app)
+
+        clientside_outputs = {callback['output'] for callback in app._callback_list
+                              if callback.get('clientside_function')}
+        server_outputs = {output for output, spec in app.callback_map.items() if 'callback' in spec}
+
+        for output in ['attribution-modal.is_open', 'chemical-tab-state.data', 'month-checklist.value',
+                       '..start-year-dropdown.options...end-year-dropdown.options..',
+                       'habitat-controls-content.style', 'biological-tab-state.data',
+                       'chemical-download-site-btn.href']:
+            assert output in clientside_outputs, f"{output} should be registered clientside"
+            assert output not in server_outputs, f"{output} should not have a server handler"
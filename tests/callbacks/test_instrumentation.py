@@ -0,0 +1,208 @@
+"""
+Tests for callback instrumentation
+
+This file tests callback metrics collection including:
+- Latency, payload and error recording through Dash dispatch
+- SQL query counts per callback
+- Prometheus text rendering and the /metrics route
+- Optional cProfile capture
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import dash
+from dash import Input, Output, html
+from dash.exceptions import PreventUpdate
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from api import register_routes
+from callbacks.instrumentation import CallbackMetrics, Histogram, instrument_callbacks
+from database.database import close_connection, get_connection
+from utils import setup_logging
+
+# Set up logging for tests
+logger = setup_logging("test_instrumentation", category="testing")
+
+
+def create_app():
+    """Create a small app whose callbacks cover success, no-update, error and SQL paths."""
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Div(id='trigger'), html.Div(id='output'), html.Div(id='other')])
+
+    @app.callback(Output('output', 'children'), Input('trigger', 'children'))
+    def render_output(value):
+        if value == 'skip':
+            raise PreventUpdate
+        if value == 'fail':
+            raise ValueError("broken")
+        if value == 'query':
+            conn = get_connection()
+            conn.execute("SELECT 1").fetchall()
+            close_connection(conn)
+        return f"Value: {value}"
+
+    return app
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    """Base class with an instrumented app and a private metrics registry."""
+
+    def setUp(self):
+        self.metrics = CallbackMetrics()
+        self.app = create_app()
+        instrument_callbacks(self.app, self.metrics)
+        register_routes(self.app.server)
+        self.client = self.app.server.test_client()
+
+    def dispatch(self, value, headers=None):
+        body = {
+            'output': 'output.children',
+            'outputs': {'id': 'output', 'property': 'children'},
+            'inputs': [{'id': 'trigger', 'property': 'children', 'value': value}],
+            'changedPropIds': ['trigger.children'],
+            'state': [],
+        }
+        return self.client.post('/_dash-update-component', json=body, headers=headers or {})
+
+
+class TestCallbackMetrics(InstrumentationTestCase):
+    """Test metrics recorded for dispatched callbacks."""
+
+    def test_successful_call(self):
+        """Test latency and response size are recorded under the callback's name."""
+        response = self.dispatch('a')
+        stats = self.metrics.get('render_output')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(stats.latency.count, 1)
+        self.assertEqual(stats.payload.sum, len(response.data))
+        self.assertEqual(stats.errors, 0)
+
+    def test_prevent_update(self):
+        """Test PreventUpdate is counted separately from errors."""
+        self.assertEqual(self.dispatch('skip').status_code, 204)
+        stats = self.metrics.get('render_output')
+
+        self.assertEqual(stats.prevented, 1)
+        self.assertEqual(stats.errors, 0)
+        self.assertEqual(stats.payload.count, 0)
+
+    def test_error(self):
+        """Test uncaught exceptions are counted and still propagate."""
+        self.app.server.config['PROPAGATE_EXCEPTIONS'] = False
+        self.assertEqual(self.dispatch('fail').status_code, 500)
+        self.assertEqual(self.metrics.get('render_output').errors, 1)
+
+    def test_sql_queries(self):
+        """Test SQL statements run by a callback are counted and timed."""
+        with patch('database.database.get_database_path', return_value=':memory:'):
+            self.dispatch('query')
+        stats = self.metrics.get('render_output')
+
+        self.assertEqual(stats.sql_queries, 1)
+        self.assertGreater(stats.sql_seconds, 0)
+
+    def test_instrument_is_idempotent(self):
+        """Test instrumenting twice does not double count."""
+        self.assertEqual(instrument_callbacks(self.app, self.metrics), 0)
+        self.dispatch('a')
+        self.assertEqual(self.metrics.get('render_output').latency.count, 1)
+
+
+class TestPrometheusRendering(unittest.TestCase):
+    """Test the Prometheus text format."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket counts accumulate and overflow lands in +Inf."""
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value)
+
+        self.assertEqual(list(histogram.cumulative_counts()), [1, 3, 4])
+
+    def test_render(self):
+        """Test series are labelled by callback and include every metric family."""
+        metrics = CallbackMetrics()
+        metrics.record('update_chemical_display', 0.2, payload_bytes=5000, sql_queries=2, sql_seconds=0.01)
+        text = metrics.render_prometheus()
+
+        self.assertIn('# TYPE dash_callback_duration_seconds histogram', text)
+        self.assertIn('dash_callback_duration_seconds_bucket{callback="update_chemical_display",le="0.25"} 1', text)
+        self.assertIn('dash_callback_duration_seconds_bucket{callback="update_chemical_display",le="0.1"} 0', text)
+        self.assertIn('dash_callback_duration_seconds_count{callback="update_chemical_display"} 1', text)
+        self.assertIn('dash_callback_sql_queries_total{callback="update_chemical_display"} 2', text)
+        self.assertIn('dash_callback_errors_total{callback="update_chemical_display"} 0', text)
+
+
+class TestMetricsRoute(InstrumentationTestCase):
+    """Test the /metrics endpoint."""
+
+    def test_metrics_route(self):
+        """Test the route serves the shared registry in Prometheus text format."""
+        with patch('api.metrics.callback_metrics', self.metrics):
+            self.dispatch('a')
+            response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        self.assertIn('dash_callback_duration_seconds_count{callback="render_output"} 1', response.get_data(as_text=True))
+
+    def test_dashboard_callbacks_instrumented(self):
+        """Test register_callbacks wraps the dashboard's server-side callbacks."""
+        from app import app
+
+        names = {spec['callback'].__name__ for spec in app.callback_map.values() if 'callback' in spec}
+        instrumented = [spec['callback'] for spec in app.callback_map.values() if 'callback' in spec]
+
+        self.assertIn('update_chemical_display', names)
+        self.assertIn('update_map_with_parameter_selection', names)
+        self.assertIn('fetch_assistant_response', names)
+        self.assertTrue(all(getattr(func, 'instrumented', False) for func in instrumented))
+
+
+class TestProfiling(InstrumentationTestCase):
+    """Test optional cProfile capture."""
+
+    def setUp(self):
+        super().setUp()
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir, ignore_errors=True)
+        patcher = patch('callbacks.instrumentation.PROFILE_DIR', self.profile_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_profiling_off_by_default(self):
+        """Test no profiles are written unless enabled."""
+        with patch.dict(os.environ, {'CALLBACK_PROFILING': ''}):
+            self.dispatch('a', headers={'X-Profile-Callback': '1'})
+        self.assertEqual(os.listdir(self.profile_dir), [])
+
+    def test_header_mode(self):
+        """Test header mode profiles only requests that ask for it."""
+        with patch.dict(os.environ, {'CALLBACK_PROFILING': 'header'}):
+            self.dispatch('a')
+            self.assertEqual(os.listdir(self.profile_dir), [])
+            self.dispatch('a', headers={'X-Profile-Callback': '1'})
+
+        profiles = os.listdir(self.profile_dir)
+        self.assertEqual(len(profiles), 1)
+        self.assertTrue(profiles[0].startswith('render_output-'))
+
+    def test_always_mode(self):
+        """Test always mode profiles every call."""
+        with patch.dict(os.environ, {'CALLBACK_PROFILING': 'always'}):
+            self.dispatch('a')
+            self.dispatch('b')
+        self.assertEqual(len(os.listdir(self.profile_dir)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -4,9 +4,10 @@ Tests the logic in data_processing.biological_utils module.
 """
 
 import os
+import sqlite3
 import sys
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pandas as pd
 
@@ -17,15 +18,29 @@ sys.path.insert(0, project_root)
 from data_processing.biological_utils import (
     convert_columns_to_numeric,
     insert_collection_events,
+    map_event_ids,
+    melt_metrics,
     remove_invalid_biological_values,
     validate_collection_event_data,
+    write_biological_records,
 )
+from database.db_schema import create_tables
 from utils import setup_logging
 
 # Set up logging for tests
 logger = setup_logging("test_biological_utils", category="testing")
 
 
+def create_test_database(site_names=('Site1', 'Site2', 'Site3')):
+    """Create an in-memory database with the full schema and the given sites."""
+    conn = sqlite3.connect(':memory:')
+    with patch('database.db_schema.get_connection', return_value=conn), \
+            patch('database.db_schema.close_connection'):
+        create_tables()
+    conn.executemany("INSERT INTO sites (site_name) VALUES (?)", [(name,) for name in site_names])
+    return conn
+
+
 class TestBiologicalUtils(unittest.TestCase):
     """Test shared biological utility functions."""
     
@@ -47,8 +62,8 @@ class TestBiologicalUtils(unittest.TestCase):
         
         # Macro-style grouping data (includes habitat)
         self.macro_style_data = self.basic_bio_data.copy()
-        self.macro_style_data['habitat'] = ['Riffle', 'Pool', 'Vegetation']
-        self.macro_style_data['season'] = ['Spring', 'Fall', 'Spring']
+        self.macro_style_data['habitat'] = ['Riffle', 'Woody', 'Vegetation']
+        self.macro_style_data['season'] = ['Summer', 'Winter', 'Summer']
         self.macro_style_data['taxa_richness_score'] = [5, 3, 1]
         self.macro_style_data['collection_date_str'] = ['2023-01-01', '2023-01-02', '2023-01-03']
 
@@ -109,12 +124,11 @@ class TestBiologicalUtils(unittest.TestCase):
     
     def test_insert_collection_events_fish_style(self):
         """Test collection event insertion for fish-style data."""
-        mock_cursor = MagicMock()
-        mock_cursor.fetchone.return_value = (1,)  # site_id = 1
-        mock_cursor.lastrowid = 123  # event_id = 123
+        conn = create_test_database()
+        cursor = conn.cursor()
         
         result = insert_collection_events(
-            cursor=mock_cursor,
+            cursor=cursor,
             df=self.fish_style_data,
             table_name='fish_collection_events',
             grouping_columns=['site_name', 'sample_id'],
@@ -130,27 +144,27 @@ class TestBiologicalUtils(unittest.TestCase):
         self.assertIsInstance(result, dict)
         self.assertEqual(len(result), 3)  # 3 unique samples
         
-        # Verify database calls were made
-        self.assertEqual(mock_cursor.execute.call_count, 6)  # 3 site lookups + 3 inserts
-        
-        # Check that sample_ids are keys (fish style)
-        for sample_id in [101, 102, 103]:
-            self.assertIn(sample_id, result)
+        # Every mapped event exists with its site and sample
+        rows = cursor.execute("""
+            SELECT e.event_id, e.sample_id, s.site_name FROM fish_collection_events e
+            JOIN sites s ON e.site_id = s.site_id
+        """).fetchall()
+        self.assertEqual({sample_id: event_id for event_id, sample_id, _ in rows}, result)
+        self.assertEqual({row[2] for row in rows}, {'Site1', 'Site2', 'Site3'})
         
     def test_insert_collection_events_macro_style(self):
         """Test collection event insertion for macro-style data."""
-        mock_cursor = MagicMock()
-        mock_cursor.fetchone.return_value = (1,)
-        mock_cursor.lastrowid = 456
+        conn = create_test_database()
         
         result = insert_collection_events(
-            cursor=mock_cursor,
+            cursor=conn.cursor(),
             df=self.macro_style_data,
             table_name='macro_collection_events',
             grouping_columns=['site_name', 'sample_id', 'habitat'],
             column_mapping={
                 'site_id': 'site_name',
                 'sample_id': 'sample_id',
+                'collection_date': 'collection_date_str',
                 'habitat': 'habitat', 
                 'season': 'season',
                 'year': 'year'
@@ -162,28 +176,67 @@ class TestBiologicalUtils(unittest.TestCase):
         self.assertEqual(len(result), 3)  # 3 unique sample+habitat combinations
         
         # Check that tuples are keys (macro style)
-        expected_keys = [(101, 'Riffle'), (102, 'Pool'), (103, 'Vegetation')]
+        expected_keys = [(101, 'Riffle'), (102, 'Woody'), (103, 'Vegetation')]
         for key in expected_keys:
             self.assertIn(key, result)
 
     def test_insert_collection_events_site_not_found(self):
         """Test handling when site is not found in database."""
-        mock_cursor = MagicMock()
-        mock_cursor.fetchone.return_value = None  # Site not found
+        conn = create_test_database(site_names=('Site1',))
         
         result = insert_collection_events(
-            cursor=mock_cursor,
+            cursor=conn.cursor(),
             df=self.fish_style_data,
             table_name='fish_collection_events',
             grouping_columns=['site_name', 'sample_id'],
             column_mapping={
                 'site_id': 'site_name',
-                'sample_id': 'sample_id'
+                'sample_id': 'sample_id',
+                'collection_date': 'collection_date_str',
+                'year': 'year'
+            }
+        )
+        
+        # Only the event at the known site is inserted
+        self.assertEqual(list(result), [101])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM fish_collection_events").fetchone()[0], 1)
+
+    def test_insert_collection_events_skips_constraint_violations(self):
+        """Test events violating a table constraint are skipped without dropping the batch."""
+        conn = create_test_database()
+        invalid_habitat = self.macro_style_data.copy()
+        invalid_habitat.loc[1, 'habitat'] = 'Pool'
+        
+        result = insert_collection_events(
+            cursor=conn.cursor(),
+            df=invalid_habitat,
+            table_name='macro_collection_events',
+            grouping_columns=['site_name', 'sample_id', 'habitat'],
+            column_mapping={
+                'site_id': 'site_name',
+                'sample_id': 'sample_id',
+                'collection_date': 'collection_date_str',
+                'habitat': 'habitat',
+                'year': 'year'
             }
         )
         
-        # Should return empty dict when sites not found
-        self.assertEqual(len(result), 0)
+        self.assertEqual(set(result), {(101, 'Riffle'), (103, 'Vegetation')})
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM macro_collection_events").fetchone()[0], 2)
+
+    def test_insert_collection_events_continues_ids(self):
+        """Test a second batch gets new ids after the existing events."""
+        conn = create_test_database()
+        column_mapping = {'site_id': 'site_name', 'sample_id': 'sample_id',
+                          'collection_date': 'collection_date_str', 'year': 'year'}
+        
+        first = insert_collection_events(conn.cursor(), self.fish_style_data.iloc[:2], 'fish_collection_events',
+                                         ['site_name', 'sample_id'], column_mapping)
+        second = insert_collection_events(conn.cursor(), self.fish_style_data.iloc[2:], 'fish_collection_events',
+                                          ['site_name', 'sample_id'], column_mapping)
+        
+        self.assertEqual(sorted(first.values()), [1, 2])
+        self.assertEqual(second, {103: 3})
 
     def test_insert_collection_events_empty_data(self):
         """Test handling of empty data."""
@@ -359,12 +412,10 @@ class TestBiologicalUtils(unittest.TestCase):
             'year': [2023, 2023, 2023]
         })
         
-        mock_cursor = MagicMock()
-        mock_cursor.fetchone.return_value = (1,)
-        mock_cursor.lastrowid = 123
+        conn = create_test_database()
         
         result = insert_collection_events(
-            cursor=mock_cursor,
+            cursor=conn.cursor(),
             df=duplicate_data,
             table_name='fish_collection_events',
             grouping_columns=['site_name', 'sample_id'],
@@ -383,28 +434,90 @@ class TestBiologicalUtils(unittest.TestCase):
         """Test collection events insertion when mapped columns are missing."""
         incomplete_data = pd.DataFrame({
             'site_name': ['Site1'],
-            'sample_id': [101]
-            # Missing 'year' column
+            'sample_id': [101],
+            'habitat': ['Riffle'],
+            'collection_date_str': ['2023-01-01'],
+            'year': [2023]
+            # Missing 'season' column
         })
         
-        mock_cursor = MagicMock()
-        mock_cursor.fetchone.return_value = (1,)
-        mock_cursor.lastrowid = 123
+        conn = create_test_database()
         
         result = insert_collection_events(
-            cursor=mock_cursor,
+            cursor=conn.cursor(),
             df=incomplete_data,
-            table_name='fish_collection_events',
-            grouping_columns=['site_name', 'sample_id'],
+            table_name='macro_collection_events',
+            grouping_columns=['site_name', 'sample_id', 'habitat'],
             column_mapping={
                 'site_id': 'site_name',
                 'sample_id': 'sample_id',
-                'year': 'year'  # This column doesn't exist
+                'habitat': 'habitat',
+                'collection_date': 'collection_date_str',
+                'year': 'year',
+                'season': 'season'  # This column doesn't exist
             }
         )
         
-        # Should handle missing columns gracefully
+        # Should handle missing columns gracefully, leaving them NULL
         self.assertEqual(len(result), 1)
+        self.assertIsNone(conn.execute("SELECT season FROM macro_collection_events").fetchone()[0])
+
+    # =============================================================================
+    # BULK WRITE TESTS
+    # =============================================================================
+
+    def test_map_event_ids(self):
+        """Test the first row per sample is kept and unmapped samples are dropped."""
+        data = pd.DataFrame({
+            'sample_id': [102, 101, 101, 103],
+            'habitat': ['Riffle', 'Woody', 'Woody', 'Riffle'],
+            'total_score': [10, 20, 99, 30],
+        })
+        
+        samples = map_event_ids(data, ['sample_id', 'habitat'], {(101, 'Woody'): 7, (102, 'Riffle'): 8})
+        
+        self.assertEqual(samples['event_id'].tolist(), [7, 8])
+        self.assertEqual(samples['total_score'].tolist(), [20, 10])
+
+    def test_melt_metrics(self):
+        """Test wide metric columns melt to sample-then-metric rows, dropping incomplete values."""
+        samples = pd.DataFrame({
+            'event_id': [1, 2],
+            'richness': [12, 9],
+            'richness_score': [5, None],
+            'abundance': [40.5, 22.0],
+            'abundance_score': [3, 1],
+        })
+        
+        metrics = melt_metrics(samples, 'event_id', {
+            'Richness': ('richness', 'richness_score'),
+            'Abundance': ('abundance', 'abundance_score'),
+            'Missing': ('missing', 'missing_score'),
+        }, ['raw_value', 'metric_score'])
+        
+        self.assertEqual(
+            list(metrics.itertuples(index=False, name=None)),
+            [(1, 'Richness', 12.0, 5.0), (1, 'Abundance', 40.5, 3.0), (2, 'Abundance', 22.0, 1.0)]
+        )
+
+    def test_write_biological_records_replaces_existing(self):
+        """Test child records are replaced rather than duplicated when an event is rewritten."""
+        conn = create_test_database()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO fish_collection_events (event_id, site_id, sample_id, collection_date, year)
+            VALUES (1, 1, 101, '2023-01-01', 2023)
+        """)
+        metrics = pd.DataFrame({
+            'event_id': [1], 'metric_name': ['Total No. of species'],
+            'raw_value': [15.0], 'metric_result': [None], 'metric_score': [3],
+        })
+        
+        write_biological_records(cursor, 'event_id', [1], {'fish_metrics': metrics})
+        counts = write_biological_records(cursor, 'event_id', [1], {'fish_metrics': metrics})
+        
+        self.assertEqual(counts, {'fish_metrics': 1})
+        self.assertEqual(cursor.execute("SELECT raw_value FROM fish_metrics").fetchall(), [(15.0,)])
 
 if __name__ == '__main__':
     unittest.main(verbosity=2) 
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Test suite for the chatbot's local BM25 index.
+Tests passage splitting, ranking, coverage scores, summaries and the saved index.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from data_processing.chatbot_index import (
+    CORPUS_DIR,
+    INDEX_PATH,
+    ChatbotIndex,
+    build_index,
+    load_index,
+    load_passages,
+    summarize_passage,
+    tokenize,
+)
+
+
+def write_corpus(directory):
+    files = {
+        'chloride.md': "### Description\nChloride is a salt ion from road salt.\n\n### Interpretation\nWinter spikes in chloride suggest road salt.",
+        'species-bluegill.txt': "Species Type: Fish\nName: Bluegill Sunfish\n\nDescription: Bluegill have a deep body. They eat insects.",
+        'caption-chloride.txt': "Category: Chemical Diagram\nTopic: Chloride\n\nCaption: Illustration of chloride sources.",
+        'action-card-conserve-water.txt': "Category: Home Yard\nTitle: CONSERVE WATER\n\nWhy this is important: Saving water keeps streams flowing.\n\nTips:\n- Fix leaks\n",
+        'notes.json': "{}",
+    }
+    for name, text in files.items():
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+class TestChatbotIndex(unittest.TestCase):
+    """Test building and searching the passage index."""
+
+    def setUp(self):
+        self.corpus_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.corpus_dir, ignore_errors=True)
+        write_corpus(self.corpus_dir)
+        self.index = ChatbotIndex.build(load_passages(self.corpus_dir))
+
+    def test_tokenize(self):
+        """Test stopwords are dropped and plural endings removed."""
+        self.assertEqual(tokenize("What does Chloride mean for streams?"), ['chloride', 'stream'])
+        self.assertEqual(tokenize("grass is less"), ['grass', 'less'])
+
+    def test_passages(self):
+        """Test markdown splits by section, cards are one passage each and other files are skipped."""
+        passages = load_passages(self.corpus_dir)
+        titles = {(passage['source'], passage['title'], passage['kind']) for passage in passages}
+
+        self.assertEqual(titles, {
+            ('action-card-conserve-water.txt', 'CONSERVE WATER', 'action'),
+            ('caption-chloride.txt', 'Chloride', 'caption'),
+            ('chloride.md', 'Chloride: Description', 'section'),
+            ('chloride.md', 'Chloride: Interpretation', 'section'),
+            ('species-bluegill.txt', 'Bluegill Sunfish', 'species'),
+        })
+
+    def test_search_ranks_and_scores_coverage(self):
+        """Test the matching passage ranks first with full coverage and unknown words lower it."""
+        best = self.index.search("what is a bluegill?")[0]
+        self.assertEqual(best['title'], 'Bluegill Sunfish')
+        self.assertEqual(best['coverage'], 1.0)
+        self.assertEqual(best['title_coverage'], 1.0)
+
+        partial = self.index.search("bluegill fishing spots")[0]
+        self.assertEqual(partial['title'], 'Bluegill Sunfish')
+        self.assertLess(partial['coverage'], 0.5)
+
+        self.assertEqual(self.index.search("the and of"), [])
+        self.assertEqual(self.index.search("volcano"), [])
+
+    def test_summarize_passage(self):
+        """Test summaries drop card headers, labels and tip lists and keep the first sentences."""
+        passages = {passage['title']: passage for passage in load_passages(self.corpus_dir)}
+
+        self.assertEqual(summarize_passage(passages['Bluegill Sunfish'], max_sentences=1), "Bluegill have a deep body.")
+        self.assertEqual(summarize_passage(passages['CONSERVE WATER']), "Saving water keeps streams flowing.")
+
+    def test_saved_index_round_trip(self):
+        """Test a saved index loads and searches the same as the built one."""
+        index_path = os.path.join(self.corpus_dir, 'index.json')
+        build_index(self.corpus_dir, index_path)
+        loaded = load_index(index_path, self.corpus_dir)
+
+        for query in ("road salt", "bluegill insects", "water"):
+            self.assertEqual(loaded.search(query), self.index.search(query))
+
+    def test_missing_index_built_from_corpus(self):
+        """Test a missing index file falls back to indexing the corpus in memory."""
+        loaded = load_index(os.path.join(self.corpus_dir, 'missing.json'), self.corpus_dir)
+        self.assertEqual(loaded.search("road salt"), self.index.search("road salt"))
+
+    def test_committed_index_matches_corpus(self):
+        """Test the saved index was rebuilt after the chatbot documents last changed."""
+        with open(INDEX_PATH, encoding='utf-8') as f:
+            saved = json.load(f)
+        rebuilt = json.loads(json.dumps(ChatbotIndex.build(load_passages(CORPUS_DIR)).to_dict()))
+        self.assertEqual(saved, rebuilt, "Run data_processing/prepare_chatbot_data.py to rebuild the index")
+
+
+if __name__ == '__main__':
+    unittest.main()
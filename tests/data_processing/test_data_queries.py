@@ -4,7 +4,9 @@ Tests the database query functionality for retrieving monitoring data.
 """
 
 import os
+import sqlite3
 import sys
+import tempfile
 import unittest
 from unittest.mock import patch
 
@@ -16,6 +18,7 @@ sys.path.insert(0, project_root)
 
 from data_processing import setup_logging
 from data_processing.data_queries import (
+    get_biological_site_bundle,
     get_chemical_data_from_db,
     get_chemical_date_range,
     get_fish_dataframe,
@@ -27,6 +30,7 @@ from data_processing.data_queries import (
     get_macro_date_range,
     get_macro_metrics_data_for_table,
     get_macroinvertebrate_dataframe,
+    site_has_data,
 )
 
 # Set up logging for tests
@@ -206,5 +210,85 @@ class TestDataQueries(unittest.TestCase):
         self.assertTrue(callable(get_habitat_metrics_data_for_table))
 
 
+
+class TestBiologicalSiteQueries(unittest.TestCase):
+    """Test site-scoped biological queries against a small database."""
+    
+    def setUp(self):
+        """Create a database with macroinvertebrate data for one of two sites."""
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript('''
+            CREATE TABLE sites (site_id INTEGER PRIMARY KEY, site_name TEXT UNIQUE);
+            CREATE TABLE macro_collection_events (
+                event_id INTEGER PRIMARY KEY, site_id INTEGER, sample_id INTEGER,
+                collection_date TEXT, season TEXT, year INTEGER, habitat TEXT
+            );
+            CREATE TABLE macro_metrics (
+                metric_id INTEGER PRIMARY KEY, event_id INTEGER, metric_name TEXT,
+                raw_value REAL, metric_score INTEGER
+            );
+            CREATE TABLE macro_summary_scores (
+                event_id INTEGER, total_score INTEGER, comparison_to_reference REAL,
+                biological_condition TEXT
+            );
+            INSERT INTO sites VALUES (1, 'Site A'), (2, 'Site B');
+            INSERT INTO macro_collection_events VALUES
+                (10, 1, 100, '2023-07-01', 'Summer', 2023, 'Riffle'),
+                (11, 1, 101, '2024-01-15', 'Winter', 2024, 'Riffle');
+            INSERT INTO macro_metrics VALUES
+                (1, 10, 'Taxa Richness', 12, 5), (2, 11, 'Taxa Richness', 9, 3);
+            INSERT INTO macro_summary_scores VALUES
+                (10, 30, 0.9, 'Non-impaired'), (11, 20, 0.6, 'Slightly Impaired');
+        ''')
+        conn.commit()
+        conn.close()
+        
+        connection_patcher = patch(
+            'data_processing.data_queries.get_connection',
+            side_effect=lambda: sqlite3.connect(self.db_path)
+        )
+        connection_patcher.start()
+        self.addCleanup(connection_patcher.stop)
+    
+    def tearDown(self):
+        """Remove the temporary database."""
+        os.remove(self.db_path)
+    
+    def test_site_has_data(self):
+        """Test existence checks distinguish sites with and without data."""
+        self.assertTrue(site_has_data('Site A', 'macro'))
+        self.assertFalse(site_has_data('Site B', 'macro'))
+        self.assertFalse(site_has_data('Unknown Site', 'macro'))
+    
+    def test_site_has_data_unknown_type(self):
+        """Test unknown data types report no data."""
+        self.assertFalse(site_has_data('Site A', 'plankton'))
+    
+    def test_site_has_data_handles_errors(self):
+        """Test database errors report no data instead of raising."""
+        with patch('data_processing.data_queries.get_connection', side_effect=Exception("DB Error")):
+            self.assertFalse(site_has_data('Site A', 'macro'))
+    
+    def test_biological_site_bundle(self):
+        """Test the bundle returns only the requested site's metrics and summary rows."""
+        bundle = get_biological_site_bundle('macro', 'Site A')
+        
+        self.assertEqual(len(bundle['metrics']), 2)
+        self.assertEqual(len(bundle['summary']), 2)
+        self.assertEqual(set(bundle['summary']['site_name']), {'Site A'})
+        
+        # Summary rows carry the chart columns
+        for column in ['collection_date', 'season', 'habitat', 'comparison_to_reference', 'biological_condition']:
+            self.assertIn(column, bundle['summary'].columns)
+    
+    def test_biological_site_bundle_invalid_community(self):
+        """Test unknown communities are rejected."""
+        with self.assertRaises(ValueError):
+            get_biological_site_bundle('plankton', 'Site A')
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2) 
\ No newline at end of file
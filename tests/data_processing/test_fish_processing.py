@@ -25,6 +25,7 @@ from data_processing.fish_processing import (
     load_fish_data,
     validate_ibi_scores,
 )
+from tests.data_processing.test_biological_utils import create_test_database
 from utils import setup_logging
 
 # Set up logging for tests
@@ -410,7 +411,7 @@ class TestFishProcessing(unittest.TestCase):
     
     def test_insert_metrics_data_basic(self):
         """Test insertion of fish metrics data."""
-        mock_cursor = MagicMock()
+        conn = create_test_database()
         event_id_map = {101: 123, 201: 456}  # sample_id -> event_id
         
         # Create processed data with proper column names
@@ -435,17 +436,25 @@ class TestFishProcessing(unittest.TestCase):
             'integrity_class': ['Good', 'Fair']
         })
         
-        result = insert_metrics_data(mock_cursor, processed_data, event_id_map)
-        
-        # Should return count of inserted metrics
-        self.assertIsInstance(result, int)
-        
-        # Verify that INSERT statements were called for metrics and summary
-        self.assertTrue(mock_cursor.execute.called)
+        result = insert_metrics_data(conn.cursor(), processed_data, event_id_map)
+        
+        # Should return count of inserted metrics: 7 metrics for each of 2 samples
+        self.assertEqual(result, 14)
+        
+        # Proportion metrics also store their raw value as the result
+        self.assertEqual(conn.execute("""
+            SELECT raw_value, metric_result, metric_score FROM fish_metrics
+            WHERE event_id = 456 AND metric_name = 'Proportion tolerant individuals'
+        """).fetchone(), (0.3, 0.3, 5))
+        self.assertIsNone(conn.execute("""
+            SELECT metric_result FROM fish_metrics WHERE event_id = 123 AND metric_name = 'Total No. of species'
+        """).fetchone()[0])
+        self.assertEqual(conn.execute("SELECT * FROM fish_summary_scores ORDER BY event_id").fetchall(),
+                         [(123, 21, 0.85, 'Good'), (456, 21, 0.65, 'Fair')])
     
     def test_insert_metrics_data_integrity_class_fallback(self):
         """Test integrity class calculation when CSV value is missing."""
-        mock_cursor = MagicMock()
+        conn = create_test_database()
         event_id_map = {101: 123}
         
         # Create data without integrity class but with comparison_to_reference
@@ -457,11 +466,11 @@ class TestFishProcessing(unittest.TestCase):
             'total_species_score': [3]
         })
         
-        result = insert_metrics_data(mock_cursor, test_data, event_id_map)
+        result = insert_metrics_data(conn.cursor(), test_data, event_id_map)
         
         # Should calculate and insert integrity class
-        self.assertIsInstance(result, int)
-        self.assertTrue(mock_cursor.execute.called)
+        self.assertEqual(result, 1)
+        self.assertEqual(conn.execute("SELECT integrity_class FROM fish_summary_scores").fetchone()[0], "Good")
 
     def test_insert_metrics_data_missing_event_id(self):
         """Test handling when sample_id is not in event_id_map."""
@@ -24,6 +24,7 @@ from data_processing.habitat_processing import (
     process_habitat_csv_data,
     resolve_habitat_duplicates,
 )
+from tests.data_processing.test_biological_utils import create_test_database
 from utils import setup_logging
 
 # Set up logging for tests
@@ -272,10 +273,7 @@ class TestHabitatProcessing(unittest.TestCase):
 
     def test_insert_habitat_assessments(self):
         """Test insertion of habitat assessments into database."""
-        # Mock cursor and connection
-        mock_cursor = MagicMock()
-        mock_cursor.fetchone.return_value = (1,)  # site_id = 1
-        mock_cursor.lastrowid = 123  # assessment_id = 123
+        conn = create_test_database(site_names=('Test Site',))
         
         # Prepare test data with mapped columns
         test_data = pd.DataFrame({
@@ -285,35 +283,32 @@ class TestHabitatProcessing(unittest.TestCase):
             'year': [2023]
         })
         
-        result = insert_habitat_assessments(mock_cursor, test_data)
+        result = insert_habitat_assessments(conn.cursor(), test_data)
         
         # Should return mapping of sample_id -> assessment_id
         self.assertIsInstance(result, dict)
         self.assertEqual(len(result), 1)
         self.assertIn(101, result)
-        self.assertEqual(result[101], 123)
-        
-        # Verify database calls were made
-        self.assertEqual(mock_cursor.execute.call_count, 2)  # 1 site lookup + 1 insert
+        self.assertEqual(conn.execute("SELECT assessment_id, site_id, assessment_date, year FROM habitat_assessments")
+                         .fetchall(), [(result[101], 1, '2023-05-15', 2023)])
 
     def test_insert_habitat_assessments_site_not_found(self):
         """Test handling when site is not found in database."""
-        mock_cursor = MagicMock()
-        mock_cursor.fetchone.return_value = None  # Site not found
+        conn = create_test_database(site_names=('Test Site',))
         
         test_data = pd.DataFrame({
             'site_name': ['Unknown Site'],
             'sample_id': [101]
         })
         
-        result = insert_habitat_assessments(mock_cursor, test_data)
+        result = insert_habitat_assessments(conn.cursor(), test_data)
         
         # Should return empty dict when site not found
         self.assertEqual(len(result), 0)
 
     def test_insert_metrics_data(self):
         """Test insertion of habitat metrics and summary scores."""
-        mock_cursor = MagicMock()
+        conn = create_test_database()
         
         # Prepare test data with habitat metrics
         test_data = pd.DataFrame({
@@ -328,14 +323,13 @@ class TestHabitatProcessing(unittest.TestCase):
         # Assessment ID mapping
         assessment_id_map = {101: 123}
         
-        result = insert_metrics_data(mock_cursor, test_data, assessment_id_map)
+        result = insert_metrics_data(conn.cursor(), test_data, assessment_id_map)
         
         # Should return count of metrics inserted
-        self.assertIsInstance(result, int)
-        self.assertGreater(result, 0)
-        
-        # Verify database calls were made (deletes + inserts)
-        self.assertGreater(mock_cursor.execute.call_count, 4)
+        self.assertEqual(result, 3)
+        self.assertEqual(conn.execute("SELECT metric_name, score FROM habitat_metrics ORDER BY metric_name").fetchall(),
+                         [('Canopy Cover', 9.1), ('Instream Cover', 8.5), ('Pool Bottom Substrate', 7.2)])
+        self.assertEqual(conn.execute("SELECT * FROM habitat_summary_scores").fetchall(), [(123, 90.0, 'B')])
 
     def test_insert_metrics_data_missing_assessment_id(self):
         """Test handling when assessment_id is missing from mapping."""
@@ -25,6 +25,7 @@ from data_processing.macro_processing import (
     load_macroinvertebrate_data,
     process_macro_csv_data,
 )
+from tests.data_processing.test_biological_utils import create_test_database
 from utils import setup_logging
 
 # Set up logging for tests
@@ -444,7 +445,7 @@ class TestMacroProcessing(unittest.TestCase):
     
     def test_insert_metrics_data_macro(self):
         """Test insertion of macro metrics data."""
-        mock_cursor = MagicMock()
+        conn = create_test_database()
         # Macro uses (sample_id, habitat) as key
         event_id_map = {
             (101, 'Riffle'): 123, 
@@ -472,13 +473,18 @@ class TestMacroProcessing(unittest.TestCase):
             'comparison_to_reference': [0.90, 0.65, 0.25]
         })
         
-        result = insert_metrics_data(mock_cursor, processed_data, event_id_map)
-        
-        # Should return count of inserted metrics
-        self.assertIsInstance(result, int)
-        
-        # Verify that INSERT statements were called
-        self.assertTrue(mock_cursor.execute.called)
+        result = insert_metrics_data(conn.cursor(), processed_data, event_id_map)
+        
+        # Should return count of inserted metrics: 6 metrics for each of 3 samples
+        self.assertEqual(result, 18)
+        self.assertEqual(conn.execute("""
+            SELECT raw_value, metric_score FROM macro_metrics WHERE event_id = 456 AND metric_name = 'HBI Score'
+        """).fetchone(), (5.8, 3))
+        self.assertEqual(conn.execute("SELECT * FROM macro_summary_scores ORDER BY event_id").fetchall(), [
+            (123, 30, 0.9, 'Non-impaired'),
+            (456, 18, 0.65, 'Slightly Impaired'),
+            (789, 6, 0.25, 'Moderately Impaired'),
+        ])
     
     def test_insert_metrics_data_biological_condition_calculation(self):
         """Test biological condition calculation during metrics insertion."""
@@ -16,7 +16,6 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 sys.path.insert(0, project_root)
 
 from data_processing.bt_fieldwork_validator import (
-    average_group_samples,
     categorize_and_process_duplicates,
     find_bt_site_match,
     load_bt_field_work_dates,
@@ -141,12 +140,17 @@ Red River at Bridge,7/12/2023,REP"""
         match = find_bt_site_match('Completely Different Site', bt_sites)
         self.assertIsNone(match)
 
+    def averaged_blue_creek(self, fish_df):
+        """Average duplicates without BT data and return the single Blue Creek record."""
+        empty_bt = pd.DataFrame(columns=['Site_Clean', 'Year', 'Is_REP', 'Date_Clean'])
+        result = categorize_and_process_duplicates(fish_df, empty_bt)
+        blue_creek = result[result['site_name'] == 'Blue Creek at Highway 9']
+        self.assertEqual(len(blue_creek), 1)
+        return blue_creek.iloc[0]
+
     def test_average_group_samples_basic(self):
         """Test averaging a group of fish samples."""
-        # Create a group with two samples
-        group = self.sample_fish_data[self.sample_fish_data['site_name'] == 'Blue Creek at Highway 9'].copy()
-        
-        averaged = average_group_samples(group)
+        averaged = self.averaged_blue_creek(self.sample_fish_data)
         
         # Should average comparison_to_reference values
         expected_avg = (0.85 + 0.75) / 2
@@ -158,11 +162,10 @@ Red River at Bridge,7/12/2023,REP"""
 
     def test_average_group_samples_with_nulls(self):
         """Test averaging when some comparison values are null."""
-        # Create group with one null value
-        group = self.sample_fish_data[self.sample_fish_data['site_name'] == 'Blue Creek at Highway 9'].copy()
-        group.loc[group.index[1], 'comparison_to_reference'] = None
+        fish_df = self.sample_fish_data.copy()
+        fish_df.loc[1, 'comparison_to_reference'] = None
         
-        averaged = average_group_samples(group)
+        averaged = self.averaged_blue_creek(fish_df)
         
         # Should only average non-null values
         self.assertAlmostEqual(averaged['comparison_to_reference'], 0.85, places=3)
@@ -233,15 +236,12 @@ Red River at Bridge,7/12/2023,REP"""
 
     def test_score_column_nullification_in_averaging(self):
         """Test that individual metric scores are nullified during averaging."""
-        # Create group to average
-        group = self.sample_fish_data[self.sample_fish_data['site_name'] == 'Blue Creek at Highway 9'].copy()
-        
-        averaged = average_group_samples(group)
+        averaged = self.averaged_blue_creek(self.sample_fish_data)
         
         # Individual scores should be set to None
         score_columns = [col for col in averaged.index if 'score' in str(col).lower() and col != 'comparison_to_reference']
         for col in score_columns:
-            self.assertIsNone(averaged[col])
+            self.assertTrue(pd.isna(averaged[col]))
 
     def test_integration_categorize_vs_averaging(self):
         """Integration test comparing different duplicate processing approaches."""
@@ -345,6 +345,13 @@ Red River at Bridge,7/12/2023,REP"""
         self.assertGreater(len(blue_creek_samples), 0)
         self.assertGreater(len(red_river_samples), 0)
 
+    def test_matches_legacy_resolution_on_multi_decade_data(self):
+        """Test grouped date correction and duplicate handling match the per-group loops."""
+        from benchmarks.duplicate_resolution import run_benchmarks
+        
+        for result in run_benchmarks(sites=12, years=30, repeats=1):
+            self.assertTrue(result['identical'], f"{result['dataset']} differs from legacy output")
+
 
 if __name__ == '__main__':
     # Set up test discovery and run tests
@@ -16,12 +16,14 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 sys.path.insert(0, project_root)
 
 from data_processing import setup_logging
+from tests.data_processing.test_biological_utils import create_test_database
 
 # Import functions from consolidate_sites.py
 from data_processing.consolidate_sites import (
     consolidate_sites,
     detect_conflicts,
     extract_sites_from_csv,
+    merge_site_sources,
     save_consolidated_data,
 )
 
@@ -585,27 +587,17 @@ class TestSiteManagement(unittest.TestCase):
         
         self.assertTrue(result.empty)
 
-    @patch('data_processing.site_processing.close_connection')
-    @patch('data_processing.site_processing.get_connection')
-    def test_insert_sites_into_db_basic(self, mock_get_conn, mock_close):
-        """Test inserting sites into database."""
-        mock_conn = MagicMock()
-        mock_cursor = MagicMock()
-        mock_get_conn.return_value = mock_conn
-        mock_conn.cursor.return_value = mock_cursor
+    def test_insert_sites_into_db_basic(self):
+        """Test existing sites are updated in place and new sites inserted."""
+        conn = create_test_database(site_names=['Blue Creek at Highway 9'])
         
-        # Mock that sites exist (so they get updated rather than inserted)
-        mock_cursor.fetchone.side_effect = [
-            (1,),  # First site exists with ID 1
-            (2,)   # Second site exists with ID 2
-        ]
-        
-        result = insert_sites_into_db(self.sample_master_sites)
+        with patch('data_processing.site_processing.get_connection', return_value=conn), \
+                patch('data_processing.site_processing.close_connection'):
+            result = insert_sites_into_db(self.sample_master_sites)
         
-        self.assertEqual(result, 2)  # Should process 2 sites
-        # Should call execute (for updates) instead of executemany
-        self.assertGreaterEqual(mock_cursor.execute.call_count, 2)  # At least site checks + updates
-        mock_conn.commit.assert_called_once()
+        self.assertEqual(result, 2)  # 1 updated + 1 inserted
+        rows = conn.execute("SELECT site_id, site_name, county FROM sites ORDER BY site_id").fetchall()
+        self.assertEqual(rows, [(1, 'Blue Creek at Highway 9', 'Cleveland'), (2, 'Tenmile Creek at Davis', 'Murray')])
 
     def test_insert_sites_into_db_empty_data(self):
         """Test inserting empty site data."""
@@ -644,27 +636,28 @@ class TestSiteManagement(unittest.TestCase):
         
         self.assertFalse(result)
 
-    @patch('data_processing.site_processing.close_connection')
-    @patch('data_processing.site_processing.get_connection')
-    def test_cleanup_unused_sites(self, mock_get_conn, mock_close):
+    def test_cleanup_unused_sites(self):
         """Test cleanup of sites with no monitoring data."""
-        mock_conn = MagicMock()
-        mock_cursor = MagicMock()
-        mock_get_conn.return_value = mock_conn
-        mock_conn.cursor.return_value = mock_cursor
+        conn = create_test_database(site_names=['Site1', 'Site2', 'Site3'])
+        conn.execute("INSERT INTO chemical_collection_events (site_id, collection_date, year, month) "
+                     "VALUES (1, '2023-06-01', 2023, 6)")
+        conn.execute("INSERT INTO habitat_assessments (site_id, assessment_date, year) VALUES (2, '2023-06-01', 2023)")
         
-        # Mock database responses
-        mock_cursor.fetchall.side_effect = [
-            [(1,), (2,)],  # Sites with data
-            [(1,), (2,), (3,)]  # All sites
-        ]
-        
-        result = cleanup_unused_sites()
+        with patch('data_processing.site_processing.get_connection', return_value=conn), \
+                patch('data_processing.site_processing.close_connection'):
+            result = cleanup_unused_sites()
         
         self.assertTrue(result)
-        # Should delete unused sites
-        mock_cursor.execute.assert_called()
-        mock_conn.commit.assert_called_once()
+        # Should delete only the site without data
+        self.assertEqual(conn.execute("SELECT site_name FROM sites ORDER BY site_id").fetchall(), [('Site1',), ('Site2',)])
+
+    def test_bulk_site_load_matches_legacy_loop(self):
+        """Test the staged upsert and anti-join cleanup leave the same sites as the per-site loop."""
+        from benchmarks.site_upsert import run_benchmarks
+        
+        result = run_benchmarks(sites=2000)
+        self.assertTrue(result['identical'])
+        self.assertGreater(result['remaining_sites'], 0)
 
     @patch('data_processing.site_processing.close_connection')
     @patch('data_processing.site_processing.get_connection')
@@ -714,6 +707,35 @@ class TestSiteManagement(unittest.TestCase):
         # The save is handled separately in main() 
         mock_save.assert_not_called()
 
+    def test_merge_site_sources_matches_legacy_consolidation(self):
+        """Test the round-based merge writes the same sites and conflicts as the row-by-row loop."""
+        from benchmarks.site_consolidation import run_benchmarks
+        
+        result = run_benchmarks(sites=300, repeats=1)
+        self.assertTrue(result['identical'])
+
+    def test_merge_site_sources_conflict_blocks_fill(self):
+        """Test a conflicting record fills nothing, so a later source still can."""
+        def sites(county, basin, source):
+            return pd.DataFrame({
+                'site_name': ['Blue Creek at Highway 9'],
+                'latitude': [35.1234], 'longitude': [-97.1234],
+                'county': [county], 'river_basin': [basin], 'ecoregion': [None],
+                'source_file': [source], 'source_description': [source]
+            })
+        
+        consolidated_sites, conflicts_df, counts = merge_site_sources([
+            sites('Cleveland', None, 'first.csv'),
+            sites('Payne', 'Canadian', 'second.csv'),
+            sites(None, 'Red', 'third.csv'),
+        ])
+        
+        site = consolidated_sites.iloc[0]
+        self.assertEqual(site['river_basin'], 'Red')
+        self.assertEqual(site['river_basin_source'], 'third.csv')
+        self.assertEqual(conflicts_df['conflicts'].tolist(), [["county: 'Cleveland' vs 'Payne'"]])
+        self.assertEqual(counts, [(1, 0, 0), (0, 0, 1), (0, 1, 0)])
+
 
 if __name__ == '__main__':
     # Set up test discovery and run tests
@@ -6,14 +6,22 @@ This module tests:
 - Connection pooling
 - Error handling
 - Resource cleanup
+- Read-only serving modes and snapshot swaps
 """
 
 import sqlite3
+import threading
 from unittest.mock import patch
 
 import pytest
 
-from database.database import get_connection
+from database.database import (
+    enable_serving_mode,
+    get_connection,
+    get_data_version,
+    get_serving_mode,
+    load_snapshot,
+)
 
 
 def test_get_connection_success(mock_path_join):
@@ -160,4 +168,117 @@ def test_connection_journal_mode(temp_db):
     # Check journal mode
     cursor.execute("PRAGMA journal_mode")
     journal_mode = cursor.fetchone()[0].upper()
-    assert journal_mode in ['WAL', 'DELETE']  # Should be either WAL or DELETE 
\ No newline at end of file
+    assert journal_mode in ['WAL', 'DELETE']  # Should be either WAL or DELETE 
+
+def test_data_version_tracks_contents(temp_db):
+    """Test the data version is stable until the database changes."""
+    version = get_data_version()
+    assert version == get_data_version()
+    
+    temp_db.execute("INSERT INTO sites (site_name) VALUES ('Version Creek')")
+    temp_db.commit()
+    
+    assert get_data_version() != version
+
+def test_data_version_without_database(mock_path_join):
+    """Test no data version is reported before the database exists."""
+    with patch('os.path.join', return_value="/path/that/does/not/exist/db.sqlite"):
+        assert get_data_version() is None
+
+@pytest.fixture
+def serving_db(temp_db):
+    """A database with one site, reset to disk serving after the test."""
+    temp_db.execute("INSERT INTO sites (site_name) VALUES ('Snapshot Creek')")
+    temp_db.commit()
+    yield temp_db
+    enable_serving_mode('disk')
+
+def site_names():
+    conn = get_connection()
+    try:
+        return [row[0] for row in conn.execute("SELECT site_name FROM sites ORDER BY site_name")]
+    finally:
+        conn.close()
+
+@pytest.mark.parametrize('mode', ['memory', 'immutable'])
+def test_serving_mode_reads_are_read_only(serving_db, mode):
+    """Test serving modes read the database but reject writes."""
+    enable_serving_mode(mode)
+    
+    assert get_serving_mode() == mode
+    assert site_names() == ['Snapshot Creek']
+    
+    conn = get_connection()
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("INSERT INTO sites (site_name) VALUES ('Write Creek')")
+    conn.close()
+
+def test_memory_snapshot_swap(serving_db):
+    """Test a new snapshot serves new connections while open ones finish on the old one."""
+    enable_serving_mode('memory')
+    version = get_data_version()
+    old_conn = get_connection()
+    
+    serving_db.execute("INSERT INTO sites (site_name) VALUES ('Later Creek')")
+    serving_db.commit()
+    
+    # The snapshot, and its version, are unchanged until the next load
+    assert site_names() == ['Snapshot Creek']
+    assert get_data_version() == version
+    
+    assert load_snapshot() != version
+    assert site_names() == ['Later Creek', 'Snapshot Creek']
+    assert old_conn.execute("SELECT COUNT(*) FROM sites").fetchone()[0] == 1
+    old_conn.close()
+
+def test_connection_survives_concurrent_swap(serving_db):
+    """Test a connection opened while a snapshot swap runs still reads a live snapshot."""
+    enable_serving_mode('memory')
+    connect = sqlite3.connect
+    swaps = []
+    
+    def connect_during_swap(target, *args, **kwargs):
+        # Swap the snapshot between resolving the URI and opening it
+        if not swaps and 'blue_thumb_snapshot' in str(target):
+            swap = threading.Thread(target=load_snapshot)
+            swaps.append(swap)
+            swap.start()
+            swap.join(0.2)
+        return connect(target, *args, **kwargs)
+    
+    with patch('database.database.sqlite3.connect', side_effect=connect_during_swap):
+        conn = get_connection()
+    swaps[0].join()
+    
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM sites").fetchone()[0] == 1
+    finally:
+        conn.close()
+
+def test_memory_mode_without_database(tmp_path):
+    """Test memory mode serves from disk when there is no database file to copy."""
+    missing_path = str(tmp_path / "missing.db")
+    with patch('database.database.get_database_path', return_value=missing_path):
+        enable_serving_mode('memory')
+        assert get_serving_mode() == 'disk'
+        
+        with pytest.raises(sqlite3.OperationalError):
+            load_snapshot(missing_path)
+    assert get_serving_mode() == 'disk'
+
+def test_unknown_serving_mode(mock_path_join):
+    """Test an unknown serving mode is rejected."""
+    with pytest.raises(ValueError, match='Unknown database serving mode'):
+        enable_serving_mode('redis')
+
+def test_serving_mode_benchmark_rows_match(serving_db):
+    """Test every serving mode in the benchmark returns the rows the file does."""
+    from benchmarks.serving_modes import run_benchmarks
+    
+    results = run_benchmarks(statements=["SELECT site_name FROM sites"], rounds=2, threads=(1, 2))
+    
+    assert [(result['mode'], result['threads']) for result in results] == [
+        ('disk', 1), ('disk', 2), ('memory', 1), ('memory', 2), ('immutable', 1), ('immutable', 2)
+    ]
+    assert all(result['identical'] for result in results)
+    assert get_serving_mode() == 'disk'
@@ -0,0 +1,90 @@
+"""
+Tests for the post-load database optimization.
+
+This module tests:
+- Planner statistics being written by ANALYZE
+- Compacting into a new file with the requested page size
+- Compacting in place
+- Refusing a compacted file that fails quick_check
+"""
+
+import os
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from database.db_optimize import optimize_database, quick_check
+
+
+@pytest.fixture
+def loaded_db(temp_db, temp_db_path):
+    """Fill the schema with sites, then delete most of them to leave free pages behind."""
+    temp_db.executemany(
+        "INSERT INTO sites (site_name, county, active) VALUES (?, ?, ?)",
+        [(f"Site {i}", 'Test County', i % 2) for i in range(5000)]
+    )
+    temp_db.execute("DELETE FROM sites WHERE site_id > 500")
+    temp_db.commit()
+    temp_db.close()
+    return temp_db_path
+
+def test_optimize_into_new_file(loaded_db, tmp_path):
+    """Test the copy is smaller, uses the requested page size and carries the statistics."""
+    output_path = str(tmp_path / "optimized.db")
+    size_before = os.path.getsize(loaded_db)
+
+    report = optimize_database(loaded_db, output_path=output_path, page_size=8192)
+
+    assert report['path'] == output_path
+    assert report['size_before'] == size_before
+    assert report['size_after'] == os.path.getsize(output_path) < size_before
+    assert report['page_size'] == 8192
+    assert report['quick_check'] == ['ok']
+
+    conn = sqlite3.connect(output_path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM sites").fetchone()[0] == 500
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1 WHERE tbl = 'sites'").fetchone()[0] > 0
+    finally:
+        conn.close()
+
+def test_optimize_in_place(loaded_db):
+    """Test compacting in place replaces the original and leaves no temporary file."""
+    report = optimize_database(loaded_db)
+
+    assert report['path'] == loaded_db
+    assert report['size_after'] < report['size_before']
+    assert not os.path.exists(f"{loaded_db}.compact")
+    assert quick_check(loaded_db) == ['ok']
+
+def test_analyze_only(loaded_db):
+    """Test skipping compaction still writes statistics without changing the file size."""
+    report = optimize_database(loaded_db, compact=False)
+
+    assert report['vacuum_seconds'] == 0.0
+    assert report['size_after'] == report['size_before']
+
+def test_failed_quick_check_keeps_original(loaded_db):
+    """Test a compacted file that fails quick_check is discarded and the original kept."""
+    size_before = os.path.getsize(loaded_db)
+
+    with patch('database.db_optimize.quick_check', return_value=['row 3 missing from index']):
+        with pytest.raises(RuntimeError, match='quick_check failed'):
+            optimize_database(loaded_db)
+
+    assert os.path.getsize(loaded_db) == size_before
+    assert not os.path.exists(f"{loaded_db}.compact")
+
+def test_benchmark_copies_return_identical_rows(loaded_db):
+    """Test every optimized copy in the benchmark returns the rows the loaded database did."""
+    from benchmarks.db_optimize import run_benchmarks
+
+    statements = [
+        "SELECT site_name FROM sites WHERE active = 1 ORDER BY site_name",
+        "SELECT county, COUNT(*) FROM sites GROUP BY county",
+    ]
+    variants = run_benchmarks(loaded_db, statements=statements, page_sizes=[4096, 8192])
+
+    assert [variant['page_size'] for variant in variants] == [4096, 4096, 8192]
+    assert all(variant['identical'] for variant in variants)
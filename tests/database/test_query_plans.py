@@ -0,0 +1,106 @@
+"""
+Tests for the query plan audit and the indexes it recommends.
+
+This module tests:
+- Flagging full scans and temp B-trees in EXPLAIN QUERY PLAN output
+- Deriving candidate indexes from a statement's joins, filters and ordering
+- Benchmarking candidates against a database copy
+- Rejecting candidates that add a temp B-tree to another plan
+- The schema applying the accepted indexes
+"""
+
+import sqlite3
+
+from benchmarks.query_plans import (
+    advise_indexes,
+    audit_statements,
+    candidate_indexes,
+    explain,
+    plan_flags,
+    table_columns,
+)
+
+HABITAT_SITE_QUERY = """
+    SELECT a.assessment_id, s.site_name, a.year, h.total_score, h.habitat_grade
+    FROM habitat_summary_scores h
+    JOIN habitat_assessments a ON h.assessment_id = a.assessment_id
+    JOIN sites s ON a.site_id = s.site_id
+    WHERE s.site_name = 'Site 7'
+    ORDER BY a.year
+"""
+
+def create_unindexed_db():
+    """Create habitat tables without the summary index, with enough rows to benchmark."""
+    conn = sqlite3.connect(':memory:')
+    conn.executescript("""
+        CREATE TABLE sites (site_id INTEGER PRIMARY KEY, site_name TEXT UNIQUE);
+        CREATE TABLE habitat_assessments (assessment_id INTEGER PRIMARY KEY, site_id INTEGER, year INTEGER);
+        CREATE TABLE habitat_summary_scores (assessment_id INTEGER, total_score REAL, habitat_grade TEXT);
+        CREATE INDEX idx_habitat_site_year ON habitat_assessments(site_id, year);
+    """)
+    conn.executemany("INSERT INTO sites VALUES (?, ?)", [(i, f"Site {i}") for i in range(200)])
+    conn.executemany("INSERT INTO habitat_assessments VALUES (?, ?, ?)",
+                     [(i, i % 200, 2000 + i % 20) for i in range(4000)])
+    conn.executemany("INSERT INTO habitat_summary_scores VALUES (?, ?, 'B')",
+                     [(i, 80.0) for i in range(4000)])
+    return conn
+
+def test_plan_flags():
+    """Test full scans and temp B-trees are flagged but index searches are not."""
+    plan = [
+        'SCAN h',
+        'SEARCH a USING INTEGER PRIMARY KEY (rowid=?)',
+        'SCAN s USING COVERING INDEX sqlite_autoindex_sites_1',
+        'USE TEMP B-TREE FOR ORDER BY',
+    ]
+
+    assert plan_flags(plan) == ['SCAN h', 'USE TEMP B-TREE FOR ORDER BY']
+
+def test_candidate_indexes():
+    """Test the join column leads the narrow candidate and read columns extend the covering one."""
+    conn = create_unindexed_db()
+    sql = ' '.join(HABITAT_SITE_QUERY.split())
+
+    candidates = candidate_indexes(sql, 'h', table_columns(conn))
+
+    assert candidates == [
+        ('habitat_summary_scores', ('assessment_id',)),
+        ('habitat_summary_scores', ('assessment_id', 'total_score', 'habitat_grade')),
+    ]
+
+def test_advise_indexes_accepts_join_index():
+    """Test the benchmark accepts an index led by the join column and leaves the database unchanged."""
+    conn = create_unindexed_db()
+    audited = audit_statements(conn, {' '.join(HABITAT_SITE_QUERY.split()): 'test'})
+
+    assert 'SCAN h' in audited[0]['flags']
+
+    advice = advise_indexes(conn, audited)
+    accepted = [(result['table'], result['columns']) for result in advice if result['accepted']]
+
+    assert accepted
+    assert all(table == 'habitat_summary_scores' and columns[0] == 'assessment_id' for table, columns in accepted)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name LIKE 'idx_habitat_summary%'").fetchone()[0] == 0
+
+def test_advise_indexes_rejects_new_temp_btree():
+    """Test a filter index that trades another query's ordered index scan for a sort is rejected."""
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE sites (site_id INTEGER PRIMARY KEY, site_name TEXT UNIQUE, active INTEGER)")
+    conn.executemany("INSERT INTO sites VALUES (?, ?, ?)",
+                     [(i, f"Site {i:05d}", int(i % 10 == 0)) for i in range(20000)])
+    conn.execute("ANALYZE")
+    ordered = "SELECT site_name FROM sites WHERE active = 1 ORDER BY site_name"
+    audited = audit_statements(conn, {"SELECT COUNT(*) FROM sites WHERE active = 1": 'test', ordered: 'test'})
+
+    advice = advise_indexes(conn, audited)
+    active_index = next(result for result in advice if result['columns'] == ('active',))
+
+    assert active_index['new_temp_btrees'] == [ordered]
+    assert not active_index['accepted']
+
+def test_schema_applies_accepted_indexes(temp_db):
+    """Test the schema's indexes remove the summary table scan from site lookups."""
+    indexes = {row[0] for row in temp_db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+    assert 'idx_habitat_summary_assessment' in indexes
+    assert 'SCAN h' not in explain(temp_db, ' '.join(HABITAT_SITE_QUERY.split()))
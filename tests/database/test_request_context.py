@@ -0,0 +1,148 @@
+"""
+Tests for request-scoped query memoization and query counting.
+
+This module tests:
+- Memoization of query functions within a data request context
+- Query counting on database connections
+- Query budgets for site displays, to catch N+1 regressions
+"""
+
+import pandas as pd
+
+from database.database import close_connection, get_connection
+from database.request_context import (
+    count_queries,
+    data_request_context,
+    request_cached,
+    request_scoped,
+)
+
+
+def make_counted_query():
+    """Return a cached query function and the list recording its real calls."""
+    calls = []
+
+    @request_cached
+    def fetch(site_name=None):
+        calls.append(site_name)
+        return pd.DataFrame({'site_name': [site_name], 'value': [1]})
+
+    return fetch, calls
+
+def test_no_caching_outside_context():
+    """Test query functions run normally without an active context."""
+    fetch, calls = make_counted_query()
+
+    fetch('Site A')
+    fetch('Site A')
+
+    assert calls == ['Site A', 'Site A']
+
+def test_cached_within_context():
+    """Test repeated calls with the same arguments hit the database once."""
+    fetch, calls = make_counted_query()
+
+    with data_request_context():
+        fetch('Site A')
+        fetch('Site A')
+        fetch(site_name='Site A')
+        fetch('Site B')
+
+    assert calls == ['Site A', 'Site A', 'Site B']
+
+def test_cached_frames_are_copies():
+    """Test in-place edits by one caller do not leak into later callers."""
+    fetch, _ = make_counted_query()
+
+    with data_request_context():
+        first = fetch('Site A')
+        first['value'] = 99
+        second = fetch('Site A')
+
+    assert second['value'].tolist() == [1]
+
+def test_cache_cleared_after_context():
+    """Test each request starts with an empty cache."""
+    fetch, calls = make_counted_query()
+
+    with data_request_context():
+        fetch('Site A')
+    with data_request_context():
+        fetch('Site A')
+
+    assert calls == ['Site A', 'Site A']
+
+def test_count_queries(temp_db):
+    """Test statements on new connections are counted, excluding pragmas."""
+    with count_queries() as counter:
+        conn = get_connection()
+        conn.execute("SELECT COUNT(*) FROM sites").fetchone()
+        conn.execute("SELECT COUNT(*) FROM fish_summary_scores").fetchone()
+        close_connection(conn)
+
+    assert counter.count == 2
+
+def test_nested_counters_report_to_parent(temp_db):
+    """Test queries counted by an inner block are included in the outer count."""
+    with count_queries() as outer:
+        with count_queries() as inner:
+            conn = get_connection()
+            conn.execute("SELECT 1").fetchone()
+            close_connection(conn)
+
+    assert inner.count == 1
+    assert outer.count == 1
+
+def test_count_queries_records_sql_time(temp_db):
+    """Test time spent executing and fetching is added to the counter and its parent."""
+    with count_queries() as outer:
+        with count_queries() as inner:
+            conn = get_connection()
+            conn.execute("SELECT COUNT(*) FROM sites").fetchall()
+            close_connection(conn)
+
+    assert inner.seconds > 0
+    assert outer.seconds == inner.seconds
+
+def insert_site_data(conn):
+    """Insert fish and habitat data for one site."""
+    conn.executescript('''
+        INSERT INTO sites (site_id, site_name) VALUES (1, 'Test Creek');
+        INSERT INTO fish_collection_events VALUES (1, 1, 100, '2022-06-01', 2022), (2, 1, 101, '2023-06-01', 2023);
+        INSERT INTO fish_metrics (event_id, metric_name, raw_value, metric_score) VALUES
+            (1, 'Total No. of species', 10, 5), (2, 'Total No. of species', 12, 5);
+        INSERT INTO fish_summary_scores VALUES (1, 40, 0.8, 'Good'), (2, 44, 0.9, 'Excellent');
+        INSERT INTO habitat_assessments (assessment_id, site_id, assessment_date, year) VALUES
+            (1, 1, '2022-07-01', 2022);
+        INSERT INTO habitat_metrics VALUES (1, 'Instream Cover', 15);
+        INSERT INTO habitat_summary_scores VALUES (1, 120, 'B');
+    ''')
+    conn.commit()
+
+def test_biological_site_display_query_budget(temp_db):
+    """Test the fish site view stays within its query budget."""
+    from callbacks.tab_utilities import create_biological_site_display
+
+    insert_site_data(temp_db)
+
+    with count_queries() as counter:
+        request_scoped(create_biological_site_display)('fish', 'Test Creek')
+
+    # Existence check, then one metrics and one summary query
+    assert counter.count == 3
+
+def test_habitat_display_query_budget(temp_db):
+    """Test the habitat view stays within its query budget and repeats are free."""
+    from callbacks.tab_utilities import create_habitat_display
+
+    insert_site_data(temp_db)
+
+    def render_twice(site_name):
+        create_habitat_display(site_name)
+        return create_habitat_display(site_name)
+
+    with count_queries() as counter:
+        request_scoped(render_twice)('Test Creek')
+
+    # Chart query plus one metrics and one summary query
+    assert counter.count == 3
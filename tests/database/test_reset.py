@@ -138,8 +138,10 @@ class TestDataReloading:
     @patch('database.reset_database.load_habitat_data')
     @patch('database.reset_database.classify_active_sites')
     @patch('database.reset_database.cleanup_unused_sites')
+    @patch('database.reset_database.optimize_database')
+    @patch('database.reset_database.publish_export_artifacts')
     def test_complete_data_loading(
-        self, mock_cleanup, mock_classify, mock_habitat, mock_macro, mock_fish,
+        self, mock_publish, mock_optimize, mock_cleanup, mock_classify, mock_habitat, mock_macro, mock_fish,
         mock_updated_chemical, mock_chemical, mock_summary, mock_merge,
         mock_site, mock_consolidate, mock_verify
     ):
@@ -188,6 +190,8 @@ class TestDataReloading:
         # Phase 3: Final Data Quality and Cleanup
         mock_classify.assert_called_once()
         mock_cleanup.assert_called_once()
+        mock_optimize.assert_called_once()
+        mock_publish.assert_called_once()
         
         # Summary should be called twice (once mid-pipeline, once at end)
         assert mock_summary.call_count == 2
@@ -0,0 +1,123 @@
+"""
+Tests for query results preloaded before forking workers.
+
+This module tests:
+- Storing DataFrames as read-only arrays that rebuild exactly
+- Serving decorated queries from the preloaded results
+- Falling back to the database for other arguments or a new data version
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from database.request_context import count_queries
+from database.shared_data import (
+    SharedFrame,
+    clear_shared_data,
+    preload_shared_data,
+    shared_cached,
+)
+from visualizations.map_queries import get_sites_for_maps
+
+
+@pytest.fixture(autouse=True)
+def empty_store():
+    clear_shared_data()
+    yield
+    clear_shared_data()
+
+@shared_cached
+def lookup(site_name=None, limit=10):
+    lookup.calls += 1
+    return pd.DataFrame({'site': [site_name], 'limit': [limit]})
+
+def test_shared_frame_round_trip():
+    """Test every column type rebuilds exactly from read-only arrays."""
+    df = pd.DataFrame({
+        'count': np.array([1, 2, 3], dtype=np.int64),
+        'score': [1.5, np.nan, 3.0],
+        'date': pd.to_datetime(['2020-01-01', '2021-06-15', None]),
+        'active': [True, False, True],
+        'name': ['A', None, 'A'],
+        'grade': ['x', np.nan, 'y'],
+        'empty': [None, None, None],
+        'nullable': pd.array([1, None, 3], dtype='Int64'),
+    }, index=[5, 7, 9])
+
+    shared = SharedFrame(df)
+    rebuilt = shared.to_frame()
+
+    pd.testing.assert_frame_equal(rebuilt, df)
+    assert rebuilt.loc[7, 'name'] is None
+    assert all(not encoded[1].flags.writeable for encoded in shared.columns_data if encoded[0] != 'array')
+
+def test_rebuilt_frames_are_independent():
+    """Test edits to a returned frame never reach the stored arrays."""
+    shared = SharedFrame(pd.DataFrame({'value': [1.0, 2.0], 'name': ['a', 'b']}))
+
+    first = shared.to_frame()
+    first.loc[0, 'value'] = 99.0
+    first.loc[0, 'name'] = 'changed'
+
+    second = shared.to_frame()
+    assert second.loc[0, 'value'] == 1.0
+    assert second.loc[0, 'name'] == 'a'
+
+def test_preloaded_calls_match_any_argument_form():
+    """Test positional, keyword and default-argument calls all hit the preloaded result."""
+    lookup.calls = 0
+    with patch('database.shared_data.get_data_version', return_value='v1'):
+        preload_shared_data(calls=[(lookup, ('Site A',)), (lookup, ())])
+        assert lookup.calls == 2
+
+        pd.testing.assert_frame_equal(lookup(site_name='Site A', limit=10), lookup('Site A'))
+        lookup()
+        assert lookup.calls == 2
+
+        # Arguments that were not preloaded still query
+        lookup('Site B')
+        assert lookup.calls == 3
+
+def test_new_data_version_bypasses_preload():
+    """Test results preloaded for an older data version are not served."""
+    lookup.calls = 0
+    with patch('database.shared_data.get_data_version', return_value='v1'):
+        preload_shared_data(calls=[(lookup, ())])
+    with patch('database.shared_data.get_data_version', return_value='v2'):
+        lookup()
+
+    assert lookup.calls == 2
+
+def test_preloaded_sites_skip_the_database(temp_db):
+    """Test a preloaded site table is served equal to the query and without SQL."""
+    temp_db.executemany(
+        "INSERT INTO sites (site_name, latitude, longitude, county, active) VALUES (?, ?, ?, ?, ?)",
+        [('Site A', 35.1, -97.1, 'Payne', 1), ('Site B', 36.2, -96.0, None, 0)]
+    )
+    temp_db.commit()
+    expected = get_sites_for_maps(active_only=False)
+
+    summary = preload_shared_data(calls=[(get_sites_for_maps, (False,))])
+
+    with count_queries() as counter:
+        sites = get_sites_for_maps()
+    assert summary['entries'] == 1
+    assert counter.count == 0
+    pd.testing.assert_frame_equal(sites, expected)
+
+def test_throughput_benchmark_responses_match(temp_db):
+    """Test the forked API workers serve the same responses with and without the preload."""
+    from benchmarks.worker_throughput import run_benchmarks
+
+    temp_db.execute("INSERT INTO sites (site_name, latitude, longitude, active) VALUES ('Site A', 35.1, -97.1, 1)")
+    temp_db.commit()
+
+    results = run_benchmarks(seconds=0.2, worker_counts=[1, 2], paths=['/api/v1/sites', '/api/v1/latest/fish'])
+
+    assert [(result['preload'], result['workers']) for result in results] == [
+        (False, 1), (False, 2), (True, 1), (True, 2)
+    ]
+    assert all(result['identical'] and result['requests_per_second'] > 0 for result in results)
@@ -0,0 +1,178 @@
+"""
+Tests for hot reloading database snapshots.
+
+This module tests:
+- Installing a new generation from a local snapshot source
+- Requests finishing on the snapshot they started on
+- Rejecting corrupt or unrelated snapshots
+- Skipping a snapshot that is already being served
+- Publishing export artifacts once per installed generation
+"""
+
+import glob
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from database.database import enable_serving_mode, get_connection, get_data_version, load_snapshot
+from database.request_context import data_request_context
+from database.snapshot_watcher import (
+    GCSSnapshotSource,
+    LocalSnapshotSource,
+    SnapshotWatcher,
+    source_from_location,
+    start_snapshot_watcher,
+)
+
+
+def site_names():
+    conn = get_connection()
+    try:
+        return [row[0] for row in conn.execute("SELECT site_name FROM sites ORDER BY site_name")]
+    finally:
+        conn.close()
+
+@pytest.fixture(autouse=True)
+def publish_exports():
+    """Stand in for export publishing so installs never write to the real export cache."""
+    with patch('data_processing.export_artifacts.publish_export_artifacts') as mock_publish:
+        yield mock_publish
+
+@pytest.fixture
+def published(temp_db, temp_db_path, tmp_path):
+    """Serve the test database from memory and publish a copy with one more site."""
+    temp_db.execute("INSERT INTO sites (site_name) VALUES ('Old Creek')")
+    temp_db.commit()
+    enable_serving_mode('memory')
+
+    published_path = str(tmp_path / "published.db")
+    shutil.copyfile(temp_db_path, published_path)
+    conn = sqlite3.connect(published_path)
+    conn.execute("INSERT INTO sites (site_name) VALUES ('New Creek')")
+    conn.commit()
+    conn.close()
+
+    yield published_path
+    enable_serving_mode('disk')
+
+def test_poll_installs_new_generation(published, temp_db_path):
+    """Test a new snapshot replaces the served data and the data version."""
+    old_version = get_data_version()
+    watcher = SnapshotWatcher(LocalSnapshotSource(published))
+
+    new_version = watcher.poll_once()
+
+    assert new_version is not None and new_version != old_version
+    assert get_data_version() == new_version
+    assert site_names() == ['New Creek', 'Old Creek']
+    assert not glob.glob(f"{temp_db_path}.*.incoming")
+
+    # The same generation is not installed twice
+    assert watcher.poll_once() is None
+
+def test_request_finishes_on_old_snapshot(published):
+    """Test a request that starts before a swap keeps its snapshot and data version."""
+    old_version = get_data_version()
+    watcher = SnapshotWatcher(LocalSnapshotSource(published))
+
+    with data_request_context():
+        assert site_names() == ['Old Creek']
+        watcher.poll_once()
+        assert site_names() == ['Old Creek']
+        assert get_data_version() == old_version
+
+    assert site_names() == ['New Creek', 'Old Creek']
+
+@pytest.mark.parametrize('contents', [b'not a database', None])
+def test_invalid_snapshot_rejected(published, tmp_path, contents):
+    """Test corrupt files and databases without the dashboard's tables are not installed."""
+    bad_path = str(tmp_path / "bad.db")
+    if contents is None:
+        sqlite3.connect(bad_path).execute("CREATE TABLE unrelated (id INTEGER)").connection.close()
+    else:
+        with open(bad_path, 'wb') as bad_file:
+            bad_file.write(contents * 1000)
+    version = get_data_version()
+    watcher = SnapshotWatcher(LocalSnapshotSource(bad_path))
+
+    assert watcher.poll_once() is None
+    assert get_data_version() == version
+    assert site_names() == ['Old Creek']
+    assert watcher.generation is not None
+
+def test_served_snapshot_not_reinstalled(published, temp_db_path):
+    """Test the first poll skips a source holding the database already served."""
+    watcher = SnapshotWatcher(LocalSnapshotSource(temp_db_path))
+
+    with patch('database.snapshot_watcher.install_snapshot') as mock_install:
+        assert watcher.poll_once() is None
+
+    mock_install.assert_not_called()
+    assert watcher.generation is not None
+
+class SlowSource(LocalSnapshotSource):
+    """Local source whose fetch is slow enough for polls to overlap, counting fetches."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.fetches = []
+
+    def fetch(self, generation, destination):
+        self.fetches.append(destination)
+        time.sleep(0.1)
+        super().fetch(generation, destination)
+
+def test_concurrent_workers_install_once(published, temp_db_path, publish_exports):
+    """Test watchers polling together stage to separate files and only one installs and publishes exports."""
+    watchers = [SnapshotWatcher(SlowSource(published)) for _ in range(3)]
+    results = []
+    threads = [threading.Thread(target=lambda watcher=watcher: results.append(watcher.poll_once()))
+               for watcher in watchers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    fetches = [destination for watcher in watchers for destination in watcher.source.fetches]
+    assert len(fetches) == 1
+    assert sum(result is not None for result in results) == 1
+    publish_exports.assert_called_once_with()
+    assert all(watcher.generation is not None for watcher in watchers)
+    assert site_names() == ['New Creek', 'Old Creek']
+    assert not glob.glob(f"{temp_db_path}.*.incoming")
+
+def test_installed_generation_reloaded_not_fetched(published, temp_db_path):
+    """Test a worker finding a generation installed by another reloads the file instead of fetching."""
+    SnapshotWatcher(LocalSnapshotSource(published)).poll_once()
+    installed_version = get_data_version()
+
+    # Stand in for another worker still serving the old snapshot
+    old_copy = f"{temp_db_path}.old"
+    conn = sqlite3.connect(old_copy)
+    conn.execute("CREATE TABLE sites (site_name TEXT)")
+    conn.close()
+    load_snapshot(old_copy)
+
+    other_worker = SnapshotWatcher(SlowSource(published))
+    assert other_worker.poll_once() == installed_version
+    assert other_worker.source.fetches == []
+    assert site_names() == ['New Creek', 'Old Creek']
+
+def test_source_from_location():
+    """Test gs:// URLs map to the bucket source and anything else to a file."""
+    with patch('google.cloud.storage.Client'):
+        source = source_from_location('gs://blue-thumb-database/blue_thumb.db')
+    assert isinstance(source, GCSSnapshotSource)
+    assert source.blob_name == 'blue_thumb.db'
+
+    assert isinstance(source_from_location('/data/blue_thumb.db'), LocalSnapshotSource)
+
+def test_watcher_not_started_without_source():
+    """Test no watcher runs unless a snapshot source is configured."""
+    with patch.dict(os.environ, {}, clear=True):
+        assert start_snapshot_watcher() is None
@@ -0,0 +1,90 @@
+"""
+Tests for layouts.lazy_tabs module
+
+This file tests lazy tab rendering including:
+- Only the active tab rendering up front
+- Memoization of tab content per data version
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+import dash_bootstrap_components as dbc
+from dash import html
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from layouts import lazy_tabs
+from layouts.lazy_tabs import create_lazy_tab, get_tab_content
+
+
+class TestLazyTabs(unittest.TestCase):
+    """Test lazy tab declaration and rendering."""
+
+    def setUp(self):
+        """Isolate the factory registry and cache for each test."""
+        self.original_factories = lazy_tabs._TAB_FACTORIES.copy()
+        lazy_tabs._build_tab_content.cache_clear()
+
+    def tearDown(self):
+        """Restore the registry used by the app layout."""
+        lazy_tabs._TAB_FACTORIES.clear()
+        lazy_tabs._TAB_FACTORIES.update(self.original_factories)
+        lazy_tabs._build_tab_content.cache_clear()
+
+    def test_active_tab_rendered_up_front(self):
+        """Test the active tab includes its content immediately."""
+        factory = MagicMock(return_value=html.Div(id="test-content"))
+
+        tab = create_lazy_tab("Test", "test-tab", factory, active_tab="test-tab")
+
+        self.assertIsInstance(tab, dbc.Tab)
+        self.assertEqual(tab.children.id, {'type': 'lazy-tab-content', 'tab': 'test-tab'})
+        self.assertEqual(tab.children.children.id, "test-content")
+        factory.assert_called_once()
+
+    def test_inactive_tab_deferred(self):
+        """Test inactive tabs ship an empty container without building content."""
+        factory = MagicMock(return_value=html.Div())
+
+        tab = create_lazy_tab("Test", "test-tab", factory, active_tab="other-tab")
+
+        self.assertEqual(tab.children.children, [])
+        factory.assert_not_called()
+
+    def test_content_memoized_per_process(self):
+        """Test tab content is built once and reused."""
+        factory = MagicMock(return_value=html.Div())
+        create_lazy_tab("Test", "test-tab", factory, active_tab="other-tab")
+
+        first = get_tab_content("test-tab")
+        second = get_tab_content("test-tab")
+
+        self.assertIs(first, second)
+        factory.assert_called_once()
+
+    def test_content_rebuilt_for_new_data_version(self):
+        """Test a new data version rebuilds tab content."""
+        factory = MagicMock(side_effect=lambda: html.Div())
+        create_lazy_tab("Test", "test-tab", factory, active_tab="other-tab")
+
+        with patch('layouts.lazy_tabs.get_data_version', return_value='v1'):
+            first = get_tab_content("test-tab")
+        with patch('layouts.lazy_tabs.get_data_version', return_value='v2'):
+            second = get_tab_content("test-tab")
+
+        self.assertIsNot(first, second)
+        self.assertEqual(factory.call_count, 2)
+
+    def test_unknown_tab_raises(self):
+        """Test unknown tab ids are rejected."""
+        with self.assertRaises(KeyError):
+            get_tab_content("missing-tab")
+
+
+if __name__ == '__main__':
+    unittest.main()
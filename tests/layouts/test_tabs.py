@@ -208,7 +208,7 @@ class TestChemicalTab(unittest.TestCase):
         
         # Check structure
         children = safe_get_children(tab_content)
-        self.assertGreater(len(children), 2)  # Download, description, site selection, controls
+        self.assertGreater(len(children), 2)  # Description, site selection, controls
     
     @patch('layouts.tabs.chemical.get_chemical_date_range')
     def test_chemical_tab_site_dropdown(self, mock_date_range):
@@ -259,7 +259,7 @@ class TestBiologicalTab(unittest.TestCase):
         
         # Check basic structure
         children = safe_get_children(tab_content)
-        self.assertGreater(len(children), 3)  # Download, description, community selection, site selection, content
+        self.assertGreater(len(children), 3)  # Description, community selection, site selection, content
     
     def test_biological_tab_community_selector(self):
         """Test biological tab community selector."""
@@ -316,7 +316,7 @@ class TestHabitatTab(unittest.TestCase):
         
         # Check structure
         children = safe_get_children(tab_content)
-        self.assertGreater(len(children), 2)  # Download, description, site selection, content
+        self.assertGreater(len(children), 2)  # Description, site selection, content
     
     @patch('layouts.tabs.habitat.load_markdown_content')
     @patch('layouts.tabs.habitat.create_image_with_caption')
@@ -501,20 +501,19 @@ class TestTabIntegration(unittest.TestCase):
         self.assertIn("tab-content-wrapper", source_tab_content.className)
     
     @patch('layouts.tabs.chemical.get_chemical_date_range')
-    def test_tab_download_components_consistency(self, mock_date_range):
-        """Test that tabs consistently include download components."""
+    def test_tab_download_links(self, mock_date_range):
+        """Test download buttons link to the pre-built export route."""
         mock_date_range.return_value = (2020, 2024)
         chemical_tab_wrapper = create_chemical_tab()
-        biological_tab_wrapper = create_biological_tab()
+        habitat_tab_wrapper = create_habitat_tab()
         
-        # Find download components
-        chemical_download = find_component_by_id(chemical_tab_wrapper, 'chemical-download-component', dcc.Download)
-        biological_download = find_component_by_id(biological_tab_wrapper, 'biological-download-component', dcc.Download)
+        chemical_download = find_component_by_id(chemical_tab_wrapper, 'chemical-download-btn', dbc.Button)
+        habitat_download = find_component_by_id(habitat_tab_wrapper, 'habitat-download-btn', dbc.Button)
         
-        # Both should have download components
-        self.assertIsNotNone(chemical_download)
-        self.assertIsNotNone(biological_download)
-
+        self.assertEqual(chemical_download.href, '/downloads/chemical.csv')
+        self.assertEqual(habitat_download.href, '/downloads/habitat.csv')
+        self.assertTrue(chemical_download.external_link)
+        self.assertIsNone(find_component_by_id(chemical_tab_wrapper, 'chemical-download-component'))
 
 if __name__ == '__main__':
     unittest.main(verbosity=2) 
\ No newline at end of file
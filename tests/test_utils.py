@@ -4,7 +4,7 @@ Tests for utils module
 This file tests the utility functions including:
 - Logging setup and configuration (setup_logging)
 - Project root discovery (find_project_root)
-- Markdown content loading (load_markdown_content)
+- Markdown content loading and caching (load_markdown_content, MarkdownRegistry)
 - Site data queries (get_sites_with_data)
 - File path handling and error cases
 - Parameter value rounding (round_parameter_value)
@@ -13,13 +13,14 @@ This file tests the utility functions including:
 """
 
 import logging
+import logging.handlers
 import os
 import shutil
 import sqlite3
 import sys
 import tempfile
 import unittest
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import MagicMock, patch
 
 # Add project root to path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -29,16 +30,20 @@ import dash_bootstrap_components as dbc
 from dash import dcc, html
 
 # Import utils functions
+import utils
 from utils import (
     CAPTION_STYLE,
     DEFAULT_IMAGE_STYLE,
+    MarkdownRegistry,
     create_image_with_caption,
     create_metrics_accordion,
     format_value,
     get_sites_with_data,
     load_markdown_content,
+    flush_logging,
     round_parameter_value,
     safe_div,
+    sampled,
     setup_logging,
 )
 
@@ -80,11 +85,11 @@ class TestLoggingSetup(unittest.TestCase):
         self.assertEqual(logger.level, logging.INFO)
         self.assertFalse(logger.propagate)
         
-        # Verify handlers
-        self.assertEqual(len(logger.handlers), 2)
-        handler_types = [type(h).__name__ for h in logger.handlers]
-        self.assertIn('FileHandler', handler_types)
-        self.assertIn('StreamHandler', handler_types)
+        # Records are queued; the listener owns the file and console handlers
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertIsInstance(logger.handlers[0], logging.handlers.QueueHandler)
+        self.assertIsInstance(utils._file_router.file_handlers["test_module"], logging.FileHandler)
+        self.assertIsInstance(utils._console_handler, logging.StreamHandler)
     
     def test_logging_categories(self):
         """Test logging with different categories."""
@@ -124,6 +129,7 @@ class TestLoggingSetup(unittest.TestCase):
         # Test logging to file
         test_message = "Test log message"
         logger.info(test_message)
+        flush_logging()
         
         # Check file content
         log_file = os.path.join(project_dir, 'logs', 'test_category', 'file_test.log')
@@ -143,14 +149,67 @@ class TestLoggingSetup(unittest.TestCase):
         
         os.chdir(project_dir)
         
-        logger = setup_logging("config_test", category="test")
+        setup_logging("config_test", category="test")
         
         # Test handler configuration
-        for handler in logger.handlers:
-            self.assertEqual(handler.level, logging.INFO)
+        for handler in [utils._file_router.file_handlers["config_test"], utils._console_handler]:
             formatter = handler.formatter
             self.assertIsInstance(formatter, logging.Formatter)
             self.assertEqual(formatter._fmt, '%(asctime)s - %(levelname)s - %(message)s')
+        self.assertEqual(utils._file_router.file_handlers["config_test"].level, logging.INFO)
+    
+    def test_setup_logging_idempotent(self):
+        """Test repeated setup reuses the existing file handler."""
+        project_dir = os.path.join(self.temp_dir, 'test_project')
+        os.makedirs(project_dir)
+        with open(os.path.join(project_dir, 'app.py'), 'w') as f:
+            f.write("# Mock app.py")
+        
+        os.chdir(project_dir)
+        
+        logger = setup_logging("repeat_test", category="test")
+        file_handler = utils._file_router.file_handlers["repeat_test"]
+        
+        self.assertIs(setup_logging("repeat_test", category="test"), logger)
+        self.assertIs(utils._file_router.file_handlers["repeat_test"], file_handler)
+        self.assertEqual(len(logger.handlers), 1)
+    
+    def test_category_level_override(self):
+        """Test per-category levels can be set from the environment."""
+        project_dir = os.path.join(self.temp_dir, 'test_project')
+        os.makedirs(project_dir)
+        with open(os.path.join(project_dir, 'app.py'), 'w') as f:
+            f.write("# Mock app.py")
+        
+        os.chdir(project_dir)
+        
+        with patch.dict(os.environ, {'LOG_LEVEL_QUIET': 'warning'}):
+            logger = setup_logging("quiet_test", category="quiet")
+        
+        self.assertEqual(logger.level, logging.WARNING)
+    
+    def test_sampled_logging(self):
+        """Test sampled call sites only write one in every N records."""
+        project_dir = os.path.join(self.temp_dir, 'test_project')
+        os.makedirs(project_dir)
+        with open(os.path.join(project_dir, 'app.py'), 'w') as f:
+            f.write("# Mock app.py")
+        
+        os.chdir(project_dir)
+        
+        logger = setup_logging("sample_test", category="test")
+        for i in range(10):
+            logger.info(f"Hot path record {i}", extra=sampled(5))
+        logger.info("Unsampled record")
+        flush_logging()
+        
+        with open(os.path.join(project_dir, 'logs', 'test', 'sample_test.log'), 'r') as f:
+            lines = f.read().splitlines()
+        
+        self.assertEqual(len(lines), 3)
+        self.assertIn("Hot path record 0 [sampled 1/5]", lines[0])
+        self.assertIn("Hot path record 5 [sampled 1/5]", lines[1])
+        self.assertIn("Unsampled record", lines[2])
 
 
 class TestProjectRootDiscovery(unittest.TestCase):
@@ -244,6 +303,12 @@ class TestMarkdownContentLoading(unittest.TestCase):
         """Set up test environment."""
         self.temp_dir = tempfile.mkdtemp()
         self.original_cwd = os.getcwd()
+        
+        # Point the shared registry at a temporary text directory
+        self.registry = MarkdownRegistry(self.temp_dir)
+        registry_patcher = patch('utils.markdown_registry', self.registry)
+        registry_patcher.start()
+        self.addCleanup(registry_patcher.stop)
     
     def tearDown(self):
         """Clean up test environment."""
@@ -251,6 +316,14 @@ class TestMarkdownContentLoading(unittest.TestCase):
         if os.path.exists(self.temp_dir):
             shutil.rmtree(self.temp_dir)
     
+    def write_markdown(self, filename, content):
+        """Write a markdown file into the temporary text directory."""
+        file_path = os.path.join(self.temp_dir, filename)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return file_path
+    
     @patch('utils.setup_logging')
     def test_load_markdown_content_success(self, mock_setup_logging):
         """Test successful markdown content loading."""
@@ -259,12 +332,9 @@ class TestMarkdownContentLoading(unittest.TestCase):
         
         # Create test markdown content
         test_content = "# Test Header\n\nThis is test content."
+        self.write_markdown('test.md', test_content)
         
-        # Mock file operations
-        with patch('builtins.open', mock_open(read_data=test_content)):
-            with patch('os.path.exists', return_value=True):
-                with patch('os.path.dirname', return_value='/mock/path'):
-                    result = load_markdown_content('test.md')
+        result = load_markdown_content('test.md')
         
         # Verify result structure
         self.assertIsInstance(result, html.Div)
@@ -279,9 +349,7 @@ class TestMarkdownContentLoading(unittest.TestCase):
         mock_logger = MagicMock()
         mock_setup_logging.return_value = mock_logger
         
-        with patch('os.path.exists', return_value=False):
-            with patch('os.path.dirname', return_value='/mock/path'):
-                result = load_markdown_content('nonexistent.md')
+        result = load_markdown_content('nonexistent.md')
         
         # Should return error div
         self.assertIsInstance(result, html.Div)
@@ -297,9 +365,7 @@ class TestMarkdownContentLoading(unittest.TestCase):
         
         fallback_msg = "Custom fallback message"
         
-        with patch('os.path.exists', return_value=False):
-            with patch('os.path.dirname', return_value='/mock/path'):
-                result = load_markdown_content('nonexistent.md', fallback_message=fallback_msg)
+        result = load_markdown_content('nonexistent.md', fallback_message=fallback_msg)
         
         self.assertIsInstance(result, html.Div)
         self.assertEqual(result.children, fallback_msg)
@@ -312,11 +378,9 @@ class TestMarkdownContentLoading(unittest.TestCase):
         
         # Test with UTF-8 content including special characters
         test_content = "# Test\n\nSpecial chars: é, ñ, 中文"
+        self.write_markdown('test.md', test_content)
         
-        with patch('builtins.open', mock_open(read_data=test_content)):
-            with patch('os.path.exists', return_value=True):
-                with patch('os.path.dirname', return_value='/mock/path'):
-                    result = load_markdown_content('test.md')
+        result = load_markdown_content('test.md')
         
         # Verify encoding is preserved
         markdown_component = result.children[0]
@@ -329,14 +393,38 @@ class TestMarkdownContentLoading(unittest.TestCase):
         mock_setup_logging.return_value = mock_logger
         
         test_content = "# Test\n\n[Link](http://example.com)"
+        self.write_markdown('test.md', test_content)
         
-        with patch('builtins.open', mock_open(read_data=test_content)):
-            with patch('os.path.exists', return_value=True):
-                with patch('os.path.dirname', return_value='/mock/path'):
-                    result = load_markdown_content('test.md', link_target="_blank")
+        result = load_markdown_content('test.md', link_target="_blank")
         
         markdown_component = result.children[0]
         self.assertEqual(markdown_component.link_target, "_blank")
+    
+    def test_components_cached_until_file_changes(self):
+        """Test components are reused and rebuilt after the file is modified."""
+        file_path = self.write_markdown('cached.md', "Original")
+        
+        first = load_markdown_content('cached.md')
+        self.assertIs(load_markdown_content('cached.md'), first)
+        self.assertIsNot(load_markdown_content('cached.md', link_target="_blank"), first)
+        
+        self.write_markdown('cached.md', "Updated")
+        stat = os.stat(file_path)
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        
+        updated = load_markdown_content('cached.md')
+        self.assertIsNot(updated, first)
+        self.assertEqual(updated.children[0].children, "Updated")
+    
+    def test_registry_preloads_nested_files(self):
+        """Test the registry discovers markdown in subdirectories."""
+        self.write_markdown('intro.md', "Intro")
+        self.write_markdown(os.path.join('chemical', 'ph.md'), "pH")
+        self.write_markdown('notes.txt', "Not markdown")
+        
+        self.assertEqual(self.registry.list_files(), ['chemical/ph.md', 'intro.md'])
+        self.assertEqual(self.registry.preload(), 2)
+        self.assertEqual(self.registry.get_text('chemical/ph.md'), "pH")
 
 
 class TestSiteDataQueries(unittest.TestCase):
@@ -766,10 +854,8 @@ class TestErrorHandling(unittest.TestCase):
         mock_setup_logging.return_value = mock_logger
         
         # Test with file reading exception
-        with patch('os.path.exists', return_value=True):
-            with patch('builtins.open', side_effect=IOError("Permission denied")):
-                with patch('os.path.dirname', return_value='/mock/path'):
-                    result = load_markdown_content('test.md', fallback_message="Custom fallback")
+        with patch.object(utils.markdown_registry, 'get_text', side_effect=IOError("Permission denied")):
+            result = load_markdown_content('test.md', fallback_message="Custom fallback")
         
         # Should return error div
         self.assertIsInstance(result, html.Div)
@@ -0,0 +1,189 @@
+"""
+Test suite for time series downsampling.
+Tests the logic in visualizations.downsampling module.
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from utils import setup_logging
+from visualizations.chemical_viz import create_all_parameters_view, create_time_series_plot
+from visualizations.downsampling import (
+    DEFAULT_VIEWPORT_WIDTH,
+    MIN_POINT_BUDGET,
+    POINTS_PER_PIXEL,
+    downsample_frame,
+    lttb_indices,
+    point_budget,
+    scatter_trace_class,
+)
+
+# Set up logging for tests
+logger = setup_logging("test_downsampling", category="testing")
+
+
+def make_long_series(n_points, exceedance_positions=()):
+    """Create a daily pH series with a status column and optional exceedances."""
+    rng = np.random.default_rng(42)
+    dates = pd.date_range('1990-01-01', periods=n_points, freq='D')
+    values = 7.0 + 0.3 * np.sin(np.arange(n_points) / 50) + rng.normal(0, 0.05, n_points)
+    status = np.array(['Normal'] * n_points, dtype=object)
+
+    for position in exceedance_positions:
+        values[position] = 9.5
+        status[position] = 'Above Normal (Basic/Alkaline)'
+
+    return pd.DataFrame({
+        'Date': dates,
+        'Year': dates.year,
+        'pH': values,
+        'pH_status': status,
+    })
+
+
+class TestPointBudget(unittest.TestCase):
+    """Test viewport-based point budgets."""
+
+    def test_default_width(self):
+        """Test the budget falls back to the default viewport width."""
+        self.assertEqual(point_budget(), DEFAULT_VIEWPORT_WIDTH * POINTS_PER_PIXEL)
+
+    def test_scales_with_width_and_columns(self):
+        """Test wider screens get more points and subplot columns share the width."""
+        self.assertGreater(point_budget(1920), point_budget(1024))
+        self.assertEqual(point_budget(1600, columns=2), 1600)
+
+    def test_minimum_budget(self):
+        """Test narrow screens still get a usable number of points."""
+        self.assertEqual(point_budget(50), MIN_POINT_BUDGET)
+
+
+class TestLTTB(unittest.TestCase):
+    """Test the Largest-Triangle-Three-Buckets selection."""
+
+    def test_keeps_endpoints_and_size(self):
+        """Test the first and last points are kept and the output has n_out points."""
+        x = np.arange(1000)
+        y = np.sin(x / 10)
+
+        indices = lttb_indices(x, y, 100)
+
+        self.assertEqual(len(indices), 100)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], 999)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_keeps_spike(self):
+        """Test an isolated spike survives downsampling."""
+        x = np.arange(1000)
+        y = np.zeros(1000)
+        y[567] = 10
+
+        self.assertIn(567, lttb_indices(x, y, 50))
+
+    def test_short_series_unchanged(self):
+        """Test series at or under the budget are returned whole."""
+        np.testing.assert_array_equal(lttb_indices(np.arange(10), np.arange(10), 20), np.arange(10))
+
+
+class TestDownsampleFrame(unittest.TestCase):
+    """Test frame downsampling with guaranteed retention."""
+
+    def test_under_budget_returns_same_frame(self):
+        """Test small frames are not modified."""
+        df = make_long_series(100)
+        self.assertIs(downsample_frame(df, 'Date', 'pH', 200), df)
+
+    def test_respects_budget(self):
+        """Test large frames are reduced to the point budget."""
+        df = make_long_series(10000)
+        result = downsample_frame(df, 'Date', 'pH', 500)
+
+        self.assertLessEqual(len(result), 500)
+        self.assertEqual(result['Date'].iloc[0], df['Date'].iloc[0])
+        self.assertEqual(result['Date'].iloc[-1], df['Date'].iloc[-1])
+
+    def test_keeps_all_flagged_rows(self):
+        """Test every row in the keep mask is retained."""
+        exceedances = list(range(100, 10000, 97))
+        df = make_long_series(10000, exceedances)
+        keep = df['pH_status'] != 'Normal'
+
+        result = downsample_frame(df, 'Date', 'pH', 300, keep_mask=keep)
+
+        self.assertTrue(set(exceedances).issubset(result.index))
+        self.assertLessEqual(len(result), 300)
+
+    def test_drops_missing_values(self):
+        """Test rows without a value are not plotted once downsampled."""
+        df = make_long_series(5000)
+        df.loc[::2, 'pH'] = np.nan
+
+        result = downsample_frame(df, 'Date', 'pH', 200)
+
+        self.assertFalse(result['pH'].isna().any())
+
+
+class TestTraceSelection(unittest.TestCase):
+    """Test WebGL trace selection."""
+
+    def test_scatter_trace_class(self):
+        """Test Scattergl is only used above the threshold."""
+        self.assertIs(scatter_trace_class(100, 2000), go.Scatter)
+        self.assertIs(scatter_trace_class(2001, 2000), go.Scattergl)
+        self.assertIs(scatter_trace_class(50000, None), go.Scatter)
+
+
+class TestChemicalDownsampling(unittest.TestCase):
+    """Test downsampling in chemical figures."""
+
+    def setUp(self):
+        """Set up a long series with a few exceedances."""
+        self.exceedances = [1234, 5678, 9000]
+        self.df = make_long_series(12000, self.exceedances)
+        self.reference_values = {'pH': {'normal min': 6.5, 'normal max': 9.0}}
+
+    def test_time_series_plot_downsampled(self):
+        """Test long series are reduced to the viewport budget with exceedances kept."""
+        fig = create_time_series_plot(self.df, 'pH', self.reference_values, site_name='Test Site',
+                                      viewport_width=800)
+
+        line = fig.data[-1]
+        exceedance_trace = next(trace for trace in fig.data if trace.name == 'Above Normal (Basic/Alkaline)')
+
+        self.assertLessEqual(len(line.x), point_budget(800))
+        self.assertEqual(len(exceedance_trace.x), len(self.exceedances))
+
+    def test_standard_plot_downsampled(self):
+        """Test the unhighlighted view is also downsampled."""
+        fig = create_time_series_plot(self.df, 'pH', self.reference_values, site_name='Test Site',
+                                      highlight_thresholds=False, viewport_width=800)
+
+        self.assertLessEqual(len(fig.data[0].x), point_budget(800))
+
+    def test_webgl_above_threshold(self):
+        """Test wide screens with many points switch to WebGL traces."""
+        fig = create_time_series_plot(self.df, 'pH', self.reference_values, site_name='Test Site',
+                                      viewport_width=2400)
+
+        self.assertIsInstance(fig.data[-1], go.Scattergl)
+
+    def test_all_parameters_view_uses_half_width(self):
+        """Test dashboard subplots share the viewport budget."""
+        fig = create_all_parameters_view(self.df, ['pH'], self.reference_values, site_name='Test Site',
+                                         viewport_width=1000)
+
+        self.assertLessEqual(len(fig.data[-1].x), point_budget(1000, columns=2))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
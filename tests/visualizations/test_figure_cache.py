@@ -0,0 +1,182 @@
+"""
+Test suite for the prerendered figure cache.
+Tests the logic in visualizations.figure_cache and visualizations.prerender modules.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from dash import html
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from callbacks.helper_functions import create_error_state
+from callbacks.tab_utilities import get_cached_chemical_view
+from visualizations.downsampling import point_budget
+from utils import setup_logging
+from visualizations.figure_cache import (
+    MANIFEST_FILE,
+    get_cached_entry,
+    get_version_dir,
+    publish_version,
+    write_entry,
+)
+from visualizations.prerender import prerender_all
+
+# Set up logging for tests
+logger = setup_logging("test_figure_cache", category="testing")
+
+
+class FigureCacheTestCase(unittest.TestCase):
+    """Base class providing a temporary cache directory and a fixed data version."""
+
+    data_version = 'abc123'
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        patcher = patch('visualizations.figure_cache.get_data_version', return_value=self.data_version)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+
+    def read(self, kind, *key):
+        return get_cached_entry(kind, *key, cache_dir=self.cache_dir)
+
+
+class TestFigureCache(FigureCacheTestCase):
+    """Test cache entry storage and versioning."""
+
+    def test_round_trip_component(self):
+        """Test Dash components are stored as their JSON form."""
+        version_dir = get_version_dir(self.data_version, self.cache_dir)
+        size = write_entry(version_dir, 'fish', ('Site A',), {'content': html.Div('Hello', id='x')})
+
+        entry = self.read('fish', 'Site A')
+
+        self.assertGreater(size, 0)
+        self.assertEqual(entry['content']['type'], 'Div')
+        self.assertEqual(entry['content']['props']['children'], 'Hello')
+
+    def test_miss_returns_none(self):
+        """Test missing entries fall back to live rendering."""
+        self.assertIsNone(self.read('fish', 'Unknown Site'))
+
+    def test_other_version_not_served(self):
+        """Test entries from an older data version are ignored."""
+        write_entry(get_version_dir('old', self.cache_dir), 'fish', ('Site A',), {'content': 'stale'})
+
+        self.assertIsNone(self.read('fish', 'Site A'))
+
+    def test_no_database(self):
+        """Test the cache is bypassed when no database exists."""
+        with patch('visualizations.figure_cache.get_data_version', return_value=None):
+            self.assertIsNone(self.read('fish', 'Site A'))
+
+    def test_corrupt_entry_ignored(self):
+        """Test unreadable entries are treated as misses."""
+        version_dir = get_version_dir(self.data_version, self.cache_dir)
+        write_entry(version_dir, 'fish', ('Site A',), {'content': 'ok'})
+        kind_dir = os.path.join(version_dir, 'fish')
+        with open(os.path.join(kind_dir, os.listdir(kind_dir)[0]), 'wb') as cache_file:
+            cache_file.write(b'not gzip')
+
+        self.assertIsNone(self.read('fish', 'Site A'))
+
+    def test_publish_replaces_stale_versions(self):
+        """Test publishing a version writes its manifest and removes older versions."""
+        write_entry(get_version_dir('old', self.cache_dir), 'fish', ('Site A',), {'content': 'stale'})
+        staging_dir = os.path.join(self.cache_dir, '.staging')
+        write_entry(staging_dir, 'fish', ('Site A',), {'content': 'fresh'})
+
+        version_dir = publish_version(staging_dir, self.data_version, {'entries': {'fish': 1}}, self.cache_dir)
+
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), [self.data_version])
+        with open(os.path.join(version_dir, MANIFEST_FILE)) as manifest_file:
+            self.assertEqual(json.load(manifest_file), {'entries': {'fish': 1}})
+        self.assertEqual(self.read('fish', 'Site A'), {'content': 'fresh'})
+
+
+class TestPrerender(FigureCacheTestCase):
+    """Test prerendering into the cache."""
+
+    def sites_with_data(self, data_type):
+        return {'habitat': ['Site A', 'Site B'], 'fish': ['Site A']}.get(data_type, [])
+
+    def render_habitat(self, site_name):
+        if site_name == 'Site B':
+            return create_error_state("Error", "Could not render")
+        return html.Div(f"Habitat for {site_name}")
+
+    def test_prerender_all(self):
+        """Test each site display is rendered once and error states are not cached."""
+        with patch('visualizations.prerender.get_data_version', return_value=self.data_version), \
+             patch('visualizations.prerender.get_sites_with_data', side_effect=self.sites_with_data), \
+             patch('visualizations.prerender.create_habitat_display', side_effect=self.render_habitat), \
+             patch('visualizations.prerender.create_biological_site_display',
+                   side_effect=lambda community, site: html.Div(f"{community} at {site}")):
+            summary = prerender_all(workers=1, cache_dir=self.cache_dir)
+
+        self.assertEqual(summary['entries'], {'chemical': 0, 'fish': 1, 'macro': 0, 'habitat': 1})
+        self.assertGreater(summary['cache_bytes'], 0)
+        self.assertEqual(self.read('habitat', 'Site A')['content']['props']['children'], 'Habitat for Site A')
+        self.assertIsNone(self.read('habitat', 'Site B'))
+        self.assertEqual(self.read('fish', 'Site A')['content']['props']['children'], 'fish at Site A')
+
+
+class TestCachedChemicalView(unittest.TestCase):
+    """Test when prerendered chemical views are served."""
+
+    def setUp(self):
+        patchers = [
+            patch('callbacks.tab_utilities.get_chemical_date_range', return_value=(2005, 2025)),
+            patch('callbacks.tab_utilities.get_cached_entry', return_value={'content': {'type': 'Graph'}, 'points': 120}),
+            patch('callbacks.tab_utilities.create_parameter_explanation', return_value=('explanation', 'diagram')),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_default_filters_served(self):
+        """Test the full date range with all months uses the cache."""
+        view = get_cached_chemical_view('Site A', 'pH', [2005, 2025], list(range(1, 13)), True)
+        self.assertEqual(view, ({'type': 'Graph'}, 'explanation', 'diagram'))
+
+    def test_empty_month_selection_means_all_months(self):
+        """Test an empty month selection, which does not filter, also uses the cache."""
+        self.assertIsNotNone(get_cached_chemical_view('Site A', 'pH', [2005, 2025], [], True))
+
+    def test_custom_filters_render_live(self):
+        """Test narrowed years, months or disabled highlighting bypass the cache."""
+        self.assertIsNone(get_cached_chemical_view('Site A', 'pH', [2010, 2025], list(range(1, 13)), True))
+        self.assertIsNone(get_cached_chemical_view('Site A', 'pH', [2005, 2025], [6, 7, 8], True))
+        self.assertIsNone(get_cached_chemical_view('Site A', 'pH', [2005, 2025], list(range(1, 13)), False))
+
+    def test_downsampled_views_render_live(self):
+        """Test charts whose point count exceeds the viewer's budget are rendered live."""
+        with patch('callbacks.tab_utilities.get_cached_entry',
+                   return_value={'content': {'type': 'Graph'}, 'points': 5000}):
+            self.assertIsNone(get_cached_chemical_view('Site A', 'pH', [2005, 2025], None, True, 800))
+
+    def test_wider_viewer_skips_downsampled_prerender(self):
+        """Test a chart downsampled for the default width is rendered live for a wider viewer."""
+        default_budget = point_budget(None)
+        entry = {'content': {'type': 'Graph'}, 'points': default_budget + 500, 'render_budget': default_budget}
+        with patch('callbacks.tab_utilities.get_cached_entry', return_value=entry):
+            self.assertIsNone(get_cached_chemical_view('Site A', 'pH', [2005, 2025], None, True, 1920))
+            # The default-width viewer gets the same downsampling the prerender used
+            self.assertIsNotNone(get_cached_chemical_view('Site A', 'pH', [2005, 2025], None, True))
+
+        entry['points'] = default_budget
+        with patch('callbacks.tab_utilities.get_cached_entry', return_value=entry):
+            self.assertIsNotNone(get_cached_chemical_view('Site A', 'pH', [2005, 2025], None, True, 1920))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
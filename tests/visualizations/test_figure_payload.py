@@ -0,0 +1,171 @@
+"""
+Test suite for figure payload minimization.
+Tests the logic in visualizations.figure_payload module.
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from utils import setup_logging
+from visualizations.chemical_viz import create_all_parameters_view, create_time_series_plot
+from visualizations.figure_payload import minimize_figure, payload_size
+from visualizations.habitat_viz import create_habitat_viz
+
+# Set up logging for tests
+logger = setup_logging("test_figure_payload", category="testing")
+
+# Minimized payload budgets in bytes for 20 years of monthly samples
+PAYLOAD_BUDGETS = {
+    'time_series': 13500,
+    'all_parameters': 24000,
+    'habitat': 7500,
+}
+
+REFERENCE_VALUES = {
+    'pH': {'normal min': 6.5, 'normal max': 9.0},
+    'do_percent': {'normal min': 80, 'normal max': 130, 'caution min': 50, 'caution max': 150},
+}
+
+
+def make_chemical_data(years=20):
+    """Create monthly pH and dissolved oxygen readings with statuses."""
+    dates = pd.date_range('2000-01-01', periods=years * 12, freq='MS') + pd.Timedelta(days=14)
+    rng = np.random.default_rng(7)
+    ph = np.round(7.5 + rng.normal(0, 0.6, len(dates)), 2)
+    do_percent = np.round(100 + rng.normal(0, 15, len(dates)), 1)
+
+    return pd.DataFrame({
+        'Date': dates,
+        'Year': dates.year,
+        'Month': dates.month,
+        'pH': ph,
+        'pH_status': np.where((ph < 6.5) | (ph > 9.0), 'Below Normal (Acidic)', 'Normal'),
+        'do_percent': do_percent,
+        'do_percent_status': np.where(do_percent < 80, 'Caution', 'Normal'),
+    })
+
+def make_habitat_data(years=20):
+    """Create one habitat assessment per year."""
+    return pd.DataFrame({
+        'assessment_id': range(years),
+        'assessment_date': [f'{2000 + i}-07-01' for i in range(years)],
+        'year': [2000 + i for i in range(years)],
+        'total_score': [100 + i for i in range(years)],
+        'habitat_grade': ['B'] * years,
+    })
+
+
+class TestMinimizeFigure(unittest.TestCase):
+    """Test individual minimization steps."""
+
+    def setUp(self):
+        """Set up a time series figure with year shading."""
+        self.fig = create_time_series_plot(make_chemical_data(), 'pH', REFERENCE_VALUES, site_name='Test Site')
+        self.minimized = minimize_figure(self.fig)
+
+    def test_year_shading_stays_below_data(self):
+        """Test alternate-year rectangles stay layout shapes drawn below the data, rounded to dates."""
+        shading_shapes = [shape for shape in self.fig.layout.shapes if shape.type == 'rect']
+        minimized_rects = [shape for shape in self.minimized['layout']['shapes'] if shape['type'] == 'rect']
+
+        self.assertGreater(len(shading_shapes), 1)
+        self.assertEqual(len(minimized_rects), len(shading_shapes))
+        self.assertTrue(all(shape['layer'] == 'below' for shape in minimized_rects))
+        self.assertEqual(minimized_rects[0]['x1'], '2000-12-31')
+
+    def test_draw_order_preserved(self):
+        """Test traces keep their order and axes, so no trace is drawn over or under another."""
+        original = [(trace.name, trace.yaxis) for trace in self.fig.data]
+        minimized = [(trace.get('name'), trace.get('yaxis')) for trace in self.minimized['data']]
+
+        self.assertEqual(minimized, original)
+        self.assertEqual(
+            [shape.get('layer', 'above') for shape in self.minimized['layout']['shapes']],
+            [shape.layer or 'above' for shape in self.fig.layout.shapes],
+        )
+
+    def test_reference_lines_kept(self):
+        """Test threshold lines are not merged into the shading."""
+        lines = [shape for shape in self.minimized['layout']['shapes'] if shape['type'] == 'line']
+        self.assertEqual(len(lines), 2)
+
+    def test_dates_shortened(self):
+        """Test midnight timestamps are sent as plain dates."""
+        self.assertEqual(self.minimized['data'][0]['x'][0], '2000-01-15')
+
+    def test_template_trimmed(self):
+        """Test template defaults for unused trace and subplot types are dropped."""
+        template = self.minimized['layout']['template']
+
+        self.assertEqual(set(template['data']), {'scatter'})
+        self.assertNotIn('scene', template['layout'])
+        self.assertEqual(template['layout']['plot_bgcolor'], 'white')
+
+    def test_hover_templates_hoisted(self):
+        """Test a hover template shared by all status traces is sent once."""
+        status_traces = [trace for trace in self.minimized['data'] if trace.get('mode') == 'markers']
+        scatter_defaults = self.minimized['layout']['template']['data']['scatter']
+
+        self.assertGreater(len(status_traces), 1)
+        self.assertTrue(all('hovertemplate' not in trace for trace in status_traces))
+        self.assertIn('%{meta}', scatter_defaults[0]['hovertemplate'])
+
+    def test_values_rounded(self):
+        """Test float arrays are rounded to display precision."""
+        fig = go.Figure(go.Scatter(x=[1, 2, 3], y=np.array([0.1 + 0.2, 7.123456789, 5.0])))
+
+        self.assertEqual(minimize_figure(fig)['data'][0]['y'], [0.3, 7.1235, 5])
+
+    def test_missing_values_preserved(self):
+        """Test gaps in a series stay gaps after rounding."""
+        fig = go.Figure(go.Scatter(x=[1, 2, 3], y=np.array([1.5, np.nan, 2.5])))
+
+        self.assertEqual(minimize_figure(fig)['data'][0]['y'], [1.5, None, 2.5])
+
+    def test_defaults_stripped(self):
+        """Test attributes equal to plotly.js defaults are removed."""
+        fig = go.Figure(go.Scatter(x=[1], y=[1], opacity=1.0, showlegend=True, visible=True))
+        trace = minimize_figure(fig)['data'][0]
+
+        for key in ('opacity', 'showlegend', 'visible'):
+            self.assertNotIn(key, trace)
+
+
+class TestPayloadBudgets(unittest.TestCase):
+    """Regression tests for minimized figure sizes."""
+
+    def assert_within_budget(self, fig, budget):
+        minimized = minimize_figure(fig)
+        self.assertLessEqual(payload_size(minimized), budget)
+        self.assertLess(payload_size(minimized), payload_size(fig) * 0.6)
+
+    def test_time_series_budget(self):
+        """Test a single-parameter chart stays within its payload budget."""
+        fig = create_time_series_plot(make_chemical_data(), 'pH', REFERENCE_VALUES, site_name='Test Site')
+        self.assert_within_budget(fig, PAYLOAD_BUDGETS['time_series'])
+
+    def test_all_parameters_budget(self):
+        """Test the all-parameters dashboard stays within its payload budget."""
+        fig = create_all_parameters_view(make_chemical_data(), ['pH', 'do_percent'], REFERENCE_VALUES,
+                                         site_name='Test Site')
+        self.assert_within_budget(fig, PAYLOAD_BUDGETS['all_parameters'])
+
+    def test_habitat_budget(self):
+        """Test the habitat chart stays within its payload budget."""
+        with patch('visualizations.habitat_viz.get_habitat_dataframe', return_value=make_habitat_data()):
+            fig = create_habitat_viz('Test Site')
+        self.assert_within_budget(fig, PAYLOAD_BUDGETS['habitat'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
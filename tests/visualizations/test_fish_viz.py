@@ -24,6 +24,7 @@ from visualizations.fish_viz import (
     create_fish_metrics_accordion,
     create_fish_metrics_table,
     create_fish_viz,
+    format_fish_metrics_table,
 )
 
 # Set up logging for tests
@@ -196,6 +197,20 @@ class TestFishViz(unittest.TestCase):
                 # Should have conditional formatting
                 self.assertGreater(len(data_table.style_data_conditional), 0)
 
+    def test_format_fish_metrics_table_missing_summary(self):
+        """Test an event without a total score shows dashes without logging a warning."""
+        summary = self.sample_summary_data.copy()
+        summary['collection_date'] = pd.to_datetime(['2020-09-15', '2021-08-20'])
+        summary['total_score'] = summary['total_score'].astype(float)
+        summary.loc[1, ['total_score', 'comparison_to_reference']] = float('nan')
+
+        with patch('visualizations.fish_viz.logger') as mock_logger:
+            _, summary_table = format_fish_metrics_table(self.sample_metrics_data, summary)
+
+        self.assertEqual(summary_table.iloc[:, -1].tolist(), ['-', '-', '-'])
+        self.assertEqual(summary_table.iloc[:, 1].tolist(), [42, '0.72', 'Fair'])
+        mock_logger.warning.assert_not_called()
+
     # =============================================================================
     # ACCORDION FUNCTION TESTS
     # =============================================================================
@@ -284,6 +284,9 @@ class TestMacroViz(unittest.TestCase):
         
         accordion = create_macro_metrics_accordion("Test Site")
         
+        # Metrics are queried for the site rather than filtered from every site
+        mock_get_data.assert_called_once_with("Test Site")
+        
         # Should return HTML component containing two accordions
         self.assertIsInstance(accordion, html.Div)
         
@@ -27,6 +27,8 @@ from visualizations.visualization_utils import (  # Core visualization functions
     create_trace,
     format_metrics_table,
     generate_hover_text,
+    label_collection_columns,
+    pivot_metric_grid,
     update_layout,
 )
 
@@ -546,5 +548,54 @@ class TestVisualizationUtils(unittest.TestCase):
         self.assertEqual(table.id, 'test-metrics-table')
         self.assertGreater(len(table.data), len(metric_order))  # Includes summary rows
 
+class TestMetricTableEngine(unittest.TestCase):
+    """Test the pivot-based metric table engine."""
+    
+    def test_replicates_labeled_by_year(self):
+        """Test later samples in a year are marked as replicates and sorted last."""
+        collections = pd.DataFrame({
+            'event_id': [3, 1, 2, 4],
+            'year': [2020, 2020, 2021, 2020],
+            'collection_date': ['2020-09-01', '2020-06-01', '2021-06-01', '2020-07-01']
+        })
+        
+        labeled = label_collection_columns(collections)
+        
+        self.assertEqual(labeled['event_id'].tolist(), [1, 4, 3, 2])
+        self.assertEqual(labeled['column_name'].tolist(), ['2020', '2020 (REP)', '2020 (REP)', '2021'])
+    
+    def test_habitat_differentiation(self):
+        """Test habitat suffixes only apply to years sampling several habitats."""
+        collections = pd.DataFrame({
+            'event_id': [1, 2, 3, 4],
+            'year': [2020, 2020, 2020, 2021],
+            'habitat': ['Riffle', 'Vegetation', 'Riffle', 'Woody'],
+            'collection_date': ['2020-06-01', '2020-06-01', '2020-06-15', '2021-06-01']
+        })
+        
+        labeled = label_collection_columns(collections, differentiate_habitat=True)
+        
+        self.assertEqual(labeled['column_name'].tolist(), ['2020-R', '2020-V', '2020-R (REP)', '2021'])
+    
+    def test_pivot_metric_grid_fills_missing(self):
+        """Test missing metrics become dashes and scores follow metric order."""
+        metrics = pd.DataFrame({
+            'event_id': [1, 1, 2],
+            'metric_name': ['B', 'A', 'A'],
+            'metric_score': [2, 1, 3]
+        })
+        
+        grid = pivot_metric_grid(metrics, 'event_id', [1, 2], ['A', 'B'], 'metric_score',
+                                 lambda value: '-' if pd.isna(value) else int(value))
+        
+        self.assertEqual(grid, [[1, 2], [3, '-']])
+    
+    def test_matches_legacy_builders_on_long_history(self):
+        """Test pivot builders match the loop-based builders on a 35-year site."""
+        from benchmarks.metric_tables import run_benchmarks
+        
+        for result in run_benchmarks(years=35, repeats=1):
+            self.assertTrue(result['identical'], f"{result['table']} table differs from legacy output")
+
 if __name__ == '__main__':
     unittest.main(verbosity=2) 
\ No newline at end of file
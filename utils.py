@@ -2,13 +2,25 @@
 This module contains reusable helper functions used across the dashboard.
 """
 
+import atexit
+import logging
+import logging.handlers
 import os
+import queue
+import threading
 import traceback
+from functools import lru_cache
 
 import dash_bootstrap_components as dbc
 import pandas as pd
 from dash import dcc, html
 
+from config.logging_config import (
+    HIGH_FREQUENCY_SAMPLE_RATE,
+    LOG_FORMAT,
+    get_category_log_level,
+)
+
 # Common style configurations
 CAPTION_STYLE = {
     'font-style': 'italic',
@@ -24,60 +36,177 @@ DEFAULT_IMAGE_STYLE = {
     'height': 'auto'
 }
 
+@lru_cache(maxsize=None)
+def _find_project_root(start_dir):
+    """Locate the directory containing app.py, cached since every module logs at import."""
+    current_dir = start_dir
+    max_levels = 5
+    
+    for _ in range(max_levels):
+        if os.path.exists(os.path.join(current_dir, 'app.py')):
+            return current_dir
+        
+        parent_dir = os.path.dirname(current_dir)
+        if parent_dir == current_dir:  # Reached system root
+            break
+        current_dir = parent_dir
+    
+    raise FileNotFoundError(
+        f"Could not find project root (app.py) within {max_levels} parent directories. "
+        f"Make sure app.py exists in your project root."
+    )
+
+# Logging subsystem: module loggers enqueue records and a single listener thread
+# writes them, so request threads never block on file I/O
+_log_queue = queue.Queue(-1)
+_queue_handler = None
+_file_router = None
+_console_handler = None
+_log_listener = None
+_configured_log_files = {}
+_logging_lock = threading.Lock()
+
+class _ModuleFileRouter(logging.Handler):
+    """Write each queued record to the log file of the module that emitted it."""
+
+    def __init__(self):
+        super().__init__()
+        self.file_handlers = {}
+
+    def set_file_handler(self, module_name, file_handler):
+        previous = self.file_handlers.get(module_name)
+        self.file_handlers[module_name] = file_handler
+        if previous is not None:
+            previous.close()
+
+    def emit(self, record):
+        file_handler = self.file_handlers.get(record.name)
+        if file_handler is not None:
+            file_handler.handle(record)
+
+    def flush(self):
+        for file_handler in list(self.file_handlers.values()):
+            file_handler.flush()
+
+    def close(self):
+        for file_handler in list(self.file_handlers.values()):
+            file_handler.close()
+        super().close()
+
+class _SamplingFilter(logging.Filter):
+    """Pass one in every N records from call sites that log with extra=sampled(N)."""
+
+    def __init__(self):
+        super().__init__()
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        every = getattr(record, 'sample_every', None)
+        if not every or every <= 1:
+            return True
+
+        call_site = (record.name, record.pathname, record.lineno)
+        with self._lock:
+            count = self._counts.get(call_site, 0)
+            self._counts[call_site] = count + 1
+
+        if count % every:
+            return False
+        record.msg = f"{record.msg} [sampled 1/{every}]"
+        return True
+
+def sampled(every=HIGH_FREQUENCY_SAMPLE_RATE):
+    """Logging extra that keeps one in every N records from a hot call site."""
+    return {'sample_every': every}
+
+def _start_log_listener():
+    """Create the shared queue handler and start the listener thread once per process."""
+    global _queue_handler, _file_router, _console_handler, _log_listener
+
+    _file_router = _ModuleFileRouter()
+    _console_handler = logging.StreamHandler()
+    _console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    _queue_handler = logging.handlers.QueueHandler(_log_queue)
+    _queue_handler.addFilter(_SamplingFilter())
+
+    _log_listener = logging.handlers.QueueListener(_log_queue, _file_router, _console_handler)
+    _log_listener.start()
+
+    atexit.register(shutdown_logging)
+    os.register_at_fork(after_in_child=_restart_log_listener)
+
+def _restart_log_listener():
+    """Start a fresh listener, e.g. in forked workers which do not inherit the thread."""
+    global _log_queue, _log_listener
+
+    if _log_listener is None:
+        return
+    _log_queue = queue.Queue(-1)
+    _queue_handler.queue = _log_queue
+    _log_listener = logging.handlers.QueueListener(_log_queue, _file_router, _console_handler)
+    _log_listener.start()
+
+def flush_logging():
+    """Block until every queued record has been written."""
+    if _log_listener is None:
+        return
+    _log_queue.join()
+    _file_router.flush()
+    _console_handler.flush()
+
+def shutdown_logging():
+    """Stop the listener after draining the queue and close log files."""
+    global _log_listener
+
+    if _log_listener is None:
+        return
+    _log_listener.stop()
+    _log_listener = None
+    _file_router.close()
+
 def setup_logging(module_name, category="general"):
     """
     Configure component-specific logging with organized directory structure.
-    """
-    import logging
-    import os
-
-    # Project root discovery
-    def find_project_root():
-        current_dir = os.getcwd()
-        max_levels = 5
-        
-        for _ in range(max_levels):
-            if os.path.exists(os.path.join(current_dir, 'app.py')):
-                return current_dir
-            
-            parent_dir = os.path.dirname(current_dir)
-            if parent_dir == current_dir:  # Reached system root
-                break
-            current_dir = parent_dir
-        
-        raise FileNotFoundError(
-            f"Could not find project root (app.py) within {max_levels} parent directories. "
-            f"Make sure app.py exists in your project root."
-        )
     
-    project_root = find_project_root()
+    Safe to call repeatedly: the log file for a module is only opened the first
+    time it is configured, and writes happen on the shared listener thread.
+    """
+    project_root = _find_project_root(os.getcwd())
     logs_dir = os.path.join(project_root, 'logs', category)
-    os.makedirs(logs_dir, exist_ok=True)
-    
     log_file = os.path.join(logs_dir, f"{module_name}.log")
-    
-    # Module-specific logger configuration
+
     logger = logging.getLogger(module_name)
-    logger.handlers.clear()
-    logger.setLevel(logging.INFO)
-    logger.propagate = False  # Prevent conflicts with root logger
-    
-    # Prevent propagation to root logger to avoid conflicts
-    logger.propagate = False
-    
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.INFO)
-    
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
+    if _configured_log_files.get(module_name) == log_file:
+        return logger
+
+    with _logging_lock:
+        if _configured_log_files.get(module_name) == log_file:
+            return logger
+
+        if _queue_handler is None:
+            _start_log_listener()
+        elif _log_listener is None:
+            # Late setup after shutdown_logging still needs a running listener
+            _restart_log_listener()
+
+        os.makedirs(logs_dir, exist_ok=True)
+        level = get_category_log_level(category)
+
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setLevel(level)
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        _file_router.set_file_handler(module_name, file_handler)
+
+        # Module-specific logger configuration
+        logger.handlers.clear()
+        logger.addHandler(_queue_handler)
+        logger.setLevel(level)
+        logger.propagate = False  # Prevent conflicts with root logger
+
+        _configured_log_files[module_name] = log_file
+
     return logger
 
 def round_parameter_value(param_name, value, data_type='chemical'):
@@ -117,35 +246,94 @@ def round_parameter_value(param_name, value, data_type='chemical'):
         logger.warning(f"Could not round value {value} for parameter {param_name}")
         return None
 
-def load_markdown_content(filename, fallback_message=None, link_target=None):
+class MarkdownRegistry:
     """
-    Load and convert markdown files to Dash components with error handling.
+    Cache of markdown files under text/, keyed by path relative to the text directory.
+    
+    Files are read once and re-read only when their mtime changes, so edits show up
+    without restarting the dev server. Built components are cached per link target.
     """
-    logger = setup_logging("load_markdown_content", category="utils")
 
-    try:
-        base_dir = os.path.dirname(__file__) 
-        file_path = os.path.join(base_dir, 'text', filename)  
-
-        if not os.path.exists(file_path):
-            error_msg = f"Markdown file not found: {file_path}"
-            logger.error(error_msg)
-            return html.Div(
-                fallback_message or f"Content not available: {filename}",
-                className="alert alert-warning"
-            )
+    def __init__(self, text_dir):
+        self.text_dir = text_dir
+        self._texts = {}
+        self._components = {}
+        self._lock = threading.Lock()
+
+    def list_files(self):
+        """Return relative paths of every markdown file, sorted for stable output."""
+        files = []
+        for root, _, filenames in os.walk(self.text_dir):
+            for name in filenames:
+                if name.endswith('.md'):
+                    relative_path = os.path.relpath(os.path.join(root, name), self.text_dir)
+                    files.append(relative_path.replace(os.sep, '/'))
+        return sorted(files)
+
+    def preload(self):
+        """Read every markdown file up front and return the number loaded."""
+        files = self.list_files()
+        for filename in files:
+            self.get_text(filename)
+        return len(files)
+
+    def get_text(self, filename):
+        """Return the raw markdown for a file, raising FileNotFoundError if it is missing."""
+        file_path = os.path.join(self.text_dir, filename)
+        mtime = os.stat(file_path).st_mtime_ns
+
+        cached = self._texts.get(filename)
+        if cached and cached[0] == mtime:
+            return cached[1]
 
         with open(file_path, 'r', encoding='utf-8') as file:
             content = file.read()
-            
+
+        with self._lock:
+            self._texts[filename] = (mtime, content)
+        return content
+
+    def get_component(self, filename, link_target=None):
+        """Return a pre-built markdown component, rebuilding it only when the file changes."""
+        content = self.get_text(filename)
+        mtime = self._texts[filename][0]
+
+        key = (filename, link_target)
+        cached = self._components.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
         # Optional link targeting for external links
         markdown_props = {}
         if link_target:
             markdown_props['link_target'] = link_target
-            
-        return html.Div([
+
+        component = html.Div([
             dcc.Markdown(content, **markdown_props)
         ], className="markdown-content")
+
+        with self._lock:
+            self._components[key] = (mtime, component)
+        return component
+
+markdown_registry = MarkdownRegistry(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'text'))
+
+def load_markdown_content(filename, fallback_message=None, link_target=None):
+    """
+    Load and convert markdown files to Dash components with error handling.
+    """
+    logger = setup_logging("load_markdown_content", category="utils")
+
+    try:
+        return markdown_registry.get_component(filename, link_target=link_target)
+
+    except FileNotFoundError:
+        error_msg = f"Markdown file not found: {os.path.join(markdown_registry.text_dir, filename)}"
+        logger.error(error_msg)
+        return html.Div(
+            fallback_message or f"Content not available: {filename}",
+            className="alert alert-warning"
+        )
     
     except Exception as e:
         error_msg = f"Error loading content from {filename}: {e}"
@@ -9,6 +9,12 @@ from plotly.subplots import make_subplots
 from data_processing.chemical_utils import KEY_PARAMETERS, get_reference_values
 from data_processing.data_queries import get_chemical_data_from_db
 from utils import get_parameter_label, get_parameter_name, setup_logging
+from visualizations.downsampling import (
+    WEBGL_POINT_THRESHOLD,
+    downsample_frame,
+    point_budget,
+    scatter_trace_class,
+)
 from visualizations.visualization_utils import (
     FONT_SIZES,
     create_empty_figure,
@@ -39,9 +45,12 @@ BDL_FOOTNOTES = {
 }
 
 # Helper functions
-def _add_threshold_plot(fig, df, parameter, reference_values, marker_size, y_label, row=None, col=None):
+def _add_threshold_plot(fig, df, parameter, reference_values, marker_size, y_label, row=None, col=None,
+                        max_points=None, webgl_threshold=WEBGL_POINT_THRESHOLD):
     """
     Add scatter plot with status-based coloring and threshold reference lines.
+    
+    Long series are downsampled to max_points, always keeping readings outside the normal range.
     """
     plot_df = df.copy()
     status_col = f'{parameter}_status'
@@ -51,6 +60,11 @@ def _add_threshold_plot(fig, df, parameter, reference_values, marker_size, y_lab
     else:
         plot_df['status'] = 'Normal'
     
+    if max_points is not None:
+        exceedances = ~plot_df['status'].isin(['Normal', 'Unknown'])
+        plot_df = downsample_frame(plot_df, 'Date', parameter, max_points, keep_mask=exceedances)
+    trace_class = scatter_trace_class(len(plot_df), webgl_threshold)
+    
     # Status-based marker coloring
     for status_type, color in COLORS.items():
         if status_type == 'Unknown':
@@ -58,7 +72,7 @@ def _add_threshold_plot(fig, df, parameter, reference_values, marker_size, y_lab
         mask = plot_df['status'] == status_type
         if mask.any():
             fig.add_trace(
-                go.Scatter(
+                trace_class(
                     x=plot_df.loc[mask, 'Date'],
                     y=plot_df.loc[mask, parameter],
                     mode='markers',
@@ -66,9 +80,11 @@ def _add_threshold_plot(fig, df, parameter, reference_values, marker_size, y_lab
                     name=status_type if row is None else f"{parameter} - {status_type}",
                     showlegend=(row is None),  # Only show legend for individual plots
                     legendgroup=parameter if row is not None else None,
+                    # Status comes from meta so every status trace shares one template
+                    meta=status_type,
                     hovertemplate='<b>Date</b>: %{x|%m-%d-%Y}<br>' +
                                 '<b>' + y_label + '</b>: %{y}<br>' +
-                                '<b>Status</b>: ' + status_type +
+                                '<b>Status</b>: %{meta}' +
                                 '<extra></extra>'
                 ),
                 row=row, col=col
@@ -76,9 +92,9 @@ def _add_threshold_plot(fig, df, parameter, reference_values, marker_size, y_lab
     
     # Connecting line for trend visualization
     fig.add_trace(
-        go.Scatter(
-            x=df['Date'],
-            y=df[parameter],
+        trace_class(
+            x=plot_df['Date'],
+            y=plot_df[parameter],
             mode='lines',
             line=dict(color='gray', width=1),
             opacity=0.2,
@@ -91,7 +107,8 @@ def _add_threshold_plot(fig, df, parameter, reference_values, marker_size, y_lab
     
     return _add_parameter_reference_lines(fig, parameter, df, reference_values, row, col)
 
-def _add_standard_plot(fig, df, parameter, marker_size, y_label, row=None, col=None):
+def _add_standard_plot(fig, df, parameter, marker_size, y_label, row=None, col=None,
+                       max_points=None, webgl_threshold=WEBGL_POINT_THRESHOLD):
     """
     Adds basic scatter plot with connecting lines.
     
@@ -103,9 +120,14 @@ def _add_standard_plot(fig, df, parameter, marker_size, y_label, row=None, col=N
         y_label: Y-axis label text
         row: Optional subplot row index
         col: Optional subplot column index
+        max_points: Optional point budget for downsampling long series
+        webgl_threshold: Point count above which Scattergl is used, or None to disable
     """
+    if max_points is not None:
+        df = downsample_frame(df, 'Date', parameter, max_points)
+    
     fig.add_trace(
-        go.Scatter(
+        scatter_trace_class(len(df), webgl_threshold)(
             x=df['Date'],
             y=df[parameter],
             mode='markers+lines',
@@ -218,7 +240,8 @@ def _add_parameter_reference_lines(fig, parameter, df, reference_values, row=Non
     
     return fig
 
-def create_time_series_plot(df, parameter, reference_values, title=None, y_label=None, highlight_thresholds=True, site_name=None):
+def create_time_series_plot(df, parameter, reference_values, title=None, y_label=None, highlight_thresholds=True, site_name=None,
+                            viewport_width=None):
     """
     Creates time series plot for a single chemical parameter.
     
@@ -230,6 +253,7 @@ def create_time_series_plot(df, parameter, reference_values, title=None, y_label
         y_label: Optional custom y-axis label
         highlight_thresholds: If True, color points by status
         site_name: Optional site name for empty plot
+        viewport_width: Optional browser width in pixels, used to size the point budget
     
     Returns:
         Plotly figure with time series plot
@@ -273,16 +297,20 @@ def create_time_series_plot(df, parameter, reference_values, title=None, y_label
                 line_width=0,
             )
     
+    max_points = point_budget(viewport_width)
+    
     # Data visualization with threshold highlighting
     if highlight_thresholds and parameter in reference_values:
         try:
             fig = _add_threshold_plot(fig, df, parameter, reference_values, 
-                                    MARKER_SIZES['individual'], y_label)
+                                    MARKER_SIZES['individual'], y_label, max_points=max_points)
         except Exception as e:
             print(f"Error creating highlighted plot for {parameter}: {e}")
-            fig = _add_standard_plot(fig, df, parameter, MARKER_SIZES['individual'], y_label)
+            fig = _add_standard_plot(fig, df, parameter, MARKER_SIZES['individual'], y_label,
+                                     max_points=max_points)
     else:
-        fig = _add_standard_plot(fig, df, parameter, MARKER_SIZES['individual'], y_label)
+        fig = _add_standard_plot(fig, df, parameter, MARKER_SIZES['individual'], y_label,
+                                 max_points=max_points)
     
     # Date range padding for visual clarity
     date_range = df['Date'].max() - df['Date'].min()
@@ -322,7 +350,8 @@ def create_time_series_plot(df, parameter, reference_values, title=None, y_label
     
     return fig
 
-def create_all_parameters_view(df=None, parameters=None, reference_values=None, highlight_thresholds=True, get_param_name=None, site_name=None):
+def create_all_parameters_view(df=None, parameters=None, reference_values=None, highlight_thresholds=True, get_param_name=None, site_name=None,
+                               viewport_width=None):
     """
     Creates dashboard view with subplots for all chemical parameters.
     
@@ -333,6 +362,7 @@ def create_all_parameters_view(df=None, parameters=None, reference_values=None,
         highlight_thresholds: If True, color points by status
         get_param_name: Optional function to get parameter display names
         site_name: Optional site name for empty plot
+        viewport_width: Optional browser width in pixels, used to size the point budget
     
     Returns:
         Plotly figure with parameter subplots
@@ -366,6 +396,9 @@ def create_all_parameters_view(df=None, parameters=None, reference_values=None,
         horizontal_spacing=0.08
     )
     
+    # Each subplot gets half the viewport width
+    max_points = point_budget(viewport_width, columns=n_cols)
+    
     # Parameter plot generation
     for i, param in enumerate(parameters):
         row = (i // 2) + 1
@@ -376,10 +409,11 @@ def create_all_parameters_view(df=None, parameters=None, reference_values=None,
         try:
             if highlight_thresholds and param in reference_values:
                 fig = _add_threshold_plot(fig, df, param, reference_values, 
-                                        MARKER_SIZES['dashboard'], param_label, row, col)
+                                        MARKER_SIZES['dashboard'], param_label, row, col,
+                                        max_points=max_points)
             else:
                 fig = _add_standard_plot(fig, df, param, MARKER_SIZES['dashboard'], 
-                                       param_label, row, col)
+                                       param_label, row, col, max_points=max_points)
         except Exception as e:
             print(f"Error creating subplot for {param}: {e}")
             fig.add_annotation(
@@ -0,0 +1,93 @@
+"""
+Server-side downsampling for long time series charts.
+
+Largest-Triangle-Three-Buckets (LTTB) keeps the visual shape of a series with far
+fewer points. Flagged readings are always kept so no threshold exceedance is
+hidden, and traces switch to WebGL once they hold many points.
+"""
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Browser width assumed until the client reports its viewport
+DEFAULT_VIEWPORT_WIDTH = 1200
+
+# More than about two points per horizontal pixel cannot be told apart
+POINTS_PER_PIXEL = 2
+MIN_POINT_BUDGET = 200
+
+# Above this many points per trace, SVG rendering gets sluggish
+WEBGL_POINT_THRESHOLD = 2000
+
+def point_budget(viewport_width=None, columns=1):
+    """Return the maximum points per series for a chart split into a number of columns."""
+    width = viewport_width or DEFAULT_VIEWPORT_WIDTH
+    return max(MIN_POINT_BUDGET, int(width / columns * POINTS_PER_PIXEL))
+
+def lttb_indices(x, y, n_out):
+    """
+    Select n_out indices that preserve the shape of a series using LTTB.
+
+    The first and last points are always kept. Each bucket in between keeps the point
+    forming the largest triangle with the previous pick and the next bucket's average.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    bucket_size = (n - 2) / (n_out - 2)
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    previous = 0
+
+    for bucket in range(n_out - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    selected[-1] = n - 1
+    return selected
+
+def downsample_frame(df, x_column, y_column, max_points, keep_mask=None):
+    """
+    Reduce a frame to about max_points rows with values in y_column.
+
+    Rows flagged in keep_mask are always retained on top of the LTTB selection.
+    Frames already within budget are returned unchanged.
+    """
+    valid = df[y_column].notna()
+    if valid.sum() <= max_points:
+        return df
+
+    series = df[valid]
+    keep = keep_mask[valid].to_numpy(dtype=bool) if keep_mask is not None else np.zeros(len(series), dtype=bool)
+
+    x = series[x_column]
+    x_values = x.to_numpy(dtype='datetime64[ns]').astype('int64') if hasattr(x, 'dt') else x.to_numpy()
+
+    selected = keep.copy()
+    selected[lttb_indices(x_values, series[y_column].to_numpy(), max(max_points - int(keep.sum()), 3))] = True
+
+    return series[selected]
+
+def scatter_trace_class(n_points, webgl_threshold=WEBGL_POINT_THRESHOLD):
+    """Return Scattergl for large traces when WebGL rendering is enabled, otherwise Scatter."""
+    if webgl_threshold is not None and n_points > webgl_threshold:
+        return go.Scattergl
+    return go.Scatter
@@ -0,0 +1,85 @@
+"""
+Versioned on-disk cache of prerendered site displays.
+
+Per-site charts and tables only change when the database does, so they are
+rendered ahead of time (see visualizations.prerender) into gzip-compressed JSON
+under a directory named after the data version. Callbacks read entries with
+get_cached_entry and fall back to live rendering on a miss.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+from plotly.io.json import to_json_plotly
+
+from database.database import get_data_version
+from utils import setup_logging
+
+logger = setup_logging("figure_cache", category="visualization")
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIGURE_CACHE_DIR = os.environ.get('FIGURE_CACHE_DIR', os.path.join(project_root, 'data', 'cache', 'figures'))
+
+MANIFEST_FILE = 'manifest.json'
+
+def get_version_dir(data_version, cache_dir=FIGURE_CACHE_DIR):
+    """Return the cache directory for a data version."""
+    return os.path.join(cache_dir, data_version)
+
+def entry_path(version_dir, kind, *key):
+    """Return the file path of a cache entry such as ('fish', site_name)."""
+    digest = hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest()[:20]
+    return os.path.join(version_dir, kind, f"{digest}.json.gz")
+
+def write_entry(version_dir, kind, key, entry):
+    """Write a JSON-serializable entry (Dash components and figures allowed) and return its size in bytes."""
+    path = entry_path(version_dir, kind, *key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as cache_file:
+        cache_file.write(to_json_plotly(entry))
+    return os.path.getsize(path)
+
+def get_cached_entry(kind, *key, cache_dir=FIGURE_CACHE_DIR):
+    """Return the cached entry for the current data version, or None on a miss."""
+    data_version = get_data_version()
+    if data_version is None:
+        return None
+
+    path = entry_path(get_version_dir(data_version, cache_dir), kind, *key)
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as cache_file:
+            return json.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+        return None
+
+def publish_version(staging_dir, data_version, manifest, cache_dir=FIGURE_CACHE_DIR):
+    """Move a fully rendered staging directory into place and remove older versions."""
+    with open(os.path.join(staging_dir, MANIFEST_FILE), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    version_dir = get_version_dir(data_version, cache_dir)
+    if os.path.exists(version_dir):
+        shutil.rmtree(version_dir)
+    os.replace(staging_dir, version_dir)
+
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name != data_version and os.path.isdir(path) and not name.startswith('.'):
+            shutil.rmtree(path, ignore_errors=True)
+            logger.info(f"Removed stale figure cache {name}")
+
+    return version_dir
+
+def get_cache_size(version_dir):
+    """Return the total size in bytes of a cache directory."""
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(version_dir)
+        for name in files
+    )
@@ -0,0 +1,165 @@
+"""
+Figure payload minimization for charts sent to the browser.
+
+Plotly figures serialize far more than the data they show: a full template,
+repeated hover templates, full-precision coordinates and nanosecond
+timestamps. minimize_figure rewrites a figure into an equivalent, smaller
+JSON dict that dcc.Graph accepts directly.
+"""
+
+import base64
+import json
+import logging
+import re
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+
+from utils import setup_logging
+
+logger = setup_logging("figure_payload", category="visualization")
+
+# Values are shown with at most this many decimals in hovers and tables
+DISPLAY_DECIMALS = 4
+
+# Template sections for subplot types these charts never use
+UNUSED_TEMPLATE_SECTIONS = ('geo', 'mapbox', 'polar', 'scene', 'ternary')
+
+# Template sections only read by traces colored on a numeric scale
+COLORSCALE_TEMPLATE_SECTIONS = ('colorscale', 'coloraxis')
+
+# Attribute values plotly.js applies anyway
+TRACE_DEFAULTS = {'opacity': 1, 'visible': True, 'showlegend': True}
+SHAPE_DEFAULTS = {'opacity': 1, 'layer': 'above', 'xref': 'x', 'yref': 'y', 'visible': True}
+
+_MIDNIGHT_DATETIME = re.compile(r'^(\d{4}-\d{2}-\d{2})T00:00:00(\.0+)?$')
+_FLOAT_DTYPES = {'f8': np.float64, 'f4': np.float32}
+
+def payload_size(figure):
+    """Return the JSON byte size of a figure as Dash sends it."""
+    return len(to_json_plotly(figure).encode('utf-8'))
+
+def minimize_figure(fig, decimals=DISPLAY_DECIMALS):
+    """
+    Return a minimized JSON dict for a Plotly figure.
+
+    Hoists shared hover templates into the template, trims unused template sections,
+    rounds coordinates and drops attributes set to their defaults. Traces and shapes
+    keep their order and layers, so the rendered chart is unchanged.
+    """
+    serialized = to_json_plotly(fig)
+    figure = json.loads(serialized)
+    layout = figure.setdefault('layout', {})
+    data = figure.setdefault('data', [])
+
+    _trim_template(figure)
+    _hoist_hover_templates(figure)
+
+    for trace in data:
+        _strip_defaults(trace, TRACE_DEFAULTS)
+        for key in ('x', 'y'):
+            if key in trace:
+                trace[key] = _round_values(trace[key], decimals)
+
+    for shape in layout.get('shapes', []):
+        _strip_defaults(shape, SHAPE_DEFAULTS)
+        for key in ('x0', 'x1', 'y0', 'y1'):
+            if key in shape:
+                shape[key] = _round_value(shape[key], decimals)
+
+    for annotation in layout.get('annotations', []):
+        for key in ('x', 'y'):
+            if key in annotation:
+                annotation[key] = _round_value(annotation[key], decimals)
+
+    for axis_name, axis in layout.items():
+        if axis_name.startswith(('xaxis', 'yaxis')) and isinstance(axis, dict) and 'range' in axis:
+            axis['range'] = [_round_value(value, decimals) for value in axis['range']]
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Figure payload reduced from {len(serialized):,} to {payload_size(figure):,} bytes")
+
+    return figure
+
+def _round_value(value, decimals):
+    """Round a number and shorten midnight timestamps to dates."""
+    if isinstance(value, float):
+        rounded = round(value, decimals)
+        return int(rounded) if rounded.is_integer() else rounded
+    if isinstance(value, str):
+        match = _MIDNIGHT_DATETIME.match(value)
+        if match:
+            return match.group(1)
+    return value
+
+def _round_values(values, decimals):
+    """Round a coordinate array, converting binary float arrays to lists when shorter."""
+    if isinstance(values, list):
+        return [_round_value(value, decimals) for value in values]
+
+    if isinstance(values, dict) and values.get('dtype') in _FLOAT_DTYPES and 'shape' not in values:
+        array = np.frombuffer(base64.b64decode(values['bdata']), dtype=_FLOAT_DTYPES[values['dtype']])
+        rounded = [None if np.isnan(value) else _round_value(float(value), decimals) for value in array]
+        if len(json.dumps(rounded)) < len(values['bdata']):
+            return rounded
+
+    return values
+
+def _strip_defaults(item, defaults):
+    """Remove attributes equal to the value plotly.js would use anyway."""
+    for key, default in defaults.items():
+        if key in item and item[key] == default:
+            del item[key]
+
+def _trim_template(figure):
+    """Drop template defaults for trace and subplot types the figure does not use."""
+    template = figure['layout'].get('template')
+    if not template:
+        return
+
+    trace_types = {trace.get('type', 'scatter') for trace in figure['data']}
+    template['data'] = {
+        trace_type: defaults for trace_type, defaults in template.get('data', {}).items()
+        if trace_type in trace_types
+    }
+
+    unused_sections = UNUSED_TEMPLATE_SECTIONS
+    if not any(_uses_colorscale(trace) for trace in figure['data']):
+        unused_sections += COLORSCALE_TEMPLATE_SECTIONS
+
+    template_layout = template.get('layout', {})
+    for section in unused_sections:
+        template_layout.pop(section, None)
+
+def _uses_colorscale(trace):
+    """Return True if a trace may be colored from a template colorscale."""
+    marker = trace.get('marker', {})
+    return (
+        'colorscale' in trace
+        or 'coloraxis' in trace
+        or 'coloraxis' in marker
+        or not isinstance(marker.get('color', ''), str)
+        or trace.get('type', 'scatter') not in ('scatter', 'scattergl')
+    )
+
+def _hoist_hover_templates(figure):
+    """Move a hover template shared by every hoverable trace of a type into the template."""
+    template = figure['layout'].get('template')
+    if template is None:
+        return
+
+    traces_by_type = {}
+    for trace in figure['data']:
+        if trace.get('hoverinfo') != 'skip':
+            traces_by_type.setdefault(trace.get('type', 'scatter'), []).append(trace)
+
+    for trace_type, traces in traces_by_type.items():
+        hover_templates = {trace.get('hovertemplate') for trace in traces}
+        if len(traces) < 2 or len(hover_templates) != 1 or None in hover_templates:
+            continue
+
+        type_defaults = template.setdefault('data', {}).setdefault(trace_type, [{}])
+        for defaults in type_defaults:
+            defaults['hovertemplate'] = traces[0]['hovertemplate']
+        for trace in traces:
+            del trace['hovertemplate']
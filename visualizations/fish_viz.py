@@ -32,6 +32,10 @@ from .visualization_utils import (
     create_error_figure,
     create_table_styles,
     create_trace,
+    first_rows_by_key,
+    format_integer_score,
+    label_collection_columns,
+    pivot_metric_grid,
     update_layout,
 )
 
@@ -74,93 +78,54 @@ def format_fish_metrics_table(metrics_df, summary_df):
             return (pd.DataFrame({'Metric': FISH_METRIC_ORDER}), 
                    pd.DataFrame({'Metric': ['No Data']}))
 
-        unique_collections = summary_df.drop_duplicates(subset=['event_id']).copy()
-        unique_collections['collection_date'] = pd.to_datetime(unique_collections['collection_date'])
+        collections = label_collection_columns(summary_df)
         
-        collections = []
-        
-        for year, year_group in unique_collections.groupby('year'):
-            year_group = year_group.sort_values('collection_date')
-            
-            for idx, (_, row) in enumerate(year_group.iterrows()):
-                event_id = row.get('event_id', None)
-                
-                # Mark subsequent samples in same year as replicates
-                column_name = str(year) if idx == 0 else f"{year} (REP)"
-                
-                collections.append({
-                    'event_id': event_id,
-                    'year': year,
-                    'column_name': column_name,
-                    'collection_date': row['collection_date']
-                })
-        
-        collections.sort(key=lambda x: (x['year'], '(REP)' in x['column_name']))
-        
-        if not collections:
+        if collections.empty:
             return (pd.DataFrame({'Metric': FISH_METRIC_ORDER}), 
                    pd.DataFrame({'Metric': ['No Data']}))
         
-        table_data = {'Metric': FISH_METRIC_ORDER}
-        
-        for collection in collections:
-            column_name = collection['column_name']
-            event_id = collection['event_id']
-            
-            collection_metrics = metrics_df[metrics_df['event_id'] == event_id]
-            
-            scores = []
-            for metric in FISH_METRIC_ORDER:
-                metric_row = collection_metrics[collection_metrics['metric_name'] == metric]
-                if not metric_row.empty:
-                    try:
-                        score_value = metric_row['metric_score'].values[0]
-                        scores.append(int(score_value))
-                    except (ValueError, TypeError) as e:
-                        logger.warning(f"Could not convert metric score to number: {score_value}, error: {e}")
-                        scores.append('-')
-                else:
-                    scores.append('-')
-            
-            table_data[column_name] = scores
+        event_ids = collections['event_id'].tolist()
+        column_names = collections['column_name'].tolist()
         
-        metrics_table = pd.DataFrame(table_data)
+        event_scores = pivot_metric_grid(
+            metrics_df, 'event_id', event_ids, FISH_METRIC_ORDER, 'metric_score', format_integer_score
+        )
+        event_summaries = first_rows_by_key(summary_df, 'event_id', event_ids)
         
-        summary_rows = pd.DataFrame({'Metric': FISH_SUMMARY_LABELS})
+        # Repeated replicate names keep their first position and the last replicate's values
+        table_data = {'Metric': FISH_METRIC_ORDER}
+        summary_data = {'Metric': FISH_SUMMARY_LABELS}
         
-        for collection in collections:
-            column_name = collection['column_name']
-            event_id = collection['event_id']
+        for column_name, event_id, scores, row in zip(column_names, event_ids, event_scores, event_summaries):
+            table_data[column_name] = scores
             
-            collection_summary = summary_df[summary_df['event_id'] == event_id]
-            if not collection_summary.empty:
-                try:
-                    row = collection_summary.iloc[0]
-                    total_score = int(row['total_score'])
-                    comparison = f"{row['comparison_to_reference']:.2f}"
-                    integrity_class = row['integrity_class']
-                    
-                    summary_data = [total_score, comparison, integrity_class]
-                    summary_rows[column_name] = summary_data
-                except (ValueError, TypeError) as e:
+            try:
+                summary_data[column_name] = [
+                    int(row['total_score']),
+                    f"{row['comparison_to_reference']:.2f}",
+                    row['integrity_class']
+                ]
+            except (ValueError, TypeError) as e:
+                if not pd.isna(row['total_score']):
                     logger.warning(f"Error processing summary data for event {event_id}: {e}")
-                    summary_rows[column_name] = ['-', '-', '-']
-            else:
-                summary_rows[column_name] = ['-', '-', '-']
+                summary_data[column_name] = ['-', '-', '-']
         
-        return metrics_table, summary_rows
+        return pd.DataFrame(table_data), pd.DataFrame(summary_data)
     
     except Exception as e:
         logger.error(f"Error formatting fish metrics table: {e}")
         return (pd.DataFrame({'Metric': FISH_METRIC_ORDER}), 
                pd.DataFrame({'Metric': ['Error']}))
 
-def create_fish_viz(site_name=None):
+def create_fish_viz(site_name=None, fish_df=None):
     """
     Generate fish community visualization with integrity thresholds.
+    
+    Pass fish_df to reuse summary rows that were already fetched for the site.
     """
     try:
-        fish_df = get_fish_dataframe(site_name)
+        if fish_df is None:
+            fish_df = get_fish_dataframe(site_name)
         
         if fish_df.empty:
             return create_empty_figure(site_name, "fish")
@@ -231,12 +196,13 @@ def create_fish_metrics_table(metrics_df, summary_df):
         logger.error(f"Error creating fish metrics table: {e}")
         return html.Div(f"Error creating fish metrics table: {str(e)}")
 
-def create_fish_metrics_accordion(site_name=None):
+def create_fish_metrics_accordion(site_name=None, metrics_df=None, summary_df=None):
     """
     Create collapsible view of fish metrics.
     """
     try:
-        metrics_df, summary_df = get_fish_metrics_data_for_table(site_name)
+        if metrics_df is None or summary_df is None:
+            metrics_df, summary_df = get_fish_metrics_data_for_table(site_name)
         
         if metrics_df.empty or summary_df.empty:
             return html.Div("No data available")
@@ -32,7 +32,11 @@ from .visualization_utils import (
     create_empty_figure,
     create_error_figure,
     create_table_styles,
+    first_rows_by_key,
+    format_integer_score,
     generate_hover_text,
+    label_collection_columns,
+    pivot_metric_grid,
     update_layout,
 )
 
@@ -61,12 +65,17 @@ MACRO_METRIC_ORDER = [
 
 MACRO_SUMMARY_LABELS = ['Total Score', 'Comparison to Reference', 'Biological Condition']
 
-def create_macro_viz(site_name=None):
+def create_macro_viz(site_name=None, macro_df=None):
     """
     Generate seasonal macroinvertebrate visualization with condition thresholds.
+    
+    Pass macro_df to reuse summary rows that were already fetched for the site.
     """
     try:
-        macro_df = get_macroinvertebrate_dataframe(site_name)
+        if macro_df is None:
+            macro_df = get_macroinvertebrate_dataframe(site_name)
+        else:
+            macro_df = macro_df.copy()
         
         if macro_df.empty:
             return create_empty_figure(site_name, "macroinvertebrate")
@@ -172,16 +181,13 @@ def create_macro_metrics_table_for_season(metrics_df, summary_df, season):
         logger.error(f"Error creating {season} metrics table: {e}")
         return html.Div(f"Error creating {season} metrics table")
 
-def create_macro_metrics_accordion(site_name=None):
+def create_macro_metrics_accordion(site_name=None, metrics_df=None, summary_df=None):
     """
     Create collapsible view of seasonal macroinvertebrate metrics.
     """
     try:
-        metrics_df, summary_df = get_macro_metrics_data_for_table()
-        
-        if site_name:
-            metrics_df = metrics_df[metrics_df['site_name'] == site_name] if 'site_name' in metrics_df.columns else metrics_df
-            summary_df = summary_df[summary_df['site_name'] == site_name] if 'site_name' in summary_df.columns else summary_df
+        if metrics_df is None or summary_df is None:
+            metrics_df, summary_df = get_macro_metrics_data_for_table(site_name)
         
         if metrics_df.empty or summary_df.empty:
             return html.Div("No data available")
@@ -217,102 +223,45 @@ def format_macro_metrics_table(metrics_df, summary_df, season=None):
             if 'season' in summary_df.columns:
                 summary_df = summary_df[summary_df['season'] == season]
         
-        collections = []
-        unique_collections = metrics_df.drop_duplicates(subset=['event_id']).copy()
-        unique_collections['collection_date'] = pd.to_datetime(unique_collections['collection_date'])
-        
-        # Process collections by year and habitat
-        for year, year_group in unique_collections.groupby('year'):
-            year_group = year_group.sort_values('collection_date')
-            habitat_counts = {}
-            
-            for _, row in year_group.iterrows():
-                habitat = row.get('habitat', 'Unknown')
-                event_id = row.get('event_id', None)
-                
-                if habitat not in habitat_counts:
-                    habitat_counts[habitat] = 0
-                habitat_counts[habitat] += 1
-                
-                # Determine column name based on habitat and replicate status
-                column_name = str(year) if habitat_counts[habitat] == 1 else f"{year} (REP)"
-                
-                unique_habitats_this_year = year_group['habitat'].nunique()
-                
-                if unique_habitats_this_year > 1:
-                    habitat_abbrev = habitat[0] if habitat else 'U'
-                    column_name = f"{year}-{habitat_abbrev}" if habitat_counts[habitat] == 1 else f"{year}-{habitat_abbrev} (REP)"
-                
-                collections.append({
-                    'event_id': event_id,
-                    'year': year,
-                    'habitat': habitat,
-                    'column_name': column_name,
-                    'collection_date': row['collection_date']
-                })
-        
-        collections.sort(key=lambda x: (x['year'], '(REP)' in x['column_name']))
+        collections = label_collection_columns(metrics_df, differentiate_habitat=True)
         
-        if not collections:
+        if collections.empty:
             return (pd.DataFrame({'Metric': MACRO_METRIC_ORDER}), 
                    pd.DataFrame({'Metric': ['Habitat Type']}),
                    pd.DataFrame({'Metric': ['No Data']}))
         
+        event_ids = collections['event_id'].tolist()
+        column_names = collections['column_name'].tolist()
+        habitats = collections['habitat'].tolist()
+        
+        event_scores = pivot_metric_grid(
+            metrics_df, 'event_id', event_ids, MACRO_METRIC_ORDER, 'metric_score', format_integer_score
+        )
+        event_summaries = first_rows_by_key(summary_df, 'event_id', event_ids)
+        
+        # Repeated replicate names keep their first position and the last replicate's values
         table_data = {'Metric': MACRO_METRIC_ORDER}
         habitat_data = {'Metric': ['Habitat Type']}
+        summary_data = {'Metric': MACRO_SUMMARY_LABELS}
         
-        # Build metrics and habitat data
-        for collection in collections:
-            column_name = collection['column_name']
-            event_id = collection['event_id']
-            habitat = collection['habitat']
-            
-            collection_metrics = metrics_df[metrics_df['event_id'] == event_id]
-            
-            habitat_data[column_name] = habitat
-            
-            scores = []
-            for metric in MACRO_METRIC_ORDER:
-                metric_row = collection_metrics[collection_metrics['metric_name'] == metric]
-                if not metric_row.empty:
-                    try:
-                        score_value = metric_row['metric_score'].values[0]
-                        scores.append(int(score_value))
-                    except (ValueError, TypeError) as e:
-                        logger.warning(f"Could not convert metric score to number: {score_value}, error: {e}")
-                        scores.append('-')
-                else:
-                    scores.append('-')
-            
+        for column_name, event_id, habitat, scores, row in zip(
+            column_names, event_ids, habitats, event_scores, event_summaries
+        ):
             table_data[column_name] = scores
-        
-        metrics_table = pd.DataFrame(table_data)
-        habitat_row = pd.DataFrame(habitat_data)
-        
-        summary_rows = pd.DataFrame({'Metric': MACRO_SUMMARY_LABELS})
-        
-        # Add summary data for each collection
-        for collection in collections:
-            column_name = collection['column_name']
-            event_id = collection['event_id']
+            habitat_data[column_name] = habitat
             
-            collection_summary = summary_df[summary_df['event_id'] == event_id]
-            if not collection_summary.empty:
-                try:
-                    row = collection_summary.iloc[0]
-                    total_score = int(row['total_score'])
-                    comparison = f"{row['comparison_to_reference']:.2f}"
-                    condition = row['biological_condition']
-                    
-                    summary_data = [total_score, comparison, condition]
-                    summary_rows[column_name] = summary_data
-                except (ValueError, TypeError) as e:
+            try:
+                summary_data[column_name] = [
+                    int(row['total_score']),
+                    f"{row['comparison_to_reference']:.2f}",
+                    row['biological_condition']
+                ]
+            except (ValueError, TypeError) as e:
+                if not pd.isna(row['total_score']):
                     logger.warning(f"Error processing summary data for event {event_id}: {e}")
-                    summary_rows[column_name] = ['-', '-', '-']
-            else:
-                summary_rows[column_name] = ['-', '-', '-']
+                summary_data[column_name] = ['-', '-', '-']
         
-        return metrics_table, habitat_row, summary_rows
+        return pd.DataFrame(table_data), pd.DataFrame(habitat_data), pd.DataFrame(summary_data)
     
     except Exception as e:
         logger.error(f"Error formatting macro metrics table: {e}")
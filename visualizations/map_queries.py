@@ -18,10 +18,12 @@ import pandas as pd
 
 from data_processing.chemical_utils import KEY_PARAMETERS
 from database.database import close_connection, get_connection
-from utils import setup_logging
+from database.shared_data import shared_cached
+from utils import sampled, setup_logging
 
 logger = setup_logging("map_queries", category="visualization")
 
+@shared_cached
 def get_sites_for_maps(active_only=False):
     """
     Fetch site information optimized for map display performance.
@@ -63,7 +65,7 @@ def get_sites_for_maps(active_only=False):
         sites_df['ecoregion'] = sites_df['ecoregion'].fillna('Unknown')
         sites_df['active'] = sites_df['active'].astype(bool)
         
-        logger.info(f"Retrieved {len(sites_df)} sites for map visualization")
+        logger.info(f"Retrieved {len(sites_df)} sites for map visualization", extra=sampled())
         return sites_df
         
     except sqlite3.Error as e:
@@ -76,6 +78,7 @@ def get_sites_for_maps(active_only=False):
         if conn:
             close_connection(conn)
             
+@shared_cached
 def get_latest_chemical_data_for_maps(site_name=None):
     """
     Fetch latest chemical readings per site using window functions for efficiency.
@@ -156,7 +159,7 @@ def get_latest_chemical_data_for_maps(site_name=None):
             if param in status_pivot.columns:
                 value_pivot[f'{param}_status'] = status_pivot[param]
         
-        logger.info(f"Retrieved latest chemical data for {len(value_pivot)} sites")
+        logger.info(f"Retrieved latest chemical data for {len(value_pivot)} sites", extra=sampled())
         return value_pivot
         
     except Exception as e:
@@ -165,6 +168,7 @@ def get_latest_chemical_data_for_maps(site_name=None):
     finally:
         close_connection(conn)
 
+@shared_cached
 def get_latest_fish_data_for_maps(site_name=None):
     """
     Fetch latest fish survey data per site using window functions.
@@ -217,7 +221,7 @@ def get_latest_fish_data_for_maps(site_name=None):
             else:
                 logger.warning("No fish data found in the database")
         else: 
-            logger.info(f"Retrieved latest fish data for {len(fish_df)} sites")
+            logger.info(f"Retrieved latest fish data for {len(fish_df)} sites", extra=sampled())
     
         return fish_df
     except sqlite3.Error as e:
@@ -230,6 +234,7 @@ def get_latest_fish_data_for_maps(site_name=None):
         if conn:
             close_connection(conn)
 
+@shared_cached
 def get_latest_macro_data_for_maps(site_name=None):
     """
     Fetch latest macroinvertebrate survey data per site using window functions.
@@ -292,7 +297,7 @@ def get_latest_macro_data_for_maps(site_name=None):
             else:
                 logger.warning("No macro data found in the database")
         else: 
-            logger.info(f"Retrieved latest macro data for {len(macro_df)} sites")
+            logger.info(f"Retrieved latest macro data for {len(macro_df)} sites", extra=sampled())
     
         return macro_df
     except sqlite3.Error as e:
@@ -305,6 +310,7 @@ def get_latest_macro_data_for_maps(site_name=None):
         if conn:
             close_connection(conn)
 
+@shared_cached
 def get_latest_habitat_data_for_maps(site_name=None):
     """
     Fetch latest habitat assessment data per site using window functions.
@@ -357,7 +363,7 @@ def get_latest_habitat_data_for_maps(site_name=None):
             else:
                 logger.warning("No habitat data found in the database")
         else: 
-            logger.info(f"Retrieved latest habitat data for {len(habitat_df)} sites")
+            logger.info(f"Retrieved latest habitat data for {len(habitat_df)} sites", extra=sampled())
 
         return habitat_df
     except sqlite3.Error as e:
@@ -22,7 +22,7 @@ import pandas as pd
 import plotly.graph_objects as go
 
 from database.database import close_connection, get_connection
-from utils import setup_logging
+from utils import sampled, setup_logging
 from visualizations.map_queries import (
     get_latest_chemical_data_for_maps,
     get_latest_fish_data_for_maps,
@@ -236,7 +236,7 @@ def get_latest_data_by_type(data_type):
         logger.warning(f"No {data_type} data found in database")
         return pd.DataFrame()
     
-    logger.info(f"Retrieved latest {data_type} data for {len(df)} sites")
+    logger.info(f"Retrieved latest {data_type} data for {len(df)} sites", extra=sampled())
     return df
 
 def get_status_color(data, data_type):
@@ -0,0 +1,161 @@
+"""
+Prerender every per-site chart and table into the figure cache.
+
+Run after reload_all_data or a sync so callbacks can serve site displays
+without querying the database. Sites are rendered in parallel across a
+process pool and the cache is published atomically under the new data version.
+CSV download artifacts are published for the same version unless they already exist.
+
+Usage: python -m visualizations.prerender [--workers N] [--reload]
+"""
+
+import argparse
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from callbacks.helper_functions import is_error_state
+from callbacks.tab_utilities import (
+    create_all_parameters_visualization,
+    create_biological_site_display,
+    create_habitat_display,
+    create_single_parameter_visualization,
+    filter_chemical_data,
+)
+from data_processing.chemical_utils import KEY_PARAMETERS, get_reference_values
+from data_processing.data_queries import get_chemical_data_from_db, get_chemical_date_range
+from data_processing.export_artifacts import publish_export_artifacts
+from database.database import get_data_version
+from database.request_context import data_request_context
+from utils import get_sites_with_data, setup_logging
+from visualizations.downsampling import point_budget
+from visualizations.figure_cache import (
+    FIGURE_CACHE_DIR,
+    get_cache_size,
+    publish_version,
+    write_entry,
+)
+
+logger = setup_logging("prerender", category="visualization")
+
+DATA_TYPES = ['chemical', 'fish', 'macro', 'habitat']
+
+# Chemical views are prerendered for the default filters: all years, all months, thresholds highlighted
+ALL_MONTHS = list(range(1, 13))
+
+def render_chemical_site(version_dir, site_name):
+    """Render every parameter view plus the all-parameters view for one site."""
+    df = get_chemical_data_from_db(site_name)
+    df = filter_chemical_data(df, list(get_chemical_date_range()), ALL_MONTHS)
+    reference_values = get_reference_values()
+
+    def count_points(parameters):
+        return max((int(df[p].notna().sum()) for p in parameters if p in df.columns), default=0)
+
+    written = []
+    for parameter in KEY_PARAMETERS:
+        graph, _, _ = create_single_parameter_visualization(df, parameter, reference_values, True, site_name)
+        if not is_error_state(graph):
+            entry = {'content': graph, 'points': count_points([parameter]), 'render_budget': point_budget(None)}
+            written.append(write_entry(version_dir, 'chemical', (site_name, parameter), entry))
+
+    graph, _, _ = create_all_parameters_visualization(df, KEY_PARAMETERS, reference_values, True, site_name)
+    if not is_error_state(graph):
+        entry = {'content': graph, 'points': count_points(KEY_PARAMETERS),
+                 'render_budget': point_budget(None, columns=2)}
+        written.append(write_entry(version_dir, 'chemical', (site_name, 'all_parameters'), entry))
+
+    return written
+
+def render_site(version_dir, data_type, site_name):
+    """Render and write all cache entries for one site. Runs in a worker process."""
+    with data_request_context():
+        if data_type == 'chemical':
+            written = render_chemical_site(version_dir, site_name)
+        else:
+            if data_type == 'habitat':
+                content = create_habitat_display(site_name)
+            else:
+                content = create_biological_site_display(data_type, site_name)
+            written = [] if is_error_state(content) else [
+                write_entry(version_dir, data_type, (site_name,), {'content': content})
+            ]
+
+    return data_type, site_name, written
+
+def prerender_all(workers=None, cache_dir=FIGURE_CACHE_DIR):
+    """
+    Render every site display for the current data version into the figure cache.
+
+    Returns a summary with entry counts, cache size and elapsed time.
+    """
+    data_version = get_data_version()
+    if data_version is None:
+        raise FileNotFoundError("No database found to prerender from")
+
+    start_time = time.perf_counter()
+    os.makedirs(cache_dir, exist_ok=True)
+    staging_dir = os.path.join(cache_dir, f".staging-{data_version}-{os.getpid()}")
+
+    tasks = [(data_type, site) for data_type in DATA_TYPES for site in get_sites_with_data(data_type)]
+    logger.info(f"Prerendering {len(tasks)} site displays for data version {data_version}")
+
+    entries = {data_type: 0 for data_type in DATA_TYPES}
+    failures = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(render_site, staging_dir, data_type, site): (data_type, site)
+                for data_type, site in tasks
+            }
+            for future in as_completed(futures):
+                data_type, site = futures[future]
+                try:
+                    _, _, written = future.result()
+                    entries[data_type] += len(written)
+                except Exception as e:
+                    logger.error(f"Error prerendering {data_type} display for {site}: {e}")
+                    failures.append(f"{data_type}:{site}")
+
+        elapsed = time.perf_counter() - start_time
+        manifest = {
+            'data_version': data_version,
+            'entries': entries,
+            'failures': failures,
+            'render_seconds': round(elapsed, 2),
+        }
+        version_dir = publish_version(staging_dir, data_version, manifest, cache_dir)
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    summary = dict(manifest, cache_bytes=get_cache_size(version_dir), cache_dir=version_dir)
+    logger.info(
+        f"Prerendered {sum(entries.values())} entries in {summary['render_seconds']:.1f}s "
+        f"({summary['cache_bytes'] / 1024:.0f} KB)"
+    )
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prerender per-site charts and tables into the figure cache.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--reload', action='store_true', help="Run reload_all_data before prerendering")
+    args = parser.parse_args()
+
+    if args.reload:
+        from database.reset_database import reload_all_data
+        if not reload_all_data():
+            raise SystemExit("Data reload failed. Check the logs for details.")
+
+    summary = prerender_all(workers=args.workers)
+    export_dir, _ = publish_export_artifacts()
+
+    print(f"Data version: {summary['data_version']}")
+    for data_type, count in summary['entries'].items():
+        print(f"  {data_type:<10} {count:>6,} entries")
+    print(f"Prerender time: {summary['render_seconds']:.1f} s")
+    print(f"Cache size: {summary['cache_bytes'] / 1024:,.0f} KB in {summary['cache_dir']}")
+    print(f"Export artifacts in {export_dir}")
+    if summary['failures']:
+        print(f"Failed: {', '.join(summary['failures'])}")
@@ -243,6 +243,76 @@ def calculate_dynamic_y_range(df, column='comparison_to_reference'):
         else:
             return 0, 1.1
 
+# Metric Table Engine
+
+def label_collection_columns(df, differentiate_habitat=False):
+    """
+    Assign a table column name to each collection event in year order.
+    
+    Later samples in the same year are marked "(REP)" using groupby().cumcount().
+    With habitat differentiation, replicates are counted per habitat and years with
+    several habitats get Year-R/V/W suffixes.
+    """
+    collections = df.drop_duplicates(subset=['event_id']).copy()
+    collections['collection_date'] = pd.to_datetime(collections['collection_date'])
+    collections = collections.sort_values(['year', 'collection_date'], kind='stable')
+    
+    labels = collections['year'].astype(str)
+    
+    if differentiate_habitat:
+        if 'habitat' not in collections.columns:
+            collections['habitat'] = 'Unknown'
+        replicate_index = collections.groupby(['year', 'habitat'], dropna=False).cumcount()
+        
+        multiple_habitats = collections.groupby('year')['habitat'].transform('nunique') > 1
+        habitat_abbrev = collections['habitat'].str[0].fillna('U')
+        labels = labels.where(~multiple_habitats, labels + '-' + habitat_abbrev)
+    else:
+        replicate_index = collections.groupby('year').cumcount()
+    
+    collections['is_replicate'] = replicate_index > 0
+    collections['column_name'] = labels.where(~collections['is_replicate'], labels + ' (REP)')
+    
+    # Originals first, then replicates, within each year
+    return collections.sort_values(['year', 'is_replicate'], kind='stable')
+
+def pivot_metric_grid(metrics_df, key_column, keys, metric_order, value_column, format_value):
+    """
+    Pivot long metric rows into formatted score lists, one per key, in metric_order.
+    
+    Uses the first row for each key and metric, so one pivot replaces a filter per cell.
+    """
+    if value_column not in metrics_df.columns:
+        logger.warning(f"No {value_column} column found for metrics")
+        return [['-'] * len(metric_order) for _ in keys]
+    
+    first_rows = metrics_df.drop_duplicates(subset=[key_column, 'metric_name'])
+    grid = first_rows.pivot(index='metric_name', columns=key_column, values=value_column)
+    grid = grid.reindex(index=metric_order, columns=keys)
+    
+    return [[format_value(value) for value in grid[key].tolist()] for key in keys]
+
+def first_rows_by_key(df, key_column, keys):
+    """Return the first row for each key as dicts aligned with keys; missing keys give NaN values."""
+    first_rows = df.drop_duplicates(subset=[key_column]).set_index(key_column).reindex(keys)
+    return first_rows.to_dict('records')
+
+def format_integer_score(value):
+    """Format a metric score as an integer, or '-' when missing or invalid."""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return '-'
+
+def format_rounded_score(value):
+    """Format a metric score with one decimal place only when it is fractional."""
+    try:
+        if isinstance(value, float) and value != int(value):
+            return round(value, 1)
+        return int(value)
+    except (ValueError, TypeError):
+        return '-'
+
 def format_metrics_table(metrics_df, summary_df, metric_order, summary_labels=None, season=None):
     """
     Format metrics into standardized table with seasonal filtering and appropriate precision.
@@ -260,36 +330,13 @@ def format_metrics_table(metrics_df, summary_df, metric_order, summary_labels=No
         years = sorted(metrics_df['year'].unique()) if not metrics_df.empty else []
         
         # Metrics table construction
-        table_data = {'Metric': metric_order}
+        value_column = 'metric_score' if 'metric_score' in metrics_df.columns else 'score'
+        year_scores = pivot_metric_grid(
+            metrics_df, 'year', years, metric_order, value_column, format_rounded_score
+        )
         
-        for year in years:
-            year_metrics = metrics_df[metrics_df['year'] == year]
-            scores = []
-            
-            for metric in metric_order:
-                metric_row = year_metrics[year_metrics['metric_name'] == metric]
-                if not metric_row.empty:
-                    try:
-                        if 'metric_score' in metric_row.columns:
-                            score_value = metric_row['metric_score'].values[0]
-                        elif 'score' in metric_row.columns:
-                            score_value = metric_row['score'].values[0]
-                        else:
-                            logger.warning(f"No score column found for metric {metric}")
-                            scores.append('-')
-                            continue
-                        
-                        # Precision formatting based on value type
-                        if isinstance(score_value, float) and score_value != int(score_value):
-                            scores.append(round(score_value, 1))
-                        else:
-                            scores.append(int(score_value))
-                    except (ValueError, TypeError) as e:
-                        logger.warning(f"Could not convert metric score to number: {score_value}, error: {e}")
-                        scores.append('-')
-                else:
-                    scores.append('-')
-            
+        table_data = {'Metric': metric_order}
+        for year, scores in zip(years, year_scores):
             table_data[str(year)] = scores
         
         metrics_table = pd.DataFrame(table_data)
@@ -297,46 +344,48 @@ def format_metrics_table(metrics_df, summary_df, metric_order, summary_labels=No
         # Summary rows construction
         default_summary_labels = ['Total Score', 'Comparison to Reference', 'Condition']
         summary_labels = summary_labels or default_summary_labels
-        summary_rows = pd.DataFrame({'Metric': summary_labels})
-        
-        for year in years:
-            year_summary = summary_df[summary_df['year'] == year]
-            if not year_summary.empty:
-                try:
-                    total_score = int(year_summary['total_score'].values[0])
-                    summary_data = [total_score]
-                    
-                    if 'comparison_to_reference' in year_summary.columns:
-                        comparison = f"{year_summary['comparison_to_reference'].values[0]:.2f}"
-                        summary_data.append(comparison)
-                        
-                        condition = 'Unknown'
-                        if 'biological_condition' in year_summary.columns:
-                            condition = year_summary['biological_condition'].values[0]
-                        elif 'integrity_class' in year_summary.columns:
-                            condition = year_summary['integrity_class'].values[0]
-                        summary_data.append(condition)
-                    
-                    elif 'habitat_grade' in year_summary.columns:
-                        habitat_grade = year_summary['habitat_grade'].values[0]
-                        summary_data.append(habitat_grade)
-                    
-                    while len(summary_data) < len(summary_labels):
-                        summary_data.append('-')
-                    
-                    summary_rows[str(year)] = summary_data
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"Error processing summary data for year {year}: {e}")
-                    summary_rows[str(year)] = ['-'] * len(summary_labels)
-            else:
-                summary_rows[str(year)] = ['-'] * len(summary_labels)
+        summary_data = {'Metric': summary_labels}
+        
+        year_summaries = first_rows_by_key(summary_df, 'year', years)
+        for year, row in zip(years, year_summaries):
+            summary_data[str(year)] = _format_year_summary(row, summary_df.columns, summary_labels, year)
         
-        return metrics_table, summary_rows
+        return metrics_table, pd.DataFrame(summary_data)
     
     except Exception as e:
         logger.error(f"Error formatting metrics table: {e}")
         return pd.DataFrame({'Metric': metric_order}), pd.DataFrame({'Metric': ['Error']})
 
+def _format_year_summary(row, columns, summary_labels, year):
+    """Format one year's summary scores, padding to the label count."""
+    try:
+        summary_data = [int(row['total_score'])]
+        
+        if 'comparison_to_reference' in columns:
+            summary_data.append(f"{row['comparison_to_reference']:.2f}")
+            
+            condition = 'Unknown'
+            if 'biological_condition' in columns:
+                condition = row['biological_condition']
+            elif 'integrity_class' in columns:
+                condition = row['integrity_class']
+            summary_data.append(condition)
+        
+        elif 'habitat_grade' in columns:
+            summary_data.append(row['habitat_grade'])
+        
+        while len(summary_data) < len(summary_labels):
+            summary_data.append('-')
+        
+        if len(summary_data) > len(summary_labels):
+            raise ValueError("More summary values than labels")
+        
+        return summary_data
+    except (ValueError, TypeError) as e:
+        if not pd.isna(row.get('total_score')):
+            logger.warning(f"Error processing summary data for year {year}: {e}")
+        return ['-'] * len(summary_labels)
+
 # Table & UI Components
 
 def create_table_styles(metrics_table):